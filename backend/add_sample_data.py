@@ -1,5 +1,6 @@
 from app.database import SessionLocal
 from app.models import Outbreak, Vaccination
+from app.rollups import rebuild_rollups
 from datetime import datetime
 
 def add_sample_data():
@@ -76,6 +77,7 @@ def add_sample_data():
                 db.add(vaccination)
         
         db.commit()
+        rebuild_rollups(db)
         print("Sample data added successfully")
         
     finally:
@@ -0,0 +1,122 @@
+"""Initial schema
+
+Creates the tables that used to come from ``Base.metadata.create_all``. Tables
+that already exist (databases created before migrations were introduced) are
+left alone, so this revision can be applied to those as well.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String()),
+            sa.Column("username", sa.String()),
+            sa.Column("hashed_password", sa.String()),
+            sa.Column("full_name", sa.String()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("role", sa.String()),
+            sa.Column("state", sa.String()),
+            sa.Column("district", sa.String()),
+            sa.Column("latitude", sa.Float()),
+            sa.Column("longitude", sa.Float()),
+            sa.Column("notifications", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+    else:
+        # Older databases still have the column under its previous name
+        columns = {column["name"] for column in inspector.get_columns("users")}
+        if "notifications" not in columns:
+            with op.batch_alter_table("users") as batch:
+                if "weekly_notifications" in columns:
+                    batch.alter_column("weekly_notifications", new_column_name="notifications")
+                else:
+                    batch.add_column(sa.Column("notifications", sa.Boolean(), server_default=sa.false()))
+
+    if not inspector.has_table("outbreaks"):
+        op.create_table(
+            "outbreaks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("outbreak_id", sa.String()),
+            sa.Column("disease", sa.String()),
+            sa.Column("report_date", sa.DateTime()),
+            sa.Column("country", sa.String()),
+            sa.Column("state", sa.String()),
+            sa.Column("district", sa.String()),
+            sa.Column("cases_reported", sa.Integer()),
+            sa.Column("deaths", sa.Integer()),
+            sa.Column("severity", sa.String()),
+            sa.Column("confirmed", sa.Boolean()),
+            sa.Column("source_url", sa.String()),
+            sa.Column("notes", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_outbreaks_id", "outbreaks", ["id"])
+        op.create_index("ix_outbreaks_outbreak_id", "outbreaks", ["outbreak_id"], unique=True)
+        op.create_index("ix_outbreaks_disease", "outbreaks", ["disease"])
+        op.create_index("ix_outbreaks_state", "outbreaks", ["state"])
+        op.create_index("ix_outbreaks_district", "outbreaks", ["district"])
+
+    if not inspector.has_table("vaccinations"):
+        op.create_table(
+            "vaccinations",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.String()),
+            sa.Column("country", sa.String()),
+            sa.Column("state", sa.String()),
+            sa.Column("district", sa.String()),
+            sa.Column("start_date", sa.DateTime()),
+            sa.Column("end_date", sa.DateTime()),
+            sa.Column("vaccine_name", sa.String()),
+            sa.Column("target_population", sa.String()),
+            sa.Column("doses_allocated", sa.Integer()),
+            sa.Column("doses_administered", sa.Integer()),
+            sa.Column("partner_org", sa.String()),
+            sa.Column("notes", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_vaccinations_id", "vaccinations", ["id"])
+        op.create_index("ix_vaccinations_campaign_id", "vaccinations", ["campaign_id"], unique=True)
+        op.create_index("ix_vaccinations_state", "vaccinations", ["state"])
+        op.create_index("ix_vaccinations_district", "vaccinations", ["district"])
+        op.create_index("ix_vaccinations_vaccine_name", "vaccinations", ["vaccine_name"])
+
+    if not inspector.has_table("chat_messages"):
+        op.create_table(
+            "chat_messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("message", sa.Text()),
+            sa.Column("response", sa.Text()),
+            sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_chat_messages_id", "chat_messages", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("chat_messages")
+    op.drop_table("vaccinations")
+    op.drop_table("outbreaks")
+    op.drop_table("users")
@@ -0,0 +1,46 @@
+"""Indexes for hot query paths
+
+Composite indexes for the location filters used by the health listings,
+alerts, notification fan-out, admin user listing and chat history. Built with
+CREATE INDEX CONCURRENTLY on PostgreSQL so large tables stay writable.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from app.migrations import batched_update, create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_users_state_district", "users", ["state", "district"]),
+    ("ix_users_notifications_location", "users", ["notifications", "state", "district"]),
+    ("ix_users_role", "users", ["role"]),
+    ("ix_outbreaks_state_district", "outbreaks", ["state", "district"]),
+    ("ix_outbreaks_location_severity", "outbreaks", ["state", "district", "severity"]),
+    ("ix_outbreaks_report_date", "outbreaks", ["report_date"]),
+    ("ix_vaccinations_state_district", "vaccinations", ["state", "district"]),
+    ("ix_chat_messages_user_timestamp", "chat_messages", ["user_id", "timestamp"]),
+]
+
+
+def upgrade() -> None:
+    # Users created before the notifications column existed have NULL there;
+    # make them explicit so the fan-out index sees every row.
+    batched_update("users", "notifications = false", "notifications IS NULL")
+
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        drop_index_online(name, table)
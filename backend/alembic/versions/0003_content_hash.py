@@ -0,0 +1,44 @@
+"""Content hash for idempotent feed upserts
+
+Adds ``content_hash`` to outbreaks and vaccinations so re-imported rows are
+only rewritten when their content changed, and backfills it for existing rows.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.ingest import FEEDS, content_hash
+from app.migrations import batched_backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, feed in FEEDS.items():
+        if "content_hash" not in {column["name"] for column in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column("content_hash", sa.String(32)))
+        fields = feed.hash_fields
+        model_table = feed.model.__table__
+        batched_backfill(
+            model_table, fields, "content_hash",
+            lambda row, fields=fields: content_hash(row, fields),
+            where=model_table.c.content_hash.is_(None),
+        )
+
+
+def downgrade() -> None:
+    for table in FEEDS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("content_hash")
@@ -0,0 +1,36 @@
+"""Digest preferences on users
+
+Adds ``digest_frequency`` (none, daily, weekly) and ``whatsapp_number`` to
+users, and the index the digest engine uses to group subscribers by location.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("digest_frequency", sa.String(), server_default="none"))
+    op.add_column("users", sa.Column("whatsapp_number", sa.String()))
+    create_index_online("ix_users_digest_location", "users", ["digest_frequency", "state", "district"])
+
+
+def downgrade() -> None:
+    drop_index_online("ix_users_digest_location", "users")
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("whatsapp_number")
+        batch_op.drop_column("digest_frequency")
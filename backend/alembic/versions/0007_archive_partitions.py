@@ -0,0 +1,41 @@
+"""Monthly archive partitions for outbreaks and chat messages
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Range-partitioned parents for rows moved out of the hot tables by
+# app/archive.py, which creates one partition per month on demand. SQLite has
+# no partitioning; there the monthly tables stand on their own, so nothing is
+# created up front. The primary keys include the partition key, as PostgreSQL
+# requires.
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE TABLE outbreaks_archive (LIKE outbreaks, PRIMARY KEY (id, report_date)) PARTITION BY RANGE (report_date)")
+    op.execute("CREATE INDEX ix_outbreaks_archive_state_district ON outbreaks_archive (state, district)")
+    op.execute(
+        'CREATE TABLE chat_messages_archive (LIKE chat_messages, PRIMARY KEY (id, "timestamp")) '
+        'PARTITION BY RANGE ("timestamp")'
+    )
+    op.execute('CREATE INDEX ix_chat_messages_archive_user_timestamp ON chat_messages_archive (user_id, "timestamp")')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TABLE chat_messages_archive")
+    op.execute("DROP TABLE outbreaks_archive")
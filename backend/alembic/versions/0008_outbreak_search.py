@@ -0,0 +1,77 @@
+"""Full-text search index over outbreaks
+
+PostgreSQL gets a GIN index on a weighted tsvector of disease, district,
+state and notes (the expression must match SEARCH_DOCUMENT in
+app/search.py). SQLite gets an FTS5 table over the same columns, kept in sync
+with outbreaks by triggers, plus an fts5vocab view of its terms.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+
+"""
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(disease, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(district, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(state, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(notes, '')), 'D')"
+)
+
+# unicode61 splits words at combining marks, which breaks up Devanagari and
+# Tamil words; keep the Indic vowel signs and viramas inside tokens
+INDIC_MARKS = "".join(chr(c) for c in range(0x0900, 0x0E00) if unicodedata.category(chr(c)).startswith("M"))
+
+COLUMNS = "disease, notes, district, state"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        create_index_online("ix_outbreaks_search", "outbreaks", [sa.text(f"({SEARCH_DOCUMENT})")], postgresql_using="gin")
+        return
+    op.execute(
+        f"CREATE VIRTUAL TABLE outbreaks_fts USING fts5({COLUMNS}, content='outbreaks', content_rowid='id', "
+        f"tokenize=\"unicode61 remove_diacritics 2 tokenchars '{INDIC_MARKS}'\", prefix='2 3')"
+    )
+    op.execute("CREATE VIRTUAL TABLE outbreaks_fts_vocab USING fts5vocab(outbreaks_fts, row)")
+    op.execute(f"""
+        CREATE TRIGGER outbreaks_fts_insert AFTER INSERT ON outbreaks BEGIN
+            INSERT INTO outbreaks_fts(rowid, {COLUMNS}) VALUES (new.id, new.disease, new.notes, new.district, new.state);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER outbreaks_fts_delete AFTER DELETE ON outbreaks BEGIN
+            INSERT INTO outbreaks_fts(outbreaks_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, old.disease, old.notes, old.district, old.state);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER outbreaks_fts_update AFTER UPDATE OF {COLUMNS} ON outbreaks BEGIN
+            INSERT INTO outbreaks_fts(outbreaks_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, old.disease, old.notes, old.district, old.state);
+            INSERT INTO outbreaks_fts(rowid, {COLUMNS}) VALUES (new.id, new.disease, new.notes, new.district, new.state);
+        END
+    """)
+    op.execute("INSERT INTO outbreaks_fts(outbreaks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        drop_index_online("ix_outbreaks_search", "outbreaks")
+        return
+    for trigger in ("outbreaks_fts_update", "outbreaks_fts_delete", "outbreaks_fts_insert"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS outbreaks_fts_vocab")
+    op.execute("DROP TABLE IF EXISTS outbreaks_fts")
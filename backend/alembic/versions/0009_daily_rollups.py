@@ -0,0 +1,71 @@
+"""Daily rollups of outbreaks and vaccination campaigns
+
+Adds ``outbreak_daily_stats`` and ``vaccination_daily_stats`` (see
+app/rollups.py) and fills them from the rows currently in the hot tables.
+Rows already moved to archive tables are added by ``python
+rebuild_rollups.py``.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbreak_daily_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("district", sa.String(), nullable=False),
+        sa.Column("disease", sa.String(), nullable=False),
+        sa.Column("reports", sa.Integer(), nullable=False),
+        sa.Column("cases_reported", sa.Integer(), nullable=False),
+        sa.Column("deaths", sa.Integer(), nullable=False),
+    )
+    op.create_index("ux_outbreak_daily_stats_key", "outbreak_daily_stats", ["day", "state", "district", "disease"], unique=True)
+    op.create_index("ix_outbreak_daily_stats_location_day", "outbreak_daily_stats", ["state", "district", "day"])
+
+    op.create_table(
+        "vaccination_daily_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("district", sa.String(), nullable=False),
+        sa.Column("vaccine_name", sa.String(), nullable=False),
+        sa.Column("campaigns", sa.Integer(), nullable=False),
+        sa.Column("doses_allocated", sa.Integer(), nullable=False),
+        sa.Column("doses_administered", sa.Integer(), nullable=False),
+    )
+    op.create_index("ux_vaccination_daily_stats_key", "vaccination_daily_stats", ["day", "state", "district", "vaccine_name"], unique=True)
+    op.create_index("ix_vaccination_daily_stats_location_day", "vaccination_daily_stats", ["state", "district", "day"])
+
+    for target, counter, source, date_column, key, measures in (
+        ("outbreak_daily_stats", "reports", "outbreaks", "report_date", "disease", ("cases_reported", "deaths")),
+        ("vaccination_daily_stats", "campaigns", "vaccinations", "start_date", "vaccine_name", ("doses_allocated", "doses_administered")),
+    ):
+        keys = f"CAST({date_column} AS DATE), COALESCE(state, ''), COALESCE(district, ''), COALESCE({key}, '')"
+        if op.get_bind().dialect.name == "sqlite":
+            keys = keys.replace(f"CAST({date_column} AS DATE)", f"date({date_column})")
+        sums = ", ".join(f"COALESCE(SUM({measure}), 0)" for measure in measures)
+        op.execute(
+            f"INSERT INTO {target} (day, state, district, {key}, {counter}, {', '.join(measures)}) "
+            f"SELECT {keys}, COUNT(*), {sums} FROM {source} WHERE {date_column} IS NOT NULL GROUP BY {keys}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("vaccination_daily_stats")
+    op.drop_table("outbreak_daily_stats")
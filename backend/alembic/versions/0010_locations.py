@@ -0,0 +1,110 @@
+"""Location dimension
+
+Adds ``locations`` and ``location_aliases`` (see app/locations.py) and a
+``location_id`` foreign key on users, outbreaks and vaccinations. Existing
+rows are located and respelled canonically, then the text indexes on state
+and district are replaced by indexes on ``location_id``.
+
+On SQLite the column is added with a plain ALTER TABLE rather than a batch
+table copy, which would drop the outbreaks full-text triggers (0008).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.locations import backfill_locations
+from app.migrations import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOCATED_TABLES = ("users", "outbreaks", "vaccinations")
+
+TEXT_INDEXES = [
+    ("ix_users_state_district", "users", ["state", "district"]),
+    ("ix_users_notifications_location", "users", ["notifications", "state", "district"]),
+    ("ix_users_digest_location", "users", ["digest_frequency", "state", "district"]),
+    ("ix_outbreaks_state", "outbreaks", ["state"]),
+    ("ix_outbreaks_district", "outbreaks", ["district"]),
+    ("ix_outbreaks_state_district", "outbreaks", ["state", "district"]),
+    ("ix_outbreaks_location_severity", "outbreaks", ["state", "district", "severity"]),
+    ("ix_vaccinations_state", "vaccinations", ["state"]),
+    ("ix_vaccinations_district", "vaccinations", ["district"]),
+    ("ix_vaccinations_state_district", "vaccinations", ["state", "district"]),
+]
+
+LOCATION_INDEXES = [
+    ("ix_users_location", "users", ["location_id"]),
+    ("ix_users_notifications_location_id", "users", ["notifications", "location_id"]),
+    ("ix_users_digest_location_id", "users", ["digest_frequency", "location_id"]),
+    ("ix_outbreaks_location", "outbreaks", ["location_id"]),
+    ("ix_outbreaks_location_id_severity", "outbreaks", ["location_id", "severity"]),
+    ("ix_vaccinations_location", "vaccinations", ["location_id"]),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.create_table(
+        "locations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("district", sa.String(), nullable=False),
+        sa.Column("state_key", sa.String(), nullable=False),
+        sa.Column("district_key", sa.String(), nullable=False),
+    )
+    op.create_index("ux_locations_key", "locations", ["state_key", "district_key"], unique=True)
+    op.create_table(
+        "location_aliases",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("state_key", sa.String(), nullable=False),
+        sa.Column("district_key", sa.String(), nullable=False),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+    )
+    op.create_index("ux_location_aliases_key", "location_aliases", ["state_key", "district_key"], unique=True)
+
+    for table in LOCATED_TABLES:
+        if bind.dialect.name == "sqlite":
+            op.execute(f"ALTER TABLE {table} ADD COLUMN location_id INTEGER REFERENCES locations (id)")
+        else:
+            op.add_column(table, sa.Column("location_id", sa.Integer()))
+            op.create_foreign_key(f"{table}_location_id_fkey", table, "locations", ["location_id"], ["id"])
+    if bind.dialect.name == "postgresql":
+        # Archived outbreaks keep their location too (app/archive.py copies shared columns)
+        op.execute("ALTER TABLE outbreaks_archive ADD COLUMN location_id INTEGER")
+
+    backfill_locations(Session(bind=bind))
+
+    for name, table, _ in TEXT_INDEXES:
+        drop_index_online(name, table)
+    for name, table, columns in LOCATION_INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for name, table, _ in reversed(LOCATION_INDEXES):
+        drop_index_online(name, table)
+    for name, table, columns in TEXT_INDEXES:
+        create_index_online(name, table, columns)
+
+    if bind.dialect.name == "postgresql":
+        op.execute("ALTER TABLE outbreaks_archive DROP COLUMN location_id")
+    for table in LOCATED_TABLES:
+        # Plain DROP COLUMN on SQLite too (3.35+), for the same reason as above
+        if bind.dialect.name != "sqlite":
+            op.drop_constraint(f"{table}_location_id_fkey", table, type_="foreignkey")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN location_id")
+    op.drop_table("location_aliases")
+    op.drop_table("locations")
@@ -0,0 +1,44 @@
+"""Change log
+
+Adds ``change_log`` (see app/changefeed.py), the append-only log behind the
+change feed. It starts empty: consumers load the listings once and follow the
+feed from there.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_log",
+        sa.Column("seq", sa.Integer(), primary_key=True),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("record_key", sa.String()),
+        sa.Column("data", sa.Text()),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_change_log_table_seq", "change_log", ["table_name", "seq"])
+    op.create_index("ix_change_log_changed_at", "change_log", ["changed_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_change_log_changed_at", table_name="change_log")
+    op.drop_index("ix_change_log_table_seq", table_name="change_log")
+    op.drop_table("change_log")
@@ -0,0 +1,87 @@
+"""Daily rollups keyed by location
+
+Replaces the ``state``/``district`` text in ``outbreak_daily_stats`` and
+``vaccination_daily_stats`` with ``location_id`` (see app/rollups.py), so
+merging two spellings of a location no longer rewrites rollup groups by name.
+The rollups are small: existing groups are read, located through
+app/locations.py (groups whose names now share a location are summed) and
+written back into the recreated tables.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.locations import resolve_locations
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_TABLES = [
+    ("outbreak_daily_stats", "disease", ("reports", "cases_reported", "deaths")),
+    ("vaccination_daily_stats", "vaccine_name", ("campaigns", "doses_allocated", "doses_administered")),
+]
+
+
+def _create(table: str, key: str, counters, located: bool):
+    if located:
+        location_columns = [sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False)]
+        group = ["location_id"]
+    else:
+        location_columns = [sa.Column("state", sa.String(), nullable=False), sa.Column("district", sa.String(), nullable=False)]
+        group = ["state", "district"]
+    op.create_table(
+        table,
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        *location_columns,
+        sa.Column(key, sa.String(), nullable=False),
+        *[sa.Column(counter, sa.Integer(), nullable=False) for counter in counters],
+    )
+    op.create_index(f"ux_{table}_key", table, ["day", *group, key], unique=True)
+    op.create_index(f"ix_{table}_location_day", table, [*group, "day"])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table, key, counters in ROLLUP_TABLES:
+        rows = bind.execute(sa.text(f"SELECT day, state, district, {key}, {', '.join(counters)} FROM {table}")).all()
+        refs = resolve_locations(Session(bind=bind), {(row[1], row[2]) for row in rows})
+        merged = {}
+        for row in rows:
+            ref = refs.get((row[1], row[2]))
+            if ref is None:
+                continue  # no state or district: not a location
+            totals = merged.setdefault((row[0], ref.id, row[3]), [0] * len(counters))
+            for i, value in enumerate(row[4:]):
+                totals[i] += value
+        op.drop_table(table)
+        _create(table, key, counters, located=True)
+        if merged:
+            columns = ["day", "location_id", key, *counters]
+            op.bulk_insert(sa.table(table, *[sa.column(name) for name in columns]),
+                           [dict(zip(columns, group + tuple(totals))) for group, totals in merged.items()])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table, key, counters in ROLLUP_TABLES:
+        rows = bind.execute(sa.text(
+            f"SELECT r.day, l.state, l.district, r.{key}, {', '.join('r.' + counter for counter in counters)} "
+            f"FROM {table} r JOIN locations l ON l.id = r.location_id"
+        )).all()
+        op.drop_table(table)
+        _create(table, key, counters, located=False)
+        if rows:
+            columns = ["day", "state", "district", key, *counters]
+            op.bulk_insert(sa.table(table, *[sa.column(name) for name in columns]), [dict(zip(columns, row)) for row in rows])
@@ -0,0 +1,49 @@
+"""Index archived outbreaks on outbreak_id
+
+Imports look up re-sent outbreaks in the archive month of their report date
+(``archived_keys`` in app/archive.py); without an index on ``outbreak_id``
+each lookup scanned the whole partition. On PostgreSQL the index is created
+on the partitioned parent, which adds it to every existing and future
+partition. SQLite months are separate tables: the existing ones are indexed
+here, new ones by ``ensure_partition``.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.orm import Session
+
+from app.archive import ARCHIVED_TABLES, archive_partitions, index_partition
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE INDEX ix_outbreaks_archive_outbreak_id ON outbreaks_archive (outbreak_id)")
+        return
+    db = Session(bind=bind)
+    spec = ARCHIVED_TABLES["outbreaks"]
+    for name in archive_partitions(db, spec).values():
+        index_partition(db, spec, name)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_outbreaks_archive_outbreak_id")
+        return
+    db = Session(bind=bind)
+    spec = ARCHIVED_TABLES["outbreaks"]
+    for name in archive_partitions(db, spec).values():
+        op.execute(f'DROP INDEX IF EXISTS "ix_{name}_{spec.key}"')
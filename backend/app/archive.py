@@ -0,0 +1,304 @@
+"""
+Retention for the time-ordered tables, ``outbreaks`` and ``chat_messages``.
+
+Rows older than a table's hot window are moved out of the hot table into
+monthly archive partitions, so the hot tables and their indexes hold only the
+recent data that queries touch. On PostgreSQL the partitions belong to a
+range-partitioned parent (``outbreaks_archive``, created by migration 0007);
+on SQLite each month is a plain table with the same name
+(``outbreaks_archive_202406``). Months older than ``ARCHIVE_KEEP_MONTHS`` are
+then written to gzip-compressed NDJSON files under ``ARCHIVE_DIR`` and their
+partition is dropped.
+
+Rows move in batches of ``ARCHIVE_BATCH_SIZE``, each copied and deleted in one
+short transaction, so a run can be interrupted and picked up again. Columns
+are copied by name; a column added to a hot table later is simply not
+archived until it is added to the archive parent as well.
+
+Each run also prunes the change log (app/changefeed.py) past its retention.
+
+The hot tables keep their unique keys (``outbreak_id`` upserts rely on them),
+which is why they are not partitioned themselves. Archived keys are no longer
+in those unique indexes, so imports ask ``archived_keys`` about rows dated
+before the hot window and leave the archived ones alone.
+"""
+import gzip
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import bindparam, delete, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from .changefeed import log_archived, prune_change_log
+from .database import SessionLocal
+from .events import publish_change
+from .jobs import enqueue, job_handler, prune_jobs
+from .models import ChatMessage, Outbreak
+from .serialization import iter_ndjson
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BACKEND_DIR, "archive"))
+# Rows older than this many days leave the hot tables
+OUTBREAK_HOT_DAYS = int(os.getenv("OUTBREAK_HOT_DAYS", "365"))
+CHAT_HOT_DAYS = int(os.getenv("CHAT_HOT_DAYS", "180"))
+# Archived months kept in the database before moving to compressed files (0 = keep all)
+ARCHIVE_KEEP_MONTHS = int(os.getenv("ARCHIVE_KEEP_MONTHS", "24"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+# Queue a daily archive run from the background scheduler, at this hour (UTC)
+ARCHIVE_SCHEDULE = os.getenv("ARCHIVE_SCHEDULE", "false").lower() in ("1", "true", "yes", "on")
+ARCHIVE_HOUR = int(os.getenv("ARCHIVE_HOUR", "3"))
+
+ARCHIVE_TABLE_RE = re.compile(r"^(outbreaks|chat_messages)_archive(?:_(\d{4})(\d{2}))?$")
+
+
+@dataclass(frozen=True)
+class ArchivedTable:
+    name: str
+    model: type
+    time_column: str
+    hot_days: int
+    # Natural key that imports look archived rows up by, indexed on every partition
+    key: Optional[str] = None
+
+    @property
+    def parent(self) -> str:
+        return f"{self.name}_archive"
+
+
+ARCHIVED_TABLES = {
+    "outbreaks": ArchivedTable("outbreaks", Outbreak, "report_date", OUTBREAK_HOT_DAYS, key="outbreak_id"),
+    "chat_messages": ArchivedTable("chat_messages", ChatMessage, "timestamp", CHAT_HOT_DAYS),
+}
+
+
+def is_archive_table(name: str) -> bool:
+    """Archive parents and monthly tables, which live outside the ORM metadata."""
+    return ARCHIVE_TABLE_RE.match(name) is not None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(spec: ArchivedTable, month: datetime) -> str:
+    return f"{spec.parent}_{month:%Y%m}"
+
+
+def _quote(db: Session, name: str) -> str:
+    return db.get_bind().dialect.identifier_preparer.quote(name)
+
+
+def archive_partitions(db: Session, spec: ArchivedTable) -> Dict[datetime, str]:
+    """Existing monthly archive tables of ``spec``, by month."""
+    partitions = {}
+    for name in inspect(db.connection()).get_table_names():
+        match = ARCHIVE_TABLE_RE.match(name)
+        if match and match.group(1) == spec.name and match.group(2):
+            partitions[datetime(int(match.group(2)), int(match.group(3)), 1)] = name
+    return partitions
+
+
+def ensure_partition(db: Session, spec: ArchivedTable, month: datetime) -> str:
+    name = partition_name(spec, month)
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_quote(db, name)} PARTITION OF {_quote(db, spec.parent)} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+        ))
+    else:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {_quote(db, name)} AS SELECT * FROM {_quote(db, spec.name)} WHERE 1 = 0"))
+        index_partition(db, spec, name)
+    return name
+
+
+def index_partition(db: Session, spec: ArchivedTable, name: str) -> None:
+    """Index a SQLite month on ``spec.key`` for ``archived_keys``; PostgreSQL partitions inherit the parent's index."""
+    if spec.key:
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS {_quote(db, f'ix_{name}_{spec.key}')} "
+                        f"ON {_quote(db, name)} ({_quote(db, spec.key)})"))
+
+
+def _shared_columns(db: Session, spec: ArchivedTable, archive_table: str) -> str:
+    archived = {column["name"] for column in inspect(db.connection()).get_columns(archive_table)}
+    return ", ".join(_quote(db, column.name) for column in spec.model.__table__.columns if column.name in archived)
+
+
+def move_cold_rows(db: Session, spec: ArchivedTable, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE,
+                   progress: Callable[[int, int], None] = None) -> Dict[str, int]:
+    """Move rows older than ``cutoff`` into their month's archive table; returns rows per month."""
+    model = spec.model
+    time_column = getattr(model, spec.time_column)
+    total = db.scalar(select(func.count()).select_from(model).where(time_column < cutoff)) or 0
+    moved: Dict[str, int] = {}
+    columns: Dict[str, str] = {}
+    done = 0
+    while done < total:
+        batch = db.execute(select(model.id, time_column).where(time_column < cutoff).order_by(model.id).limit(batch_size)).all()
+        if not batch:
+            break
+        by_month: Dict[datetime, List[int]] = {}
+        for row_id, when in batch:
+            by_month.setdefault(_month_start(when), []).append(row_id)
+        for month, ids in by_month.items():
+            target = ensure_partition(db, spec, month)
+            if target not in columns:
+                columns[target] = _shared_columns(db, spec, target)
+            copy = text(
+                f"INSERT INTO {_quote(db, target)} ({columns[target]}) "
+                f"SELECT {columns[target]} FROM {_quote(db, spec.name)} WHERE id IN :ids"
+            ).bindparams(bindparam("ids", expanding=True))
+            db.execute(copy, {"ids": ids})
+            log_archived(db, spec.name, ids)
+            db.execute(delete(model).where(model.id.in_(ids)))
+            moved[f"{month:%Y-%m}"] = moved.get(f"{month:%Y-%m}", 0) + len(ids)
+        db.commit()
+        done += len(batch)
+        if progress is not None:
+            progress(done, total)
+    return moved
+
+
+def _exported(spec: ArchivedTable, month: datetime) -> bool:
+    return os.path.exists(os.path.join(ARCHIVE_DIR, spec.name, f"{month:%Y-%m}.ndjson.gz"))
+
+
+def archived_keys(db: Session, spec: ArchivedTable, key: str, times: Dict[str, datetime], now: datetime = None) -> Set[str]:
+    """Keys of ``times`` (key -> row time) that belong to archived rows.
+
+    Only rows older than the hot window are looked up, in the archive table
+    of their month. Months already exported to files cannot be searched; all
+    their keys count as archived.
+    """
+    cutoff = (now or _utcnow()) - timedelta(days=spec.hot_days)
+    by_month: Dict[datetime, List[str]] = {}
+    for value, when in times.items():
+        if when is None:
+            continue
+        if when.tzinfo is not None:
+            when = when.astimezone(timezone.utc).replace(tzinfo=None)
+        if when < cutoff:
+            by_month.setdefault(_month_start(when), []).append(value)
+    if not by_month:
+        return set()
+    partitions = archive_partitions(db, spec)
+    found = set()
+    for month, values in by_month.items():
+        if month in partitions:
+            query = text(f"SELECT {_quote(db, key)} FROM {_quote(db, partitions[month])} WHERE {_quote(db, key)} IN :values")
+            query = query.bindparams(bindparam("values", expanding=True))
+            for start in range(0, len(values), 500):
+                found.update(row[0] for row in db.execute(query, {"values": values[start:start + 500]}))
+        elif _exported(spec, month):
+            found.update(values)
+    return found
+
+
+def export_partition(db: Session, spec: ArchivedTable, month: datetime, name: str, directory: str = None) -> dict:
+    """Write one archive month to ``<ARCHIVE_DIR>/<table>/<YYYY-MM>.ndjson.gz`` and drop it."""
+    directory = os.path.join(directory or ARCHIVE_DIR, spec.name)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{month:%Y-%m}.ndjson.gz")
+    if os.path.exists(path):
+        # Rows archived into an already exported month (late reports) get their own file
+        path = os.path.join(directory, f"{month:%Y-%m}.{_utcnow():%Y%m%dT%H%M%S}.ndjson.gz")
+
+    result = db.connection().execution_options(stream_results=True).execute(text(f"SELECT * FROM {_quote(db, name)} ORDER BY id"))
+    fields = list(result.keys())
+    counter = {"rows": 0}
+    partial = path + ".partial"
+    with gzip.open(partial, "wb") as handle:
+        for chunk in iter_ndjson(fields, _counted(result, counter)):
+            handle.write(chunk)
+    os.replace(partial, path)
+    db.execute(text(f"DROP TABLE {_quote(db, name)}"))
+    db.commit()
+    return {"month": f"{month:%Y-%m}", "rows": counter["rows"], "path": path, "bytes": os.path.getsize(path)}
+
+
+def _counted(rows, counter: dict):
+    for row in rows:
+        counter["rows"] += 1
+        yield row
+
+
+def run_archive(tables: List[str] = None, now: datetime = None, progress: Callable[[float, str], None] = None) -> dict:
+    """Move cold rows out of the hot tables and export months past ``ARCHIVE_KEEP_MONTHS``."""
+    now = now or _utcnow()
+    names = tables or list(ARCHIVED_TABLES)
+    summary = {}
+    db = SessionLocal()
+    try:
+        for position, table in enumerate(names):
+            spec = ARCHIVED_TABLES[table]
+            cutoff = now - timedelta(days=spec.hot_days)
+
+            def report(done, total, position=position, table=table):
+                if progress is not None:
+                    progress((position + (done / total if total else 1) * 0.9) / len(names), f"{table}: archived {done}/{total} rows")
+
+            moved = move_cold_rows(db, spec, cutoff, progress=report)
+            exported = []
+            if ARCHIVE_KEEP_MONTHS > 0:
+                keep_from = _month_start(now)
+                for _ in range(ARCHIVE_KEEP_MONTHS):
+                    keep_from = _month_start(keep_from - timedelta(days=1))
+                for month, name in sorted(archive_partitions(db, spec).items()):
+                    if month < keep_from:
+                        exported.append(export_partition(db, spec, month, name))
+            summary[table] = {"cutoff": cutoff.isoformat(), "moved": sum(moved.values()), "months": moved, "exported": exported}
+            if moved:
+                # No records: listeners only need to drop derived state, not fan out rows
+                publish_change(table, "archived")
+        summary["change_log"] = {"pruned": prune_change_log(db, now)}
+        summary["jobs"] = {"pruned": prune_jobs(db, now)}
+    finally:
+        db.close()
+    return summary
+
+
+def archive_status(db: Session) -> dict:
+    status = {}
+    for table, spec in ARCHIVED_TABLES.items():
+        time_column = getattr(spec.model, spec.time_column)
+        hot_rows, oldest = db.execute(select(func.count(), func.min(time_column)).select_from(spec.model)).one()
+        partitions = [
+            {"month": f"{month:%Y-%m}", "table": name, "rows": db.scalar(text(f"SELECT COUNT(*) FROM {_quote(db, name)}"))}
+            for month, name in sorted(archive_partitions(db, spec).items())
+        ]
+        directory = os.path.join(ARCHIVE_DIR, table)
+        files = [
+            {"file": name, "bytes": os.path.getsize(os.path.join(directory, name))}
+            for name in sorted(os.listdir(directory)) if name.endswith(".ndjson.gz")
+        ] if os.path.isdir(directory) else []
+        status[table] = {
+            "hot_days": spec.hot_days, "hot_rows": hot_rows, "oldest_hot": oldest.isoformat() if oldest else None,
+            "partitions": partitions, "files": files,
+        }
+    return status
+
+
+@job_handler("archive")
+def run_archive_job(ctx):
+    return run_archive(
+        ctx.params.get("tables"),
+        progress=lambda fraction, message: ctx.progress(fraction, message=message),
+    )
+
+
+def queue_due_archive(now: datetime = None) -> Optional[str]:
+    """Queue today's archive run once the hour is reached, unless some worker already did."""
+    now = now or _utcnow()
+    if not ARCHIVE_SCHEDULE or now.hour < ARCHIVE_HOUR:
+        return None
+    return enqueue("archive", {}, job_id=f"archive-{now:%Y%m%d}")
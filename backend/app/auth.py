@@ -12,6 +12,8 @@ import os
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Stream tickets travel in URLs (EventSource cannot set headers), so they only open the alert stream and expire fast
+STREAM_TICKET_EXPIRE_SECONDS = int(os.getenv("STREAM_TICKET_EXPIRE_SECONDS", "60"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -32,16 +34,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def create_stream_ticket(username: str) -> str:
+    return create_access_token({"sub": username, "scope": "stream"}, timedelta(seconds=STREAM_TICKET_EXPIRE_SECONDS))
+
+def decode_token(token: str, scope: Optional[str] = None) -> str:
+    """Username of a valid token; access tokens carry no scope, stream tickets ``scope="stream"``."""
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("scope") != scope:
             raise HTTPException(status_code=401, detail="Invalid token")
         return username
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return decode_token(credentials.credentials)
+
 def get_current_user(db: Session = Depends(get_db), username: str = Depends(verify_token)):
     user = db.query(User).filter(User.username == username).first()
     if user is None:
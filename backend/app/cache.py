@@ -0,0 +1,261 @@
+"""
+Response cache for the public health listing endpoints.
+
+Responses are stored as already-serialized JSON bytes in an in-process LRU
+tier, optionally backed by a shared tier that all workers can see
+(``response_cache.set_shared_backend``; ``MemoryCacheBackend`` ships in-repo,
+a Redis client fits the same interface). Cache keys embed a per-table data
+version; admin writes call ``bump_data_version`` so every cached page for that
+table is bypassed at once.
+
+Pages are built from the read replica when one is configured. A page built
+right after a version change may still show the replica's old rows, so for
+``HEALTH_CACHE_REPLICA_LAG`` seconds after a table's version changes its pages
+are served but not stored.
+"""
+import hashlib
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from fastapi import Request, Response
+from .database import READ_DATABASE_URL
+from .events import add_listener
+from .serialization import dumps
+
+HEALTH_CACHE_ENABLED = os.getenv("HEALTH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+HEALTH_CACHE_MAX_ENTRIES = int(os.getenv("HEALTH_CACHE_MAX_ENTRIES", "2048"))
+# Local entries expire so that workers without a shared tier converge after
+# writes handled by another worker.
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "30"))
+# Browsers revalidate with If-None-Match by default, which keeps the admin
+# panel consistent after edits while still avoiding response bodies.
+HEALTH_CACHE_MAX_AGE = int(os.getenv("HEALTH_CACHE_MAX_AGE", "0"))
+# Upper bound on replica lag; only applies with READ_DATABASE_URL
+HEALTH_CACHE_REPLICA_LAG = float(os.getenv("HEALTH_CACHE_REPLICA_LAG", "2"))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class SharedCacheBackend(ABC):
+    """Interface for a cache tier shared between workers.
+
+    Implementations must be safe to call from multiple threads. ``incr`` must be
+    atomic across workers since it backs the data-version counters.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+
+class MemoryCacheBackend(SharedCacheBackend):
+    """In-process shared tier, for a single worker or for trying the shared path out."""
+
+    def __init__(self, max_entries: int = HEALTH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._values.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.monotonic()
+        with self._lock:
+            self._values[key] = (value, now + ttl)
+            if len(self._values) > self.max_entries:
+                self._values = {k: v for k, v in self._values.items() if v[1] is None or v[1] > now}
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._values.get(key, (b"0", None))[0]) + 1
+            # Counters never expire
+            self._values[key] = (str(value).encode(), None)
+            return value
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a per-entry time to live."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = HEALTH_CACHE_MAX_ENTRIES, ttl: float = HEALTH_CACHE_TTL,
+                 shared: SharedCacheBackend = None, replica_lag: float = None):
+        self.local = LRUCache(max_entries, ttl)
+        self.shared = shared
+        self.ttl = ttl
+        self.replica_lag = (HEALTH_CACHE_REPLICA_LAG if READ_DATABASE_URL else 0) if replica_lag is None else replica_lag
+        self.hits = 0
+        self.misses = 0
+        self.unstored = 0
+        self._versions = {}
+        # Per table: the last data version seen and when it was first seen
+        self._seen: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def set_shared_backend(self, backend: Optional[SharedCacheBackend]):
+        self.shared = backend
+        self.local.clear()
+
+    def data_version(self, table: str) -> int:
+        if self.shared is not None:
+            raw = self.shared.get(f"version:{table}")
+            return self._observe(table, int(raw) if raw else 0)
+        return self._observe(table, self._versions.get(table, 0))
+
+    def bump_data_version(self, table: str) -> int:
+        """Invalidate every cached response derived from ``table``."""
+        if self.shared is not None:
+            version = self.shared.incr(f"version:{table}")
+        else:
+            with self._lock:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                version = self._versions[table]
+        self._seen[table] = (version, time.monotonic())
+        return version
+
+    def _observe(self, table: str, version: int) -> int:
+        seen = self._seen.get(table)
+        if seen is None:
+            # Versions this process starts with are not news
+            self._seen[table] = (version, float("-inf"))
+        elif seen[0] != version:
+            self._seen[table] = (version, time.monotonic())
+        return version
+
+    def storable(self, table: str) -> bool:
+        """False while a page of ``table`` could still be built from a lagging replica."""
+        changed_at = self._seen.get(table, (0, float("-inf")))[1]
+        if time.monotonic() - changed_at >= self.replica_lag:
+            return True
+        self.unstored += 1
+        return False
+
+    def make_key(self, table: str, params: dict) -> str:
+        query = "&".join(f"{name}={'' if value is None else value}" for name, value in sorted(params.items()))
+        return f"{table}:v{self.data_version(table)}:{query}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        cached = self.local.get(key)
+        if cached is None and self.shared is not None:
+            raw = self.shared.get(f"response:{key}")
+            if raw is not None:
+                etag, _, body = raw.partition(b"\n")
+                cached = CachedResponse(body, etag.decode())
+                self.local.set(key, cached)
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    def set(self, key: str, cached: CachedResponse):
+        self.local.set(key, cached)
+        if self.shared is not None:
+            self.shared.set(f"response:{key}", cached.etag.encode() + b"\n" + cached.body, self.ttl)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": HEALTH_CACHE_ENABLED,
+            "entries": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "unstored": self.unstored,
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def bump_data_version(table: str) -> int:
+    return response_cache.bump_data_version(table)
+
+
+@add_listener
+def _invalidate_on_change(change):
+    bump_data_version(change.table)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _etag_matches(request: Optional[Request], etag: str) -> bool:
+    header = request.headers.get("if-none-match") if request is not None else None
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def cached_json_response(request: Optional[Request], table: str, params: dict, build_payload: Callable[[], object]) -> Response:
+    """Serve ``build_payload()`` as JSON through the response cache.
+
+    ``params`` must hold every input that affects the payload; it becomes the
+    normalized cache key. Conditional requests get ``304 Not Modified``.
+    """
+    key = response_cache.make_key(table, params) if HEALTH_CACHE_ENABLED else None
+    cached = response_cache.get(key) if key else None
+    if cached is None:
+        body = dumps(build_payload())
+        cached = CachedResponse(body, make_etag(body))
+        if key and response_cache.storable(table):
+            response_cache.set(key, cached)
+
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"public, max-age={HEALTH_CACHE_MAX_AGE}, must-revalidate",
+    }
+    if _etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
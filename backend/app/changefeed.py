@@ -0,0 +1,164 @@
+"""
+Change feed of outbreaks and vaccinations for downstream consumers.
+
+Every write to the two tables appends to ``change_log`` in the writer's own
+transaction: one entry per inserted, updated or deleted row, holding the row
+as written (the id and natural key only for deletes). The admin endpoints,
+``upsert_rows`` (bulk upserts, CSV and file imports), location merges and
+archiving all log their changes, so an entry exists exactly when the change
+was committed.
+
+``seq`` is the log's autoincrement key. Consumers poll
+``GET /api/health/changes?since=<seq>`` and resume from the ``next`` it
+returns; each poll is a range scan on the key, however large the tables are,
+instead of paging through the listings to find what changed. For a seq to
+be a safe resume point, entries must become visible in seq order. SQLite
+has a single writer, so they do. On PostgreSQL a sequence value is taken
+before commit, so appends take a transaction-level advisory lock that is
+held until commit.
+
+Rows moved to archive partitions are logged with the ``archive`` action:
+they leave the listings but not the history. Entries older than
+``CHANGE_LOG_RETENTION_DAYS`` are pruned by the daily archive run. A
+consumer whose ``since`` predates the oldest retained entry gets ``410`` and
+has to reload the listings.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+
+from sqlalchemy import delete, func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .serialization import dumps, query_rows, rows_to_dicts, schema_fields
+
+# Entries older than this many days are pruned (0 keeps them forever)
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+CHANGE_FEED_MAX_LIMIT = 5000
+
+LOGGED_TABLES = {
+    "outbreaks": (models.Outbreak, schemas.Outbreak, "outbreak_id"),
+    "vaccinations": (models.Vaccination, schemas.Vaccination, "campaign_id"),
+}
+
+# Any constant works; it only has to be the same for every writer
+_APPEND_LOCK = 0x63686C67
+
+
+class ChangeLogExpired(Exception):
+    """``since`` is older than the oldest retained entry."""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _lock(db: Session):
+    """Serialize appends until commit, so entries become visible in seq order."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _APPEND_LOCK})
+
+
+def _append(db: Session, entries: list):
+    if not entries:
+        return
+    _lock(db)
+    db.execute(insert(models.ChangeLogEntry), entries)
+
+
+def _entry(table: str, action: str, record: dict, now: datetime) -> dict:
+    key = LOGGED_TABLES[table][2]
+    return {
+        "table_name": table, "action": action, "record_id": record["id"], "record_key": record.get(key),
+        "data": dumps(record).decode("utf-8") if action in ("insert", "update") else None, "changed_at": now,
+    }
+
+
+def log_changes(db: Session, table: str, removed: Iterable[dict] = (), added: Iterable[dict] = ()):
+    """Log the rows a write replaced or deleted (``removed``) and wrote (``added``), matched by id; the caller commits.
+
+    Takes the same arguments as ``rollups.apply_changes``. Rows written back
+    unchanged are not logged.
+    """
+    now = _utcnow()
+    before = {record["id"]: record for record in removed}
+    entries = []
+    for record in added:
+        previous = before.pop(record["id"], None)
+        if previous is None:
+            entries.append(_entry(table, "insert", record, now))
+        elif previous != record:
+            entries.append(_entry(table, "update", record, now))
+    entries.extend(_entry(table, "delete", record, now) for record in before.values())
+    _append(db, entries)
+
+
+def log_rows(db: Session, table: str, ids: List[int]):
+    """Log rows changed by a bulk UPDATE as updates, reading them back; the caller commits."""
+    model, schema, _ = LOGGED_TABLES[table]
+    if not ids:
+        return
+    rows = rows_to_dicts(schema_fields(schema), query_rows(db, model, schema).filter(model.id.in_(ids)).order_by(model.id).all())
+    now = _utcnow()
+    _append(db, [_entry(table, "update", record, now) for record in rows])
+
+
+def log_archived(db: Session, table: str, ids: List[int]):
+    """Log rows about to move to an archive partition; call before deleting them from ``table``."""
+    if table not in LOGGED_TABLES or not ids:
+        return
+    model, _, key = LOGGED_TABLES[table]
+    _lock(db)
+    entry = models.ChangeLogEntry
+    db.execute(insert(entry).from_select(
+        ["table_name", "action", "record_id", "record_key", "changed_at"],
+        select(literal(table), literal("archive"), model.id, getattr(model, key), literal(_utcnow()))
+        .where(model.id.in_(ids)).order_by(model.id),
+    ))
+
+
+def read_changes(db: Session, since: int = 0, table: str = None, limit: int = 1000) -> bytes:
+    """JSON page of entries after ``since``, oldest first.
+
+    Stored rows are spliced into the response as they are rather than
+    decoded and encoded again. Raises ``ChangeLogExpired`` when entries after
+    ``since`` have been pruned.
+    """
+    entry = models.ChangeLogEntry
+    limit = max(1, min(limit, CHANGE_FEED_MAX_LIMIT))
+    oldest, latest = db.execute(select(func.min(entry.seq), func.max(entry.seq))).one()
+    # A consumer's ``since`` is a seq it was given, so a gap before the oldest entry means pruning
+    if since and oldest is not None and since < oldest - 1:
+        raise ChangeLogExpired(f"Changes before {oldest} are no longer kept")
+    query = select(entry.seq, entry.table_name, entry.action, entry.record_id, entry.record_key, entry.changed_at, entry.data).where(entry.seq > since)
+    if table:
+        query = query.where(entry.table_name == table)
+    rows = db.execute(query.order_by(entry.seq).limit(limit + 1)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    changes = []
+    for seq, table_name, action, record_id, record_key, changed_at, data in rows:
+        meta = dumps({"seq": seq, "table": table_name, "action": action, "id": record_id, "key": record_key, "changed_at": changed_at})
+        changes.append(meta[:-1] + b',"record":' + (data.encode("utf-8") if data else b"null") + b"}")
+    head = dumps({"since": since, "next": rows[-1][0] if rows else max(since, 0), "latest": latest or 0, "more": more})
+    return head[:-1] + b',"changes":[' + b",".join(changes) + b"]}"
+
+
+def prune_change_log(db: Session, now: datetime = None) -> int:
+    """Delete entries older than ``CHANGE_LOG_RETENTION_DAYS`` and commit; returns how many.
+
+    The newest entry is always kept, so a stale ``since`` can still be told
+    from one that is simply up to date.
+    """
+    if CHANGE_LOG_RETENTION_DAYS <= 0:
+        return 0
+    entry = models.ChangeLogEntry
+    cutoff = (now or _utcnow()) - timedelta(days=CHANGE_LOG_RETENTION_DAYS)
+    newest = db.scalar(select(func.max(entry.seq)))
+    last = db.scalar(select(func.max(entry.seq)).where(entry.changed_at < cutoff, entry.seq < newest)) if newest else None
+    if last is None:
+        return 0
+    deleted = db.execute(delete(entry).where(entry.seq <= last).execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return deleted
@@ -1,14 +1,248 @@
-import requests
-import json
 import os
-from typing import List
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from sqlalchemy.orm import Session
+from .district_context import district_context
+from .intents import intent_classifier
 from .models import ChatMessage, User
 
+# Earlier messages (with their answers) included in each prompt; 0 disables
+CHAT_HISTORY_MESSAGES = int(os.getenv("CHAT_HISTORY_MESSAGES", "3"))
+
+# Canned answers per intent (see app/intents.py), used when the model is unavailable
+FALLBACK_RESPONSES = {
+    "malaria": "Malaria is a serious disease transmitted by mosquitoes. In {district}, {state}, please take precautions: use mosquito nets, wear long sleeves, and apply repellent. Symptoms include fever, chills, and headache. Seek medical attention if you experience these symptoms.",
+    "dengue": "Dengue fever is spread by Aedes mosquitoes. In {district}, {state}, prevent mosquito breeding by removing standing water. Symptoms include high fever, severe headache, pain behind eyes, and joint pain. Consult a doctor immediately if symptoms appear.",
+    "covid": "COVID-19 prevention in {district}, {state}: Wear masks in crowded places, maintain social distancing, wash hands frequently, and get vaccinated. Symptoms include fever, cough, and difficulty breathing. Get tested if you have symptoms.",
+    "cholera": "Cholera spreads through contaminated water and food. In {district}, {state}, drink boiled or treated water, eat freshly cooked food, and wash hands with soap. Sudden watery diarrhoea and vomiting need urgent care: start oral rehydration solution (ORS) and go to a health center immediately.",
+    "typhoid": "Typhoid spreads through contaminated food and water. In {district}, {state}, drink safe water, avoid raw street food, and wash hands before eating. Symptoms include prolonged fever, weakness, stomach pain, and headache. See a doctor for testing and a full course of treatment.",
+    "fever": "For fever: Rest, drink plenty of fluids, and take paracetamol if needed. If fever persists for more than 3 days or is very high (above 103°F), consult a doctor immediately.",
+    "vaccine": "Check your local health center in {district}, {state} for vaccination schedules. Common vaccines include COVID-19, flu, and routine immunizations. Vaccination is safe and protects you and your community.",
+    "symptom": "Common health symptoms to watch for: persistent fever, severe headache, difficulty breathing, chest pain, unusual fatigue, or sudden weight loss. Always consult a healthcare provider for proper diagnosis.",
+    "general": "I'm a health assistant for {district}, {state}. I can help with information about diseases, symptoms, prevention, and vaccinations. Please ask specific health-related questions, and I'll do my best to assist you. For medical emergencies, please call your local emergency services or visit a hospital.",
+}
+
+# Ollama gateway: requests in flight per model server, and how many more may wait (and for how long) for a slot
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_MAX_QUEUE = int(os.getenv("OLLAMA_MAX_QUEUE", "32"))
+OLLAMA_QUEUE_TIMEOUT = float(os.getenv("OLLAMA_QUEUE_TIMEOUT", "2"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "2"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "10"))
+# Consecutive failures that open the circuit, and how long it stays open before a probe
+OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))
+OLLAMA_BREAKER_COOLDOWN = float(os.getenv("OLLAMA_BREAKER_COOLDOWN", "30"))
+OLLAMA_PROBE_TIMEOUT = float(os.getenv("OLLAMA_PROBE_TIMEOUT", "1"))
+# Distinct model server URLs (users may supply their own) kept with a connection pool
+OLLAMA_MAX_BACKENDS = int(os.getenv("OLLAMA_MAX_BACKENDS", "32"))
+
+class OllamaUnavailable(Exception):
+    """The model server is failing, saturated or did not answer in time."""
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures.
+
+    While open every call is refused. Once ``cooldown`` seconds have passed a
+    single trial call is let through (half-open): its success closes the
+    circuit, its failure opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int = OLLAMA_BREAKER_FAILURES, cooldown: float = OLLAMA_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def accepting(self) -> bool:
+        return self.state == self.CLOSED or (self.state == self.OPEN and time.monotonic() >= self.retry_at)
+
+    def allow(self) -> Optional[str]:
+        """``"call"``, ``"trial"`` (the half-open attempt) or None when refused."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return "call"
+            if self.state == self.OPEN and time.monotonic() >= self.retry_at:
+                self.state = self.HALF_OPEN
+                return "trial"
+            return None
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures = self.CLOSED, 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state, self.retry_at = self.OPEN, time.monotonic() + self.cooldown
+
+    def abort_trial(self):
+        # The trial never reached the server; let the next call try instead
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state, self.retry_at = self.OPEN, time.monotonic()
+
+class _OllamaBackend:
+    """Slots, circuit breaker and HTTP connection pool for one model server URL."""
+
+    def __init__(self, url: str, concurrency: int):
+        self.url = url
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.breaker = CircuitBreaker()
+        self.waiting = 0
+        self.in_flight = 0
+        self.counts = {"requests": 0, "failures": 0, "rejected": 0, "queue_timeouts": 0}
+        self._session = None
+        self._lock = threading.Lock()
+
+    def http(self):
+        if self._session is None:
+            import requests  # deferred so workers start without the HTTP client stack
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.mount(self.url, HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency))
+            self._session = session
+        return self._session
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def stats(self) -> dict:
+        return {"state": self.breaker.state, "consecutive_failures": self.breaker.failures,
+                "in_flight": self.in_flight, "waiting": self.waiting, **self.counts}
+
+class OllamaGateway:
+    """Admission control in front of the Ollama HTTP API.
+
+    Each server URL gets at most ``concurrency`` requests in flight; up to
+    ``max_queue`` more wait up to ``queue_timeout`` seconds for a slot and the
+    rest are refused at once. A circuit breaker per URL refuses calls while
+    the server keeps failing, so chat falls back without waiting out the
+    timeout, and a half-open circuit probes ``/api/tags`` before the trial
+    request. Refusals and failures raise ``OllamaUnavailable``.
+    """
+
+    def __init__(self, concurrency: int = OLLAMA_MAX_CONCURRENCY, max_queue: int = OLLAMA_MAX_QUEUE,
+                 queue_timeout: float = OLLAMA_QUEUE_TIMEOUT, timeout: float = OLLAMA_TIMEOUT,
+                 max_backends: int = OLLAMA_MAX_BACKENDS):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.max_backends = max_backends
+        self._backends: "OrderedDict[str, _OllamaBackend]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def backend(self, url: str) -> _OllamaBackend:
+        url = url.rstrip("/")
+        with self._lock:
+            backend = self._backends.get(url)
+            if backend is None:
+                backend = self._backends[url] = _OllamaBackend(url, self.concurrency)
+                self._evict()
+            else:
+                self._backends.move_to_end(url)
+            return backend
+
+    def _evict(self):
+        # Least recently used idle servers go first; busy ones are kept
+        for url in list(self._backends):
+            if len(self._backends) <= self.max_backends:
+                return
+            backend = self._backends[url]
+            if not backend.in_flight and not backend.waiting:
+                del self._backends[url]
+                backend.close()
+
+    def accepting(self, url: str) -> bool:
+        """False while the circuit for ``url`` is open (no request would be sent)."""
+        with self._lock:
+            backend = self._backends.get(url.rstrip("/"))
+        return backend is None or backend.breaker.accepting()
+
+    def probe(self, url: str) -> bool:
+        try:
+            response = self.backend(url).http().get(f"{url.rstrip('/')}/api/tags", timeout=OLLAMA_PROBE_TIMEOUT)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def generate(self, url: str, payload: dict) -> str:
+        backend = self.backend(url)
+        admitted = backend.breaker.allow()
+        if admitted is None:
+            backend.count("rejected")
+            raise OllamaUnavailable(f"circuit open for {backend.url}")
+
+        with backend._lock:
+            queue_full = backend.waiting >= self.max_queue
+            if not queue_full:
+                backend.waiting += 1
+        if queue_full:
+            backend.count("rejected")
+            if admitted == "trial":
+                backend.breaker.abort_trial()
+            raise OllamaUnavailable(f"queue full for {backend.url}")
+        try:
+            acquired = backend.slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with backend._lock:
+                backend.waiting -= 1
+        if not acquired:
+            backend.count("queue_timeouts")
+            if admitted == "trial":
+                backend.breaker.abort_trial()
+            raise OllamaUnavailable(f"no free slot for {backend.url} within {self.queue_timeout}s")
+        if admitted == "call" and backend.breaker.state != CircuitBreaker.CLOSED:
+            # The circuit opened while this request was queued
+            backend.slots.release()
+            backend.count("rejected")
+            raise OllamaUnavailable(f"circuit open for {backend.url}")
+
+        with backend._lock:
+            backend.in_flight += 1
+            backend.counts["requests"] += 1
+        try:
+            if admitted == "trial" and not self.probe(backend.url):
+                raise OllamaUnavailable(f"health probe failed for {backend.url}")
+            response = backend.http().post(f"{backend.url}/api/generate", json=payload, timeout=(OLLAMA_CONNECT_TIMEOUT, self.timeout))
+            if response.status_code != 200:
+                raise OllamaUnavailable(f"{backend.url} answered {response.status_code}")
+            text = response.json().get("response", "").strip()
+        except Exception as e:
+            backend.breaker.record_failure()
+            backend.count("failures")
+            if isinstance(e, OllamaUnavailable):
+                raise
+            raise OllamaUnavailable(str(e)) from e
+        finally:
+            with backend._lock:
+                backend.in_flight -= 1
+            backend.slots.release()
+        backend.breaker.record_success()
+        return text
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            backends = list(self._backends.values())
+        return {backend.url: backend.stats() for backend in backends}
+
 class HealthChatbot:
     def __init__(self):
         self.ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
         self.model_name = os.getenv("OLLAMA_MODEL", "your-fine-tuned-model:latest")
+        self.gateway = OllamaGateway()
     
     def get_conversation_history(self, db: Session, user_id: int, limit: int = 5) -> str:
         """Get recent conversation history for context"""
@@ -25,37 +259,28 @@ class HealthChatbot:
         return "\n".join(conversation)
     
     def generate_response(self, message: str, user: User, db: Session, ollama_url: str = None) -> str:
-        """Generate response using AI model with fallback"""
+        """Generate response using AI model with fallback; the caller stores the exchange"""
         # Use provided ollama_url or fall back to default
         active_ollama_url = ollama_url or self.ollama_url
         
+        if not self.gateway.accepting(active_ollama_url):
+            return self.get_fallback_response(message, user, db)
+        
         try:
-            system_prompt = f"You are a health assistant for {user.district}, {user.state}, India. Answer health questions accurately and concisely. Question: {message}"
-
-            response = requests.post(
-                f"{active_ollama_url}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": system_prompt,
-                    "stream": False
-                },
-                timeout=10
-            )
+            system_prompt, prompt = self.build_prompt(message, user, db)
+
+            bot_response = self.gateway.generate(active_ollama_url, {
+                "model": self.model_name,
+                "system": system_prompt,
+                "prompt": prompt,
+                "stream": False
+            })
             
-            if response.status_code == 200:
-                result = response.json()
-                bot_response = result.get("response", "").strip()
-                
-                if bot_response:
-                    chat_message = ChatMessage(
-                        user_id=user.id,
-                        message=message,
-                        response=bot_response
-                    )
-                    db.add(chat_message)
-                    db.commit()
-                    return bot_response
+            if bot_response:
+                return bot_response
                 
+        except OllamaUnavailable as e:
+            print(f"AI unavailable: {e}, using fallback")
         except Exception as e:
             print(f"AI Error: {e}, using fallback")
         
@@ -64,6 +289,19 @@ class HealthChatbot:
     
 
     
+    def build_prompt(self, message: str, user: User, db: Session) -> Tuple[str, str]:
+        """System prompt with the district's current health data, and the question with recent history"""
+        system_prompt = self.get_health_context_prompt(user)
+        local_context = district_context.get(user.location_id)
+        if local_context:
+            system_prompt = f"{system_prompt}\n\n{local_context}"
+        
+        history = self.get_conversation_history(db, user.id, CHAT_HISTORY_MESSAGES) if CHAT_HISTORY_MESSAGES > 0 else ""
+        prompt = f"User: {message}\nAssistant:"
+        if history:
+            prompt = f"{history}\n{prompt}"
+        return system_prompt, prompt
+    
     def get_health_context_prompt(self, user: User) -> str:
         """Generate location-specific health context"""
         return f"""You are a health assistant specializing in:
@@ -76,35 +314,7 @@ Provide location-specific, accurate health information."""
     
     def get_fallback_response(self, message: str, user: User, db: Session) -> str:
         """Provide fallback health responses when AI is unavailable"""
-        message_lower = message.lower()
-        
-        # Save to database
-        fallback_response = ""
-        
-        if "malaria" in message_lower:
-            fallback_response = f"Malaria is a serious disease transmitted by mosquitoes. In {user.district}, {user.state}, please take precautions: use mosquito nets, wear long sleeves, and apply repellent. Symptoms include fever, chills, and headache. Seek medical attention if you experience these symptoms."
-        elif "dengue" in message_lower:
-            fallback_response = f"Dengue fever is spread by Aedes mosquitoes. In {user.district}, {user.state}, prevent mosquito breeding by removing standing water. Symptoms include high fever, severe headache, pain behind eyes, and joint pain. Consult a doctor immediately if symptoms appear."
-        elif "covid" in message_lower or "corona" in message_lower:
-            fallback_response = f"COVID-19 prevention in {user.district}, {user.state}: Wear masks in crowded places, maintain social distancing, wash hands frequently, and get vaccinated. Symptoms include fever, cough, and difficulty breathing. Get tested if you have symptoms."
-        elif "fever" in message_lower:
-            fallback_response = "For fever: Rest, drink plenty of fluids, and take paracetamol if needed. If fever persists for more than 3 days or is very high (above 103°F), consult a doctor immediately."
-        elif "vaccine" in message_lower or "vaccination" in message_lower:
-            fallback_response = f"Check your local health center in {user.district}, {user.state} for vaccination schedules. Common vaccines include COVID-19, flu, and routine immunizations. Vaccination is safe and protects you and your community."
-        elif "symptom" in message_lower:
-            fallback_response = "Common health symptoms to watch for: persistent fever, severe headache, difficulty breathing, chest pain, unusual fatigue, or sudden weight loss. Always consult a healthcare provider for proper diagnosis."
-        else:
-            fallback_response = f"I'm a health assistant for {user.district}, {user.state}. I can help with information about diseases, symptoms, prevention, and vaccinations. Please ask specific health-related questions, and I'll do my best to assist you. For medical emergencies, please call your local emergency services or visit a hospital."
-        
-        # Save to database
-        chat_message = ChatMessage(
-            user_id=user.id,
-            message=message,
-            response=fallback_response
-        )
-        db.add(chat_message)
-        db.commit()
-        
-        return fallback_response
+        intent = intent_classifier.best(message) or "general"
+        return FALLBACK_RESPONSES[intent].format(district=user.district, state=user.state)
 
 chatbot = HealthChatbot()
\ No newline at end of file
@@ -1,28 +1,208 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Neon PostgreSQL requires postgresql:// to be replaced with postgresql+psycopg2://
-if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _normalize_url(url):
+    # Neon PostgreSQL requires postgresql:// to be replaced with postgresql+psycopg2://
+    if url and url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+DATABASE_URL = _normalize_url(os.getenv("DATABASE_URL"))
+# Optional read replica for the read-only health listings and chat history
+READ_DATABASE_URL = _normalize_url(os.getenv("READ_DATABASE_URL"))
+
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 300)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Connections opened per engine at startup so the first requests skip the connect handshake
+DB_POOL_WARM = _env_int("DB_POOL_WARM", 2)
+# PgBouncer (transaction pooling) mode: no startup options, no pre-ping, and
+# DB_POOL_SIZE=0 disables app-side pooling entirely.
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", False)
+# Statement timeouts in milliseconds (PostgreSQL only, 0 disables)
+DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 0)
+DB_READ_STATEMENT_TIMEOUT_MS = _env_int("DB_READ_STATEMENT_TIMEOUT_MS", DB_STATEMENT_TIMEOUT_MS)
+
+
+class PoolMetrics:
+    """Counters for connection pool usage, updated from pool events."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        size = pool.size() if hasattr(pool, "size") else None
+        overflow = getattr(pool, "_max_overflow", None)
+        capacity = size + overflow if size is not None and overflow is not None and overflow >= 0 else None
+        with self._lock:
+            return {
+                "pool_class": type(pool).__name__,
+                "pool_size": size,
+                "max_overflow": overflow,
+                "checked_out": self.checked_out,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "peak_checked_out": self.peak_checked_out,
+                "saturation": round(self.checked_out / capacity, 3) if capacity else None,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+            }
+
+
+def create_db_engine(url: str):
+    """Create an engine with pool settings taken from the environment."""
+    backend = make_url(url).get_backend_name()
+    kwargs = {}
+    connect_args = {}
+
+    if backend != "sqlite":
+        if DB_PGBOUNCER and DB_POOL_SIZE == 0:
+            kwargs["poolclass"] = NullPool
+        else:
+            kwargs.update(
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=DB_POOL_PRE_PING and not DB_PGBOUNCER,
+                pool_use_lifo=True,
+            )
+        # PgBouncer rejects startup options, so there the timeout is set per
+        # transaction instead (see _apply_statement_timeout).
+        if backend == "postgresql" and DB_STATEMENT_TIMEOUT_MS and not DB_PGBOUNCER:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    return create_engine(url, connect_args=connect_args, **kwargs)
+
+
+engine = create_db_engine(DATABASE_URL)
+read_engine = create_db_engine(READ_DATABASE_URL) if READ_DATABASE_URL else engine
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+pool_metrics = {"primary": PoolMetrics(engine)}
+if read_engine is not engine:
+    pool_metrics["replica"] = PoolMetrics(read_engine)
+
+
+def pool_warm_up(count: int = None):
+    """Open ``count`` connections per engine and check them back in to pre-fill the pools."""
+    count = min(DB_POOL_WARM if count is None else count, DB_POOL_SIZE)
+    engines = [engine] if read_engine is engine else [engine, read_engine]
+    for target in engines:
+        connections = []
+        try:
+            for _ in range(count):
+                connections.append(target.connect())
+        finally:
+            for connection in connections:
+                connection.close()
+
+
+def pool_status() -> dict:
+    """Current pool usage for the primary and (if configured) replica engines."""
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+
+def _apply_statement_timeout(session, transaction, connection):
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if not timeout_ms or connection.dialect.name != "postgresql":
+        return
+    if timeout_ms == DB_STATEMENT_TIMEOUT_MS and not DB_PGBOUNCER:
+        return  # already the connection default
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+event.listen(SessionLocal, "after_begin", _apply_statement_timeout)
+event.listen(ReadSessionLocal, "after_begin", _apply_statement_timeout)
+
+
+def _session_scope(session_factory, timeout_ms: int = None):
+    db = session_factory()
+    if timeout_ms:
+        db.info["statement_timeout_ms"] = timeout_ms
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_db():
+    yield from _session_scope(SessionLocal, DB_STATEMENT_TIMEOUT_MS)
+
+
+def get_read_db():
+    """Session for read-only endpoints, routed to the replica when configured."""
+    yield from _session_scope(ReadSessionLocal, DB_READ_STATEMENT_TIMEOUT_MS)
+
+
+def get_db_with_timeout(timeout_ms: int, read_only: bool = False):
+    """Build a dependency whose session uses its own statement timeout.
+
+    Example: ``db: Session = Depends(get_db_with_timeout(2000, read_only=True))``
+    """
+    session_factory = ReadSessionLocal if read_only else SessionLocal
+
+    def dependency():
+        yield from _session_scope(session_factory, timeout_ms)
+
+    return dependency
@@ -0,0 +1,330 @@
+"""
+Periodic daily and weekly digests for subscribers (``users.digest_frequency``).
+
+A run works per location, not per user: the outbreaks and vaccination
+campaigns for every ``location_id`` that has subscribers are selected with two
+windowed queries, each location's message is rendered and encoded
+once per locale (see ``app/notification_templates.py``), and subscribers are
+then streamed in location order and handed to the email and WhatsApp senders
+in batches on a small thread pool.
+
+``DigestScheduler`` runs in every worker and queues the due run as a job with a
+deterministic id, so each period is sent once however many workers there are.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from . import scheduler, whatsapp
+from .archive import queue_due_archive
+from .database import SessionLocal
+from .jobs import enqueue, job_handler
+from .models import Location, Outbreak, User, Vaccination
+from .notification_templates import CompiledTemplate, PreparedEmail, get_template
+
+
+DIGEST_WINDOWS = {"daily": timedelta(days=1), "weekly": timedelta(days=7)}
+DIGEST_SCHEDULER = os.getenv("DIGEST_SCHEDULER", "true").lower() in ("1", "true", "yes", "on")
+# Digests go out at this hour (UTC); weekly ones on this weekday (0 = Monday)
+DIGEST_HOUR = int(os.getenv("DIGEST_HOUR", "7"))
+DIGEST_WEEKDAY = int(os.getenv("DIGEST_WEEKDAY", "0"))
+# A run missed by more than this (e.g. all workers were down) is skipped, not sent late
+DIGEST_GRACE_HOURS = float(os.getenv("DIGEST_GRACE_HOURS", "6"))
+DIGEST_CHECK_SECONDS = int(os.getenv("DIGEST_CHECK_SECONDS", "60"))
+DIGEST_BATCH_SIZE = int(os.getenv("DIGEST_BATCH_SIZE", "500"))
+DIGEST_SEND_WORKERS = int(os.getenv("DIGEST_SEND_WORKERS", "4"))
+DIGEST_MAX_ITEMS = int(os.getenv("DIGEST_MAX_ITEMS", "5"))
+DIGEST_UPCOMING_DAYS = int(os.getenv("DIGEST_UPCOMING_DAYS", "30"))
+
+@dataclass
+class LocationDigest:
+    location_id: int
+    state: str  # the location's canonical names
+    district: str
+    outbreaks: List[dict] = field(default_factory=list)  # top DIGEST_MAX_ITEMS, most severe first
+    outbreak_total: int = 0
+    outbreak_cases: int = 0
+    campaigns: List[dict] = field(default_factory=list)  # ongoing first, then upcoming
+    campaign_total: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.outbreak_total and not self.campaign_total
+
+
+@dataclass
+class RenderedDigest:
+    subject: str
+    email_body: str  # without greeting and footer, the per-user and fixed parts
+    whatsapp_body: str
+    greeting: CompiledTemplate
+    footer: str
+
+    def prepared_email(self) -> PreparedEmail:
+        return PreparedEmail(self.subject, self.email_body, self.greeting, self.footer)
+
+
+def _utcnow() -> datetime:
+    # Report and campaign dates are stored as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _location_scope(model, frequency: str, location_id: Optional[int]):
+    """Rows of ``model`` in one location, or in every location with subscribers."""
+    if location_id is not None:
+        return None, model.location_id == location_id
+    subscribers = (
+        select(User.location_id)
+        .where(User.digest_frequency == frequency, User.is_active == True)
+        .distinct()
+        .subquery()
+    )
+    return subscribers, model.location_id == subscribers.c.location_id
+
+
+def _ranked(model, columns: list, where, order_by: tuple, frequency: str, location_id: Optional[int]):
+    partition = (model.location_id,)
+    subscribers, on_location = _location_scope(model, frequency, location_id)
+    inner = select(
+        model.location_id, Location.state, Location.district, *columns,
+        func.row_number().over(partition_by=partition, order_by=order_by).label("rank"),
+        func.count().over(partition_by=partition).label("total"),
+    ).join(Location, Location.id == model.location_id)
+    inner = inner.join(subscribers, on_location) if subscribers is not None else inner.where(on_location)
+    inner = inner.where(where).subquery()
+    return select(inner).where(inner.c.rank <= DIGEST_MAX_ITEMS)
+
+
+def compute_location_digests(db: Session, frequency: str, period_end: datetime, location_id: int = None) -> Dict[int, LocationDigest]:
+    """Digest content by ``location_id`` for every subscribed location (or just ``location_id``)."""
+    since = period_end - DIGEST_WINDOWS[frequency]
+    digests: Dict[int, LocationDigest] = {}
+
+    def digest_for(row) -> LocationDigest:
+        if row.location_id not in digests:
+            digests[row.location_id] = LocationDigest(row.location_id, row.state, row.district)
+        return digests[row.location_id]
+
+    severity_rank = case({"high": 3, "moderate": 2, "low": 1}, value=func.lower(Outbreak.severity), else_=0)
+    outbreaks = _ranked(
+        Outbreak,
+        [Outbreak.disease, Outbreak.severity, Outbreak.cases_reported, Outbreak.deaths, Outbreak.report_date,
+         func.sum(Outbreak.cases_reported).over(partition_by=Outbreak.location_id).label("cases")],
+        and_(Outbreak.report_date > since, Outbreak.report_date <= period_end),
+        (severity_rank.desc(), Outbreak.cases_reported.desc(), Outbreak.report_date.desc()),
+        frequency, location_id,
+    )
+    for row in db.execute(outbreaks):
+        digest = digest_for(row)
+        digest.outbreak_total, digest.outbreak_cases = row.total, row.cases or 0
+        digest.outbreaks.append({
+            "disease": row.disease, "severity": row.severity, "cases_reported": row.cases_reported,
+            "deaths": row.deaths, "report_date": row.report_date,
+        })
+
+    upcoming_until = period_end + timedelta(days=DIGEST_UPCOMING_DAYS)
+    ongoing = Vaccination.start_date <= period_end
+    campaigns = _ranked(
+        Vaccination,
+        [Vaccination.vaccine_name, Vaccination.target_population, Vaccination.start_date, Vaccination.end_date,
+         Vaccination.doses_administered, case((ongoing, "ongoing"), else_="upcoming").label("status")],
+        and_(Vaccination.start_date <= upcoming_until, Vaccination.end_date >= period_end),
+        (case((ongoing, 0), else_=1), Vaccination.start_date),
+        frequency, location_id,
+    )
+    for row in db.execute(campaigns):
+        digest = digest_for(row)
+        digest.campaign_total = row.total
+        digest.campaigns.append({
+            "vaccine_name": row.vaccine_name, "target_population": row.target_population, "status": row.status,
+            "start_date": row.start_date, "end_date": row.end_date, "doses_administered": row.doses_administered,
+        })
+    return digests
+
+
+def _date(value) -> str:
+    return value.date().isoformat() if isinstance(value, datetime) else str(value)
+
+
+def render_digest(frequency: str, digest: LocationDigest, period_end: datetime, locale: str = None) -> RenderedDigest:
+    """Render the parts of a digest shared by everyone in the location."""
+    template = get_template("digest", locale)
+    values = {"state": digest.state, "district": digest.district, "frequency": frequency,
+              "label": template[frequency].render({}), "date": _date(period_end)}
+    parts = []
+    if digest.outbreak_total:
+        parts.append(template["outbreak_header"].render({"total": digest.outbreak_total, "cases": digest.outbreak_cases}))
+        item = template["outbreak_item"]
+        parts += [item.render({**o, "report_date": _date(o["report_date"])}) for o in digest.outbreaks]
+        if digest.outbreak_total > len(digest.outbreaks):
+            parts.append(template["outbreak_more"].render({"more": digest.outbreak_total - len(digest.outbreaks)}))
+        parts.append("\n")
+    if digest.campaign_total:
+        parts.append(template["campaign_header"].render({"total": digest.campaign_total}))
+        for c in digest.campaigns:
+            item = template["ongoing_item" if c["status"] == "ongoing" else "upcoming_item"]
+            parts.append(item.render({**c, "start_date": _date(c["start_date"]), "end_date": _date(c["end_date"])}))
+        if digest.campaign_total > len(digest.campaigns):
+            parts.append(template["campaign_more"].render({"more": digest.campaign_total - len(digest.campaigns)}))
+        parts.append("\n")
+    details = "".join(parts)
+
+    return RenderedDigest(
+        subject=template["subject"].render(values),
+        email_body=template["intro"].render(values) + details,
+        whatsapp_body=template["whatsapp_intro"].render(values) + details,
+        greeting=template.greeting,
+        footer=template.footer,
+    )
+
+
+def _wait_oldest(pending: deque, stats: dict):
+    emails, messages = pending.popleft().result()
+    stats["emails_sent"] += emails
+    stats["whatsapp_sent"] += messages
+
+
+def _send_batch(emails: list, messages: list) -> Tuple[int, int]:
+    return scheduler.send_email_batch(emails), whatsapp.send_whatsapp_batch(messages)
+
+
+def run_digest(frequency: str, period_end: datetime = None, progress=None) -> dict:
+    """Build and send one digest run; ``progress(done, total)`` is called per batch."""
+    if frequency not in DIGEST_WINDOWS:
+        raise ValueError(f"Unknown digest frequency '{frequency}'")
+    period_end = period_end or _utcnow()
+    started = time.perf_counter()
+    stats = {"frequency": frequency, "period_end": period_end.isoformat(), "locations": 0, "subscribers": 0,
+             "recipients": 0, "emails_sent": 0, "whatsapp_sent": 0}
+
+    db = SessionLocal()
+    try:
+        digests = compute_location_digests(db, frequency, period_end)
+        stats["locations"] = sum(1 for digest in digests.values() if not digest.is_empty)
+        subscribed = (User.digest_frequency == frequency, User.is_active == True)
+        total = db.query(func.count(User.id)).filter(*subscribed).scalar() or 0
+        stats["subscribers"] = total
+
+        sender = scheduler._smtp_settings()[2] or ""
+        # Per location and locale: the prepared email and the WhatsApp text, or None when there is no news
+        rendered: Dict[tuple, Optional[Tuple[PreparedEmail, str]]] = {}
+        pending = deque()
+        emails, messages = [], []
+        workers = max(1, DIGEST_SEND_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="digest") as executor:
+            subscribers = (
+                db.query(User.email, User.full_name, User.whatsapp_number, User.location_id, User.locale)
+                .filter(*subscribed)
+                .order_by(User.location_id, User.id)
+                .yield_per(DIGEST_BATCH_SIZE)
+            )
+            for done, user in enumerate(subscribers, start=1):
+                key = (user.location_id, user.locale)
+                if key not in rendered:
+                    digest = digests.get(user.location_id)
+                    if digest is None or digest.is_empty:
+                        rendered[key] = None
+                    else:
+                        message = render_digest(frequency, digest, period_end, user.locale)
+                        rendered[key] = (message.prepared_email(), message.whatsapp_body)
+                if rendered[key] is not None:
+                    prepared, whatsapp_body = rendered[key]
+                    stats["recipients"] += 1
+                    if user.email:
+                        emails.append((user.email, prepared.for_recipient(sender, user.email, user.full_name)))
+                    if user.whatsapp_number:
+                        messages.append((user.whatsapp_number, whatsapp_body))
+
+                if len(emails) + len(messages) >= DIGEST_BATCH_SIZE:
+                    pending.append(executor.submit(_send_batch, emails, messages))
+                    emails, messages = [], []
+                    # Keep a bounded number of batches in flight so memory stays flat
+                    while len(pending) > workers * 2:
+                        _wait_oldest(pending, stats)
+                    if progress is not None:
+                        progress(done, total)
+            if emails or messages:
+                pending.append(executor.submit(_send_batch, emails, messages))
+            while pending:
+                _wait_oldest(pending, stats)
+    finally:
+        db.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+@job_handler("digest")
+def run_digest_job(ctx):
+    period_end = datetime.fromisoformat(ctx.params["period_end"]) if ctx.params.get("period_end") else None
+    return run_digest(
+        ctx.params["frequency"], period_end,
+        progress=lambda done, total: ctx.progress(done, total, message=f"Sent to {done}/{total} subscribers"),
+    )
+
+
+def due_run(frequency: str, now: datetime) -> datetime:
+    """Start of the most recent scheduled period for ``frequency`` at or before ``now``."""
+    run = now.replace(hour=DIGEST_HOUR, minute=0, second=0, microsecond=0)
+    if frequency == "weekly":
+        run -= timedelta(days=(now.weekday() - DIGEST_WEEKDAY) % 7)
+    while run > now:
+        run -= DIGEST_WINDOWS[frequency]
+    return run
+
+
+def queue_due_digests(now: datetime = None) -> List[str]:
+    """Queue the current period's digests unless some worker already did."""
+    now = now or _utcnow()
+    queued = []
+    for frequency in DIGEST_WINDOWS:
+        run = due_run(frequency, now)
+        if now - run > timedelta(hours=DIGEST_GRACE_HOURS):
+            continue
+        job_id = enqueue("digest", {"frequency": frequency, "period_end": run.isoformat()}, job_id=f"digest-{frequency}-{run:%Y%m%d}")
+        if job_id:
+            queued.append(job_id)
+    return queued
+
+
+class DigestScheduler:
+    """Background thread that checks every ``DIGEST_CHECK_SECONDS`` for due digests
+    and for the daily archive run (``ARCHIVE_SCHEDULE``)."""
+
+    def __init__(self, interval: int = DIGEST_CHECK_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="digest-scheduler", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                queue_due_digests()
+            except Exception as e:
+                print(f"Digest scheduling failed: {e}")
+            try:
+                queue_due_archive()
+            except Exception as e:
+                print(f"Archive scheduling failed: {e}")
+
+
+digest_scheduler = DigestScheduler()
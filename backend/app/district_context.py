@@ -0,0 +1,233 @@
+"""
+Compact per-district health summaries for chat prompts.
+
+Querying outbreaks on every chat message would put the health tables on the
+chat path, so the summaries are precomputed, one per ``location_id`` (so a
+profile spelled "TAMIL NADU"/"chennai " reads the same summary as the
+canonical names) and headed with the location's canonical names.
+``rebuild_all`` builds every district at startup. The change listener marks only the districts touched by a
+write as stale (including the district a moved record used to count in), and
+they are recomputed on their next lookup. A lookup is a dict read.
+
+Each summary is trimmed to ``CHAT_CONTEXT_TOKENS`` so prompt size stays
+bounded however much data a district has. Entries also expire after
+``CHAT_CONTEXT_TTL`` so old outbreaks age out of the window and writes made
+through other workers are picked up.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .events import DataChange, add_listener
+from .models import Location, Outbreak, Vaccination
+
+CHAT_CONTEXT_ENABLED = os.getenv("CHAT_CONTEXT_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+# Outbreaks reported within this many days count as active
+CHAT_CONTEXT_OUTBREAK_DAYS = int(os.getenv("CHAT_CONTEXT_OUTBREAK_DAYS", "30"))
+# Upper bound for one summary, estimated at CHARS_PER_TOKEN characters per token
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "200"))
+CHAT_CONTEXT_TTL = float(os.getenv("CHAT_CONTEXT_TTL", "300"))
+CHARS_PER_TOKEN = 4
+
+SEVERITY_RANK = {"low": 1, "moderate": 2, "high": 3}
+
+LocationId = int
+RecordKey = Tuple[str, int]
+
+
+def _utcnow() -> datetime:
+    # Report and campaign dates are stored as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _date(value) -> str:
+    return value.date().isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _fit(title: str, items: List[str], budget: int) -> str:
+    """``title`` followed by as many ``items`` as fit in ``budget`` characters."""
+    line = title
+    for i, item in enumerate(items):
+        more = len(items) - i - 1
+        candidate = f"{line}{' ' if i == 0 else '; '}{item}"
+        if len(candidate) + (len(f" (+{more} more)") if more else 0) > budget:
+            return f"{line} (+{len(items) - i} more)"
+        line = candidate
+    return line
+
+
+def summarize_outbreaks(rows: list) -> List[str]:
+    """One entry per disease, most severe and most cases first."""
+    by_disease: Dict[str, dict] = {}
+    for row in rows:
+        totals = by_disease.setdefault(row.disease, {"cases": 0, "deaths": 0, "rank": 0, "severity": None})
+        totals["cases"] += row.cases_reported or 0
+        totals["deaths"] += row.deaths or 0
+        rank = SEVERITY_RANK.get(str(row.severity or "").strip().lower(), 0)
+        if rank > totals["rank"] or totals["severity"] is None:
+            totals["rank"], totals["severity"] = rank, row.severity
+    ranked = sorted(by_disease.items(), key=lambda item: (-item[1]["rank"], -item[1]["cases"], item[0] or ""))
+    return [
+        f"{disease} {t['cases']} cases, {t['deaths']} deaths" + (f" ({t['severity']})" if t["severity"] else "")
+        for disease, t in ranked
+    ]
+
+
+def summarize_campaigns(rows: list) -> List[str]:
+    """Running campaigns, the ones ending soonest first."""
+    ordered = sorted(rows, key=lambda row: row.end_date)
+    return [f"{row.vaccine_name} for {row.target_population} until {_date(row.end_date)}" for row in ordered]
+
+
+def render_summary(state: str, district: str, outbreaks: List[str], campaigns: List[str], now: datetime,
+                   token_budget: int = CHAT_CONTEXT_TOKENS) -> str:
+    budget = token_budget * CHARS_PER_TOKEN
+    header = f"Local health data for {district}, {state} as of {_date(now)}:"
+    if not outbreaks and not campaigns:
+        return f"{header} no active outbreaks or running vaccination campaigns are recorded."
+    lines = [header]
+    remaining = budget - len(header)
+    if outbreaks:
+        # Outbreaks take precedence; campaigns get what is left
+        reserve = min(remaining // 3, 120) if campaigns else 0
+        lines.append(_fit(f"Active outbreaks (last {CHAT_CONTEXT_OUTBREAK_DAYS} days):", outbreaks, remaining - reserve))
+        remaining -= len(lines[-1]) + 1
+    if campaigns:
+        lines.append(_fit("Running vaccination campaigns:", campaigns, remaining))
+    return "\n".join(lines)
+
+
+class DistrictContextCache:
+    """Per-location summaries, rebuilt lazily after writes."""
+
+    def __init__(self, ttl: float = CHAT_CONTEXT_TTL, token_budget: int = CHAT_CONTEXT_TOKENS):
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self._entries: Dict[LocationId, Tuple[str, float]] = {}
+        self._stale: Set[LocationId] = set()
+        # Canonical names of the cached locations, as published write records spell them
+        self._ids: Dict[Tuple[str, str], LocationId] = {}
+        # Which district each active record was counted in, to catch moves
+        self._located: Dict[RecordKey, LocationId] = {}
+        self._records: Dict[LocationId, Set[RecordKey]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, location_id: int) -> str:
+        if not CHAT_CONTEXT_ENABLED or location_id is None:
+            return ""
+        key = location_id
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic() and key not in self._stale:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        try:
+            return self.refresh(key)
+        except Exception as e:
+            print(f"District context refresh failed for location {location_id}: {e}")
+            return entry[0] if entry is not None else ""
+
+    def refresh(self, location: LocationId) -> str:
+        # Cleared before reading so a write that lands during the query marks it again
+        with self._lock:
+            self._stale.discard(location)
+        db = SessionLocal()
+        try:
+            return self._build(db, location).get(location, "")
+        finally:
+            db.close()
+
+    def rebuild_all(self) -> int:
+        """Precompute every district with active data; returns how many were built."""
+        if not CHAT_CONTEXT_ENABLED:
+            return 0
+        db = SessionLocal()
+        try:
+            return len(self._build(db))
+        finally:
+            db.close()
+
+    def _build(self, db: Session, location: LocationId = None) -> Dict[LocationId, str]:
+        now = _utcnow()
+        since = now - timedelta(days=CHAT_CONTEXT_OUTBREAK_DAYS)
+        outbreak_where = and_(Outbreak.report_date >= since, Outbreak.report_date <= now)
+        campaign_where = and_(Vaccination.start_date <= now, Vaccination.end_date >= now)
+        if location is not None:
+            outbreak_where = and_(outbreak_where, Outbreak.location_id == location)
+            campaign_where = and_(campaign_where, Vaccination.location_id == location)
+
+        outbreaks: Dict[LocationId, list] = {}
+        campaigns: Dict[LocationId, list] = {}
+        records: Dict[LocationId, Set[RecordKey]] = {} if location is None else {location: set()}
+        query = select(Outbreak.id, Outbreak.location_id, Outbreak.disease, Outbreak.cases_reported,
+                       Outbreak.deaths, Outbreak.severity).where(outbreak_where, Outbreak.location_id.isnot(None))
+        for row in db.execute(query):
+            key = row.location_id
+            outbreaks.setdefault(key, []).append(row)
+            records.setdefault(key, set()).add(("outbreaks", row.id))
+        query = select(Vaccination.id, Vaccination.location_id, Vaccination.vaccine_name,
+                       Vaccination.target_population, Vaccination.end_date).where(campaign_where, Vaccination.location_id.isnot(None))
+        for row in db.execute(query):
+            key = row.location_id
+            campaigns.setdefault(key, []).append(row)
+            records.setdefault(key, set()).add(("vaccinations", row.id))
+
+        names = {row.id: (row.state, row.district) for row in db.execute(
+            select(Location.id, Location.state, Location.district).where(Location.id.in_(list(records)))
+        )}
+        summaries = {
+            key: render_summary(names[key][0], names[key][1], summarize_outbreaks(outbreaks.get(key, [])),
+                                summarize_campaigns(campaigns.get(key, [])), now, self.token_budget)
+            for key in records if key in names
+        }
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if location is None:
+                self._entries.clear()
+                self._ids.clear()
+                self._located.clear()
+                self._records.clear()
+            for key, summary in summaries.items():
+                self._entries[key] = (summary, expires)
+                self._ids[names[key]] = key
+                for record in self._records.pop(key, ()):
+                    if self._located.get(record) == key:
+                        del self._located[record]
+                self._records[key] = records[key]
+                for record in records[key]:
+                    self._located[record] = key
+        return summaries
+
+    def invalidate(self, change: DataChange):
+        with self._lock:
+            if not change.records:
+                # Changes without records (merged locations, reloads): any summary may be off
+                self._stale.update(self._entries)
+            for record in change.records:
+                # Written rows carry their location's canonical names; other locations have no entry yet
+                location = self._ids.get((record.get("state"), record.get("district")))
+                if location is not None:
+                    self._stale.add(location)
+                previous = self._located.get((change.table, record.get("id")))
+                if previous is not None:
+                    self._stale.add(previous)
+
+    def stats(self) -> dict:
+        return {"districts": len(self._entries), "stale": len(self._stale), "hits": self.hits, "misses": self.misses}
+
+
+district_context = DistrictContextCache()
+
+
+@add_listener
+def _refresh_on_change(change: DataChange):
+    if change.table in ("outbreaks", "vaccinations"):
+        district_context.invalidate(change)
@@ -0,0 +1,44 @@
+"""
+In-process notifications for committed data changes.
+
+Admin write paths call ``publish_change`` once their transaction has committed.
+Components that derive state from the health tables (response cache, real-time
+hub, ...) register with ``add_listener``. A failing listener is reported and
+skipped; it never fails the write that triggered it.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+# Event type sent to clients for each table
+EVENT_TYPES = {"outbreaks": "outbreak", "vaccinations": "vaccination"}
+
+
+@dataclass
+class DataChange:
+    table: str
+    action: str  # created, updated, deleted, imported, upserted
+    records: List[dict] = field(default_factory=list)
+
+
+_listeners: List[Callable[[DataChange], None]] = []
+
+
+def add_listener(listener: Callable[[DataChange], None]):
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def remove_listener(listener: Callable[[DataChange], None]):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def publish_change(table: str, action: str, records: List[dict] = None) -> DataChange:
+    change = DataChange(table, action, records or [])
+    for listener in list(_listeners):
+        try:
+            listener(change)
+        except Exception as e:
+            print(f"Change listener {getattr(listener, '__name__', listener)} failed: {e}")
+    return change
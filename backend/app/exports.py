@@ -0,0 +1,204 @@
+"""
+Bulk export of the outbreak and vaccination tables for analysts.
+
+The JSON listings page through rows for the UI; pulling the whole data set
+through them costs a count and an offset query per page and several times the
+bytes. ``iter_export`` streams one table, optionally filtered by date range
+and location, in one of:
+
+* ``csv.gz``: gzip-compressed CSV, no extra dependency.
+* ``parquet``: Parquet with zstd-compressed row groups.
+* ``arrow``: Arrow IPC stream format with zstd-compressed record batches.
+
+Rows are read in id order with ``yield_per``. On PostgreSQL this runs on a
+server-side cursor. Each batch of ``EXPORT_BATCH_SIZE`` rows is encoded and
+handed on before the next one is fetched. Memory therefore stays at one batch
+whatever the table size; only the Parquet footer grows, by one entry per row
+group.
+
+Parquet and Arrow need ``pyarrow``. It is imported when one of those formats
+is requested, so it never loads at startup. Archived rows are not exported;
+exported archive months are already gzip NDJSON files (app/archive.py).
+"""
+import os
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer
+
+from . import models, schemas
+from .database import ReadSessionLocal
+from .locations import location_condition
+from .serialization import iter_csv, query_rows, schema_fields
+
+# Rows per database fetch, and per Parquet row group / Arrow record batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+
+EXPORT_TABLES = {
+    "outbreaks": (models.Outbreak, schemas.Outbreak, "report_date"),
+    "vaccinations": (models.Vaccination, schemas.Vaccination, "start_date"),
+}
+
+EXPORT_FORMATS = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class ExportError(ValueError):
+    """Unknown table or format, or a format whose library is not installed."""
+
+
+def check_export(table: str, format: str):
+    if table not in EXPORT_TABLES:
+        raise ExportError(f"Unknown table {table!r}")
+    if format not in EXPORT_FORMATS:
+        raise ExportError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if format != "csv.gz":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportError(f"{format} export needs pyarrow installed")
+
+
+def _export_query(db, table: str, state: str = None, district: str = None, since: date = None, until: date = None):
+    model, schema, date_field = EXPORT_TABLES[table]
+    query = query_rows(db, model, schema)
+    if state or district:
+        query = query.filter(location_condition(model.location_id, state, district))
+    column = getattr(model, date_field)
+    if since:
+        query = query.filter(column >= datetime.combine(since, time.min))
+    if until:
+        query = query.filter(column < datetime.combine(until, time.min) + timedelta(days=1))
+    return query.order_by(model.id).yield_per(EXPORT_BATCH_SIZE)
+
+
+def _batches(rows, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(tuple(row))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _arrow_schema(table: str):
+    import pyarrow as pa
+
+    model, schema, _ = EXPORT_TABLES[table]
+    fields = []
+    for name in schema_fields(schema):
+        column_type = model.__table__.c[name].type
+        if isinstance(column_type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column_type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+        elif isinstance(column_type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+class _Chunks:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+        self.position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _iter_gzip_csv(fields: List[str], rows) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in iter_csv(fields, rows, EXPORT_BATCH_SIZE):
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _iter_arrow(table: str, format: str, rows) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    arrow_schema = _arrow_schema(table)
+    sink = _Chunks()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, arrow_schema, compression="zstd")
+    else:
+        writer = ipc.new_stream(sink, arrow_schema, options=ipc.IpcWriteOptions(compression="zstd"))
+    try:
+        for batch in _batches(rows, EXPORT_BATCH_SIZE):
+            columns = list(zip(*batch))
+            record_batch = pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, arrow_schema)], schema=arrow_schema
+            )
+            if format == "parquet":
+                writer.write_batch(record_batch, row_group_size=len(batch))
+            else:
+                writer.write_batch(record_batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_export(table: str, format: str, state: str = None, district: str = None,
+                since: date = None, until: date = None, db=None) -> Iterator[bytes]:
+    """Encoded chunks of ``table`` in ``format``; ``since``/``until`` are inclusive days.
+
+    Uses its own read session unless ``db`` is given, so a streaming response
+    can outlive the request's session. Call ``check_export`` first: errors
+    raised once streaming has started cannot become an HTTP status.
+    """
+    own_session = db is None
+    db = db if db is not None else ReadSessionLocal()
+    try:
+        rows = _export_query(db, table, state, district, since, until)
+        if format == "csv.gz":
+            yield from _iter_gzip_csv(schema_fields(EXPORT_TABLES[table][1]), rows)
+        else:
+            yield from _iter_arrow(table, format, rows)
+    finally:
+        if own_session:
+            db.close()
+
+
+def export_filename(table: str, format: str, since: Optional[date] = None, until: Optional[date] = None) -> str:
+    parts = [table] + [value.isoformat() for value in (since, until) if value]
+    return "_".join(parts) + "." + ("arrows" if format == "arrow" else format)
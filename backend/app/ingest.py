@@ -0,0 +1,471 @@
+"""
+Idempotent upserts for the outbreak and vaccination feeds.
+
+Rows are keyed on their natural id (``outbreak_id`` / ``campaign_id``) and
+carry a ``content_hash`` of their business fields. Re-importing a feed inserts
+new keys, rewrites only the rows whose hash differs and leaves the rest alone.
+Writes go out as ``INSERT ... ON CONFLICT DO UPDATE`` (PostgreSQL and SQLite)
+guarded by the hash, so replaying the same rows concurrently is a no-op.
+Outbreaks already moved to the archive (app/archive.py) are reported as
+``archived`` and not written again.
+
+Callers get inserted/updated/unchanged per key plus the subset of changes that
+are worth notifying subscribers about (new rows, severity increases, case-count
+jumps, moved or rescheduled campaigns).
+
+Feeds split over many files (or zips of them) are parsed and validated in a
+process pool, merged with last-file-wins dedup on the key, and then loaded
+through the same upsert path.
+"""
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import repeat
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .archive import ARCHIVED_TABLES, archived_keys
+from .changefeed import log_changes
+from .locations import assign_locations
+from .rollups import apply_changes
+from .serialization import rows_to_dicts, schema_columns, schema_fields
+
+UPSERT_CHUNK_SIZE = 500
+# An outbreak update notifies when cases grow by at least this many and by this fraction
+NOTIFY_CASE_JUMP_MIN = int(os.getenv("NOTIFY_CASE_JUMP_MIN", "10"))
+NOTIFY_CASE_JUMP_RATIO = float(os.getenv("NOTIFY_CASE_JUMP_RATIO", "0.25"))
+SEVERITY_RANK = {"low": 1, "moderate": 2, "high": 3}
+# Processes used to parse multi-file uploads (0 = one per CPU)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0")) or os.cpu_count() or 1
+MAX_ERRORS_PER_FILE = 50
+
+
+class CSVFormatError(ValueError):
+    pass
+
+
+def _severity_rank(value) -> int:
+    return SEVERITY_RANK.get(str(value or "").strip().lower(), 0)
+
+
+def outbreak_is_material(previous: dict, current: dict) -> bool:
+    if previous is None:
+        return True
+    if (previous["state"], previous["district"]) != (current["state"], current["district"]):
+        return True
+    if _severity_rank(current["severity"]) > _severity_rank(previous["severity"]):
+        return True
+    before = previous["cases_reported"] or 0
+    jump = (current["cases_reported"] or 0) - before
+    return jump >= NOTIFY_CASE_JUMP_MIN and jump >= NOTIFY_CASE_JUMP_RATIO * before
+
+
+def vaccination_is_material(previous: dict, current: dict) -> bool:
+    if previous is None:
+        return True
+    return any(previous[name] != current[name] for name in ("state", "district", "vaccine_name", "start_date"))
+
+
+@dataclass(frozen=True)
+class Feed:
+    table: str
+    model: type
+    schema: Type[BaseModel]
+    create_schema: Type[BaseModel]
+    key: str
+    required_columns: List[str]
+    is_material: Callable[[dict, dict], bool]
+
+    @property
+    def hash_fields(self) -> List[str]:
+        return schema_fields(self.create_schema)
+
+
+FEEDS = {
+    "outbreaks": Feed(
+        "outbreaks", models.Outbreak, schemas.Outbreak, schemas.OutbreakCreate, "outbreak_id",
+        ['outbreak_id', 'disease', 'report_date', 'state', 'district', 'cases_reported', 'deaths', 'severity', 'confirmed'],
+        outbreak_is_material,
+    ),
+    "vaccinations": Feed(
+        "vaccinations", models.Vaccination, schemas.Vaccination, schemas.VaccinationCreate, "campaign_id",
+        ['campaign_id', 'state', 'district', 'start_date', 'end_date', 'vaccine_name', 'target_population', 'doses_allocated', 'doses_administered'],
+        vaccination_is_material,
+    ),
+}
+FEEDS_BY_MODEL = {feed.model: feed for feed in FEEDS.values()}
+
+
+def _canonical(value) -> str:
+    if value is None:
+        return "\x00"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def content_hash(values: dict, fields: List[str]) -> str:
+    """Stable digest of the business fields of a row."""
+    text = "\x1f".join(_canonical(values.get(name)) for name in fields)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _hash_on_flush(mapper, connection, target):
+    feed = FEEDS_BY_MODEL[mapper.class_]
+    target.content_hash = content_hash({name: getattr(target, name) for name in feed.hash_fields}, feed.hash_fields)
+
+
+for _model in FEEDS_BY_MODEL:
+    event.listen(_model, "before_insert", _hash_on_flush)
+    event.listen(_model, "before_update", _hash_on_flush)
+
+
+@dataclass
+class UpsertResult:
+    statuses: Dict[str, str] = field(default_factory=dict)  # key -> inserted/updated/unchanged/skipped/archived
+    ids: Dict[str, int] = field(default_factory=dict)
+    changed: List[dict] = field(default_factory=list)   # rows as stored after the write
+    material: List[dict] = field(default_factory=list)  # subset worth notifying about
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for status in self.statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+
+def _chunks(items: list, size: int = UPSERT_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _load_by_keys(db: Session, feed: Feed, keys: list, with_hash: bool = False) -> Dict[str, dict]:
+    key_column = getattr(feed.model, feed.key)
+    columns = schema_columns(feed.model, feed.schema)
+    fields = schema_fields(feed.schema)
+    if with_hash:
+        columns = columns + [feed.model.content_hash]
+        fields = fields + ["content_hash"]
+    records = {}
+    for chunk in _chunks(keys):
+        for record in rows_to_dicts(fields, db.query(*columns).filter(key_column.in_(chunk)).all()):
+            records[record[feed.key]] = record
+    return records
+
+
+def _write(db: Session, feed: Feed, rows: List[dict], update_existing: bool, on_chunk: Callable[[int, int], None] = None):
+    table = feed.model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        # One statement executed with a parameter list (executemany) compiles once
+        # and stays in the statement cache; inlining VALUES would recompile per chunk.
+        stmt = dialect_insert(table)
+        if update_existing:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[feed.key],
+                set_={name: stmt.excluded[name] for name in rows[0] if name != feed.key},
+                where=table.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[feed.key])
+
+    written = 0
+    for chunk in _chunks(rows):
+        if on_chunk is not None:
+            on_chunk(written, len(rows))
+        written += len(chunk)
+        if dialect_insert is not None:
+            db.execute(stmt, chunk)
+            continue
+
+        # Other databases: rows are already classified, split into INSERT and UPDATE
+        key_column = getattr(feed.model, feed.key)
+        ids = dict(db.query(key_column, feed.model.id).filter(key_column.in_([row[feed.key] for row in chunk])).all())
+        inserts = [row for row in chunk if row[feed.key] not in ids]
+        updates = [{"id": ids[row[feed.key]], **row} for row in chunk if row[feed.key] in ids]
+        if inserts:
+            db.execute(insert(feed.model), inserts)
+        if updates and update_existing:
+            db.execute(update(feed.model), updates)
+
+
+def upsert_rows(db: Session, feed_name: str, rows: List[dict], update_existing: bool = True, on_chunk: Callable[[int, int], None] = None) -> UpsertResult:
+    """Insert new keys and rewrite changed rows; the caller commits.
+
+    When a key appears more than once the last row wins. With
+    ``update_existing=False`` existing keys are reported as ``skipped``.
+    ``on_chunk(written, total)`` is called before each chunk is written.
+    Locations are resolved (and names respelled canonically) first; the daily
+    rollups are updated in the same transaction.
+    """
+    feed = FEEDS[feed_name]
+    fields = feed.hash_fields
+    incoming = {}
+    for row in rows:
+        values = {name: row.get(name) for name in fields}
+        values["content_hash"] = row.get("content_hash")
+        incoming[values[feed.key]] = values
+    spellings = {key: (values["state"], values["district"]) for key, values in incoming.items()}
+    assign_locations(db, incoming.values())
+    for key, values in incoming.items():
+        # Hashes computed by the parse workers cover the names as they were spelled in the file
+        if not values["content_hash"] or spellings[key] != (values["state"], values["district"]):
+            values["content_hash"] = content_hash(values, fields)
+
+    previous = _load_by_keys(db, feed, list(incoming), with_hash=True)
+    archived = set()
+    if feed.table in ARCHIVED_TABLES:
+        # Not in the hot table's unique index any more; inserting them again would count them twice
+        spec = ARCHIVED_TABLES[feed.table]
+        archived = archived_keys(db, spec, feed.key, {
+            key: values[spec.time_column] for key, values in incoming.items() if key not in previous
+        })
+    result = UpsertResult()
+    writes = []
+    for key, values in incoming.items():
+        stored = previous.get(key)
+        if key in archived:
+            result.statuses[key] = "archived"
+        elif stored is None:
+            result.statuses[key] = "inserted"
+            writes.append(values)
+        elif not update_existing:
+            result.statuses[key] = "skipped"
+        elif (stored["content_hash"] or content_hash(stored, fields)) != values["content_hash"]:
+            result.statuses[key] = "updated"
+            writes.append(values)
+        else:
+            result.statuses[key] = "unchanged"
+    if writes:
+        _write(db, feed, writes, update_existing, on_chunk)
+
+    changed_keys = [key for key, status in result.statuses.items() if status in ("inserted", "updated")]
+    current = _load_by_keys(db, feed, changed_keys)
+    result.ids = {key: record["id"] for key, record in previous.items()}
+    result.ids.update({key: record["id"] for key, record in current.items()})
+    result.changed = [current[key] for key in changed_keys if key in current]
+    result.material = [record for record in result.changed if feed.is_material(previous.get(record[feed.key]), record)]
+    replaced = [previous[key] for key, status in result.statuses.items() if status == "updated"]
+    apply_changes(db, feed_name, replaced, result.changed)
+    log_changes(db, feed_name, replaced, result.changed)
+    return result
+
+
+def refresh_content_hashes(db: Session, feed_name: str, ids: list):
+    """Recompute ``content_hash`` for rows changed by partial bulk updates."""
+    feed = FEEDS[feed_name]
+    if not ids:
+        return
+    fields = feed.hash_fields
+    columns = [feed.model.id] + schema_columns(feed.model, feed.create_schema)
+    for chunk in _chunks(list(ids)):
+        rows = rows_to_dicts(["id"] + fields, db.query(*columns).filter(feed.model.id.in_(chunk)).all())
+        db.execute(update(feed.model), [{"id": row["id"], "content_hash": content_hash(row, fields)} for row in rows])
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y", "t")
+    return bool(value)
+
+
+def _outbreak_row(row: dict, to_datetime) -> dict:
+    return {
+        "outbreak_id": str(row['outbreak_id']),
+        "disease": row['disease'],
+        "report_date": to_datetime(row['report_date']),
+        "country": row.get('country') or 'India',
+        "state": row['state'],
+        "district": row['district'],
+        "cases_reported": int(row['cases_reported']),
+        "deaths": int(row['deaths']),
+        "severity": row['severity'],
+        "confirmed": _to_bool(row['confirmed']),
+        "source_url": row.get('source_url') or '',
+        "notes": row.get('notes') or '',
+    }
+
+
+def _vaccination_row(row: dict, to_datetime) -> dict:
+    return {
+        "campaign_id": str(row['campaign_id']),
+        "country": row.get('country') or 'India',
+        "state": row['state'],
+        "district": row['district'],
+        "start_date": to_datetime(row['start_date']),
+        "end_date": to_datetime(row['end_date']),
+        "vaccine_name": row['vaccine_name'],
+        "target_population": row['target_population'],
+        "doses_allocated": int(row['doses_allocated']),
+        "doses_administered": int(row['doses_administered']),
+        "partner_org": row.get('partner_org') or '',
+        "notes": row.get('notes') or '',
+    }
+
+
+ROW_PARSERS = {"outbreaks": _outbreak_row, "vaccinations": _vaccination_row}
+DATE_COLUMNS = {"outbreaks": ["report_date"], "vaccinations": ["start_date", "end_date"]}
+
+
+def read_csv_rows(feed_name: str, contents: bytes) -> List[dict]:
+    """Parse an uploaded CSV into column dicts ready for ``upsert_rows``."""
+    # Imported lazily: pandas adds noticeable time to every worker start
+    import pandas as pd
+
+    feed = FEEDS[feed_name]
+    df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+    if not all(col in df.columns for col in feed.required_columns):
+        raise CSVFormatError(f"CSV must contain columns: {', '.join(feed.required_columns)}")
+
+    df = df.astype(object).where(df.notna(), None)
+    to_datetime = lambda value: pd.to_datetime(value).to_pydatetime()
+    parse = ROW_PARSERS[feed_name]
+    return [parse(row, to_datetime) for row in df.to_dict("records")]
+
+
+@dataclass
+class ParsedFile:
+    name: str
+    rows: List[tuple]  # hash fields of the feed followed by content_hash
+    total_rows: int = 0
+    invalid_rows: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def parse_csv_file(feed_name: str, name: str, contents: bytes) -> ParsedFile:
+    """Parse and validate one file; bad rows are reported instead of failing the file.
+
+    Runs in pool processes, so it only returns plain picklable data.
+    """
+    import pandas as pd
+
+    feed = FEEDS[feed_name]
+    fields = feed.hash_fields
+    try:
+        df = pd.read_csv(io.BytesIO(contents))
+    except Exception as e:
+        return ParsedFile(name, [], errors=[f"{name}: {e}"])
+    missing = [col for col in feed.required_columns if col not in df.columns]
+    if missing:
+        return ParsedFile(name, [], total_rows=len(df), invalid_rows=len(df), errors=[f"{name}: missing columns: {', '.join(missing)}"])
+
+    # Convert date columns in one vectorized pass; cells in another format fall
+    # back to per-value parsing below (and become row errors if that fails too).
+    for column in DATE_COLUMNS[feed_name]:
+        converted = pd.to_datetime(df[column], errors="coerce")
+        df[column] = converted.astype(object).where(converted.notna(), df[column])
+    df = df.astype(object).where(df.notna(), None)
+
+    def to_datetime(value):
+        if isinstance(value, datetime):
+            return value.to_pydatetime() if hasattr(value, "to_pydatetime") else value
+        return pd.to_datetime(value).to_pydatetime()
+
+    parse = ROW_PARSERS[feed_name]
+    parsed = ParsedFile(name, [], total_rows=len(df))
+    for line, record in enumerate(df.to_dict("records"), start=2):
+        try:
+            values = parse(record, to_datetime)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            parsed.invalid_rows += 1
+            if len(parsed.errors) < MAX_ERRORS_PER_FILE:
+                parsed.errors.append(f"{name} line {line}: {e}")
+            continue
+        parsed.rows.append(tuple(values[column] for column in fields) + (content_hash(values, fields),))
+    return parsed
+
+
+def expand_uploads(files: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """Flatten uploaded ``.csv`` and ``.zip`` files into (name, csv bytes) pairs."""
+    expanded = []
+    for name, contents in files:
+        lower = name.lower()
+        if lower.endswith(".csv"):
+            expanded.append((name, contents))
+        elif lower.endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(contents)) as archive:
+                for member in sorted(archive.namelist()):
+                    base = os.path.basename(member)
+                    if member.lower().endswith(".csv") and not base.startswith(".") and "__MACOSX" not in member:
+                        expanded.append((f"{name}/{member}", archive.read(member)))
+        else:
+            raise CSVFormatError(f"{name}: only .csv and .zip files are accepted")
+    if not expanded:
+        raise CSVFormatError("No CSV files found in the upload")
+    return expanded
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: forking a server process that already runs threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_files(feed_name: str, files: List[Tuple[str, bytes]], workers: int = None) -> List[ParsedFile]:
+    """Parse files in parallel (one task per file), keeping input order."""
+    workers = min(workers or INGEST_WORKERS, len(files))
+    if workers <= 1:
+        return [parse_csv_file(feed_name, name, contents) for name, contents in files]
+    names = [name for name, _ in files]
+    contents = [data for _, data in files]
+    try:
+        return list(_process_pool(workers).map(parse_csv_file, repeat(feed_name), names, contents))
+    except BrokenProcessPool as e:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        print(f"Ingest process pool failed, parsing in-process: {e}")
+        shutdown_process_pool()
+        return [parse_csv_file(feed_name, name, data) for name, data in files]
+
+
+def merge_parsed(feed_name: str, parsed: List[ParsedFile]) -> Tuple[List[dict], int]:
+    """Combine parsed files into one row per key (later files win); returns rows and duplicate count."""
+    feed = FEEDS[feed_name]
+    fields = feed.hash_fields + ["content_hash"]
+    key_index = fields.index(feed.key)
+    merged = {}
+    duplicates = 0
+    for parsed_file in parsed:
+        for row in parsed_file.rows:
+            key = row[key_index]
+            if key in merged:
+                duplicates += 1
+            merged[key] = row
+    return [dict(zip(fields, row)) for row in merged.values()], duplicates
@@ -0,0 +1,139 @@
+"""
+Keyword intent matching for the chatbot's fallback answers.
+
+All keywords of all intents are compiled into one regular expression shaped
+like a trie (shared prefixes are factored out), so a message is scanned once
+and the cost depends on its length, not on how many keywords there are.
+Keywords cover English plus Hindi and Tamil, both in their own scripts and as
+common Latin transliterations. A keyword ending in ``*`` matches as a word
+prefix ("vaccin*" matches "vaccines", "vaccination"); other keywords must be
+whole words.
+
+When several intents match, the one with the highest ``priority`` wins, then
+the one with the most keyword hits, then the one mentioned first.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    priority: int
+    keywords: tuple
+
+
+@dataclass
+class IntentMatch:
+    intent: str
+    priority: int
+    hits: int
+    position: int
+    keywords: List[str]
+
+
+# Disease intents outrank general topics so "malaria fever" is about malaria
+INTENTS = [
+    Intent("malaria", 30, (
+        "malaria*", "maleria*", "maleriya", "मलेरिया", "மலேரியா", "maleriyaa",
+    )),
+    Intent("dengue", 30, (
+        "dengue", "dengu", "dengi", "डेंगू", "डेंगी", "டெங்கு", "tengu", "dengue fever",
+    )),
+    Intent("covid", 30, (
+        "covid*", "corona*", "sars-cov-2", "kovid", "korona", "कोविड", "कोरोना", "கொரோனா", "கோவிட்", "koronaa",
+    )),
+    Intent("cholera", 30, (
+        "cholera", "haija", "haiza", "हैजा", "காலரா", "kalara", "kaalaraa",
+    )),
+    Intent("typhoid", 30, (
+        "typhoid", "taifaid", "motijhara", "टाइफाइड", "मोतीझरा", "டைபாய்டு", "taipaidu",
+    )),
+    Intent("fever", 20, (
+        "fever*", "feverish", "temperature", "bukhar", "bukhaar", "jwar", "बुखार", "ज्वर",
+        "காய்ச்சல்", "kaichal", "kaaichal", "kaychal", "kaichchal",
+    )),
+    Intent("vaccine", 20, (
+        "vaccin*", "vaccine*", "immuniz*", "immunis*", "booster*", "tika", "teeka", "tike", "teeke",
+        "tikakaran", "teekakaran", "टीका", "टीके", "टीकाकरण", "vaccine lagwana", "தடுப்பூசி", "thadupoosi",
+        "thaduppoosi", "vaksin",
+    )),
+    Intent("symptom", 10, (
+        "symptom*", "sign of", "signs of", "lakshan", "lakshana", "लक्षण", "அறிகுறி*", "arikuri", "arigurigal",
+    )),
+]
+
+
+# Word characters, counting Indic vowel signs and viramas (which ``\w`` does not)
+WORD_CHAR = r"[\w\u0900-\u0DFF]"
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal: Optional[str] = None  # "word" or "prefix"
+
+
+def _trie_pattern(node: _TrieNode) -> str:
+    alternatives = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.children.items())]
+    # Longer keywords are tried first; a keyword ending here comes last
+    if node.terminal == "word":
+        alternatives.append(f"(?!{WORD_CHAR})")
+    elif node.terminal == "prefix":
+        alternatives.append("")
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+def compile_keywords(keywords: Iterable[str]) -> "re.Pattern":
+    """One pattern matching any of ``keywords`` (``*`` suffix = prefix match)."""
+    root = _TrieNode()
+    for keyword in keywords:
+        prefix = keyword.endswith("*")
+        node = root
+        for char in keyword.rstrip("*").casefold():
+            node = node.children.setdefault(char, _TrieNode())
+        if node.terminal != "prefix":
+            node.terminal = "prefix" if prefix else "word"
+    if not root.children:
+        return re.compile(r"(?!x)x")
+    return re.compile(f"(?<!{WORD_CHAR})" + _trie_pattern(root))
+
+
+class IntentClassifier:
+    def __init__(self, intents: List[Intent] = None):
+        self.intents = {intent.name: intent for intent in (INTENTS if intents is None else intents)}
+        self._intent_of: Dict[str, str] = {}
+        for intent in self.intents.values():
+            for keyword in intent.keywords:
+                # The first intent listing a keyword owns it
+                self._intent_of.setdefault(keyword.rstrip("*").casefold(), intent.name)
+        self._pattern = compile_keywords(
+            keyword for intent in self.intents.values() for keyword in intent.keywords
+        )
+
+    def classify(self, message: str) -> List[IntentMatch]:
+        """Matching intents, best first."""
+        matches: Dict[str, IntentMatch] = {}
+        for found in self._pattern.finditer(message.casefold()):
+            # A match ends where its keyword ends, so it is always a table entry
+            keyword = found.group(0)
+            name = self._intent_of[keyword]
+            match = matches.get(name)
+            if match is None:
+                matches[name] = IntentMatch(name, self.intents[name].priority, 1, found.start(), [keyword])
+            else:
+                match.hits += 1
+                match.keywords.append(keyword)
+        return sorted(matches.values(), key=lambda m: (-m.priority, -m.hits, m.position))
+
+    def best(self, message: str) -> Optional[str]:
+        ranked = self.classify(message)
+        return ranked[0].intent if ranked else None
+
+
+intent_classifier = IntentClassifier()
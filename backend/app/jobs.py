@@ -0,0 +1,277 @@
+"""
+Background jobs for long-running admin work.
+
+Jobs are rows in the ``jobs`` table, so status survives restarts and every
+worker process can answer status queries. Each process runs the jobs it
+accepts on a small thread pool (``JOB_WORKERS``). A job is claimed with a
+conditional ``UPDATE ... WHERE status = 'queued'`` before it runs, so jobs left
+queued by a worker that died are picked up exactly once by whichever worker
+starts next.
+
+While a process runs jobs, one background thread writes their heartbeat and
+latest progress every ``JOB_HEARTBEAT_SECONDS``, on every database, and in
+the same pass reads which of them were asked to cancel. A running job whose
+heartbeat is older than ``JOB_STALE_SECONDS`` is marked failed at startup.
+On SQLite a heartbeat waits while an import holds the write lock; the next
+one goes through once it commits.
+
+Handlers are plain functions registered with ``@job_handler(kind)``. They get
+a ``JobContext`` to report progress; reporting progress is also where a
+requested cancellation takes effect. Progress goes to memory only, so a
+report costs no database round trip.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from . import models
+from .database import SessionLocal
+from .serialization import dumps
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Minimum seconds between progress updates of a job
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "0.5"))
+# Seconds between heartbeat (and progress) writes for the jobs a process runs
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "5"))
+# Where uploaded files wait for their job to run
+JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR", os.path.join(tempfile.gettempdir(), "health_jobs"))
+
+# A running job without a heartbeat for this long is considered lost
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+# Finished jobs older than this many days are deleted by the daily archive run (0 keeps them)
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "30"))
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+_handlers: Dict[str, Callable] = {}
+_cancel_hooks: Dict[str, Callable] = {}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def job_handler(kind: str, on_cancel: Callable[[dict], None] = None):
+    """Register a handler; ``on_cancel(params)`` cleans up jobs cancelled before they ran."""
+    def register(func):
+        _handlers[kind] = func
+        if on_cancel is not None:
+            _cancel_hooks[kind] = on_cancel
+        return func
+    return register
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _update(job_id: str, only_if_status: tuple = None, **values) -> bool:
+    db = SessionLocal()
+    try:
+        query = db.query(models.Job).filter(models.Job.id == job_id)
+        if only_if_status:
+            query = query.filter(models.Job.status.in_(only_if_status))
+        updated = query.update(values, synchronize_session=False)
+        db.commit()
+        return bool(updated)
+    finally:
+        db.close()
+
+
+class JobContext:
+    def __init__(self, job_id: str, params: dict, live: dict = None):
+        self.job_id = job_id
+        self.params = params
+        self.live = live if live is not None else {}
+        self._last_write = 0.0
+
+    def cancel_requested(self) -> bool:
+        # Set by JobQueue.cancel in this process, or by the heartbeat from the table
+        return bool(self.live.get("cancel_requested"))
+
+    def progress(self, done: float, total: float = None, message: str = None, force: bool = False):
+        """Record progress (``done``/``total`` or a 0-1 fraction); raises JobCancelled on request."""
+        if self.cancel_requested():
+            raise JobCancelled()
+        now = time.monotonic()
+        if not force and now - self._last_write < JOB_PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        fraction = done / total if total else done
+        values = {"progress": round(min(max(fraction, 0.0), 1.0), 4)}
+        if message is not None:
+            values["message"] = message
+        self.live.update(values)
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._running: Dict[str, dict] = {}  # job id -> live progress
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            return self._executor
+
+    def start(self):
+        """Pick up jobs left over by a previous process."""
+        self._pool()
+        db = SessionLocal()
+        try:
+            # Jobs whose worker stopped reporting were interrupted mid-way; they are not retried
+            stale_before = _now() - timedelta(seconds=JOB_STALE_SECONDS)
+            db.query(models.Job).filter(models.Job.status == "running", models.Job.heartbeat_at < stale_before).update(
+                {"status": "failed", "error": "Interrupted by a restart", "finished_at": _now()},
+                synchronize_session=False,
+            )
+            db.commit()
+            queued = [job_id for (job_id,) in db.query(models.Job.id).filter(models.Job.status == "queued").order_by(models.Job.created_at)]
+        finally:
+            db.close()
+        for job_id in queued:
+            self._pool().submit(self._run, job_id)
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def submit(self, kind: str, params: dict = None, created_by: int = None, job_id: str = None) -> Optional[str]:
+        """Queue a job. A caller-chosen ``job_id`` makes the job unique: if it
+        already exists (e.g. another worker queued it first) None is returned."""
+        if kind not in _handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        job_id = job_id or uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            db.add(models.Job(id=job_id, kind=kind, status="queued", params=dumps(params or {}).decode("utf-8"), created_by=created_by))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return None
+        finally:
+            db.close()
+        self._pool().submit(self._run, job_id)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job now, or ask a running one to stop at its next progress report."""
+        if _update(job_id, only_if_status=("queued",), status="cancelled", cancel_requested=True, finished_at=_now()):
+            self._run_cancel_hook(job_id)
+            return True
+        if not _update(job_id, only_if_status=("running",), cancel_requested=True):
+            return False
+        live = self._running.get(job_id)
+        if live is not None:
+            live["cancel_requested"] = True  # running here: no need to wait for the heartbeat
+        return True
+
+    def _run_cancel_hook(self, job_id: str):
+        db = SessionLocal()
+        try:
+            job = db.query(models.Job.kind, models.Job.params).filter(models.Job.id == job_id).one()
+        finally:
+            db.close()
+        hook = _cancel_hooks.get(job.kind)
+        if hook is not None:
+            try:
+                hook(json.loads(job.params or "{}"))
+            except Exception as e:
+                print(f"Cancel hook for job {job_id} failed: {e}")
+
+    def _run(self, job_id: str):
+        if not _update(job_id, only_if_status=("queued",), status="running", started_at=_now(), heartbeat_at=_now()):
+            return  # cancelled, or already claimed by another worker
+        db = SessionLocal()
+        try:
+            job = db.query(models.Job.kind, models.Job.params).filter(models.Job.id == job_id).one()
+        finally:
+            db.close()
+
+        with self._lock:
+            self._running[job_id] = live = {}
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+        try:
+            result = _handlers[job.kind](JobContext(job_id, json.loads(job.params or "{}"), live))
+            _update(job_id, status="succeeded", progress=1.0, result=dumps(result).decode("utf-8") if result is not None else None, finished_at=_now())
+        except JobCancelled:
+            _update(job_id, status="cancelled", finished_at=_now())
+        except Exception as e:
+            print(f"Job {job_id} ({job.kind}) failed: {e}")
+            _update(job_id, status="failed", error=str(e), finished_at=_now())
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            with self._lock:
+                running = dict(self._running)
+                if not running:
+                    self._heartbeat = None
+                    return
+            try:
+                self._beat(running)
+            except Exception as e:
+                print(f"Job heartbeat failed: {e}")
+
+    def _beat(self, running: Dict[str, dict]):
+        """Write heartbeat and progress of ``running`` jobs and pick up cancellation requests."""
+        now = _now()
+        db = SessionLocal()
+        try:
+            for job_id, live in running.items():
+                values = {name: live[name] for name in ("progress", "message") if name in live}
+                db.query(models.Job).filter(models.Job.id == job_id, models.Job.status == "running").update(
+                    {"heartbeat_at": now, **values}, synchronize_session=False
+                )
+            cancelled = db.query(models.Job.id).filter(models.Job.id.in_(list(running)), models.Job.cancel_requested == True).all()
+            db.commit()
+        finally:
+            db.close()
+        for (job_id,) in cancelled:
+            running[job_id]["cancel_requested"] = True
+
+    def live_progress(self, job_id: str) -> Optional[dict]:
+        """Progress of a job running in this process, fresher than the table."""
+        return self._running.get(job_id)
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "running_here": len(self._running), "kinds": sorted(_handlers)}
+
+
+def prune_jobs(db, now: datetime = None) -> int:
+    """Delete jobs finished more than ``JOB_RETENTION_DAYS`` ago and commit; returns how many."""
+    if JOB_RETENTION_DAYS <= 0:
+        return 0
+    now = now or _now()
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    deleted = db.query(models.Job).filter(
+        models.Job.status.in_(FINISHED_STATUSES), models.Job.finished_at < now - timedelta(days=JOB_RETENTION_DAYS)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+job_queue = JobQueue()
+
+
+def enqueue(kind: str, params: dict = None, created_by: int = None, job_id: str = None) -> Optional[str]:
+    return job_queue.submit(kind, params, created_by, job_id)
@@ -0,0 +1,332 @@
+"""
+Location dimension: one ``locations`` row per (state, district) with an
+integer id.
+
+Users, outbreaks and vaccinations carry ``location_id`` next to their
+``state``/``district`` text. Filters and joins by location compare that id on
+small integer indexes; the text columns stay for display and hold the
+location's canonical spelling.
+
+Names are matched on a normalized key: Unicode NFKC, case-folded, ``&`` read
+as "and", punctuation and repeated whitespace dropped, so "tamil  nadu" and
+"Tamil Nadu" are the same state. Old and short state names ("Orissa", "TN")
+resolve through ``STATE_ALIASES``; other spellings of a district ("Cochin"
+for Kochi) through the ``location_aliases`` table, which admins maintain.
+A name not seen before creates a new location, spelled as given (title-cased
+when it was all upper or lower case).
+
+Every ORM insert or update of a located row resolves its location on flush
+(like the content hash in app/ingest.py); app/models.py imports this module so
+the listeners are registered wherever the models are used. Bulk paths call
+``assign_locations`` on their row dicts, and ``backfill_locations`` locates
+rows written without it. New locations are inserted in the writer's own
+transaction, so nothing is cached from the write path; read paths go through
+``canonical_location``, whose lookups are cached per process.
+"""
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, select, tuple_, union, update
+
+from . import models
+from .events import DataChange, add_listener
+
+# Letters and digits plus the Indic combining marks, as in app/search.py
+WORD_RE = re.compile(r"(?:[^\W_]|[\u0900-\u0DFF])+")
+
+# Normalized old or short state name -> current name
+STATE_ALIASES = {
+    "orissa": "Odisha",
+    "pondicherry": "Puducherry",
+    "uttaranchal": "Uttarakhand",
+    "nct of delhi": "Delhi",
+    "delhi nct": "Delhi",
+    "national capital territory of delhi": "Delhi",
+    "j and k": "Jammu and Kashmir",
+    "ap": "Andhra Pradesh",
+    "mp": "Madhya Pradesh",
+    "tn": "Tamil Nadu",
+    "up": "Uttar Pradesh",
+    "wb": "West Bengal",
+}
+
+LOCATED_MODELS = (models.User, models.Outbreak, models.Vaccination)
+
+
+class LocationRef(NamedTuple):
+    id: int
+    state: str
+    district: str
+
+
+def location_key(value: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKC", value or "").casefold().replace("&", " and ")
+    return " ".join(WORD_RE.findall(text))
+
+
+def state_key(value: Optional[str]) -> str:
+    key = location_key(value)
+    return location_key(STATE_ALIASES[key]) if key in STATE_ALIASES else key
+
+
+def _spelling(value: str) -> str:
+    text = " ".join(value.split())
+    return text.title() if text.islower() or text.isupper() else text
+
+
+def _keys(state: Optional[str], district: Optional[str]) -> Optional[Tuple[str, str]]:
+    key = (state_key(state), location_key(district))
+    return key if all(key) else None
+
+
+def _lookup(bind, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], LocationRef]:
+    """Locations for normalized keys, by their own key or an alias."""
+    Location, Alias = models.Location, models.LocationAlias
+    found = {}
+    columns = (Location.id, Location.state, Location.district)
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        query = select(Location.state_key, Location.district_key, *columns).where(
+            tuple_(Location.state_key, Location.district_key).in_(chunk)
+        )
+        aliased = select(Alias.state_key, Alias.district_key, *columns).join(Location, Location.id == Alias.location_id).where(
+            tuple_(Alias.state_key, Alias.district_key).in_(chunk)
+        )
+        for row in bind.execute(union(query, aliased)):
+            found[(row[0], row[1])] = LocationRef(row[2], row[3], row[4])
+    return found
+
+
+def _insert_locations(bind, rows: List[dict]):
+    dialect = bind.get_bind().dialect.name if hasattr(bind, "get_bind") else bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        existing = _lookup(bind, [(row["state_key"], row["district_key"]) for row in rows])
+        rows = [row for row in rows if (row["state_key"], row["district_key"]) not in existing]
+        if rows:
+            bind.execute(models.Location.__table__.insert(), rows)
+        return
+    stmt = dialect_insert(models.Location.__table__).on_conflict_do_nothing(index_elements=["state_key", "district_key"])
+    bind.execute(stmt, rows)
+
+
+def resolve_locations(bind, pairs: Iterable[Tuple[Optional[str], Optional[str]]], create: bool = True) -> Dict[tuple, LocationRef]:
+    """Location of each ``(state, district)`` pair (pairs missing a part are left out).
+
+    ``bind`` is a Session or Connection; with ``create`` unknown locations are
+    inserted in its transaction.
+    """
+    keyed = {}
+    for pair in set(pairs):
+        key = _keys(*pair)
+        if key is not None:
+            keyed[pair] = key
+    found = _lookup(bind, sorted(set(keyed.values())))
+    missing = {key: pair for pair, key in keyed.items() if key not in found}
+    if missing and create:
+        # States keep the spelling they already have
+        state_names = dict(bind.execute(
+            select(models.Location.state_key, func.min(models.Location.state))
+            .where(models.Location.state_key.in_({key[0] for key in missing}))
+            .group_by(models.Location.state_key)
+        ).all())
+        rows = []
+        for key, (state, district) in missing.items():
+            alias = STATE_ALIASES.get(location_key(state))
+            state_name = state_names.get(key[0]) or alias or _spelling(state)
+            state_names[key[0]] = state_name
+            rows.append({"state": state_name, "district": _spelling(district), "state_key": key[0], "district_key": key[1]})
+        _insert_locations(bind, rows)
+        found.update(_lookup(bind, list(missing)))
+    return {pair: found[key] for pair, key in keyed.items() if key in found}
+
+
+def assign_locations(bind, rows: Iterable[dict]):
+    """Set ``location_id`` and the canonical ``state``/``district`` on row dicts, in place."""
+    rows = list(rows)
+    refs = resolve_locations(bind, [(row.get("state"), row.get("district")) for row in rows])
+    for row in rows:
+        ref = refs.get((row.get("state"), row.get("district")))
+        row["location_id"] = ref.id if ref else None
+        if ref:
+            row["state"], row["district"] = ref.state, ref.district
+
+
+def _locate_on_flush(mapper, connection, target):
+    if target.location_id is not None:
+        attrs = inspect(target).attrs
+        if not attrs.state.history.has_changes() and not attrs.district.history.has_changes():
+            return
+    ref = resolve_locations(connection, [(target.state, target.district)]).get((target.state, target.district))
+    target.location_id = ref.id if ref else None
+    if ref:
+        target.state, target.district = ref.state, ref.district
+
+
+for _model in LOCATED_MODELS:
+    # Ahead of the content hash listener, which must hash the canonical names
+    event.listen(_model, "before_insert", _locate_on_flush, insert=True)
+    event.listen(_model, "before_update", _locate_on_flush, insert=True)
+
+
+def location_condition(column, state: str = None, district: str = None):
+    """Condition on a ``location_id`` column for free-text filters, or None without filters."""
+    if not state and not district:
+        return None
+    Location, Alias = models.Location, models.LocationAlias
+    ids = select(Location.id)
+    aliased = select(Alias.location_id)
+    if state:
+        ids = ids.where(Location.state_key == state_key(state))
+        aliased = aliased.where(Alias.state_key == state_key(state))
+    if district:
+        ids = ids.where(Location.district_key == location_key(district))
+        aliased = aliased.where(Alias.district_key == location_key(district))
+    return column.in_(union(ids, aliased))
+
+
+class CanonicalNames:
+    """Per-process cache of canonical spellings for filter values on read paths."""
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self._names: Dict[tuple, Tuple[Optional[str], Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+
+    def get(self, db, state: Optional[str], district: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        key = (state_key(state), location_key(district))
+        names = self._names.get(key)
+        if names is not None:
+            return names
+        if key[0] and key[1]:
+            ref = resolve_locations(db, [(state, district)], create=False).get((state, district))
+            names = (ref.state, ref.district) if ref else None
+        elif key[0]:
+            name = db.scalar(select(func.min(models.Location.state)).where(models.Location.state_key == key[0]))
+            names = (name, None) if name else None
+        else:
+            name = db.scalar(select(func.min(models.Location.district)).where(models.Location.district_key == key[1]))
+            names = (None, name) if name else None
+        if names is None:
+            # Unknown names are not cached; they match nothing either way
+            return state or None, district or None
+        with self._lock:
+            if len(self._names) >= self.MAX_ENTRIES:
+                self._names.clear()
+            self._names[key] = names
+        return names
+
+
+canonical_names = CanonicalNames()
+
+
+def canonical_location(db, state: str = None, district: str = None) -> Tuple[Optional[str], Optional[str]]:
+    """Stored spelling of filter values (``kerala`` -> ``Kerala``), for filters on the text columns.
+
+    Call with a read session: results are cached, and a location created by an
+    uncommitted write must not be.
+    """
+    if not state and not district:
+        return None, None
+    return canonical_names.get(db, state, district)
+
+
+@add_listener
+def _clear_names(change: DataChange):
+    if change.table == "locations":
+        canonical_names.clear()
+
+
+def backfill_locations(db) -> Dict[str, int]:
+    """Locate rows without ``location_id`` and respell them canonically; the caller commits.
+
+    The most common spelling of a location becomes its canonical one when it
+    is created here. Content hashes are refreshed for rows whose spelling
+    changed; the rollups locate rows by name themselves.
+    """
+    from .ingest import refresh_content_hashes
+    from .rollups import ROLLUPS
+
+    counts = {}
+    for model in LOCATED_MODELS:
+        table = model.__tablename__
+        pairs = db.execute(
+            select(model.state, model.district, func.count())
+            .where(model.location_id.is_(None), model.state.isnot(None), model.district.isnot(None))
+            .group_by(model.state, model.district)
+            .order_by(func.count().desc(), model.state, model.district)
+        ).all()
+        for state, district, _ in pairs:
+            # One at a time, so the most common spelling is created first
+            ref = resolve_locations(db, [(state, district)]).get((state, district))
+            if ref is None:
+                continue
+            condition = (model.location_id.is_(None), model.state == state, model.district == district)
+            ids = [row[0] for row in db.execute(select(model.id).where(*condition))] if table in ROLLUPS else []
+            db.execute(update(model).where(*condition).values(location_id=ref.id, state=ref.state, district=ref.district)
+                       .execution_options(synchronize_session=False))
+            if ids and (state, district) != (ref.state, ref.district):
+                refresh_content_hashes(db, table, ids)
+        counts[table] = sum(row[2] for row in pairs)
+    return counts
+
+
+def add_alias(db, location_id: int, state: str, district: str) -> dict:
+    """Make ``state``/``district`` another name of a location; the caller commits.
+
+    When the name belongs to a location of its own, that location is merged
+    into this one: its rows move over, taking the canonical spelling, and its
+    aliases follow. Raises ``LookupError`` for an unknown id and
+    ``ValueError`` for a name that is the location's own.
+    """
+    from .changefeed import log_rows
+    from .ingest import refresh_content_hashes
+    from .rollups import ROLLUPS, move_location
+
+    Location, Alias = models.Location, models.LocationAlias
+    target = db.get(Location, location_id)
+    if target is None:
+        raise LookupError("Unknown location")
+    key = _keys(state, district)
+    if key is None:
+        raise ValueError("State and district are required")
+    if key == (target.state_key, target.district_key):
+        raise ValueError("That is already the location's name")
+
+    moved = {}
+    merged = db.scalar(select(Location).where(Location.state_key == key[0], Location.district_key == key[1]))
+    if merged is not None:
+        for model in LOCATED_MODELS:
+            table = model.__tablename__
+            ids = [row[0] for row in db.execute(select(model.id).where(model.location_id == merged.id))]
+            if ids:
+                db.execute(update(model).where(model.location_id == merged.id)
+                           .values(location_id=target.id, state=target.state, district=target.district)
+                           .execution_options(synchronize_session=False))
+                if table in ROLLUPS:
+                    refresh_content_hashes(db, table, ids)
+                    log_rows(db, table, ids)
+            moved[table] = len(ids)
+        for table in ROLLUPS:
+            move_location(db, table, merged.id, target.id)
+        db.execute(update(Alias).where(Alias.location_id == merged.id).values(location_id=target.id))
+        db.execute(delete(Location).where(Location.id == merged.id))
+
+    existing = db.scalar(select(Alias).where(Alias.state_key == key[0], Alias.district_key == key[1]))
+    if existing is not None:
+        existing.location_id = target.id
+    else:
+        db.add(Alias(state_key=key[0], district_key=key[1], location_id=target.id))
+    db.flush()
+    return {"location_id": target.id, "alias": {"state_key": key[0], "district_key": key[1]},
+            "merged_location_id": merged.id if merged is not None else None, "moved": moved}
@@ -0,0 +1,152 @@
+"""
+Schema migration support.
+
+The schema is owned by the Alembic scripts in ``backend/alembic``. Migrations
+run once per deploy (``alembic upgrade head`` or ``python init_db.py``); each
+worker only checks at startup that the database is already at the latest
+revision instead of issuing DDL itself.
+
+The helpers at the bottom are for use inside migration scripts: online index
+builds (``CREATE INDEX CONCURRENTLY`` on PostgreSQL) and batched backfills that
+keep row locks short on large tables.
+"""
+import os
+from alembic import command, op
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import bindparam, select, text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# What to do when the database is behind the migration scripts: error, warn or off
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "error").lower()
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+def alembic_config(database_url: str = None) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    if database_url:
+        config.attributes["database_url"] = database_url
+    return config
+
+
+def head_revisions() -> set:
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+def current_revisions(engine) -> set:
+    with engine.connect() as connection:
+        return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def check_schema(engine, mode: str = None):
+    """Verify the database is at the latest migration without running DDL."""
+    mode = mode or DB_SCHEMA_CHECK
+    if mode == "off":
+        return
+    current, heads = current_revisions(engine), head_revisions()
+    if current == heads:
+        return
+    message = (
+        f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+        f"expected {', '.join(sorted(heads))}. Run `alembic upgrade head` (or `python init_db.py`) from backend/."
+    )
+    if mode == "warn":
+        print(f"WARNING: {message}")
+        return
+    raise SchemaOutOfDateError(message)
+
+
+def upgrade_to_head(database_url: str = None):
+    config = alembic_config(database_url)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+# ----- Helpers for migration scripts -----
+
+def _drop_invalid_index(bind, name: str):
+    # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that
+    # IF NOT EXISTS would silently keep; drop it so the build is retried.
+    invalid = bind.execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+def create_index_online(name: str, table: str, columns: list, unique: bool = False, **kw):
+    """Create an index without blocking writes on PostgreSQL.
+
+    Runs outside the migration transaction with ``CONCURRENTLY``; on other
+    databases it is a plain ``CREATE INDEX IF NOT EXISTS``.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            _drop_invalid_index(bind, name)
+            op.create_index(name, table, columns, unique=unique, if_not_exists=True, postgresql_concurrently=True, **kw)
+    else:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True, **kw)
+
+
+def drop_index_online(name: str, table: str):
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def batched_update(table: str, set_clause: str, where_clause: str, batch_size: int = 5000, key: str = "id") -> int:
+    """Backfill rows in primary-key batches, committing after each batch.
+
+    ``where_clause`` must stop matching a row once it has been updated,
+    otherwise the loop never ends. Returns the number of rows updated.
+    """
+    total = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            result = bind.execute(text(
+                f"UPDATE {table} SET {set_clause} WHERE {key} IN "
+                f"(SELECT {key} FROM {table} WHERE {where_clause} LIMIT {int(batch_size)})"
+            ))
+            if not result.rowcount:
+                break
+            total += result.rowcount
+    return total
+
+
+def batched_backfill(table, columns: list, target: str, compute, where=None, batch_size: int = 5000, key: str = "id") -> int:
+    """Fill ``target`` with a value computed in Python, in primary-key batches.
+
+    For values SQL cannot express (hashes, normalized names). ``table`` is a
+    SQLAlchemy ``Table`` so values come back typed; ``compute`` gets a dict of
+    ``columns`` per row. Commits after each batch like ``batched_update`` and
+    returns the number of rows updated.
+    """
+    total = 0
+    key_column = table.c[key]
+    query = select(key_column, *[table.c[name] for name in columns]).order_by(key_column).limit(batch_size)
+    if where is not None:
+        query = query.where(where)
+    statement = table.update().where(key_column == bindparam("_key")).values({target: bindparam("_value")})
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last = None
+        while True:
+            batch = query if last is None else query.where(key_column > last)
+            rows = bind.execute(batch).mappings().all()
+            if not rows:
+                break
+            bind.execute(statement, [{"_key": row[key], "_value": compute(dict(row))} for row in rows])
+            total += len(rows)
+            last = rows[-1][key]
+    return total
@@ -1,8 +1,36 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 
+class Location(Base):
+    """One (state, district), see app/locations.py."""
+    __tablename__ = "locations"
+
+    id = Column(Integer, primary_key=True)
+    state = Column(String, nullable=False)
+    district = Column(String, nullable=False)
+    # Normalized names the location is looked up by
+    state_key = Column(String, nullable=False)
+    district_key = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ux_locations_key", "state_key", "district_key", unique=True),
+    )
+
+class LocationAlias(Base):
+    """Another name of a location, as normalized keys."""
+    __tablename__ = "location_aliases"
+
+    id = Column(Integer, primary_key=True)
+    state_key = Column(String, nullable=False)
+    district_key = Column(String, nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+
+    __table_args__ = (
+        Index("ux_location_aliases_key", "state_key", "district_key", unique=True),
+    )
+
 class User(Base):
     __tablename__ = "users"
     
@@ -15,13 +43,26 @@ class User(Base):
     role = Column(String, default="user")  # user, admin
     state = Column(String)
     district = Column(String)
+    location_id = Column(Integer, ForeignKey("locations.id"))
     latitude = Column(Float)
     longitude = Column(Float)
     notifications = Column(Boolean, default=False)
+    digest_frequency = Column(String, default="none", server_default="none")  # none, daily, weekly
+    whatsapp_number = Column(String)  # e.g. whatsapp:+91XXXXXXXXXX, receives digests when set
+    locale = Column(String, default="en", server_default="en")  # language of notifications, see app/notification_templates.py
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     chat_messages = relationship("ChatMessage", back_populates="user")
 
+    __table_args__ = (
+        # Admin listing filters and notification fan-out by location
+        Index("ix_users_location", "location_id"),
+        Index("ix_users_notifications_location_id", "notifications", "location_id"),
+        Index("ix_users_role", "role"),
+        # Digest runs group subscribers by frequency and location
+        Index("ix_users_digest_location_id", "digest_frequency", "location_id"),
+    )
+
 class Outbreak(Base):
     __tablename__ = "outbreaks"
     
@@ -30,24 +71,33 @@ class Outbreak(Base):
     disease = Column(String, index=True)
     report_date = Column(DateTime)
     country = Column(String)
-    state = Column(String, index=True)
-    district = Column(String, index=True)
+    state = Column(String)
+    district = Column(String)
+    location_id = Column(Integer, ForeignKey("locations.id"))
     cases_reported = Column(Integer)
     deaths = Column(Integer)
     severity = Column(String)  # low, moderate, high
     confirmed = Column(Boolean)
     source_url = Column(String)
     notes = Column(Text)
+    content_hash = Column(String(32))  # digest of the fields above, see app/ingest.py
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_outbreaks_location", "location_id"),
+        Index("ix_outbreaks_location_id_severity", "location_id", "severity"),
+        Index("ix_outbreaks_report_date", "report_date"),
+    )
+
 class Vaccination(Base):
     __tablename__ = "vaccinations"
     
     id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(String, unique=True, index=True)
     country = Column(String)
-    state = Column(String, index=True)
-    district = Column(String, index=True)
+    state = Column(String)
+    district = Column(String)
+    location_id = Column(Integer, ForeignKey("locations.id"))
     start_date = Column(DateTime)
     end_date = Column(DateTime)
     vaccine_name = Column(String, index=True)
@@ -56,8 +106,47 @@ class Vaccination(Base):
     doses_administered = Column(Integer)
     partner_org = Column(String)
     notes = Column(Text)
+    content_hash = Column(String(32))  # digest of the fields above, see app/ingest.py
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_vaccinations_location", "location_id"),
+    )
+
+class OutbreakDailyStat(Base):
+    """Outbreak totals per report day, location and disease, see app/rollups.py."""
+    __tablename__ = "outbreak_daily_stats"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    disease = Column(String, nullable=False)
+    reports = Column(Integer, nullable=False, default=0)
+    cases_reported = Column(Integer, nullable=False, default=0)
+    deaths = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ux_outbreak_daily_stats_key", "day", "location_id", "disease", unique=True),
+        Index("ix_outbreak_daily_stats_location_day", "location_id", "day"),
+    )
+
+class VaccinationDailyStat(Base):
+    """Vaccination campaign totals per start day, location and vaccine, see app/rollups.py."""
+    __tablename__ = "vaccination_daily_stats"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    vaccine_name = Column(String, nullable=False)
+    campaigns = Column(Integer, nullable=False, default=0)
+    doses_allocated = Column(Integer, nullable=False, default=0)
+    doses_administered = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ux_vaccination_daily_stats_key", "day", "location_id", "vaccine_name", unique=True),
+        Index("ix_vaccination_daily_stats_location_day", "location_id", "day"),
+    )
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
     
@@ -67,4 +156,53 @@ class ChatMessage(Base):
     response = Column(Text)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     
-    user = relationship("User", back_populates="chat_messages")
\ No newline at end of file
+    user = relationship("User", back_populates="chat_messages")
+
+    __table_args__ = (
+        Index("ix_chat_messages_user_timestamp", "user_id", "timestamp"),
+    )
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String, index=True)
+    status = Column(String, default="queued")  # queued, running, succeeded, failed, cancelled
+    params = Column(Text)  # JSON
+    progress = Column(Float, default=0.0)
+    message = Column(String)
+    result = Column(Text)  # JSON
+    error = Column(Text)
+    cancel_requested = Column(Boolean, default=False)
+    created_by = Column(Integer)  # user id; no FK so users can be deleted with their job history
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+    )
+
+class ChangeLogEntry(Base):
+    """One inserted, updated, deleted or archived outbreak/vaccination, see app/changefeed.py."""
+    __tablename__ = "change_log"
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    action = Column(String, nullable=False)  # insert, update, delete, archive
+    record_id = Column(Integer, nullable=False)
+    record_key = Column(String)  # outbreak_id / campaign_id
+    data = Column(Text)  # JSON of the row as written; NULL for delete and archive
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_table_seq", "table_name", "seq"),
+        Index("ix_change_log_changed_at", "changed_at"),
+        # Never reuse a seq on SQLite, even after the newest entries were pruned
+        {"sqlite_autoincrement": True},
+    )
+
+# Registers the flush listeners that fill location_id on users, outbreaks and
+# vaccinations, so every importer of the models gets them (not only the app)
+from . import locations  # noqa: E402,F401
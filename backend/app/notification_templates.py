@@ -0,0 +1,234 @@
+"""
+Message templates for subscriber notifications and digests.
+
+Templates are compiled once at import per notification kind and locale. A
+message is rendered in two steps: the part shared by everyone in a location
+(subject, intro, item lines) once per event, then only the per-user greeting
+for each recipient. ``PreparedEmail`` goes one step further for email: the
+subject header and the encoded shared body are serialized once, so each
+recipient costs a few header lines and one encoded greeting line.
+"""
+import socket
+from dataclasses import dataclass
+from email.header import Header
+from email.quoprimime import body_encode
+from email.utils import formatdate, make_msgid
+from string import Formatter
+from typing import Dict, List
+
+DEFAULT_LOCALE = "en"
+CRLF = "\r\n"
+
+
+class CompiledTemplate:
+    """A ``str.format`` template parsed once; ``render`` only joins the pieces."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts = []
+        for literal, name, spec, conversion in Formatter().parse(source):
+            if conversion:
+                raise ValueError(f"Conversions are not supported in templates: {source!r}")
+            self._parts.append((literal, name, spec))
+        self.fields = {name for _, name, _ in self._parts if name}
+
+    def render(self, values: dict) -> str:
+        out = []
+        for literal, name, spec in self._parts:
+            out.append(literal)
+            if name is not None:
+                value = values.get(name)
+                out.append(format(value, spec) if spec else str(value))
+        return "".join(out)
+
+
+# kind -> locale -> part -> template source. For the alert kinds the item
+# template is repeated once per item; "count", "state" and "district" are
+# available to subject and intro. Digests are assembled in app/digests.py.
+SOURCES = {
+    "outbreak": {
+        "en": {
+            "subject": "Health Alert: New Outbreak in {district}, {state}",
+            "intro": "A new outbreak has been reported in your area:\n\n",
+            "item": "Disease: {disease}\nCases: {cases_reported}\nSeverity: {severity}\n\n",
+        },
+        "hi": {
+            "subject": "स्वास्थ्य चेतावनी: {district}, {state} में नया प्रकोप",
+            "intro": "आपके क्षेत्र में एक नया प्रकोप दर्ज किया गया है:\n\n",
+            "item": "बीमारी: {disease}\nमामले: {cases_reported}\nगंभीरता: {severity}\n\n",
+        },
+    },
+    "outbreak_bulk": {
+        "en": {
+            "subject": "Health Alert: {count} Outbreak Updates in {district}, {state}",
+            "intro": "{count} outbreak reports have been added or updated in your area:\n\n",
+            "item": "Disease: {disease}\nCases: {cases_reported}\nSeverity: {severity}\n\n",
+        },
+        "hi": {
+            "subject": "स्वास्थ्य चेतावनी: {district}, {state} में {count} प्रकोप अपडेट",
+            "intro": "आपके क्षेत्र में {count} प्रकोप रिपोर्ट जोड़ी या अपडेट की गई हैं:\n\n",
+            "item": "बीमारी: {disease}\nमामले: {cases_reported}\nगंभीरता: {severity}\n\n",
+        },
+    },
+    "vaccination": {
+        "en": {
+            "subject": "Vaccination Update: New Campaign in {district}, {state}",
+            "intro": "A new vaccination campaign is available in your area:\n\n",
+            "item": "Vaccine: {vaccine_name}\nTarget: {target_population}\nStart Date: {start_date}\n\n",
+        },
+        "hi": {
+            "subject": "टीकाकरण अपडेट: {district}, {state} में नया अभियान",
+            "intro": "आपके क्षेत्र में एक नया टीकाकरण अभियान उपलब्ध है:\n\n",
+            "item": "टीका: {vaccine_name}\nलक्षित समूह: {target_population}\nआरंभ तिथि: {start_date}\n\n",
+        },
+    },
+    "vaccination_bulk": {
+        "en": {
+            "subject": "Vaccination Update: {count} Campaigns in {district}, {state}",
+            "intro": "{count} vaccination campaigns have been added or updated in your area:\n\n",
+            "item": "Vaccine: {vaccine_name}\nTarget: {target_population}\nStart Date: {start_date}\n\n",
+        },
+        "hi": {
+            "subject": "टीकाकरण अपडेट: {district}, {state} में {count} अभियान",
+            "intro": "आपके क्षेत्र में {count} टीकाकरण अभियान जोड़े या अपडेट किए गए हैं:\n\n",
+            "item": "टीका: {vaccine_name}\nलक्षित समूह: {target_population}\nआरंभ तिथि: {start_date}\n\n",
+        },
+    },
+    "digest": {
+        "en": {
+            "subject": "{label} Health Digest: {district}, {state}",
+            "intro": "Here is your {frequency} health summary for {district}, {state}:\n\n",
+            "whatsapp_intro": "{label} health digest for {district}, {state} - {date}\n\n",
+            "outbreak_header": "Outbreak reports: {total} ({cases} cases)\n",
+            "outbreak_item": "- {disease} ({severity}): {cases_reported} cases, {deaths} deaths, reported {report_date}\n",
+            "outbreak_more": "...and {more} more reports.\n",
+            "campaign_header": "Vaccination campaigns: {total}\n",
+            "ongoing_item": "- ONGOING: {vaccine_name} for {target_population} until {end_date}\n",
+            "upcoming_item": "- UPCOMING: {vaccine_name} for {target_population} from {start_date}\n",
+            "campaign_more": "...and {more} more campaigns.\n",
+            "daily": "Daily",
+            "weekly": "Weekly",
+        },
+        "hi": {
+            "subject": "{label} स्वास्थ्य सारांश: {district}, {state}",
+            "intro": "{district}, {state} के लिए आपका {label} स्वास्थ्य सारांश:\n\n",
+            "whatsapp_intro": "{district}, {state} का {label} स्वास्थ्य सारांश - {date}\n\n",
+            "outbreak_header": "प्रकोप रिपोर्ट: {total} ({cases} मामले)\n",
+            "outbreak_item": "- {disease} ({severity}): {cases_reported} मामले, {deaths} मौतें, {report_date} को दर्ज\n",
+            "outbreak_more": "...और {more} रिपोर्ट।\n",
+            "campaign_header": "टीकाकरण अभियान: {total}\n",
+            "ongoing_item": "- जारी: {vaccine_name}, {target_population} के लिए, {end_date} तक\n",
+            "upcoming_item": "- आगामी: {vaccine_name}, {target_population} के लिए, {start_date} से\n",
+            "campaign_more": "...और {more} अभियान।\n",
+            "daily": "दैनिक",
+            "weekly": "साप्ताहिक",
+        },
+    },
+}
+
+# Parts common to every kind in a locale
+COMMON = {
+    "en": {"greeting": "Dear {full_name},\n\n", "footer": "Stay safe and healthy!\n\nHealth Monitoring System"},
+    "hi": {"greeting": "प्रिय {full_name},\n\n", "footer": "सुरक्षित और स्वस्थ रहें!\n\nस्वास्थ्य निगरानी प्रणाली"},
+}
+
+LOCALES = sorted(COMMON)
+
+
+class NotificationTemplate:
+    """Compiled parts of one kind in one locale, looked up with ``template[part]``."""
+
+    def __init__(self, parts: Dict[str, str], common: Dict[str, str]):
+        self.parts = {name: CompiledTemplate(source) for name, source in parts.items()}
+        self.greeting = CompiledTemplate(common["greeting"])
+        self.footer = common["footer"]
+
+    def __getitem__(self, part: str) -> CompiledTemplate:
+        return self.parts[part]
+
+
+def _compile_all() -> Dict[tuple, NotificationTemplate]:
+    return {
+        (kind, locale): NotificationTemplate(parts, COMMON[locale])
+        for kind, locales in SOURCES.items()
+        for locale, parts in locales.items()
+    }
+
+
+TEMPLATES = _compile_all()
+
+
+def get_template(kind: str, locale: str = None) -> NotificationTemplate:
+    """Template for ``kind`` in ``locale``, falling back to English."""
+    return TEMPLATES.get((kind, locale or DEFAULT_LOCALE)) or TEMPLATES[(kind, DEFAULT_LOCALE)]
+
+
+def normalize_locale(locale: str = None) -> str:
+    return locale if locale in COMMON else DEFAULT_LOCALE
+
+
+@dataclass
+class SharedMessage:
+    """The location-wide part of a notification, rendered once per event."""
+    subject: str
+    body: str
+    greeting: CompiledTemplate
+    footer: str
+
+    def text_for(self, full_name) -> str:
+        return self.greeting.render({"full_name": full_name}) + self.body + self.footer
+
+
+def render_shared(notification_type: str, state: str, district: str, items: List[dict], locale: str = None) -> SharedMessage:
+    """Render subject and body for ``items`` in one location (``outbreak`` or ``vaccination``)."""
+    kind = notification_type if len(items) == 1 else f"{notification_type}_bulk"
+    template = get_template(kind, locale)
+    values = {"state": state, "district": district, "count": len(items)}
+    item = template["item"]
+    body = template["intro"].render(values) + "".join(item.render(values) for values in items)
+    return SharedMessage(template["subject"].render(values), body, template.greeting, template.footer)
+
+
+def _qp(text: str) -> str:
+    # quoprimime works on one character per byte, so encode to UTF-8 first
+    return body_encode(text.encode("utf-8").decode("latin-1"), eol=CRLF)
+
+
+_msgid_domain = None
+
+
+def _message_id() -> str:
+    global _msgid_domain
+    if _msgid_domain is None:
+        _msgid_domain = socket.getfqdn()  # can block on DNS, so only once
+    return make_msgid(domain=_msgid_domain)
+
+
+class PreparedEmail:
+    """A text email whose subject and shared body are serialized once.
+
+    The body uses quoted-printable, which encodes line by line, so the encoded
+    greeting can be prepended to the pre-encoded body for each recipient.
+    """
+
+    def __init__(self, subject: str, body: str, greeting: CompiledTemplate, footer: str = ""):
+        self.greeting = greeting
+        self._subject = Header(subject, "utf-8").encode(linesep=CRLF)
+        self._body = _qp(body + footer)
+        self._headers = (
+            f"MIME-Version: 1.0{CRLF}"
+            f'Content-Type: text/plain; charset="utf-8"{CRLF}'
+            f"Content-Transfer-Encoding: quoted-printable{CRLF}"
+            f"Subject: {self._subject}{CRLF}"
+        )
+
+    @classmethod
+    def from_shared(cls, shared: SharedMessage) -> "PreparedEmail":
+        return cls(shared.subject, shared.body, shared.greeting, shared.footer)
+
+    def for_recipient(self, sender: str, recipient: str, full_name) -> bytes:
+        greeting = _qp(self.greeting.render({"full_name": full_name}))
+        return (
+            f"From: {sender}{CRLF}To: {recipient}{CRLF}Date: {formatdate()}{CRLF}"
+            f"Message-ID: {_message_id()}{CRLF}{self._headers}{CRLF}{greeting}{self._body}"
+        ).encode("utf-8")
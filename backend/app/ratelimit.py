@@ -0,0 +1,262 @@
+"""
+Request rate limiting per user and per client IP.
+
+Every request is charged a cost (``ROUTE_COSTS``, 1 by default) against two
+token buckets: one for the authenticated user (the JWT subject) and one for
+the client IP. It goes ahead only if both can pay; otherwise it gets a 429
+with ``Retry-After``. Buckets are kept in process memory, so the check is a
+dict lookup and some arithmetic under a lock; buckets that have refilled are
+dropped again.
+
+With several workers each one enforces the limits separately. A shared
+backend (``rate_limiter.set_shared_backend``, e.g. Redis) adds a sliding-window
+count per key that all workers see, on top of the local buckets.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from .auth import decode_token
+from .cache import LRUCache
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+# Sustained cost per minute and burst size, per user and per client IP. An IP
+# can be shared by many users (NAT, campus networks), so it gets more.
+RATE_LIMIT_USER_PER_MINUTE = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "120"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "40"))
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "600"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "120"))
+# Take the client IP from X-Forwarded-For. Only enable behind a proxy that sets it.
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes", "on")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Expensive routes cost more than one request
+ROUTE_COSTS: Dict[Tuple[str, str], float] = {
+    ("POST", "/api/chat/message"): 10,  # model call plus two writes
+    ("GET", "/api/health/location-data"): 5,
+    ("GET", "/api/health/search"): 2,
+    ("POST", "/api/users/login"): 5,  # bcrypt
+    ("POST", "/api/users/register"): 5,
+    ("GET", "/api/admin/users/export"): 5,
+    ("POST", "/api/admin/outbreaks/upload-csv"): 10,
+    ("POST", "/api/admin/vaccinations/upload-csv"): 10,
+    ("POST", "/api/admin/outbreaks/ingest"): 10,
+    ("POST", "/api/admin/vaccinations/ingest"): 10,
+}
+
+
+def _parse_costs(value: str) -> Dict[Tuple[str, str], float]:
+    """``RATE_LIMIT_COSTS``, e.g. ``POST /api/chat/message=20;GET /api/health/alerts=2``."""
+    costs = {}
+    for entry in filter(None, (part.strip() for part in value.split(";"))):
+        route, _, cost = entry.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        costs[(method.upper(), path.strip())] = float(cost)
+    return costs
+
+
+ROUTE_COSTS.update(_parse_costs(os.getenv("RATE_LIMIT_COSTS", "")))
+EXEMPT_PATHS = {"/"}
+
+
+class Policy:
+    def __init__(self, per_minute: float, burst: float):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.burst = burst
+
+
+class SharedRateLimitBackend:
+    """Counters shared between workers for the sliding-window check.
+
+    ``incr`` must add ``amount`` atomically, create missing keys with ``ttl``
+    seconds to live and return the new value (Redis ``INCRBYFLOAT`` plus
+    ``EXPIRE``).
+    """
+
+    def incr(self, key: str, amount: float, ttl: float) -> float:
+        raise NotImplementedError
+
+    def get(self, key: str) -> float:
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(SharedRateLimitBackend):
+    """In-process counters, for a single worker or for trying the sliding window out."""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, amount: float, ttl: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            value, expires = self._values.get(key, (0.0, now + ttl))
+            if expires <= now:
+                value, expires = 0.0, now + ttl
+            self._values[key] = (value + amount, expires)
+            if len(self._values) > RATE_LIMIT_MAX_KEYS:
+                self._values = {k: v for k, v in self._values.items() if v[1] > now}
+            return value + amount
+
+    def get(self, key: str) -> float:
+        entry = self._values.get(key)
+        return entry[0] if entry and entry[1] > time.monotonic() else 0.0
+
+
+class RateLimiter:
+    """Token buckets keyed by ``(kind, id)``, with one ``Policy`` per kind."""
+
+    def __init__(self, policies: Dict[str, Policy] = None, max_keys: int = RATE_LIMIT_MAX_KEYS,
+                 shared: SharedRateLimitBackend = None):
+        self.policies = policies or {
+            "user": Policy(RATE_LIMIT_USER_PER_MINUTE, RATE_LIMIT_USER_BURST),
+            "ip": Policy(RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST),
+        }
+        self.max_keys = max_keys
+        self.shared = shared
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()  # key -> [tokens, updated], oldest first
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def set_shared_backend(self, backend: Optional[SharedRateLimitBackend]):
+        self.shared = backend
+
+    def hit(self, keys: List[tuple], cost: float = 1, now: float = None) -> float:
+        """Charge ``cost`` to every key's bucket if all of them can pay.
+
+        Returns 0 when the request may proceed, otherwise the seconds until it
+        would be allowed; nothing is charged then.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for key in keys:
+                policy = self.policies[key[0]]
+                charge = min(cost, policy.burst)
+                bucket = self._buckets.get(key)
+                tokens = policy.burst if bucket is None else min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+                if tokens < charge:
+                    wait = max(wait, (charge - tokens) / policy.rate)
+                levels.append((key, tokens - charge))
+            if wait:
+                self.rejected += 1
+                return wait
+            for key, tokens in levels:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    self._buckets[key] = [tokens, now]
+                else:
+                    bucket[0], bucket[1] = tokens, now
+                    self._buckets.move_to_end(key)
+            self._prune(now)
+            self.allowed += 1
+        return 0.0
+
+    def _prune(self, now: float):
+        # Least recently charged first; a bucket that has refilled is the same as no bucket
+        while self._buckets:
+            key, (tokens, updated) = next(iter(self._buckets.items()))
+            policy = self.policies[key[0]]
+            if len(self._buckets) <= self.max_keys and tokens + (now - updated) * policy.rate < policy.burst:
+                return
+            del self._buckets[key]
+
+    def hit_shared(self, keys: List[tuple], cost: float = 1, now: float = None) -> float:
+        """Approximate sliding window over one-minute counters in the shared backend."""
+        now = time.time() if now is None else now
+        window = int(now // 60)
+        elapsed = (now % 60) / 60.0
+        wait = 0.0
+        for kind, ident in keys:
+            policy = self.policies[kind]
+            name = f"ratelimit:{kind}:{ident}"
+            current = self.shared.incr(f"{name}:{window}", cost, 120)
+            previous = self.shared.get(f"{name}:{window - 1}")
+            if previous * (1 - elapsed) + current > policy.per_minute + policy.burst:
+                wait = max(wait, 60 * (1 - elapsed))
+        if wait:
+            with self._lock:
+                self.rejected += 1
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "keys": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "policies": {kind: {"per_minute": p.per_minute, "burst": p.burst} for kind, p in self.policies.items()},
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+        }
+
+
+rate_limiter = RateLimiter()
+
+# Bearer token -> username ("" when invalid), so JWTs are verified once per token
+_subjects = LRUCache(max_entries=50000, ttl=60.0)
+
+
+def _token_subject(authorization: bytes) -> Optional[str]:
+    if authorization[:7].lower() != b"bearer ":
+        return None
+    token = authorization[7:].decode("latin-1").strip()
+    subject = _subjects.get(token)
+    if subject is None:
+        try:
+            subject = decode_token(token)
+        except HTTPException:
+            subject = ""
+        _subjects.set(token, subject)
+    return subject or None
+
+
+def request_keys(scope) -> List[tuple]:
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    user = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            user = _token_subject(value)
+        elif name == b"x-forwarded-for" and RATE_LIMIT_TRUST_FORWARDED:
+            ip = value.decode("latin-1").split(",")[0].strip() or ip
+    keys = [("ip", ip)]
+    if user:
+        keys.append(("user", user))
+    return keys
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with ``Retry-After`` once a bucket runs dry."""
+
+    def __init__(self, app, limiter: RateLimiter = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        keys = request_keys(scope)
+        cost = ROUTE_COSTS.get((scope["method"], scope["path"].rstrip("/") or "/"), 1)
+        wait = self.limiter.hit(keys, cost)
+        if not wait and self.limiter.shared is not None:
+            wait = await run_in_threadpool(self.limiter.hit_shared, keys, cost)
+        if wait:
+            response = JSONResponse(
+                {"detail": "Too many requests, please retry later"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,378 @@
+"""
+In-process read model of the outbreak and vaccination tables.
+
+The health data set is small next to how often it is read, so with
+``READ_MODEL_ENABLED`` each worker keeps both tables in memory and the
+listing, alerts and location endpoints filter them there instead of querying
+the database. A table is held as an immutable snapshot: row tuples shaped like
+the response schema plus ``location_id``, in id order, with position indexes
+(``array``) by location, state, district, disease, and by date. Queries pick the smallest
+matching index and check the remaining conditions on those rows only.
+
+Snapshots are loaded at startup and kept current from the change feed: every
+``publish_change`` already carries the rows as committed. The writer's thread
+only applies them to a map by id; rebuilding the snapshot (a sort and the
+indexes, O(N log N)) is left to one background builder thread, which
+coalesces bursts of changes into a single rebuild and swaps the new snapshot
+in. Readers never take a lock and see the previous snapshot until then,
+usually a few milliseconds; ``settle`` waits for pending rebuilds. Changes
+made by other processes (other workers, CLI imports) are not seen that way,
+so a snapshot older than ``READ_MODEL_REFRESH_SECONDS`` is reloaded by the
+builder while the current one keeps serving.
+
+Loads read the primary, not the replica: a lagging replica could otherwise
+swap in rows older than changes this process already applied. Changes
+published while a load is reading are applied again on top of its rows.
+
+Published changes carry the response schema's fields, without
+``location_id``; it is filled in from the canonical names of rows already
+held, and the builder looks up names it has not seen.
+
+Rows come back in id order, as from the SQL listings.
+"""
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import models, schemas
+from .cache import bump_data_version
+from .database import SessionLocal
+from .events import DataChange, add_listener
+from .locations import resolve_locations
+from .serialization import query_rows, rows_to_dicts, schema_fields
+
+READ_MODEL_ENABLED = os.getenv("READ_MODEL_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+# Reload from the database when the snapshot is older than this (0 = only on changes in this process)
+READ_MODEL_REFRESH_SECONDS = float(os.getenv("READ_MODEL_REFRESH_SECONDS", "60"))
+
+_EMPTY = array("I")
+
+
+def _timestamp(value) -> Optional[float]:
+    if not isinstance(value, datetime):
+        return None
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class TableSpec:
+    def __init__(self, name: str, model, schema, indexes: Iterable[Tuple[str, ...]], date_field: str, interned: Iterable[str]):
+        self.name = name
+        self.model = model
+        self.schema = schema
+        self.fields = schema_fields(schema)
+        # Stored after the response fields, left out of records
+        self.columns = self.fields + ["location_id"]
+        self.indexes = list(indexes)
+        self.date_field = date_field
+        # Low-cardinality text columns, stored once per distinct value
+        self.interned = [self.fields.index(field) for field in interned]
+
+    def to_row(self, record) -> tuple:
+        values = [record.get(field) for field in self.columns] if isinstance(record, dict) else list(record)
+        for i in self.interned:
+            if isinstance(values[i], str):
+                values[i] = sys.intern(values[i])
+        return tuple(values)
+
+
+TABLES = {
+    "outbreaks": TableSpec(
+        "outbreaks", models.Outbreak, schemas.Outbreak,
+        [("location_id",), ("state",), ("district",), ("state", "district"), ("disease",)], "report_date",
+        ["disease", "country", "state", "district", "severity"],
+    ),
+    "vaccinations": TableSpec(
+        "vaccinations", models.Vaccination, schemas.Vaccination,
+        [("location_id",), ("state",), ("district",), ("state", "district"), ("vaccine_name",)], "start_date",
+        ["country", "state", "district", "vaccine_name", "target_population", "partner_org"],
+    ),
+}
+
+
+class Snapshot:
+    """Rows of one table in id order with position indexes; never modified after construction."""
+
+    def __init__(self, spec: TableSpec, rows: List[tuple]):
+        self.spec = spec
+        self.rows = rows
+        self.column = {field: i for i, field in enumerate(spec.columns)}
+        self.indexes: Dict[Tuple[str, ...], Dict[tuple, array]] = {}
+        for fields in spec.indexes:
+            columns = [self.column[field] for field in fields]
+            groups: Dict[tuple, list] = {}
+            for position, row in enumerate(rows):
+                groups.setdefault(tuple(row[i] for i in columns), []).append(position)
+            self.indexes[fields] = {key: array("I", positions) for key, positions in groups.items()}
+        date_column = self.column[spec.date_field]
+        dated = sorted(
+            (stamp, position) for position, row in enumerate(rows)
+            if (stamp := _timestamp(row[date_column])) is not None
+        )
+        self.dates = array("d", [stamp for stamp, _ in dated])
+        self.by_date = array("I", [position for _, position in dated])
+        self.loaded_at = time.monotonic()
+
+    def select(self, since: datetime = None, until: datetime = None, limit: int = None, **filters) -> Sequence[int]:
+        """Positions (in id order) of rows matching every filter.
+
+        A filter value is matched exactly, or by membership when it is a set;
+        ``None`` means no filter. ``since``/``until`` bound the table's date
+        column, inclusive. With ``limit`` the scan stops after that many matches.
+        """
+        filters = {field: value for field, value in filters.items() if value is not None}
+        candidates, covered = None, ()
+        for fields, index in self.indexes.items():
+            if all(field in filters and not isinstance(filters[field], (set, frozenset)) for field in fields):
+                positions = index.get(tuple(filters[field] for field in fields), _EMPTY)
+                if candidates is None or (len(positions), -len(fields)) < (len(candidates), -len(covered)):
+                    candidates, covered = positions, fields
+        low = _timestamp(since)
+        high = _timestamp(until)
+        dated = low is not None or high is not None
+        if dated:
+            start = bisect_left(self.dates, low) if low is not None else 0
+            end = bisect_right(self.dates, high) if high is not None else len(self.dates)
+            if candidates is None or end - start < len(candidates):
+                candidates, covered, dated = sorted(self.by_date[start:end]), (), False
+        if candidates is None:
+            candidates = range(len(self.rows))
+
+        # Conditions the chosen index does not already guarantee
+        checks = [(self.column[field], value) for field, value in filters.items() if field not in covered]
+        if not checks and not dated:
+            return candidates[:limit]
+        date_column = self.column[self.spec.date_field]
+        rows = self.rows
+        matched = []
+        for position in candidates:
+            row = rows[position]
+            if all(row[i] in value if isinstance(value, (set, frozenset)) else row[i] == value for i, value in checks):
+                if dated:
+                    stamp = _timestamp(row[date_column])
+                    if stamp is None or (low is not None and stamp < low) or (high is not None and stamp > high):
+                        continue
+                matched.append(position)
+                if len(matched) == limit:
+                    break
+        return matched
+
+    def records(self, positions: Iterable[int]) -> List[dict]:
+        return rows_to_dicts(self.spec.fields, (self.rows[position] for position in positions))
+
+
+class ReadModel:
+    def __init__(self, tables: Dict[str, TableSpec] = None, refresh_seconds: float = READ_MODEL_REFRESH_SECONDS):
+        self.tables = tables or TABLES
+        self.refresh_seconds = refresh_seconds
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._rows: Dict[str, Dict[int, tuple]] = {}
+        # Canonical (state, district) -> location_id, for published records
+        self._location_ids: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        # Serialize loads, and snapshot builds so an older copy of the rows never replaces a newer one
+        self._load_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        # Tables waiting for the builder: "build" from the rows in memory or "load" from the database
+        self._pending: Dict[str, str] = {}
+        # Changes applied while a table is being loaded, replayed on the loaded rows
+        self._replay: Dict[str, List[DataChange]] = {}
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._builder: Optional[threading.Thread] = None
+        self.changes_applied = 0
+        self.reloads = 0
+        self.builds = 0
+        self.last_build_ms = 0.0
+
+    def ready(self, table: str) -> bool:
+        return table in self._snapshots
+
+    def snapshot(self, table: str) -> Snapshot:
+        snapshot = self._snapshots[table]
+        stale = self.refresh_seconds and time.monotonic() - snapshot.loaded_at > self.refresh_seconds
+        if stale and table not in self._pending and table not in self._replay:
+            self._schedule(table, "load")
+        return snapshot
+
+    def load(self, tables: Iterable[str] = None):
+        """(Re)load tables from the primary database and swap in new snapshots."""
+        with self._load_lock:
+            self._load(list(tables or self.tables))
+
+    def _load(self, names: List[str]):
+        with self._lock:
+            for name in names:
+                self._replay[name] = []
+        try:
+            loaded = {}
+            db = SessionLocal()
+            try:
+                for name in names:
+                    spec = self.tables[name]
+                    rows = query_rows(db, spec.model, spec.schema).add_columns(spec.model.location_id).order_by(spec.model.id).all()
+                    loaded[name] = {row[spec.fields.index("id")]: spec.to_row(row) for row in rows}
+                    self._learn_locations(spec, loaded[name].values())
+            finally:
+                db.close()
+            with self._lock:
+                for name in names:
+                    for change in self._replay[name]:
+                        self._apply_records(loaded[name], change)
+                    self._rows[name] = loaded[name]
+            for name in names:
+                self._build(name)
+        finally:
+            with self._lock:
+                for name in names:
+                    self._replay.pop(name, None)
+        self.reloads += 1
+
+    def _learn_locations(self, spec: TableSpec, rows: Iterable[tuple]):
+        state, district, location_id = (spec.columns.index(field) for field in ("state", "district", "location_id"))
+        for row in rows:
+            if row[location_id] is not None:
+                self._location_ids[(row[state], row[district])] = row[location_id]
+
+    def _locate_rows(self, name: str, rows: Dict[int, tuple]):
+        """Fill in ``location_id`` for rows from records with names not seen yet (builder thread)."""
+        spec = self.tables[name]
+        state, district, location_id = (spec.columns.index(field) for field in ("state", "district", "location_id"))
+        missing = {row_id: row for row_id, row in rows.items() if row[location_id] is None and row[state] and row[district]}
+        if not missing:
+            return
+        db = SessionLocal()
+        try:
+            refs = resolve_locations(db, {(row[state], row[district]) for row in missing.values()}, create=False)
+        finally:
+            db.close()
+        with self._lock:
+            for row_id, row in missing.items():
+                ref = refs.get((row[state], row[district]))
+                if ref is None:
+                    continue
+                self._location_ids[(row[state], row[district])] = ref.id
+                located = row[:location_id] + (ref.id,) + row[location_id + 1:]
+                rows[row_id] = located
+                if self._rows[name].get(row_id) is row:
+                    self._rows[name][row_id] = located
+
+    def _build(self, name: str):
+        with self._build_lock:
+            started = time.perf_counter()
+            with self._lock:
+                rows = dict(self._rows[name])
+            self._locate_rows(name, rows)
+            self._snapshots[name] = Snapshot(self.tables[name], [rows[row_id] for row_id in sorted(rows)])
+            self.builds += 1
+            self.last_build_ms = round((time.perf_counter() - started) * 1000, 2)
+        # The response cache was invalidated when the change was published;
+        # drop pages built from the previous snapshot in between
+        bump_data_version(name)
+
+    def _apply_records(self, rows: Dict[int, tuple], change: DataChange):
+        spec = self.tables[change.table]
+        for record in change.records:
+            if change.action == "deleted":
+                rows.pop(record["id"], None)
+            else:
+                if record.get("location_id") is None:
+                    record = {**record, "location_id": self._location_ids.get((record.get("state"), record.get("district")))}
+                rows[record["id"]] = spec.to_row(record)
+
+    def apply(self, change: DataChange):
+        if change.table not in self._snapshots:
+            return
+        if not change.records:
+            # Bulk removals (e.g. archiving) come without rows
+            self._schedule(change.table, "load")
+            return
+        with self._lock:
+            self._apply_records(self._rows[change.table], change)
+            if change.table in self._replay:
+                self._replay[change.table].append(change)
+            self.changes_applied += 1
+        self._schedule(change.table, "build")
+
+    def _schedule(self, name: str, task: str):
+        with self._lock:
+            if self._pending.get(name) != "load":
+                self._pending[name] = task
+            self._idle.clear()
+            if self._builder is None or not self._builder.is_alive():
+                self._builder = threading.Thread(target=self._run_builder, name="read-model-builder", daemon=True)
+                self._builder.start()
+        self._wake.set()
+
+    def _run_builder(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for name, task in pending.items():
+                try:
+                    if task == "load":
+                        self.load([name])
+                    else:
+                        self._build(name)
+                except Exception as e:
+                    print(f"Read model {task} of {name} failed: {e}")
+            with self._lock:
+                if not self._pending:
+                    self._idle.set()
+
+    def settle(self, timeout: float = None) -> bool:
+        """Wait until pending rebuilds and reloads are swapped in; False on timeout."""
+        return self._idle.wait(timeout)
+
+    def page(self, table: str, page: int, limit: int, **filters) -> dict:
+        """Same shape as the SQL listing pages."""
+        snapshot = self.snapshot(table)
+        positions = snapshot.select(**filters)
+        total = len(positions)
+        start = max((page - 1) * limit, 0)
+        return {
+            "items": snapshot.records(positions[start:start + limit]),
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "pages": (total + limit - 1) // limit,
+        }
+
+    def rows(self, table: str, limit: int = None, **filters) -> List[dict]:
+        snapshot = self.snapshot(table)
+        return snapshot.records(snapshot.select(limit=limit, **filters))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": READ_MODEL_ENABLED,
+            "tables": {
+                name: {"rows": len(snapshot.rows), "age_seconds": round(time.monotonic() - snapshot.loaded_at, 1)}
+                for name, snapshot in self._snapshots.items()
+            },
+            "changes_applied": self.changes_applied,
+            "reloads": self.reloads,
+            "builds": self.builds,
+            "pending": sorted(self._pending),
+            "last_build_ms": self.last_build_ms,
+            "refresh_seconds": self.refresh_seconds,
+        }
+
+
+read_model = ReadModel()
+
+
+def serves(table: str) -> bool:
+    """Whether requests for ``table`` should be answered from memory."""
+    return READ_MODEL_ENABLED and read_model.ready(table)
+
+
+@add_listener
+def _apply_change(change: DataChange):
+    read_model.apply(change)
@@ -0,0 +1,159 @@
+"""
+Fan-out hub for real-time alert delivery over Server-Sent Events.
+
+Each connected client holds one small bounded ``asyncio.Queue`` registered
+under the ``(state, district)`` it follows (``district`` may be ``None`` for a
+whole state, and ``(None, None)`` receives everything). When a write path
+publishes a change, the hub groups the records by location, encodes one SSE
+frame per location and hands the same bytes to every matching queue on the
+event loop. Idle connections cost a coroutine and an empty queue, so a single
+process can hold tens of thousands of them.
+"""
+import asyncio
+import itertools
+import os
+import threading
+from collections import defaultdict
+from typing import Optional
+from .events import EVENT_TYPES, DataChange, add_listener
+from .serialization import dumps
+
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "64"))
+REALTIME_KEEPALIVE_SECONDS = float(os.getenv("REALTIME_KEEPALIVE_SECONDS", "15"))
+
+
+def sse_frame(event: str, data: bytes, event_id: int = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode() + b"data: " + data + b"\n\n"
+
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+RESYNC_FRAME = sse_frame("resync", b"{}")
+
+
+class Subscription:
+    __slots__ = ("key", "queue", "overflowed")
+
+    def __init__(self, key, queue_size: int):
+        self.key = key
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, frame: bytes) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            # Slow consumer: drop events and tell the client to refetch instead
+            self.overflowed = True
+            return False
+
+
+class AlertHub:
+    def __init__(self, queue_size: int = REALTIME_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subs) for subs in list(self._subscribers.values()))
+
+    def subscribe(self, state: str = None, district: str = None) -> Subscription:
+        """Register a subscriber; must be called from the serving event loop."""
+        self._loop = asyncio.get_running_loop()
+        key = (state or None, district or None if state else None)
+        subscription = Subscription(key, self.queue_size)
+        self._subscribers[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subs = self._subscribers.get(subscription.key)
+        if subs is not None:
+            subs.discard(subscription)
+            if not subs:
+                del self._subscribers[subscription.key]
+
+    def build_frames(self, change: DataChange) -> list:
+        event = EVENT_TYPES.get(change.table)
+        if event is None:
+            return []
+        by_location = defaultdict(list)
+        for record in change.records:
+            by_location[(record.get("state"), record.get("district"))].append(record)
+        frames = []
+        with self._lock:
+            for (state, district), records in by_location.items():
+                payload = dumps({
+                    "type": event,
+                    "action": change.action,
+                    "state": state,
+                    "district": district,
+                    "count": len(records),
+                    "items": records,
+                })
+                frames.append(((state, district), sse_frame(event, payload, next(self._sequence))))
+        return frames
+
+    def publish(self, change: DataChange):
+        """Fan a committed change out to subscribers. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        frames = self.build_frames(change)
+        if not frames:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(frames)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, frames)
+
+    def _dispatch(self, frames: list):
+        for (state, district), frame in frames:
+            self.published += 1
+            for key in ((state, district), (state, None), (None, None)):
+                for subscription in self._subscribers.get(key, ()):
+                    if subscription.offer(frame):
+                        self.delivered += 1
+                    else:
+                        self.dropped += 1
+
+    async def stream(self, state: str = None, district: str = None, keepalive: float = REALTIME_KEEPALIVE_SECONDS):
+        """Subscribe and yield SSE frames until the client disconnects."""
+        subscription = self.subscribe(state, district)
+        try:
+            yield sse_frame("subscribed", dumps({"state": subscription.key[0], "district": subscription.key[1]}))
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+                    continue
+                yield frame
+                if subscription.overflowed and subscription.queue.empty():
+                    subscription.overflowed = False
+                    yield RESYNC_FRAME
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "locations": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+alert_hub = AlertHub()
+add_listener(alert_hub.publish)
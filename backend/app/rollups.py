@@ -0,0 +1,239 @@
+"""
+Daily rollups of outbreaks and vaccination campaigns.
+
+``outbreak_daily_stats`` holds, per report day, location and disease, the
+number of reports and the summed cases and deaths;
+``vaccination_daily_stats`` holds, per campaign start day, location and
+vaccine, the number of campaigns and the summed doses. Summaries and trend
+charts read these few thousand rows instead of the raw tables.
+
+Write paths call ``apply_changes`` with the rows as they were before and
+after the write, inside the same transaction: the old values are
+subtracted, the new ones added, and groups that drop to zero reports are
+removed. ``upsert_rows`` does this for bulk upserts and CSV imports; the admin
+create, update and delete endpoints do it themselves. Archiving does not
+touch the rollups, so history outlives the raw rows. Groups are keyed by
+``location_id`` (app/locations.py), resolved from the rows' names, so any
+spelling of a location lands in the same group; filters match names through
+``location_condition`` and display names come from ``locations``. When a
+location is merged into another (``app.locations.add_alias``)
+``move_location`` adds its groups to the other's.
+
+``rebuild_rollups`` recomputes them from the live and archived rows (the
+``rollups`` job, ``python rebuild_rollups.py``). Days that only exist in
+exported archive files are left as they are.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import column, delete, func, insert, null, select, table, union_all, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .archive import ARCHIVED_TABLES, archive_partitions
+from .database import SessionLocal
+from .jobs import job_handler
+from .locations import location_condition, resolve_locations
+
+
+@dataclass(frozen=True)
+class Rollup:
+    source: str           # raw table
+    model: type           # rollup table
+    date_field: str
+    key_field: str        # disease / vaccine_name
+    count_field: str      # reports / campaigns
+    measures: Tuple[str, ...]
+
+    @property
+    def key_columns(self) -> Tuple[str, ...]:
+        return ("day", "location_id", self.key_field)
+
+    def key(self, record: dict, location_id: Optional[int]) -> Optional[tuple]:
+        value = record.get(self.date_field)
+        if isinstance(value, datetime):
+            value = value.date()
+        if not isinstance(value, date) or location_id is None:
+            return None
+        return (value, location_id, record.get(self.key_field) or "")
+
+
+ROLLUPS = {
+    "outbreaks": Rollup("outbreaks", models.OutbreakDailyStat, "report_date", "disease", "reports", ("cases_reported", "deaths")),
+    "vaccinations": Rollup(
+        "vaccinations", models.VaccinationDailyStat, "start_date", "vaccine_name", "campaigns",
+        ("doses_allocated", "doses_administered"),
+    ),
+}
+
+
+def _location_ids(db: Session, records: List[dict]) -> Dict[tuple, int]:
+    pairs = {(record.get("state"), record.get("district")) for record in records if record.get("location_id") is None}
+    return {pair: ref.id for pair, ref in resolve_locations(db, pairs).items()} if pairs else {}
+
+
+def _deltas(db: Session, rollup: Rollup, removed: Iterable[dict], added: Iterable[dict]) -> Dict[tuple, List[int]]:
+    removed, added = list(removed), list(added)
+    location_ids = _location_ids(db, removed + added)
+    deltas: Dict[tuple, List[int]] = {}
+    for sign, records in ((-1, removed), (1, added)):
+        for record in records:
+            location_id = record.get("location_id") or location_ids.get((record.get("state"), record.get("district")))
+            key = rollup.key(record, location_id)
+            if key is None:
+                continue
+            delta = deltas.setdefault(key, [0] * (len(rollup.measures) + 1))
+            delta[0] += sign
+            for i, measure in enumerate(rollup.measures, 1):
+                delta[i] += sign * (record.get(measure) or 0)
+    return {key: delta for key, delta in deltas.items() if any(delta)}
+
+
+def apply_changes(db: Session, source: str, removed: Iterable[dict] = (), added: Iterable[dict] = ()):
+    """Move rollup totals from the ``removed`` rows' groups to the ``added`` rows'; the caller commits."""
+    rollup = ROLLUPS[source]
+    deltas = _deltas(db, rollup, removed, added)
+    if deltas:
+        _add(db, rollup, deltas)
+
+
+def _add(db: Session, rollup: Rollup, deltas: Dict[tuple, List[int]]):
+    """Add counters to their groups, creating missing ones and removing emptied ones."""
+    model = rollup.model
+    counters = (rollup.count_field,) + rollup.measures
+    rows = [dict(zip(rollup.key_columns + counters, key + tuple(delta))) for key, delta in deltas.items()]
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(rollup.key_columns),
+            set_={name: getattr(model.__table__.c, name) + stmt.excluded[name] for name in counters},
+        )
+        db.execute(stmt, rows)
+    else:
+        key_columns = [getattr(model, name) for name in rollup.key_columns]
+        for row in rows:
+            condition = [key_column == row[name] for key_column, name in zip(key_columns, rollup.key_columns)]
+            result = db.execute(update(model).where(*condition).values(
+                {name: getattr(model, name) + row[name] for name in counters}
+            ))
+            if not result.rowcount:
+                db.execute(insert(model).values(row))
+
+    days = {key[0] for key in deltas}
+    db.execute(delete(model).where(model.day.in_(days), getattr(model, rollup.count_field) <= 0).execution_options(synchronize_session=False))
+
+
+def move_location(db: Session, source: str, from_id: int, to_id: int):
+    """Add the groups of location ``from_id`` to ``to_id``'s, when one location is merged into another; the caller commits."""
+    rollup = ROLLUPS[source]
+    model = rollup.model
+    counters = (rollup.count_field,) + rollup.measures
+    rows = db.execute(select(model.day, getattr(model, rollup.key_field), *[getattr(model, name) for name in counters])
+                      .where(model.location_id == from_id)).all()
+    if not rows:
+        return
+    db.execute(delete(model).where(model.location_id == from_id).execution_options(synchronize_session=False))
+    _add(db, rollup, {(row[0], to_id, row[1]): list(row[2:]) for row in rows})
+
+
+def _sources(db: Session, rollup: Rollup) -> List[str]:
+    names = [rollup.source]
+    if rollup.source in ARCHIVED_TABLES:
+        names.extend(name for _, name in sorted(archive_partitions(db, ARCHIVED_TABLES[rollup.source]).items()))
+    return names
+
+
+def _day(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild_rollups(db: Session, sources: List[str] = None) -> Dict[str, dict]:
+    """Recompute rollups from live and archived rows and commit.
+
+    Only days from the earliest row still in the database onward are
+    replaced; older rollups (rows exported to archive files) are kept.
+    Archived rows are located by name: their ``location_id``, where they
+    have one, is not updated when locations are merged.
+    """
+    summary = {}
+    for source in sources or list(ROLLUPS):
+        rollup = ROLLUPS[source]
+        fields = ("state", "district", rollup.key_field, rollup.date_field) + rollup.measures
+        selects = [
+            select(
+                column("location_id") if name == rollup.source else null().label("location_id"),
+                *[column(name) for name in fields],
+            ).select_from(table(name, column("location_id"), *[column(name) for name in fields]))
+            for name in _sources(db, rollup)
+        ]
+        rows = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+        day = func.date(rows.c[rollup.date_field])
+        since = db.scalar(select(func.min(day)).where(rows.c[rollup.date_field].isnot(None)))
+        if since is None:
+            summary[source] = {"since": None, "groups": 0}
+            continue
+
+        keys = [day, rows.c.location_id, rows.c.state, rows.c.district, func.coalesce(rows.c[rollup.key_field], "")]
+        grouped = db.execute(select(
+            *keys,
+            func.count(),
+            *[func.coalesce(func.sum(rows.c[measure]), 0) for measure in rollup.measures],
+        ).where(rows.c[rollup.date_field].isnot(None)).group_by(*keys)).all()
+        location_ids = {pair: ref.id for pair, ref in resolve_locations(
+            db, {(row[2], row[3]) for row in grouped if row[1] is None}
+        ).items()}
+        totals: Dict[tuple, List[int]] = {}
+        for row in grouped:
+            location_id = row[1] if row[1] is not None else location_ids.get((row[2], row[3]))
+            if location_id is None:
+                continue  # no state or district
+            group = totals.setdefault((_day(row[0]), location_id, row[4]), [0] * (len(rollup.measures) + 1))
+            for i, value in enumerate(row[5:]):
+                group[i] += value
+        model = rollup.model
+        since = _day(since)
+        db.execute(delete(model).where(model.day >= since).execution_options(synchronize_session=False))
+        if totals:
+            db.execute(insert(model), [
+                dict(zip(rollup.key_columns + (rollup.count_field,) + rollup.measures, group + tuple(values)))
+                for group, values in totals.items()
+            ])
+        db.commit()
+        summary[source] = {"since": since.isoformat(), "groups": db.scalar(select(func.count()).select_from(model).where(model.day >= since))}
+    return summary
+
+
+def daily_totals(db: Session, source: str, state: str = None, district: str = None, key: str = None,
+                 since: date = None, until: date = None) -> List[dict]:
+    """Totals per day (summed over the groups matching the filters), oldest first."""
+    rollup = ROLLUPS[source]
+    model = rollup.model
+    counters = (rollup.count_field,) + rollup.measures
+    query = select(model.day, *[func.sum(getattr(model, name)).label(name) for name in counters]).group_by(model.day).order_by(model.day)
+    location = location_condition(model.location_id, state, district)
+    if location is not None:
+        query = query.where(location)
+    if key:
+        query = query.where(getattr(model, rollup.key_field) == key)
+    if since:
+        query = query.where(model.day >= since)
+    if until:
+        query = query.where(model.day <= until)
+    return [{"day": row[0], **{name: int(row[i] or 0) for i, name in enumerate(counters, 1)}} for row in db.execute(query)]
+
+
+@job_handler("rollups")
+def run_rebuild_job(ctx):
+    ctx.progress(0.0, message="Rebuilding daily rollups", force=True)
+    db = SessionLocal()
+    try:
+        return rebuild_rollups(db, ctx.params.get("sources"))
+    finally:
+        db.close()
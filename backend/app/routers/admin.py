@@ -1,19 +1,199 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from pydantic import ValidationError
+from collections import Counter
+from datetime import datetime
 from .. import models, schemas
 from .. import auth
-from ..database import get_db
-from ..scheduler import send_location_notifications
-import pandas as pd
-import io
-from datetime import datetime
+from ..database import get_db, get_read_db, pool_status, ReadSessionLocal
+from ..cache import response_cache
+from ..chatbot import chatbot
+from ..archive import ARCHIVED_TABLES, archive_status
+from ..ratelimit import rate_limiter
+from ..read_model import read_model
+from ..rollups import ROLLUPS, apply_changes
+from ..changefeed import log_changes
+from ..locations import add_alias, assign_locations, location_condition, resolve_locations
+from ..digests import DIGEST_WINDOWS, compute_location_digests, render_digest
+from ..events import publish_change
+from ..ingest import FEEDS_BY_MODEL, CSVFormatError, refresh_content_hashes, upsert_rows
+from ..jobs import enqueue
+from ..tasks import import_feed, ingest_files, notify_records, save_upload, save_uploads
+from ..serialization import FastJSONResponse, query_rows, rows_to_dicts, schema_fields, iter_csv, iter_ndjson, object_to_dict
 
 router = APIRouter()
 
-@router.get("/users", response_model=List[schemas.User])
-def get_all_users(admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
-    return db.query(models.User).all()
+MAX_USERS_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+MAX_BULK_ITEMS = 1000
+
+def _filter_users(query, state: str = None, district: str = None, role: str = None, notifications: Optional[bool] = None, q: str = None):
+    if state or district:
+        query = query.filter(location_condition(models.User.location_id, state, district))
+    if role:
+        query = query.filter(models.User.role == role)
+    if notifications is not None:
+        query = query.filter(models.User.notifications == notifications)
+    if q:
+        # Prefix search written as a range so the username/email btree indexes
+        # are usable; the LIKE keeps the result exact under any collation.
+        pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        upper = q + "\uffff"
+        query = query.filter(
+            ((models.User.username >= q) & (models.User.username < upper) & models.User.username.like(pattern, escape="\\")) |
+            ((models.User.email >= q) & (models.User.email < upper) & models.User.email.like(pattern, escape="\\"))
+        )
+    return query
+
+def _check_bulk_size(count: int):
+    if count == 0:
+        raise HTTPException(status_code=400, detail="No items given")
+    if count > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+
+def _bulk_result(results: list) -> dict:
+    return {"results": results, "counts": dict(Counter(item["status"] for item in results))}
+
+def _load_records(db: Session, model, schema, ids: list) -> list:
+    if not ids:
+        return []
+    rows = query_rows(db, model, schema).filter(model.id.in_(ids)).order_by(model.id).all()
+    return rows_to_dicts(schema_fields(schema), rows)
+
+def _patch_problem(schema, record: dict, values: dict) -> Optional[str]:
+    """Why ``values`` would make ``record`` (the stored row, patched) invalid, or None.
+
+    Only the patched fields are judged, so older rows that would not pass
+    today's schema can still be corrected one field at a time.
+    """
+    try:
+        schema(**{**record, **values})
+    except ValidationError as e:
+        problems = [f"{error['loc'][0]}: {error['msg']}" for error in e.errors() if error["loc"] and error["loc"][0] in values]
+        return "; ".join(problems) or None
+    return None
+
+def _bulk_patch(db: Session, model, schema, items: list):
+    """Apply partial updates by primary key with one executemany UPDATE.
+
+    Items are checked before anything is written: one that would leave its
+    row invalid (e.g. an explicit null for ``disease``) is reported
+    ``invalid``, one that moves its row to a natural key (outbreak_id /
+    campaign_id) held by another row or claimed earlier in the request
+    ``conflict``, and neither is applied. Returns per-item results and the
+    rows that actually changed, as updated.
+    """
+    _check_bulk_size(len(items))
+    previous = {record["id"]: record for record in _load_records(db, model, schema, list({item.id for item in items}))}
+    key = FEEDS_BY_MODEL[model].key
+    key_column = getattr(model, key)
+    wanted = {getattr(item, key) for item in items if getattr(item, key) is not None}
+    holders = dict(db.query(key_column, model.id).filter(key_column.in_(wanted)).all()) if wanted else {}
+    changes = {}
+    results = []
+    for index, item in enumerate(items):
+        values = item.dict(exclude_unset=True)
+        detail = None
+        if item.id not in previous:
+            status = "not_found"
+        elif len(values) == 1:
+            status = "unchanged"  # only the id was given
+        elif (detail := _patch_problem(schema, {**previous[item.id], **changes.get(item.id, {})}, values)):
+            status = "invalid"
+        elif key in values and holders.get(values[key], item.id) != item.id:
+            status, detail = "conflict", f"{key} {values[key]!r} belongs to another row"
+        else:
+            if key in values:
+                holders[values[key]] = item.id
+            changes.setdefault(item.id, {}).update(values)
+            status = "updated"
+        results.append({"index": index, "id": item.id, "status": status, "detail": detail})
+    if not changes:
+        return results, []
+    moved = [values for values in changes.values() if "state" in values or "district" in values]
+    for values in moved:
+        values.setdefault("state", previous[values["id"]]["state"])
+        values.setdefault("district", previous[values["id"]]["district"])
+    assign_locations(db, moved)
+    try:
+        db.execute(update(model), list(changes.values()))
+    except IntegrityError:
+        # A concurrent write took one of the keys after the check above
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Update conflicts with another row's {key}; nothing was changed")
+    records = _load_records(db, model, schema, list(changes))
+    apply_changes(db, model.__tablename__, [previous[record["id"]] for record in records], records)
+    log_changes(db, model.__tablename__, [previous[record["id"]] for record in records], records)
+    return results, records
+
+def _bulk_upsert(db: Session, feed: str, key: str, items: list):
+    """Insert or update rows by their natural key (outbreak_id / campaign_id).
+
+    Returns per-item results and the upsert result with the changed rows.
+    """
+    _check_bulk_size(len(items))
+    result = upsert_rows(db, feed, [item.dict() for item in items])
+    last_index = {getattr(item, key): index for index, item in enumerate(items)}
+    results = []
+    for index, item in enumerate(items):
+        item_key = getattr(item, key)
+        status = result.statuses[item_key] if last_index[item_key] == index else "duplicate"
+        results.append({"index": index, "id": result.ids.get(item_key), "key": item_key, "status": status})
+    return results, result
+
+def _bulk_delete(db: Session, model, schema, ids: list):
+    _check_bulk_size(len(ids))
+    records = _load_records(db, model, schema, list(set(ids)))
+    found = {record["id"] for record in records}
+    if found:
+        db.execute(delete(model).where(model.id.in_(found)).execution_options(synchronize_session=False))
+        apply_changes(db, model.__tablename__, records, [])
+        log_changes(db, model.__tablename__, records, [])
+    results = [
+        {"index": index, "id": item_id, "status": "deleted" if item_id in found else "not_found"}
+        for index, item_id in enumerate(ids)
+    ]
+    return results, records
+
+@router.get("/users", response_model=schemas.UserPage)
+def get_all_users(page: int = 1, limit: int = 50, state: str = None, district: str = None, role: str = None, notifications: Optional[bool] = None, q: str = None, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_read_db)):
+    page = max(page, 1)
+    limit = min(max(limit, 1), MAX_USERS_PAGE_SIZE)
+    query = _filter_users(query_rows(db, models.User, schemas.User), state, district, role, notifications, q)
+    total = query.count()
+    rows = query.order_by(models.User.id).offset((page - 1) * limit).limit(limit).all()
+    return FastJSONResponse({
+        "items": rows_to_dicts(schema_fields(schemas.User), rows),
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "pages": (total + limit - 1) // limit
+    })
+
+@router.get("/users/export")
+def export_users(format: str = "csv", state: str = None, district: str = None, role: str = None, notifications: Optional[bool] = None, q: str = None, admin_user: models.User = Depends(auth.require_admin)):
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    fields = schema_fields(schemas.User)
+
+    def generate():
+        # Own session: the request-scoped one may be closed before streaming ends
+        db = ReadSessionLocal()
+        try:
+            query = _filter_users(query_rows(db, models.User, schemas.User), state, district, role, notifications, q)
+            rows = query.order_by(models.User.id).yield_per(EXPORT_BATCH_SIZE)
+            encoder = iter_csv if format == "csv" else iter_ndjson
+            yield from encoder(fields, rows, EXPORT_BATCH_SIZE)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"users.{format}"
+    return StreamingResponse(generate(), media_type=media_type, headers={"Content-Disposition": f"attachment; filename={filename}"})
 
 @router.delete("/users/{user_id}")
 def delete_user(user_id: int, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
@@ -24,39 +204,139 @@ def delete_user(user_id: int, admin_user: models.User = Depends(auth.require_adm
     db.commit()
     return {"message": "User deleted successfully"}
 
+@router.get("/pool-stats")
+def get_pool_stats(admin_user: models.User = Depends(auth.require_admin)):
+    return pool_status()
+
+@router.get("/cache-stats")
+def get_cache_stats(admin_user: models.User = Depends(auth.require_admin)):
+    return response_cache.stats()
+
+@router.get("/read-model-stats")
+def get_read_model_stats(admin_user: models.User = Depends(auth.require_admin)):
+    return read_model.stats()
+
+@router.get("/rate-limit-stats")
+def get_rate_limit_stats(admin_user: models.User = Depends(auth.require_admin)):
+    return rate_limiter.stats()
+
+@router.get("/archive-stats")
+def get_archive_stats(admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    return archive_status(db)
+
+@router.post("/archive")
+def run_archive(table: Optional[str] = None, admin_user: models.User = Depends(auth.require_admin)):
+    """Move rows past their hot window into the monthly archive, as a background job."""
+    if table is not None and table not in ARCHIVED_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown archived table")
+    job_id = enqueue("archive", {"tables": [table] if table else None}, created_by=admin_user.id)
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+
+@router.post("/rollups/rebuild")
+def rebuild_rollups(table: Optional[str] = None, admin_user: models.User = Depends(auth.require_admin)):
+    """Recompute the daily rollups from the live and archived rows, as a background job."""
+    if table is not None and table not in ROLLUPS:
+        raise HTTPException(status_code=404, detail="Unknown rollup table")
+    job_id = enqueue("rollups", {"sources": [table] if table else None}, created_by=admin_user.id)
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+
+@router.get("/locations", response_model=List[schemas.Location])
+def get_locations(state: Optional[str] = None, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_read_db)):
+    query = db.query(models.Location.id, models.Location.state, models.Location.district)
+    if state:
+        query = query.filter(location_condition(models.Location.id, state))
+    aliases = {}
+    for location_id, state_key, district_key in db.query(models.LocationAlias.location_id, models.LocationAlias.state_key, models.LocationAlias.district_key):
+        aliases.setdefault(location_id, []).append(f"{district_key}, {state_key}")
+    return FastJSONResponse([
+        {"id": row.id, "state": row.state, "district": row.district, "aliases": aliases.get(row.id, [])}
+        for row in query.order_by(models.Location.state, models.Location.district)
+    ])
+
+@router.post("/locations/{location_id}/aliases")
+def add_location_alias(location_id: int, alias: schemas.LocationAliasCreate, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    """Record another name of a location; a location already known by that name is merged into this one."""
+    try:
+        result = add_alias(db, location_id, alias.state, alias.district)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    publish_change("locations", "aliased")
+    for table, count in result["moved"].items():
+        if count and table in ROLLUPS:
+            # No records: derived state for these tables is rebuilt, not patched
+            publish_change(table, "relocated")
+    return result
+
+@router.get("/ollama-stats")
+def get_ollama_stats(probe: bool = False, admin_user: models.User = Depends(auth.require_admin)):
+    result = {"default_url": chatbot.ollama_url, "backends": chatbot.gateway.stats()}
+    if probe:
+        result["healthy"] = chatbot.gateway.probe(chatbot.ollama_url)
+    return result
+
 @router.post("/outbreaks", response_model=schemas.Outbreak)
 def create_outbreak(outbreak: schemas.OutbreakCreate, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
     db_outbreak = models.Outbreak(**outbreak.dict())
     db.add(db_outbreak)
+    db.flush()
+    written = object_to_dict(db_outbreak, schemas.Outbreak)
+    apply_changes(db, "outbreaks", [], [written])
+    log_changes(db, "outbreaks", [], [written])
     db.commit()
     db.refresh(db_outbreak)
-    
-    send_location_notifications(
-        db_outbreak.state, 
-        db_outbreak.district, 
-        "outbreak", 
-        {"disease": db_outbreak.disease, "cases_reported": db_outbreak.cases_reported, "severity": db_outbreak.severity}
-    )
+    record = object_to_dict(db_outbreak, schemas.Outbreak)
+    publish_change("outbreaks", "created", [record])
+    notify_records("outbreak", [record])
     
     return db_outbreak
 
+@router.patch("/outbreaks/bulk", response_model=schemas.BulkResult)
+def bulk_update_outbreaks(payload: schemas.OutbreakBulkPatch, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    results, records = _bulk_patch(db, models.Outbreak, schemas.Outbreak, payload.items)
+    refresh_content_hashes(db, "outbreaks", [record["id"] for record in records])
+    db.commit()
+    if records:
+        publish_change("outbreaks", "updated", records)
+        notify_records("outbreak", records)
+    return _bulk_result(results)
+
+@router.put("/outbreaks/bulk", response_model=schemas.BulkResult)
+def bulk_upsert_outbreaks(payload: schemas.OutbreakBulkUpsert, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    results, result = _bulk_upsert(db, "outbreaks", "outbreak_id", payload.items)
+    db.commit()
+    if result.changed:
+        publish_change("outbreaks", "upserted", result.changed)
+        notify_records("outbreak", result.material)
+    return _bulk_result(results)
+
+@router.delete("/outbreaks/bulk", response_model=schemas.BulkResult)
+def bulk_delete_outbreaks(payload: schemas.BulkDelete, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    results, records = _bulk_delete(db, models.Outbreak, schemas.Outbreak, payload.ids)
+    db.commit()
+    if records:
+        publish_change("outbreaks", "deleted", records)
+    return _bulk_result(results)
+
 @router.put("/outbreaks/{outbreak_id}", response_model=schemas.Outbreak)
 def update_outbreak(outbreak_id: int, outbreak: schemas.OutbreakCreate, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
     db_outbreak = db.query(models.Outbreak).filter(models.Outbreak.id == outbreak_id).first()
     if not db_outbreak:
         raise HTTPException(status_code=404, detail="Outbreak not found")
-    
+    previous = object_to_dict(db_outbreak, schemas.Outbreak)
     for field, value in outbreak.dict().items():
         setattr(db_outbreak, field, value)
+    db.flush()
+    written = object_to_dict(db_outbreak, schemas.Outbreak)
+    apply_changes(db, "outbreaks", [previous], [written])
+    log_changes(db, "outbreaks", [previous], [written])
     db.commit()
     db.refresh(db_outbreak)
-    
-    send_location_notifications(
-        db_outbreak.state, 
-        db_outbreak.district, 
-        "outbreak", 
-        {"disease": db_outbreak.disease, "cases_reported": db_outbreak.cases_reported, "severity": db_outbreak.severity}
-    )
+    record = object_to_dict(db_outbreak, schemas.Outbreak)
+    publish_change("outbreaks", "updated", [record])
+    notify_records("outbreak", [record])
     
     return db_outbreak
 
@@ -65,43 +345,74 @@ def delete_outbreak(outbreak_id: int, admin_user: models.User = Depends(auth.req
     outbreak = db.query(models.Outbreak).filter(models.Outbreak.id == outbreak_id).first()
     if not outbreak:
         raise HTTPException(status_code=404, detail="Outbreak not found")
+    record = object_to_dict(outbreak, schemas.Outbreak)
     db.delete(outbreak)
+    apply_changes(db, "outbreaks", [record], [])
+    log_changes(db, "outbreaks", [record], [])
     db.commit()
+    publish_change("outbreaks", "deleted", [record])
     return {"message": "Outbreak deleted successfully"}
 
 @router.post("/vaccinations", response_model=schemas.Vaccination)
 def create_vaccination(vaccination: schemas.VaccinationCreate, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
     db_vaccination = models.Vaccination(**vaccination.dict())
     db.add(db_vaccination)
+    db.flush()
+    written = object_to_dict(db_vaccination, schemas.Vaccination)
+    apply_changes(db, "vaccinations", [], [written])
+    log_changes(db, "vaccinations", [], [written])
     db.commit()
     db.refresh(db_vaccination)
-    
-    send_location_notifications(
-        db_vaccination.state, 
-        db_vaccination.district, 
-        "vaccination", 
-        {"vaccine_name": db_vaccination.vaccine_name, "target_population": db_vaccination.target_population, "start_date": str(db_vaccination.start_date)}
-    )
+    record = object_to_dict(db_vaccination, schemas.Vaccination)
+    publish_change("vaccinations", "created", [record])
+    notify_records("vaccination", [record])
     
     return db_vaccination
 
+@router.patch("/vaccinations/bulk", response_model=schemas.BulkResult)
+def bulk_update_vaccinations(payload: schemas.VaccinationBulkPatch, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    results, records = _bulk_patch(db, models.Vaccination, schemas.Vaccination, payload.items)
+    refresh_content_hashes(db, "vaccinations", [record["id"] for record in records])
+    db.commit()
+    if records:
+        publish_change("vaccinations", "updated", records)
+        notify_records("vaccination", records)
+    return _bulk_result(results)
+
+@router.put("/vaccinations/bulk", response_model=schemas.BulkResult)
+def bulk_upsert_vaccinations(payload: schemas.VaccinationBulkUpsert, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    results, result = _bulk_upsert(db, "vaccinations", "campaign_id", payload.items)
+    db.commit()
+    if result.changed:
+        publish_change("vaccinations", "upserted", result.changed)
+        notify_records("vaccination", result.material)
+    return _bulk_result(results)
+
+@router.delete("/vaccinations/bulk", response_model=schemas.BulkResult)
+def bulk_delete_vaccinations(payload: schemas.BulkDelete, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    results, records = _bulk_delete(db, models.Vaccination, schemas.Vaccination, payload.ids)
+    db.commit()
+    if records:
+        publish_change("vaccinations", "deleted", records)
+    return _bulk_result(results)
+
 @router.put("/vaccinations/{vaccination_id}", response_model=schemas.Vaccination)
 def update_vaccination(vaccination_id: int, vaccination: schemas.VaccinationCreate, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
     db_vaccination = db.query(models.Vaccination).filter(models.Vaccination.id == vaccination_id).first()
     if not db_vaccination:
         raise HTTPException(status_code=404, detail="Vaccination not found")
-    
+    previous = object_to_dict(db_vaccination, schemas.Vaccination)
     for field, value in vaccination.dict().items():
         setattr(db_vaccination, field, value)
+    db.flush()
+    written = object_to_dict(db_vaccination, schemas.Vaccination)
+    apply_changes(db, "vaccinations", [previous], [written])
+    log_changes(db, "vaccinations", [previous], [written])
     db.commit()
     db.refresh(db_vaccination)
-    
-    send_location_notifications(
-        db_vaccination.state, 
-        db_vaccination.district, 
-        "vaccination", 
-        {"vaccine_name": db_vaccination.vaccine_name, "target_population": db_vaccination.target_population, "start_date": str(db_vaccination.start_date)}
-    )
+    record = object_to_dict(db_vaccination, schemas.Vaccination)
+    publish_change("vaccinations", "updated", [record])
+    notify_records("vaccination", [record])
     
     return db_vaccination
 
@@ -110,100 +421,83 @@ def delete_vaccination(vaccination_id: int, admin_user: models.User = Depends(au
     vaccination = db.query(models.Vaccination).filter(models.Vaccination.id == vaccination_id).first()
     if not vaccination:
         raise HTTPException(status_code=404, detail="Vaccination not found")
+    record = object_to_dict(vaccination, schemas.Vaccination)
     db.delete(vaccination)
+    apply_changes(db, "vaccinations", [record], [])
+    log_changes(db, "vaccinations", [record], [])
     db.commit()
+    publish_change("vaccinations", "deleted", [record])
     return {"message": "Vaccination deleted successfully"}
 
-@router.post("/outbreaks/upload-csv")
-def upload_outbreaks_csv(file: UploadFile = File(...), admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+def _import_csv(db: Session, feed: str, file: UploadFile, mode: str, background: bool, admin_user: models.User):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
-    
+    if mode not in ("upsert", "insert"):
+        raise HTTPException(status_code=400, detail="mode must be 'upsert' or 'insert'")
+
+    contents = file.file.read()
+    if background:
+        job_id = enqueue("import_csv", {"feed": feed, "mode": mode, "path": save_upload(contents), "filename": file.filename}, created_by=admin_user.id)
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+
     try:
-        contents = file.file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        required_columns = ['outbreak_id', 'disease', 'report_date', 'state', 'district', 'cases_reported', 'deaths', 'severity', 'confirmed']
-        if not all(col in df.columns for col in required_columns):
-            raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(required_columns)}")
-        
-        created_count = 0
-        for _, row in df.iterrows():
-            existing = db.query(models.Outbreak).filter(models.Outbreak.outbreak_id == row['outbreak_id']).first()
-            if not existing:
-                outbreak = models.Outbreak(
-                    outbreak_id=row['outbreak_id'],
-                    disease=row['disease'],
-                    report_date=pd.to_datetime(row['report_date']),
-                    country=row.get('country', 'India'),
-                    state=row['state'],
-                    district=row['district'],
-                    cases_reported=int(row['cases_reported']),
-                    deaths=int(row['deaths']),
-                    severity=row['severity'],
-                    confirmed=bool(row['confirmed']),
-                    source_url=row.get('source_url', ''),
-                    notes=row.get('notes', '')
-                )
-                db.add(outbreak)
-                created_count += 1
-                
-                send_location_notifications(
-                    outbreak.state,
-                    outbreak.district,
-                    "outbreak",
-                    {"disease": outbreak.disease, "cases_reported": outbreak.cases_reported, "severity": outbreak.severity}
-                )
-        
-        db.commit()
-        return {"message": f"Successfully uploaded {created_count} outbreaks"}
-        
+        return import_feed(db, feed, contents, mode)
+    except CSVFormatError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=400, detail=f"Error processing CSV: {str(e)}")
 
+@router.post("/outbreaks/upload-csv")
+def upload_outbreaks_csv(file: UploadFile = File(...), mode: str = "upsert", background: bool = False, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    return _import_csv(db, "outbreaks", file, mode, background, admin_user)
+
 @router.post("/vaccinations/upload-csv")
-def upload_vaccinations_csv(file: UploadFile = File(...), admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
-    
+def upload_vaccinations_csv(file: UploadFile = File(...), mode: str = "upsert", background: bool = False, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    return _import_csv(db, "vaccinations", file, mode, background, admin_user)
+
+def _ingest(db: Session, feed: str, files: List[UploadFile], mode: str, workers: Optional[int], strict: bool, background: bool, admin_user: models.User):
+    if mode not in ("upsert", "insert"):
+        raise HTTPException(status_code=400, detail="mode must be 'upsert' or 'insert'")
+    uploads = [(file.filename, file.file.read()) for file in files]
+    if background:
+        params = {"feed": feed, "mode": mode, "workers": workers, "strict": strict, "names": [name for name, _ in uploads], "directory": save_uploads(uploads)}
+        job_id = enqueue("ingest_files", params, created_by=admin_user.id)
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+
     try:
-        contents = file.file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        required_columns = ['campaign_id', 'state', 'district', 'start_date', 'end_date', 'vaccine_name', 'target_population', 'doses_allocated', 'doses_administered']
-        if not all(col in df.columns for col in required_columns):
-            raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(required_columns)}")
-        
-        created_count = 0
-        for _, row in df.iterrows():
-            existing = db.query(models.Vaccination).filter(models.Vaccination.campaign_id == row['campaign_id']).first()
-            if not existing:
-                vaccination = models.Vaccination(
-                    campaign_id=row['campaign_id'],
-                    country=row.get('country', 'India'),
-                    state=row['state'],
-                    district=row['district'],
-                    start_date=pd.to_datetime(row['start_date']),
-                    end_date=pd.to_datetime(row['end_date']),
-                    vaccine_name=row['vaccine_name'],
-                    target_population=row['target_population'],
-                    doses_allocated=int(row['doses_allocated']),
-                    doses_administered=int(row['doses_administered']),
-                    partner_org=row.get('partner_org', ''),
-                    notes=row.get('notes', '')
-                )
-                db.add(vaccination)
-                created_count += 1
-                
-                send_location_notifications(
-                    vaccination.state,
-                    vaccination.district,
-                    "vaccination",
-                    {"vaccine_name": vaccination.vaccine_name, "target_population": vaccination.target_population, "start_date": str(vaccination.start_date)}
-                )
-        
-        db.commit()
-        return {"message": f"Successfully uploaded {created_count} vaccinations"}
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error processing CSV: {str(e)}")
\ No newline at end of file
+        return ingest_files(db, feed, uploads, mode, workers, strict)
+    except CSVFormatError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/outbreaks/ingest")
+def ingest_outbreaks(files: List[UploadFile] = File(...), mode: str = "upsert", workers: Optional[int] = None, strict: bool = False, background: bool = True, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    return _ingest(db, "outbreaks", files, mode, workers, strict, background, admin_user)
+
+@router.post("/vaccinations/ingest")
+def ingest_vaccinations(files: List[UploadFile] = File(...), mode: str = "upsert", workers: Optional[int] = None, strict: bool = False, background: bool = True, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    return _ingest(db, "vaccinations", files, mode, workers, strict, background, admin_user)
+
+@router.post("/digests/{frequency}")
+def send_digest(frequency: str, admin_user: models.User = Depends(auth.require_admin)):
+    """Send a digest now, covering the window that ends at the current time."""
+    if frequency not in DIGEST_WINDOWS:
+        raise HTTPException(status_code=404, detail="Unknown digest frequency")
+    job_id = enqueue("digest", {"frequency": frequency, "period_end": datetime.utcnow().isoformat()}, created_by=admin_user.id)
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+
+@router.get("/digests/{frequency}/preview")
+def preview_digest(frequency: str, state: str, district: str, locale: str = "en", admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    if frequency not in DIGEST_WINDOWS:
+        raise HTTPException(status_code=404, detail="Unknown digest frequency")
+    location = resolve_locations(db, [(state, district)], create=False).get((state, district))
+    if location is None:
+        return {"empty": True}
+    period_end = datetime.utcnow()
+    digest = compute_location_digests(db, frequency, period_end, location.id).get(location.id)
+    if digest is None:
+        return {"empty": True}
+    rendered = render_digest(frequency, digest, period_end, locale)
+    return {"empty": False, "subject": rendered.subject, "email_body": rendered.email_body, "whatsapp_body": rendered.whatsapp_body}
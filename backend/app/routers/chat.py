@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from .. import models, schemas
 from .. import auth
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..chatbot import chatbot
 
 router = APIRouter()
@@ -25,7 +25,7 @@ def send_message(message: schemas.ChatMessageBase, current_user: models.User = D
     return chat_message
 
 @router.get("/history", response_model=List[schemas.ChatMessage])
-def get_chat_history(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def get_chat_history(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_read_db)):
     return db.query(models.ChatMessage).filter(
         models.ChatMessage.user_id == current_user.id
     ).order_by(models.ChatMessage.timestamp.desc()).limit(20).all()
\ No newline at end of file
@@ -1,101 +1,183 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 from .. import models, schemas
 from .. import auth
-from ..database import get_db
+from ..database import get_read_db, ReadSessionLocal
+from ..cache import cached_json_response
+from ..changefeed import LOGGED_TABLES, ChangeLogExpired, read_changes
+from ..exports import EXPORT_FORMATS, EXPORT_TABLES, ExportError, check_export, export_filename, iter_export
+from ..read_model import read_model, serves
+from ..rollups import ROLLUPS, daily_totals
+from ..locations import canonical_location, location_condition
+from ..search import search_outbreaks
+from ..serialization import FastJSONResponse, query_rows, rows_to_dicts, schema_fields
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 100
+
+def _user_location(user: models.User) -> dict:
+    """Read model filter for the user's location; a user without one matches nothing, as in SQL."""
+    return {"location_id": user.location_id if user.location_id is not None else frozenset()}
+
 @router.get("/location-data", response_model=schemas.LocationData)
-def get_location_health_data(filter_location: bool = False, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def get_location_health_data(filter_location: bool = False, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_read_db)):
+    if serves("outbreaks") and serves("vaccinations"):
+        location = _user_location(current_user) if filter_location else {}
+        return FastJSONResponse({
+            "state": current_user.state,
+            "district": current_user.district,
+            "outbreaks": read_model.rows("outbreaks", **location),
+            "vaccinations": read_model.rows("vaccinations", **location)
+        })
+
+    outbreaks = query_rows(db, models.Outbreak, schemas.Outbreak)
+    vaccinations = query_rows(db, models.Vaccination, schemas.Vaccination)
     if filter_location:
-        outbreaks = db.query(models.Outbreak).filter(
-            models.Outbreak.state == current_user.state,
-            models.Outbreak.district == current_user.district
-        ).all()
-        
-        vaccinations = db.query(models.Vaccination).filter(
-            models.Vaccination.state == current_user.state,
-            models.Vaccination.district == current_user.district
-        ).all()
-    else:
-        outbreaks = db.query(models.Outbreak).all()
-        vaccinations = db.query(models.Vaccination).all()
+        outbreaks = outbreaks.filter(models.Outbreak.location_id == current_user.location_id)
+        vaccinations = vaccinations.filter(models.Vaccination.location_id == current_user.location_id)
+    outbreaks = outbreaks.order_by(models.Outbreak.id)
+    vaccinations = vaccinations.order_by(models.Vaccination.id)
     
-    return schemas.LocationData(
-        state=current_user.state,
-        district=current_user.district,
-        outbreaks=outbreaks,
-        vaccinations=vaccinations
-    )
+    return FastJSONResponse({
+        "state": current_user.state,
+        "district": current_user.district,
+        "outbreaks": rows_to_dicts(schema_fields(schemas.Outbreak), outbreaks.all()),
+        "vaccinations": rows_to_dicts(schema_fields(schemas.Vaccination), vaccinations.all())
+    })
 
 @router.get("/alerts")
-def get_user_alerts(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
-    recent_outbreaks = db.query(models.Outbreak).filter(
-        models.Outbreak.state == current_user.state,
-        models.Outbreak.district == current_user.district,
-        models.Outbreak.severity.in_(["high", "moderate"])
-    ).limit(3).all()
-    
-    recent_vaccinations = db.query(models.Vaccination).filter(
-        models.Vaccination.state == current_user.state,
-        models.Vaccination.district == current_user.district
-    ).limit(3).all()
+def get_user_alerts(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_read_db)):
+    if serves("outbreaks") and serves("vaccinations"):
+        location = _user_location(current_user)
+        recent_outbreaks = read_model.rows("outbreaks", limit=3, severity={"high", "moderate"}, **location)
+        recent_vaccinations = read_model.rows("vaccinations", limit=3, **location)
+    else:
+        recent_outbreaks = rows_to_dicts(schema_fields(schemas.Outbreak), query_rows(db, models.Outbreak, schemas.Outbreak).filter(
+            models.Outbreak.location_id == current_user.location_id,
+            models.Outbreak.severity.in_(["high", "moderate"])
+        ).order_by(models.Outbreak.id).limit(3).all())
+
+        recent_vaccinations = rows_to_dicts(schema_fields(schemas.Vaccination), query_rows(db, models.Vaccination, schemas.Vaccination).filter(
+            models.Vaccination.location_id == current_user.location_id
+        ).order_by(models.Vaccination.id).limit(3).all())
     
     alerts = []
     for outbreak in recent_outbreaks:
         alerts.append({
             "type": "outbreak",
-            "title": f"{outbreak.disease} Alert",
-            "message": f"{outbreak.cases_reported} cases reported in {outbreak.district}",
-            "severity": outbreak.severity
+            "title": f"{outbreak['disease']} Alert",
+            "message": f"{outbreak['cases_reported']} cases reported in {outbreak['district']}",
+            "severity": outbreak['severity']
         })
     
     for vaccination in recent_vaccinations:
         alerts.append({
             "type": "vaccination",
-            "title": f"{vaccination.vaccine_name} Available",
-            "message": f"Vaccination campaign for {vaccination.target_population}",
+            "title": f"{vaccination['vaccine_name']} Available",
+            "message": f"Vaccination campaign for {vaccination['target_population']}",
             "severity": "info"
         })
     
     return {"alerts": alerts}
 
-@router.get("/outbreaks")
-def get_outbreaks(page: int = 1, limit: int = 10, state: str = None, district: str = None, db: Session = Depends(get_db)):
-    query = db.query(models.Outbreak)
-    if state:
-        query = query.filter(models.Outbreak.state == state)
-    if district:
-        query = query.filter(models.Outbreak.district == district)
-    
+def _paginate(query, order_column, schema, page: int, limit: int) -> dict:
+    # Id order, the same as the read model's pages
     total = query.count()
-    outbreaks = query.offset((page - 1) * limit).limit(limit).all()
-    
+    rows = query.order_by(order_column).offset((page - 1) * limit).limit(limit).all()
     return {
-        "items": outbreaks,
+        "items": rows_to_dicts(schema_fields(schema), rows),
         "total": total,
         "page": page,
         "limit": limit,
         "pages": (total + limit - 1) // limit
     }
 
+def build_outbreaks_page(db: Session, page: int = 1, limit: int = 10, state: str = None, district: str = None) -> dict:
+    if serves("outbreaks"):
+        state, district = canonical_location(db, state, district)
+        return read_model.page("outbreaks", page, limit, state=state, district=district)
+    query = query_rows(db, models.Outbreak, schemas.Outbreak)
+    if state or district:
+        query = query.filter(location_condition(models.Outbreak.location_id, state, district))
+    return _paginate(query, models.Outbreak.id, schemas.Outbreak, page, limit)
+
+def build_vaccinations_page(db: Session, page: int = 1, limit: int = 10, state: str = None, district: str = None) -> dict:
+    if serves("vaccinations"):
+        state, district = canonical_location(db, state, district)
+        return read_model.page("vaccinations", page, limit, state=state, district=district)
+    query = query_rows(db, models.Vaccination, schemas.Vaccination)
+    if state or district:
+        query = query.filter(location_condition(models.Vaccination.location_id, state, district))
+    return _paginate(query, models.Vaccination.id, schemas.Vaccination, page, limit)
+
+LISTING_BUILDERS = {"outbreaks": build_outbreaks_page, "vaccinations": build_vaccinations_page}
+
+def listing_response(request: Optional[Request], table: str, db: Session, page: int = 1, limit: int = 10, state: str = None, district: str = None):
+    params = {"page": page, "limit": limit, "state": state or None, "district": district or None}
+    return cached_json_response(request, table, params, lambda: LISTING_BUILDERS[table](db, page, limit, state, district))
+
+def warm_listing_cache():
+    """Pre-build the default first pages so the first polls after start are cache hits."""
+    db = ReadSessionLocal()
+    try:
+        for table in LISTING_BUILDERS:
+            listing_response(None, table, db)
+    finally:
+        db.close()
+
+@router.get("/search")
+def search(request: Request, q: str, page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), state: str = None, district: str = None, disease: str = None, severity: str = None, fuzzy: bool = True, db: Session = Depends(get_read_db)):
+    state, district = canonical_location(db, state, district)
+    filters = {"state": state, "district": district, "disease": disease or None, "severity": severity or None}
+    params = {"q": q, "page": page, "limit": limit, "fuzzy": fuzzy, **filters}
+    return cached_json_response(request, "outbreaks", params, lambda: search_outbreaks(db, q, page, limit, fuzzy, **filters))
+
+@router.get("/trends/{table}")
+def get_trends(request: Request, table: str, state: str = None, district: str = None, disease: str = None, vaccine_name: str = None, since: Optional[date] = None, until: Optional[date] = None, db: Session = Depends(get_read_db)):
+    """Daily totals from the rollup tables; ``disease`` filters outbreaks, ``vaccine_name`` vaccinations."""
+    if table not in ROLLUPS:
+        raise HTTPException(status_code=404, detail="Unknown table")
+    key = disease if table == "outbreaks" else vaccine_name
+    state, district = canonical_location(db, state, district)
+    params = {"state": state, "district": district, "key": key or None,
+              "since": since.isoformat() if since else None, "until": until.isoformat() if until else None}
+
+    def build():
+        days = daily_totals(db, table, state, district, key, since, until)
+        rollup = ROLLUPS[table]
+        totals = {name: sum(day[name] for day in days) for name in (rollup.count_field,) + rollup.measures}
+        return {"table": table, **params, "days": days, "totals": totals}
+
+    return cached_json_response(request, table, params, build)
+
+@router.get("/changes")
+def get_changes(since: int = 0, table: str = None, limit: int = 1000, db: Session = Depends(get_read_db)):
+    """Inserts, updates and deletes after ``since``; resume from the returned ``next``."""
+    if table and table not in LOGGED_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown table")
+    try:
+        return Response(content=read_changes(db, since, table, limit), media_type="application/json")
+    except ChangeLogExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+@router.get("/export/{table}")
+def export_table(table: str, format: str = "csv.gz", state: str = None, district: str = None, since: Optional[date] = None, until: Optional[date] = None, current_user: models.User = Depends(auth.get_current_user)):
+    """Stream the whole table (or the rows matching the filters) as compressed CSV, Parquet or Arrow."""
+    try:
+        check_export(table, format)
+    except ExportError as e:
+        raise HTTPException(status_code=404 if table not in EXPORT_TABLES else 400, detail=str(e))
+    filename = export_filename(table, format, since, until)
+    return StreamingResponse(iter_export(table, format, state, district, since, until), media_type=EXPORT_FORMATS[format], headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@router.get("/outbreaks")
+def get_outbreaks(request: Request, page: int = Query(1, ge=1), limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), state: str = None, district: str = None, db: Session = Depends(get_read_db)):
+    return listing_response(request, "outbreaks", db, page, limit, state, district)
+
 @router.get("/vaccinations")
-def get_vaccinations(page: int = 1, limit: int = 10, state: str = None, district: str = None, db: Session = Depends(get_db)):
-    query = db.query(models.Vaccination)
-    if state:
-        query = query.filter(models.Vaccination.state == state)
-    if district:
-        query = query.filter(models.Vaccination.district == district)
-    
-    total = query.count()
-    vaccinations = query.offset((page - 1) * limit).limit(limit).all()
-    
-    return {
-        "items": vaccinations,
-        "total": total,
-        "page": page,
-        "limit": limit,
-        "pages": (total + limit - 1) // limit
-    }
\ No newline at end of file
+def get_vaccinations(request: Request, page: int = Query(1, ge=1), limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), state: str = None, district: str = None, db: Session = Depends(get_read_db)):
+    return listing_response(request, "vaccinations", db, page, limit, state, district)
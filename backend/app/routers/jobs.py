@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+import json
+from .. import models, schemas
+from .. import auth
+from ..database import get_db
+from ..jobs import job_queue
+from ..serialization import query_rows, rows_to_dicts, schema_fields
+
+router = APIRouter()
+
+MAX_JOBS_PAGE_SIZE = 200
+
+def _job_dicts(rows) -> list:
+    jobs = rows_to_dicts(schema_fields(schemas.Job), rows)
+    for job in jobs:
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        if job["status"] == "running":
+            job.update(job_queue.live_progress(job["id"]) or {})
+    return jobs
+
+def _get_job(db: Session, job_id: str) -> dict:
+    row = query_rows(db, models.Job, schemas.Job).filter(models.Job.id == job_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_dicts([row])[0]
+
+@router.get("/", response_model=List[schemas.Job])
+def list_jobs(status: str = None, kind: str = None, limit: int = 50, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    query = query_rows(db, models.Job, schemas.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    if kind:
+        query = query.filter(models.Job.kind == kind)
+    limit = min(max(limit, 1), MAX_JOBS_PAGE_SIZE)
+    return _job_dicts(query.order_by(models.Job.created_at.desc()).limit(limit).all())
+
+@router.get("/stats")
+def get_job_stats(admin_user: models.User = Depends(auth.require_admin)):
+    return job_queue.stats()
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def get_job(job_id: str, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    return _get_job(db, job_id)
+
+@router.post("/{job_id}/cancel", response_model=schemas.Job)
+def cancel_job(job_id: str, admin_user: models.User = Depends(auth.require_admin), db: Session = Depends(get_db)):
+    job = _get_job(db, job_id)
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    job_queue.cancel(job_id)
+    return _get_job(db, job_id)
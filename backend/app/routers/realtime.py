@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+from .. import models
+from .. import auth
+from ..database import ReadSessionLocal, SessionLocal
+from ..locations import canonical_location
+from ..realtime import alert_hub
+
+router = APIRouter()
+optional_security = HTTPBearer(auto_error=False)
+
+def _load_location(username: str):
+    # Short-lived session so the open stream never holds a pooled connection
+    db = SessionLocal()
+    try:
+        user = db.query(models.User.state, models.User.district).filter(models.User.username == username).first()
+    finally:
+        db.close()
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user.state, user.district
+
+def _canonical_location(state: str, district: str):
+    db = ReadSessionLocal()
+    try:
+        return canonical_location(db, state, district)
+    finally:
+        db.close()
+
+@router.post("/ticket")
+def create_ticket(current_user: models.User = Depends(auth.get_current_user)):
+    """Short-lived, stream-only credential for ``EventSource``, which cannot send headers."""
+    return {"ticket": auth.create_stream_ticket(current_user.username), "expires_in": auth.STREAM_TICKET_EXPIRE_SECONDS}
+
+@router.get("/stream")
+async def stream_alerts(state: str = None, district: str = None, ticket: str = None, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    # Access tokens only in the header; URLs end up in logs and history, so they carry stream tickets
+    if credentials:
+        username = auth.decode_token(credentials.credentials)
+    elif ticket:
+        username = auth.decode_token(ticket, scope="stream")
+    else:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if not state:
+        state, district = await run_in_threadpool(_load_location, username)
+    else:
+        # The hub matches alerts on the stored spelling
+        state, district = await run_in_threadpool(_canonical_location, state, district)
+
+    return StreamingResponse(
+        alert_hub.stream(state, district),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stats")
+def get_realtime_stats(admin_user: models.User = Depends(auth.require_admin)):
+    return alert_hub.stats()
@@ -1,62 +1,112 @@
 from sqlalchemy.orm import Session
 from .database import SessionLocal
-from .models import User, Outbreak, Vaccination
+from .locations import resolve_locations
+from .models import Location, User
+from .notification_templates import PreparedEmail, render_shared
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import os
 
+# Emails handed to one SMTP connection during a notification fan-out
+NOTIFY_EMAIL_BATCH = int(os.getenv("NOTIFY_EMAIL_BATCH", "500"))
+
 def send_location_notifications(state: str, district: str, notification_type: str, item_data: dict):
+    send_bulk_location_notifications(notification_type, [(state, district, item_data)])
+
+def send_bulk_location_notifications(notification_type: str, located_items: list):
+    """Notify subscribers about many items at once.
+
+    ``located_items`` is a list of ``(state, district, item_data)``. The items'
+    locations are resolved once, subscribers for all of them are loaded in one
+    query and each user gets a single email covering every item in their
+    location, under its canonical names (whatever spelling the items or the
+    user's profile used). The message for a location is rendered and encoded
+    once per locale; only the greeting is per user.
+    """
+    sender = _smtp_settings()[2]
+    if not located_items or not sender:
+        return
+
     db = SessionLocal()
     try:
-        users_with_notifications = db.query(User).filter(
+        located = resolve_locations(db, [(state, district) for state, district, _ in located_items], create=False)
+        items_by_location = {}
+        for state, district, item_data in located_items:
+            location = located.get((state, district))
+            if location is not None:
+                items_by_location.setdefault(location.id, []).append(item_data)
+        if not items_by_location:
+            return
+        users_with_notifications = db.query(User.email, User.full_name, User.location_id, User.locale, Location.state, Location.district).join(
+            Location, Location.id == User.location_id
+        ).filter(
             User.notifications == True,
-            User.state == state,
-            User.district == district
-        ).all()
-        
+            User.location_id.in_(list(items_by_location))
+        ).yield_per(NOTIFY_EMAIL_BATCH)
+
+        prepared = {}
+        batch = []
         for user in users_with_notifications:
-            send_notification_email(user, notification_type, item_data)
+            key = (user.location_id, user.locale)
+            if key not in prepared:
+                shared = render_shared(notification_type, user.state, user.district, items_by_location[user.location_id], user.locale)
+                prepared[key] = PreparedEmail.from_shared(shared)
+            batch.append((user.email, prepared[key].for_recipient(sender, user.email, user.full_name)))
+            if len(batch) >= NOTIFY_EMAIL_BATCH:
+                send_email_batch(batch)
+                batch = []
+        send_email_batch(batch)
     finally:
         db.close()
 
+def send_bulk_notification_email(user, notification_type: str, items: list):
+    _send_prepared(user, render_shared(notification_type, user.state, user.district, items, getattr(user, "locale", None)))
+
 def send_notification_email(user, notification_type: str, item_data: dict):
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    email_user = os.getenv("EMAIL_USER")
-    email_password = os.getenv("EMAIL_PASSWORD")
-    
-    if not email_user or not email_password:
-        return
-    
-    msg = MIMEMultipart()
-    msg['From'] = email_user
-    msg['To'] = user.email
-    
-    if notification_type == "outbreak":
-        msg['Subject'] = f"Health Alert: New Outbreak in {user.district}, {user.state}"
-        body = f"Dear {user.full_name},\n\n"
-        body += f"A new outbreak has been reported in your area:\n\n"
-        body += f"Disease: {item_data.get('disease')}\n"
-        body += f"Cases: {item_data.get('cases_reported')}\n"
-        body += f"Severity: {item_data.get('severity')}\n\n"
-    else:  # vaccination
-        msg['Subject'] = f"Vaccination Update: New Campaign in {user.district}, {user.state}"
-        body = f"Dear {user.full_name},\n\n"
-        body += f"A new vaccination campaign is available in your area:\n\n"
-        body += f"Vaccine: {item_data.get('vaccine_name')}\n"
-        body += f"Target: {item_data.get('target_population')}\n"
-        body += f"Start Date: {item_data.get('start_date')}\n\n"
-    
-    body += "Stay safe and healthy!\n\nHealth Monitoring System"
-    
-    msg.attach(MIMEText(body, 'plain'))
-    
+    _send_prepared(user, render_shared(notification_type, user.state, user.district, [item_data], getattr(user, "locale", None)))
+
+def _send_prepared(user, shared):
+    sender = _smtp_settings()[2]
+    if sender:
+        send_email_batch([(user.email, PreparedEmail.from_shared(shared).for_recipient(sender, user.email, user.full_name))])
+
+def _smtp_settings():
+    return (
+        os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        int(os.getenv("SMTP_PORT", "587")),
+        os.getenv("EMAIL_USER"),
+        os.getenv("EMAIL_PASSWORD"),
+    )
+
+def send_email_batch(messages: list) -> int:
+    """Send ``(recipient, message_bytes)`` pairs over a single SMTP connection.
+
+    Messages come serialized from ``PreparedEmail.for_recipient``. Returns how
+    many were accepted by the server.
+    """
+    smtp_server, smtp_port, email_user, email_password = _smtp_settings()
+    if not messages or not email_user or not email_password:
+        return 0
+
+    sent = 0
     try:
         server = smtplib.SMTP(smtp_server, smtp_port)
         server.starttls()
         server.login(email_user, email_password)
-        server.send_message(msg)
-        server.quit()
     except Exception as e:
-        print(f"Failed to send email to {user.email}: {e}")
\ No newline at end of file
+        print(f"Failed to connect to SMTP server for {len(messages)} emails: {e}")
+        return 0
+    try:
+        for recipient, message in messages:
+            try:
+                server.sendmail(email_user, [recipient], message)
+                sent += 1
+            except smtplib.SMTPRecipientsRefused as e:
+                print(f"Failed to send email to {recipient}: {e}")
+    except Exception as e:
+        print(f"SMTP batch aborted after {sent} of {len(messages)} emails: {e}")
+    finally:
+        try:
+            server.quit()
+        except Exception:
+            pass
+    return sent
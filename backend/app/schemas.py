@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Any, Optional, List, Dict, Literal
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -23,11 +23,21 @@ class User(UserBase):
     is_active: bool
     role: str
     notifications: bool
+    digest_frequency: Optional[str] = "none"
+    whatsapp_number: Optional[str] = None
+    locale: Optional[str] = "en"
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class UserPage(BaseModel):
+    items: List[User]
+    total: int
+    page: int
+    limit: int
+    pages: int
+
 class UserUpdate(BaseModel):
     full_name: Optional[str] = None
     state: Optional[str] = None
@@ -35,6 +45,9 @@ class UserUpdate(BaseModel):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     notifications: Optional[bool] = None
+    digest_frequency: Optional[Literal["none", "daily", "weekly"]] = None
+    whatsapp_number: Optional[str] = None
+    locale: Optional[Literal["en", "hi"]] = None
 
 class Token(BaseModel):
     access_token: str
@@ -64,6 +77,27 @@ class Outbreak(OutbreakBase):
     class Config:
         from_attributes = True
 
+class OutbreakPatch(BaseModel):
+    id: int
+    outbreak_id: Optional[str] = None
+    disease: Optional[str] = None
+    report_date: Optional[datetime] = None
+    country: Optional[str] = None
+    state: Optional[str] = None
+    district: Optional[str] = None
+    cases_reported: Optional[int] = None
+    deaths: Optional[int] = None
+    severity: Optional[str] = None
+    confirmed: Optional[bool] = None
+    source_url: Optional[str] = None
+    notes: Optional[str] = None
+
+class OutbreakBulkPatch(BaseModel):
+    items: List[OutbreakPatch]
+
+class OutbreakBulkUpsert(BaseModel):
+    items: List[OutbreakCreate]
+
 class VaccinationBase(BaseModel):
     campaign_id: str
     country: str = "India"
@@ -88,6 +122,59 @@ class Vaccination(VaccinationBase):
     class Config:
         from_attributes = True
 
+class VaccinationPatch(BaseModel):
+    id: int
+    campaign_id: Optional[str] = None
+    country: Optional[str] = None
+    state: Optional[str] = None
+    district: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    vaccine_name: Optional[str] = None
+    target_population: Optional[str] = None
+    doses_allocated: Optional[int] = None
+    doses_administered: Optional[int] = None
+    partner_org: Optional[str] = None
+    notes: Optional[str] = None
+
+class VaccinationBulkPatch(BaseModel):
+    items: List[VaccinationPatch]
+
+class VaccinationBulkUpsert(BaseModel):
+    items: List[VaccinationCreate]
+
+class BulkDelete(BaseModel):
+    ids: List[int]
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    key: Optional[str] = None
+    status: str  # inserted, updated, unchanged, deleted, not_found, duplicate, invalid, conflict
+    detail: Optional[str] = None  # why an item was invalid or conflicted
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+    counts: Dict[str, int]
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, succeeded, failed, cancelled
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: Optional[bool] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+
 class ChatMessageBase(BaseModel):
     message: str
     ollama_url: Optional[str] = None
@@ -106,4 +193,13 @@ class LocationData(BaseModel):
     state: str
     district: str
     outbreaks: List[Outbreak]
-    vaccinations: List[Vaccination]
\ No newline at end of file
+    vaccinations: List[Vaccination]
+class Location(BaseModel):
+    id: int
+    state: str
+    district: str
+    aliases: List[str] = []
+
+class LocationAliasCreate(BaseModel):
+    state: str
+    district: str
@@ -0,0 +1,235 @@
+"""
+Full-text search over outbreaks (disease, district, state and notes).
+
+The index lives in the database and is maintained by it as rows are written:
+an FTS5 table kept in sync by triggers on SQLite, a GIN index on a weighted
+``tsvector`` expression on PostgreSQL (migration 0008). Every query term
+matches as a prefix, so partial words work while typing; results are ranked
+by relevance (disease matches weigh most, notes least), then by report date.
+
+When a query finds nothing and ``fuzzy`` is on, terms that are not a prefix
+of any indexed word are expanded to the closest indexed words (edit distance
+1, or 2 for longer words) and the query is run again. The word list comes
+from the index (``fts5vocab`` / ``ts_stat``) and is cached in process for
+``SEARCH_VOCABULARY_TTL``. Outbreak changes mark it stale, but it is read again
+at most every ``SEARCH_VOCABULARY_MIN_REFRESH`` seconds: on PostgreSQL
+``ts_stat`` scans the whole table, which a stream of imports must not trigger
+once per search. Words added meanwhile still match as prefixes; they are only
+missing from fuzzy expansion until the next refresh.
+
+Facet counts by disease, state and severity cover all matches, not just the
+returned page. State and district filters go through ``location_id`` like the
+listings, so any recorded spelling of a location finds its outbreaks.
+"""
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional
+
+from sqlalchemy import Float, bindparam, column, select, text
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .events import DataChange, add_listener
+from .locations import location_condition
+from .serialization import rows_to_dicts, schema_columns, schema_fields
+
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "8"))
+SEARCH_MAX_EXPANSIONS = int(os.getenv("SEARCH_MAX_EXPANSIONS", "3"))
+SEARCH_VOCABULARY_TTL = float(os.getenv("SEARCH_VOCABULARY_TTL", "300"))
+# Least time between reloads of a word list marked stale by outbreak changes
+SEARCH_VOCABULARY_MIN_REFRESH = float(os.getenv("SEARCH_VOCABULARY_MIN_REFRESH", "30"))
+
+# Must match the index expression in migration 0008
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(disease, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(district, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(state, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(notes, '')), 'D')"
+)
+# bm25 weights for the FTS5 columns (disease, notes, district, state)
+FTS_WEIGHTS = "10.0, 1.0, 4.0, 2.0"
+FACETS = ("disease", "state", "severity")
+
+# Letters and digits plus the Indic combining marks FTS5 is told to keep in words
+TOKEN_RE = re.compile(r"(?:[^\W_]|[\u0900-\u0DFF])+")
+
+
+def is_search_object(name: str) -> bool:
+    """FTS5 tables (and their shadow tables) and the GIN index, which the models do not declare."""
+    return name.startswith("outbreaks_fts") or name == "ix_outbreaks_search"
+
+
+def tokenize(query: str) -> List[str]:
+    return [term.lower() for term in TOKEN_RE.findall(query or "")][:SEARCH_MAX_TERMS]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or ``limit + 1`` as soon as it must exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class Vocabulary:
+    """Sorted list of the words in the search index, for fuzzy expansion."""
+
+    def __init__(self, ttl: float = SEARCH_VOCABULARY_TTL, min_refresh: float = SEARCH_VOCABULARY_MIN_REFRESH):
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self._terms: Optional[List[str]] = None
+        self._loaded_at = 0.0
+        self._stale = False
+        self.loads = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._stale = True
+
+    def clear(self):
+        """Drop the word list, so the next lookup reads it again whenever it was loaded."""
+        self._terms = None
+
+    def _expired(self) -> bool:
+        if self._terms is None:
+            return True
+        age = time.monotonic() - self._loaded_at
+        return age > self.ttl or (self._stale and age >= self.min_refresh)
+
+    def terms(self, db: Session) -> List[str]:
+        terms = self._terms
+        if self._expired():
+            with self._lock:
+                if self._expired():
+                    # Cleared first, so changes made while reading mark it stale again
+                    self._stale = False
+                    if db.get_bind().dialect.name == "postgresql":
+                        query = text("SELECT word FROM ts_stat(:document) ORDER BY word")
+                        rows = db.execute(query, {"document": f"SELECT {SEARCH_DOCUMENT} FROM outbreaks"})
+                    else:
+                        rows = db.execute(text("SELECT term FROM outbreaks_fts_vocab ORDER BY term"))
+                    self._terms = [row[0] for row in rows]
+                    self._loaded_at = time.monotonic()
+                    self.loads += 1
+                terms = self._terms
+        return terms
+
+    def has_prefix(self, db: Session, prefix: str) -> bool:
+        terms = self.terms(db)
+        position = bisect_left(terms, prefix)
+        return position < len(terms) and terms[position].startswith(prefix)
+
+    def closest(self, db: Session, term: str, count: int = SEARCH_MAX_EXPANSIONS) -> List[str]:
+        limit = 1 if len(term) <= 5 else 2
+        scored = []
+        for candidate in self.terms(db):
+            distance = edit_distance(term, candidate, limit)
+            if distance <= limit:
+                scored.append((distance, candidate))
+        return [candidate for _, candidate in sorted(scored)[:count]]
+
+
+vocabulary = Vocabulary()
+
+
+@add_listener
+def _invalidate_vocabulary(change: DataChange):
+    if change.table == "outbreaks":
+        vocabulary.invalidate()
+
+
+def _match_expression(dialect: str, alternatives: List[List[str]], terms: List[str]) -> str:
+    # Each term matches as a prefix; fuzzy expansions match whole words
+    groups = []
+    for term, extra in zip(terms, alternatives):
+        if dialect == "postgresql":
+            options = [f"'{term}':*"] + [f"'{word}'" for word in extra]
+            groups.append("(" + " | ".join(options) + ")")
+        else:
+            options = [f'"{term}"*'] + [f'"{word}"' for word in extra]
+            groups.append("(" + " OR ".join(options) + ")")
+    return (" & " if dialect == "postgresql" else " AND ").join(groups)
+
+
+def _expand_locations(query, params: dict):
+    return query.bindparams(bindparam("location_ids", expanding=True)) if "location_ids" in params else query
+
+
+def _run(db: Session, match: str, filters: Dict[str, str], offset: int, limit: int):
+    dialect = db.get_bind().dialect.name
+    fields = schema_fields(schemas.Outbreak)
+    params = {"match": match, "limit": limit, "offset": offset}
+    conditions = []
+    if filters.get("state") or filters.get("district"):
+        # By location, so aliases and other spellings of the names match too
+        location = location_condition(models.Location.id, filters.get("state"), filters.get("district"))
+        params["location_ids"] = db.scalars(select(models.Location.id).where(location)).all()
+        conditions.append("o.location_id IN :location_ids")
+    for name in ("disease", "severity"):
+        if filters.get(name):
+            conditions.append(f"o.{name} = :{name}")
+            params[name] = filters[name]
+    where = "".join(f" AND {condition}" for condition in conditions)
+    columns = ", ".join(f"o.{field}" for field in fields)
+    if dialect == "postgresql":
+        source = f"outbreaks o, to_tsquery('simple', :match) query WHERE ({SEARCH_DOCUMENT}) @@ query{where}"
+        score = f"ts_rank({SEARCH_DOCUMENT}, query)"
+        order = "score DESC"
+    else:
+        source = f"outbreaks_fts JOIN outbreaks o ON o.id = outbreaks_fts.rowid WHERE outbreaks_fts MATCH :match{where}"
+        score = f"-bm25(outbreaks_fts, {FTS_WEIGHTS})"
+        order = f"bm25(outbreaks_fts, {FTS_WEIGHTS})"
+
+    facet_query = text(
+        f"SELECT {', '.join('o.' + name for name in FACETS)}, COUNT(*) FROM {source} GROUP BY {', '.join('o.' + name for name in FACETS)}"
+    )
+    facet_rows = db.execute(_expand_locations(facet_query, params), params).all()
+    facets = {name: Counter() for name in FACETS}
+    for row in facet_rows:
+        for i, name in enumerate(FACETS):
+            facets[name][row[i]] += row[-1]
+    total = sum(row[-1] for row in facet_rows)
+    # Typed result columns, so dates come back as datetimes as in the listings
+    page = text(
+        f"SELECT {columns}, {score} AS score FROM {source} ORDER BY {order}, o.report_date DESC, o.id LIMIT :limit OFFSET :offset"
+    ).columns(*schema_columns(models.Outbreak, schemas.Outbreak), column("score", Float))
+    rows = db.execute(_expand_locations(page, params), params).all() if total else []
+    return rows_to_dicts(fields + ["score"], rows), total, facets
+
+
+def search_outbreaks(db: Session, query: str, page: int = 1, limit: int = 20, fuzzy: bool = True, **filters) -> dict:
+    terms = tokenize(query)
+    result = {"query": query, "terms": terms, "expanded": {}, "items": [], "total": 0, "page": page, "limit": limit, "pages": 0,
+              "facets": {name: {} for name in FACETS}}
+    if not terms:
+        return result
+    dialect = db.get_bind().dialect.name
+    offset = max((page - 1) * limit, 0)
+    alternatives = [[] for _ in terms]
+    items, total, facets = _run(db, _match_expression(dialect, alternatives, terms), filters, offset, limit)
+    if not total and fuzzy:
+        for i, term in enumerate(terms):
+            if not vocabulary.has_prefix(db, term):
+                alternatives[i] = vocabulary.closest(db, term)
+                if alternatives[i]:
+                    result["expanded"][term] = alternatives[i]
+        if result["expanded"]:
+            items, total, facets = _run(db, _match_expression(dialect, alternatives, terms), filters, offset, limit)
+    result.update({
+        "items": items,
+        "total": total,
+        "pages": (total + limit - 1) // limit,
+        "facets": {name: dict(counts.most_common()) for name, counts in facets.items()},
+    })
+    return result
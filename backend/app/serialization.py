@@ -0,0 +1,101 @@
+"""
+Fast JSON serialization for large list responses.
+
+Instead of loading ORM objects, validating them into Pydantic models and then
+running ``jsonable_encoder`` over the result, list endpoints select exactly the
+columns of the response schema as plain row tuples and encode them with orjson.
+The field names come from the ``schemas.*`` models, so the JSON contract stays
+the same as the ``response_model`` declared on the route.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator, List, Type
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy / pandas scalars
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """Encode plain dicts/lists/datetimes to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def schema_fields(schema: Type[BaseModel]) -> List[str]:
+    return list(schema.model_fields)
+
+
+def schema_columns(model, schema: Type[BaseModel]) -> list:
+    """Model columns matching the fields of ``schema``, in schema order."""
+    return [getattr(model, field) for field in schema_fields(schema)]
+
+
+def rows_to_dicts(fields: List[str], rows) -> List[dict]:
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def object_to_dict(obj, schema: Type[BaseModel], loaded_only: bool = False) -> dict:
+    """Plain dict of an ORM object's ``schema`` fields, without validation.
+
+    With ``loaded_only`` expired attributes (e.g. server defaults right after a
+    flush) are left as ``None`` instead of triggering a reload per object.
+    """
+    if loaded_only:
+        return {field: obj.__dict__.get(field) for field in schema_fields(schema)}
+    return {field: getattr(obj, field) for field in schema_fields(schema)}
+
+
+def query_rows(db, model, schema: Type[BaseModel]):
+    """Column query returning row tuples shaped like ``schema``."""
+    return db.query(*schema_columns(model, schema))
+
+
+def iter_ndjson(fields: List[str], rows: Iterable, batch_size: int = 1000) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding one chunk per batch."""
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(dict(zip(fields, row))))
+        if len(chunk) >= batch_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+def iter_csv(fields: List[str], rows: Iterable, batch_size: int = 1000) -> Iterator[bytes]:
+    """Encode rows as CSV with a header line, yielding one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    count = 0
+    for row in rows:
+        writer.writerow(["" if value is None else value.isoformat() if hasattr(value, "isoformat") else value for value in row])
+        count += 1
+        if count >= batch_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
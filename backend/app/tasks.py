@@ -0,0 +1,204 @@
+"""
+Work that runs off the request path as background jobs (see ``app/jobs.py``):
+subscriber notifications and CSV imports.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .events import publish_change
+from .ingest import CSVFormatError, expand_uploads, merge_parsed, parse_files, read_csv_rows, upsert_rows
+from .jobs import JOB_STORAGE_DIR, enqueue, job_handler
+from .locations import resolve_locations
+from .models import User
+from .scheduler import send_bulk_location_notifications
+
+
+def outbreak_notice(record: dict) -> dict:
+    return {"disease": record["disease"], "cases_reported": record["cases_reported"], "severity": record["severity"]}
+
+
+def vaccination_notice(record: dict) -> dict:
+    return {"vaccine_name": record["vaccine_name"], "target_population": record["target_population"], "start_date": str(record["start_date"])}
+
+
+NOTICES = {"outbreak": outbreak_notice, "vaccination": vaccination_notice}
+NOTIFICATION_TYPES = {"outbreaks": "outbreak", "vaccinations": "vaccination"}
+
+
+def _subscribed_locations(records: list) -> dict:
+    """Locations of ``records`` that have at least one user with notifications on."""
+    db = SessionLocal()
+    try:
+        located = resolve_locations(db, [(record["state"], record["district"]) for record in records], create=False)
+        if not located:
+            return {}
+        subscribed = set(db.scalars(select(User.location_id).where(
+            User.notifications == True, User.location_id.in_({ref.id for ref in located.values()})
+        ).distinct()))
+    finally:
+        db.close()
+    return {pair: ref for pair, ref in located.items() if ref.id in subscribed}
+
+
+def notify_records(notification_type: str, records: list):
+    """Queue one notification job covering the ``records`` whose location has subscribers.
+
+    Returns the job id, or None when nobody is subscribed to any of them.
+    """
+    if not records:
+        return None
+    subscribed = _subscribed_locations(records)
+    notice = NOTICES[notification_type]
+    items = [[record["state"], record["district"], notice(record)] for record in records if (record["state"], record["district"]) in subscribed]
+    if not items:
+        return None
+    return enqueue("notify", {"notification_type": notification_type, "items": items})
+
+
+@job_handler("notify")
+def run_notify(ctx):
+    items = ctx.params["items"]
+    send_bulk_location_notifications(ctx.params["notification_type"], [tuple(item) for item in items])
+    return {"items": len(items)}
+
+
+def import_feed(db: Session, feed: str, contents: bytes, mode: str = "upsert", on_chunk=None) -> dict:
+    """Parse and upsert a CSV feed, commit, then announce the changes."""
+    rows = read_csv_rows(feed, contents)
+    result = upsert_rows(db, feed, rows, update_existing=mode == "upsert", on_chunk=on_chunk)
+    db.commit()
+
+    if result.changed:
+        publish_change(feed, "imported", result.changed)
+        notify_records(NOTIFICATION_TYPES[feed], result.material)
+    counts = result.counts
+    summary = ", ".join(f"{count} {status}" for status, count in counts.items())
+    return {"message": f"Processed {len(rows)} {feed}: {summary}", **counts, "notified": len(result.material)}
+
+
+def save_upload(contents: bytes) -> str:
+    """Keep an uploaded file on disk until its import job has run."""
+    os.makedirs(JOB_STORAGE_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=JOB_STORAGE_DIR, suffix=".csv")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(contents)
+    return path
+
+
+def _remove_upload(params: dict):
+    if os.path.exists(params["path"]):
+        os.remove(params["path"])
+
+
+@job_handler("import_csv", on_cancel=_remove_upload)
+def run_import_csv(ctx):
+    path = ctx.params["path"]
+    try:
+        with open(path, "rb") as handle:
+            contents = handle.read()
+        ctx.progress(0.05, message="Parsing CSV", force=True)
+
+        def on_chunk(written, total):
+            ctx.progress(0.1 + 0.85 * written / total, message=f"Writing rows {written}/{total}")
+
+        db = SessionLocal()
+        try:
+            return import_feed(db, ctx.params["feed"], contents, ctx.params.get("mode", "upsert"), on_chunk)
+        finally:
+            db.close()
+    finally:
+        _remove_upload(ctx.params)
+
+
+def ingest_files(db: Session, feed: str, files: list, mode: str = "upsert", workers: int = None, strict: bool = False, notify: bool = True, on_chunk=None, on_parsed=None) -> dict:
+    """Parse many CSV/zip files in parallel, merge them and load them in one transaction.
+
+    ``files`` is a list of (name, bytes). With ``strict`` any invalid row aborts
+    the load; otherwise invalid rows are skipped and reported per file.
+    """
+    started = time.perf_counter()
+    parsed = parse_files(feed, expand_uploads(files), workers)
+    parse_seconds = time.perf_counter() - started
+    if on_parsed is not None:
+        on_parsed()
+
+    errors = [error for parsed_file in parsed for error in parsed_file.errors]
+    if strict and errors:
+        raise CSVFormatError(f"{len(errors)} problems found, nothing was loaded. First: {errors[0]}")
+    rows, duplicates = merge_parsed(feed, parsed)
+
+    load_started = time.perf_counter()
+    result = upsert_rows(db, feed, rows, update_existing=mode == "upsert", on_chunk=on_chunk)
+    db.commit()
+    load_seconds = time.perf_counter() - load_started
+
+    if result.changed:
+        publish_change(feed, "imported", result.changed)
+        if notify:
+            notify_records(NOTIFICATION_TYPES[feed], result.material)
+
+    total_rows = sum(parsed_file.total_rows for parsed_file in parsed)
+    elapsed = time.perf_counter() - started
+    counts = result.counts
+    summary = ", ".join(f"{count} {status}" for status, count in counts.items())
+    return {
+        "message": f"Processed {total_rows} {feed} rows from {len(parsed)} files: {summary}",
+        **counts,
+        "notified": len(result.material) if notify else 0,
+        "rows": total_rows,
+        "invalid_rows": sum(parsed_file.invalid_rows for parsed_file in parsed),
+        "duplicates": duplicates,
+        "files": [
+            {"name": parsed_file.name, "rows": parsed_file.total_rows, "invalid_rows": parsed_file.invalid_rows, "errors": parsed_file.errors[:5]}
+            for parsed_file in parsed
+        ],
+        "parse_seconds": round(parse_seconds, 3),
+        "load_seconds": round(load_seconds, 3),
+        "rows_per_second": round(total_rows / elapsed) if elapsed else None,
+    }
+
+
+def save_uploads(files: list) -> str:
+    """Store a multi-file upload in its own directory until the job runs."""
+    os.makedirs(JOB_STORAGE_DIR, exist_ok=True)
+    directory = tempfile.mkdtemp(dir=JOB_STORAGE_DIR)
+    for index, (name, contents) in enumerate(files):
+        with open(os.path.join(directory, f"{index:05d}"), "wb") as handle:
+            handle.write(contents)
+    return directory
+
+
+def _remove_upload_dir(params: dict):
+    shutil.rmtree(params["directory"], ignore_errors=True)
+
+
+@job_handler("ingest_files", on_cancel=_remove_upload_dir)
+def run_ingest_files(ctx):
+    directory = ctx.params["directory"]
+    try:
+        files = []
+        for index, name in enumerate(ctx.params["names"]):
+            with open(os.path.join(directory, f"{index:05d}"), "rb") as handle:
+                files.append((name, handle.read()))
+        ctx.progress(0.02, message=f"Parsing {len(files)} files", force=True)
+
+        def on_chunk(written, total):
+            ctx.progress(0.5 + 0.45 * written / total, message=f"Writing rows {written}/{total}")
+
+        db = SessionLocal()
+        try:
+            return ingest_files(
+                db, ctx.params["feed"], files, ctx.params.get("mode", "upsert"), ctx.params.get("workers"),
+                ctx.params.get("strict", False), on_chunk=on_chunk,
+                on_parsed=lambda: ctx.progress(0.5, message="Merging and loading", force=True),
+            )
+        finally:
+            db.close()
+    finally:
+        _remove_upload_dir(ctx.params)
@@ -0,0 +1,47 @@
+"""
+WhatsApp delivery through Twilio for digests.
+
+Same configuration as ``whatsapp-alerts-main/tn_alerts_whatsapp.py``. twilio is
+optional: without it, or without credentials, WhatsApp messages are skipped.
+"""
+import os
+
+TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
+
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        from twilio.rest import Client  # imported on first send, it is slow and optional
+        _client = Client(TWILIO_SID, TWILIO_TOKEN)
+    return _client
+
+
+def is_configured() -> bool:
+    return bool(TWILIO_SID and TWILIO_TOKEN and TWILIO_WHATSAPP_FROM)
+
+
+def send_whatsapp_batch(messages: list) -> int:
+    """Send ``(recipient, body)`` messages with one shared client; returns how many were sent."""
+    if not messages or not is_configured():
+        return 0
+    try:
+        client = _get_client()
+    except ImportError:
+        print("twilio is not installed; skipping WhatsApp messages")
+        return 0
+
+    sent = 0
+    for recipient, body in messages:
+        if not recipient.startswith("whatsapp:"):
+            recipient = f"whatsapp:{recipient}"
+        try:
+            client.messages.create(from_=TWILIO_WHATSAPP_FROM, to=recipient, body=body)
+            sent += 1
+        except Exception as e:
+            print(f"Failed to send WhatsApp message to {recipient}: {e}")
+    return sent
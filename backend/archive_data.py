@@ -0,0 +1,50 @@
+"""
+Move outbreaks and chat messages past their hot window into the monthly
+archive, and export archived months older than ARCHIVE_KEEP_MONTHS to
+compressed files (see app/archive.py).
+
+    python archive_data.py
+    python archive_data.py chat_messages --status
+"""
+import argparse
+import json
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main(argv=None):
+    from app.archive import ARCHIVED_TABLES, archive_status, run_archive
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Archive cold outbreak and chat rows")
+    parser.add_argument("tables", nargs="*", help=f"Tables to archive: {', '.join(ARCHIVED_TABLES)} (default: all)")
+    parser.add_argument("--status", action="store_true", help="Only show hot row counts, partitions and exported files")
+    args = parser.parse_args(argv)
+    # Checked here: before Python 3.12 argparse rejects an empty list against ``choices``
+    unknown = [table for table in args.tables if table not in ARCHIVED_TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    if not args.status:
+        summary = run_archive(args.tables or None, progress=lambda fraction, message: print(f"  {message}"))
+        pruned = summary.pop("change_log")["pruned"]
+        pruned_jobs = summary.pop("jobs")["pruned"]
+        for table, result in summary.items():
+            print(f"✓ {table}: moved {result['moved']} rows older than {result['cutoff']}")
+            for export in result["exported"]:
+                print(f"  exported {export['month']} ({export['rows']} rows) to {export['path']}")
+        print(f"✓ change log: pruned {pruned} entries")
+        print(f"✓ jobs: pruned {pruned_jobs} finished jobs")
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(archive_status(db), indent=2))
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
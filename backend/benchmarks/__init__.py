@@ -0,0 +1 @@
+"""Performance benchmarks and load tests for the Health Monitoring System API."""
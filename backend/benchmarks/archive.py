@@ -0,0 +1,116 @@
+"""
+Effect of archiving cold outbreaks on the queries that read the hot table.
+
+Seeds ``--years`` of outbreak reports for every benchmark location, times a
+district listing (newest first) and a recent-alerts scan, runs the archive
+with a one-year hot window, and times the same queries again. Also reports
+how fast rows move to the monthly archive tables.
+
+    python -m benchmarks.archive --per-district-per-month 40 --years 5
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def _time_queries(SessionLocal, locations, rounds: int) -> dict:
+    from app.models import Outbreak
+
+    now = datetime.utcnow()
+    timings = {"listing_us": 0.0, "alerts_us": 0.0}
+    db = SessionLocal()
+    try:
+        for i in range(rounds):
+            state, district = locations[i % len(locations)]
+            started = time.perf_counter()
+            db.query(Outbreak).filter(Outbreak.state == state, Outbreak.district == district) \
+                .order_by(Outbreak.report_date.desc()).offset(100).limit(50).all()
+            timings["listing_us"] += time.perf_counter() - started
+            started = time.perf_counter()
+            db.query(Outbreak).filter(Outbreak.state == state, Outbreak.district == district, Outbreak.severity == "high",
+                                      Outbreak.report_date >= now - timedelta(days=30)).all()
+            timings["alerts_us"] += time.perf_counter() - started
+    finally:
+        db.close()
+    return {name: round(total / rounds * 1e6, 1) for name, total in timings.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure hot-table queries before and after archiving")
+    parser.add_argument("--per-district-per-month", type=int, default=20)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="archive_results.json")
+    args = parser.parse_args(argv)
+
+    archive_dir = tempfile.mkdtemp(prefix="health_archive_")
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false", ARCHIVE_DIR=archive_dir,
+                                       OUTBREAK_HOT_DAYS="365", ARCHIVE_KEEP_MONTHS="24")
+    from sqlalchemy import insert
+
+    from app import models
+    from app.archive import run_archive
+    from app.database import SessionLocal
+    from app.migrations import upgrade_to_head
+    from benchmarks.seed import DISEASES, LOCATIONS, SEVERITIES
+
+    upgrade_to_head()
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    locations = [(state, district) for state, districts in LOCATIONS.items() for district in districts]
+    months = args.years * 12
+    db = SessionLocal()
+    try:
+        for state, district in locations:
+            db.execute(insert(models.Outbreak), [{
+                "outbreak_id": f"ARC-{state}-{district}-{i}", "disease": rng.choice(DISEASES),
+                "report_date": now - timedelta(days=rng.uniform(0, months * 30.4)), "state": state, "district": district,
+                "cases_reported": rng.randrange(1, 500), "deaths": rng.randrange(0, 5), "severity": rng.choice(SEVERITIES),
+                "confirmed": True,
+            } for i in range(args.per_district_per_month * months)])
+        db.commit()
+        total = db.query(models.Outbreak).count()
+    finally:
+        db.close()
+
+    try:
+        before = _time_queries(SessionLocal, locations, args.rounds)
+        started = time.perf_counter()
+        summary = run_archive(["outbreaks"], now=now)["outbreaks"]
+        elapsed = time.perf_counter() - started
+        after = _time_queries(SessionLocal, locations, args.rounds)
+    finally:
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    exported = sum(export["rows"] for export in summary["exported"])
+    results = {
+        "meta": run_metadata(benchmark="archive", per_district_per_month=args.per_district_per_month, years=args.years),
+        "rows": total,
+        "moved": summary["moved"],
+        "exported_to_files": exported,
+        "archive_seconds": round(elapsed, 2),
+        "rows_per_second": round(summary["moved"] / elapsed) if elapsed else None,
+        "before": before,
+        "after": after,
+    }
+    print(f"{total} outbreaks; archived {summary['moved']} ({exported} to files) in {results['archive_seconds']}s, "
+          f"{results['rows_per_second']} rows/s")
+    for name in before:
+        print(f"  {name[:-3]:>8}: {before[name]}us -> {after[name]}us")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
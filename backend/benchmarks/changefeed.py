@@ -0,0 +1,110 @@
+"""
+Finding what changed: scraping the outbreak listing versus the change feed.
+
+Seeds the benchmark data set at ``--scale`` and edits ``--changes`` outbreaks
+through ``upsert_rows`` (as a CSV import would). Then finds those edits the
+way partner systems did, by paging through the whole listing (a count and
+an offset query per page) and diffing it against the previous copy, and the
+way the feed allows, by reading ``change_log`` after the last seq seen.
+Also times what logging adds to a 500-row upsert.
+
+    python -m benchmarks.changefeed --scale 100 --changes 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare listing scrapes with the change feed")
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--changes", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="changefeed_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false", READ_MODEL_ENABLED="false")
+    from sqlalchemy import func, select
+
+    from app import models, schemas
+    from app.changefeed import log_changes, read_changes
+    from app.database import SessionLocal
+    from app.ingest import upsert_rows
+    from app.migrations import upgrade_to_head
+    from app.routers.health_data import build_outbreaks_page
+    from app.serialization import query_rows, rows_to_dicts, schema_fields
+    from benchmarks.seed import seed_database
+
+    upgrade_to_head()
+    db = SessionLocal()
+    try:
+        counts = seed_database(db, scale=args.scale)
+    finally:
+        db.close()
+
+    def scrape(db):
+        rows, page = {}, 1
+        while True:
+            result = build_outbreaks_page(db, page, args.page_size)
+            rows.update((item["id"], item) for item in result["items"])
+            if page >= result["pages"]:
+                return rows
+            page += 1
+
+    fields = schema_fields(schemas.Outbreak)
+    results = {"meta": run_metadata(benchmark="changefeed", scale=args.scale, rounds=args.rounds, changes=args.changes), "rows": counts}
+    db = SessionLocal()
+    try:
+        before = scrape(db)
+        since = db.scalar(select(func.max(models.ChangeLogEntry.seq))) or 0
+        records = rows_to_dicts(fields, query_rows(db, models.Outbreak, schemas.Outbreak).order_by(models.Outbreak.id).limit(args.changes).all())
+        upsert_rows(db, "outbreaks", [dict(record, cases_reported=record["cases_reported"] + 1) for record in records])
+        db.commit()
+
+        timings = {}
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            after = scrape(db)
+            changed = {row_id for row_id, item in after.items() if before.get(row_id) != item}
+        timings["scrape"] = (time.perf_counter() - started) / args.rounds
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            feed = json.loads(read_changes(db, since, "outbreaks", limit=5000))
+        timings["feed"] = (time.perf_counter() - started) / args.rounds
+        if changed != {change["id"] for change in feed["changes"]}:
+            raise SystemExit("The feed and the scrape disagree on what changed")
+        results["find_changes"] = {
+            "changed": len(changed), "pages": -(-len(after) // args.page_size),
+            "scrape_ms": round(timings["scrape"] * 1000, 2), "feed_ms": round(timings["feed"] * 1000, 3),
+            "speedup": round(timings["scrape"] / timings["feed"], 1),
+        }
+        print(f"{len(changed)} changes among {len(after)} outbreaks: scrape {results['find_changes']['scrape_ms']}ms, "
+              f"feed {results['find_changes']['feed_ms']}ms ({results['find_changes']['speedup']}x)")
+
+        batch = rows_to_dicts(fields, query_rows(db, models.Outbreak, schemas.Outbreak).order_by(models.Outbreak.id).limit(500).all())
+        edited = [dict(record, deaths=(record["deaths"] or 0) + 1) for record in batch]
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            log_changes(db, "outbreaks", batch, edited)
+        elapsed = (time.perf_counter() - started) / args.rounds
+        db.rollback()
+        results["log_500_ms"] = round(elapsed * 1000, 3)
+        print(f"log_changes for {len(batch)} updated rows: {results['log_500_ms']}ms")
+    finally:
+        db.close()
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Cost of adding a district's health data to a chat prompt.
+
+Seeds recent outbreaks and running campaigns for every benchmark location and
+compares querying and summarizing a district for each message with a lookup
+in the precomputed ``district_context``. Also times ``rebuild_all``, the
+startup warm-up.
+
+    python -m benchmarks.chat_context --outbreaks-per-district 500 --lookups 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cost of chat prompt district context")
+    parser.add_argument("--outbreaks-per-district", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200, help="Per-message query rounds to time (default: 200)")
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="chat_context_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false")
+    from sqlalchemy import insert
+
+    from app import models
+    from app.database import SessionLocal
+    from app.district_context import DistrictContextCache
+    from app.locations import assign_locations, resolve_locations
+    from app.migrations import upgrade_to_head
+    from benchmarks.seed import DISEASES, LOCATIONS, POPULATIONS, SEVERITIES, VACCINES
+
+    upgrade_to_head()
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    names = [(state, district) for state, districts in LOCATIONS.items() for district in districts]
+    db = SessionLocal()
+    try:
+        for state, district in names:
+            outbreaks = [{
+                "outbreak_id": f"CTX-{state}-{district}-{i}", "disease": rng.choice(DISEASES),
+                "report_date": now - timedelta(days=rng.randrange(0, 29), hours=1), "state": state, "district": district,
+                "cases_reported": rng.randrange(1, 500), "deaths": rng.randrange(0, 5), "severity": rng.choice(SEVERITIES),
+                "confirmed": True,
+            } for i in range(args.outbreaks_per_district)]
+            campaigns = [{
+                "campaign_id": f"CTX-{state}-{district}-{i}", "state": state, "district": district,
+                "vaccine_name": rng.choice(VACCINES), "target_population": rng.choice(POPULATIONS),
+                "start_date": now - timedelta(days=2), "end_date": now + timedelta(days=rng.randrange(5, 60)),
+                "doses_allocated": 1000, "doses_administered": 100,
+            } for i in range(5)]
+            assign_locations(db, outbreaks + campaigns)
+            db.execute(insert(models.Outbreak), outbreaks)
+            db.execute(insert(models.Vaccination), campaigns)
+        refs = resolve_locations(db, names, create=False)
+        locations = [refs[name].id for name in names]
+        db.commit()
+    finally:
+        db.close()
+
+    cache = DistrictContextCache(ttl=3600)
+    try:
+        started = time.perf_counter()
+        built = cache.rebuild_all()
+        rebuild = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(args.queries):
+            cache.refresh(locations[i % len(locations)])
+        per_query = (time.perf_counter() - started) / args.queries
+
+        started = time.perf_counter()
+        for i in range(args.lookups):
+            cache.get(locations[i % len(locations)])
+        per_lookup = (time.perf_counter() - started) / args.lookups
+    finally:
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    sample = cache.get(locations[0])
+    results = {
+        "meta": run_metadata(benchmark="chat_context", outbreaks_per_district=args.outbreaks_per_district),
+        "districts": built,
+        "rebuild_all_ms": round(rebuild * 1000, 2),
+        "query_per_message_us": round(per_query * 1e6, 2),
+        "cached_lookup_us": round(per_lookup * 1e6, 3),
+        "speedup": round(per_query / per_lookup),
+        "summary_chars": len(sample),
+    }
+    print(f"{built} districts rebuilt in {results['rebuild_all_ms']}ms; per message: query {results['query_per_message_us']}us, "
+          f"cached {results['cached_lookup_us']}us ({results['speedup']}x); summary {len(sample)} chars")
+    print(sample)
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Shared helpers for benchmark scripts: environment setup, latency statistics
+and JSON result files that can be compared against a stored baseline.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def prepare_environment(database_url: str = None, **extra_env) -> str:
+    """Point the app at a benchmark database before ``app`` is imported.
+
+    Returns the database URL in use. When no URL is given a fresh SQLite file in
+    the temp directory is used.
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    if not database_url:
+        fd, path = tempfile.mkstemp(prefix="health_bench_", suffix=".db")
+        os.close(fd)
+        os.remove(path)
+        database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+    for key, value in extra_env.items():
+        os.environ[key] = str(value)
+    return database_url
+
+
+def sqlite_path(database_url: str):
+    if database_url.startswith("sqlite:///"):
+        return database_url[len("sqlite:///"):]
+    return None
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors: int = 0, elapsed: float = None) -> dict:
+    """Summarize a list of latencies (seconds) as milliseconds."""
+    values = sorted(latencies)
+    count = len(values)
+    summary = {
+        "count": count,
+        "errors": errors,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+    if elapsed:
+        summary["throughput_rps"] = round(count / elapsed, 2)
+    return summary
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def run_metadata(**extra) -> dict:
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def write_results(path: str, results: dict):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {path}")
+
+
+def compare_to_baseline(current: dict, baseline_path: str, threshold: float = 0.10) -> list:
+    """Print a comparison table and return the names of regressed scenarios.
+
+    A scenario regresses when its p95 latency grows, or its throughput drops,
+    by more than ``threshold`` (a fraction) relative to the baseline file.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    print(f"\nComparison against {baseline_path} (commit {baseline.get('meta', {}).get('commit', '?')})")
+    print(f"{'scenario':<28}{'p95 base':>12}{'p95 now':>12}{'delta':>9}{'rps base':>12}{'rps now':>12}{'delta':>9}")
+    for name, now in sorted(current.get("scenarios", {}).items()):
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            print(f"{name:<28}{'-':>12}{now['p95_ms']:>12.2f}")
+            continue
+        p95_delta = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps_base = base.get("throughput_rps", 0.0)
+        rps_now = now.get("throughput_rps", 0.0)
+        rps_delta = (rps_now - rps_base) / rps_base if rps_base else 0.0
+        flag = ""
+        if p95_delta > threshold or rps_delta < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28}{base['p95_ms']:>12.2f}{now['p95_ms']:>12.2f}{p95_delta:>+9.1%}"
+              f"{rps_base:>12.1f}{rps_now:>12.1f}{rps_delta:>+9.1%}{flag}")
+    return regressions
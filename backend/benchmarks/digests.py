@@ -0,0 +1,96 @@
+"""
+Digest run throughput with the senders replaced by no-ops.
+
+Seeds ``--subscribers`` digest subscribers spread over the benchmark locations,
+plus recent outbreaks and campaigns, then times ``run_digest`` end to end:
+content queries, per-location rendering, streaming subscribers and batching.
+Delivery itself (SMTP, Twilio) is excluded.
+
+    python -m benchmarks.digests --subscribers 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure digest run throughput")
+    parser.add_argument("--subscribers", type=int, default=100000)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="digests_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false")
+    from sqlalchemy import insert
+
+    from app import digests, models, scheduler, whatsapp
+    from app.database import SessionLocal
+    from app.locations import assign_locations
+    from app.migrations import upgrade_to_head
+    from benchmarks.seed import BATCH_SIZE, DISEASES, LOCATIONS, SEVERITIES, VACCINES, random_location
+
+    upgrade_to_head()
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for start in range(0, args.subscribers, BATCH_SIZE):
+            rows = []
+            for i in range(start, min(start + BATCH_SIZE, args.subscribers)):
+                state, district = random_location(rng)
+                rows.append({
+                    "email": f"digest{i}@example.org", "username": f"digest{i}", "hashed_password": "x",
+                    "full_name": f"Subscriber {i}", "state": state, "district": district, "is_active": True,
+                    "digest_frequency": "daily", "whatsapp_number": f"+9100{i:08d}" if i % 4 == 0 else None,
+                })
+            assign_locations(db, rows)
+            db.execute(insert(models.User), rows)
+        for state, districts in LOCATIONS.items():
+            for district in districts:
+                for i in range(20):
+                    db.add(models.Outbreak(
+                        outbreak_id=f"DIGEST-{state}-{district}-{i}", disease=rng.choice(DISEASES),
+                        report_date=now - timedelta(hours=rng.randrange(1, 23)), state=state, district=district,
+                        cases_reported=rng.randrange(1, 500), deaths=rng.randrange(0, 5), severity=rng.choice(SEVERITIES), confirmed=True,
+                    ))
+                db.add(models.Vaccination(
+                    campaign_id=f"DIGEST-{state}-{district}", state=state, district=district, vaccine_name=rng.choice(VACCINES),
+                    start_date=now - timedelta(days=2), end_date=now + timedelta(days=20), target_population="Adults 18+",
+                    doses_allocated=1000, doses_administered=100,
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+    delivered = {"emails": 0, "whatsapp": 0}
+    scheduler.send_email_batch = lambda messages: delivered.__setitem__("emails", delivered["emails"] + len(messages)) or len(messages)
+    whatsapp.send_whatsapp_batch = lambda messages: delivered.__setitem__("whatsapp", delivered["whatsapp"] + len(messages)) or len(messages)
+
+    try:
+        started = time.perf_counter()
+        stats = digests.run_digest("daily", now)
+        elapsed = time.perf_counter() - started
+    finally:
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    results = {
+        "meta": run_metadata(benchmark="digests", subscribers=args.subscribers),
+        "stats": stats,
+        "seconds": round(elapsed, 3),
+        "subscribers_per_second": round(args.subscribers / elapsed),
+    }
+    print(f"{args.subscribers} subscribers, {stats['locations']} locations: {elapsed:.2f}s "
+          f"({results['subscribers_per_second']} subscribers/s, {delivered['emails']} emails, {delivered['whatsapp']} WhatsApp)")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Bulk export formats versus paging through the JSON listing.
+
+Seeds the benchmark data set at ``--scale`` and pulls every outbreak once
+through the JSON listing, page by page as analysts did, and once per export
+format with ``app.exports.iter_export``. For each it reports the time, the
+bytes produced and the peak Python memory (``tracemalloc``) while running.
+The export's peak should stay near one ``EXPORT_BATCH_SIZE`` batch however
+large ``--scale`` gets.
+
+    python -m benchmarks.export --scale 200
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare bulk export formats with the JSON listing")
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=10000, help="EXPORT_BATCH_SIZE for the run")
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="export_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false", READ_MODEL_ENABLED="false",
+                                       EXPORT_BATCH_SIZE=str(args.batch_size))
+    from app.database import SessionLocal
+    from app.exports import EXPORT_FORMATS, check_export, iter_export
+    from app.migrations import upgrade_to_head
+    from app.routers.health_data import build_outbreaks_page
+    from app.serialization import dumps
+    from benchmarks.seed import seed_database
+
+    upgrade_to_head()
+    db = SessionLocal()
+    try:
+        counts = seed_database(db, scale=args.scale)
+    finally:
+        db.close()
+
+    def json_pages():
+        db = SessionLocal()
+        try:
+            page = 1
+            while True:
+                result = build_outbreaks_page(db, page, args.page_size)
+                yield dumps(result)
+                if page >= result["pages"]:
+                    return
+                page += 1
+        finally:
+            db.close()
+
+    paths = {"json_listing": json_pages}
+    for format in EXPORT_FORMATS:
+        try:
+            check_export("outbreaks", format)
+        except ValueError as e:
+            print(f"Skipping {format}: {e}")
+            continue
+        paths[format] = lambda format=format: iter_export("outbreaks", format)
+    if "parquet" in paths:
+        # Loaded up front so the first format does not pay for the import
+        import pyarrow.ipc, pyarrow.parquet  # noqa: F401
+
+    results = {"meta": run_metadata(benchmark="export", scale=args.scale, batch_size=args.batch_size), "rows": counts, "paths": {}}
+    try:
+        print(f"{'path':>14}{'seconds':>10}{'bytes':>12}{'peak MiB':>10}")
+        for label, produce in paths.items():
+            tracemalloc.start()
+            started = time.perf_counter()
+            size = sum(len(chunk) for chunk in produce())
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            entry = {"seconds": round(elapsed, 3), "bytes": size, "peak_mib": round(peak / 2 ** 20, 1)}
+            results["paths"][label] = entry
+            print(f"{label:>14}{entry['seconds']:>10}{size:>12}{entry['peak_mib']:>10}")
+    finally:
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
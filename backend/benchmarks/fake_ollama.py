@@ -0,0 +1,89 @@
+"""
+Minimal stand-in for the Ollama HTTP API.
+
+Answers ``POST /api/generate`` and ``GET /api/tags`` after a configurable delay
+so chat benchmarks measure our own overhead rather than model inference.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "bench-model:latest"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/generate":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail:
+            self._send_json({"error": "model unavailable"}, status=503)
+            return
+        self._send_json({
+            "model": payload.get("model"),
+            "response": "Stay hydrated, use mosquito nets and consult a doctor if fever persists.",
+            "done": True,
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOllamaServer:
+    """Run a fake Ollama server on a background thread.
+
+    Usage::
+
+        with FakeOllamaServer(latency=0.05) as server:
+            os.environ["OLLAMA_URL"] = server.url
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, fail: bool = False):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.latency = latency
+        self._server.fail = fail
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_latency(self, latency: float):
+        self._server.latency = latency
+
+    def set_fail(self, fail: bool):
+        self._server.fail = fail
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,123 @@
+"""
+Cold-start benchmark and gate for worker startup.
+
+Runs ``python -X importtime -c "import main"`` in fresh interpreters, reports
+the slowest modules and fails when the import exceeds ``--budget-ms`` or pulls
+in a module that should only load on demand (pandas for CSV uploads, alembic
+for migrations, requests for chat, twilio for WhatsApp). It also times the
+lifespan startup (schema check, pool and cache warm-up) and the first request.
+
+    python -m benchmarks.importtime --budget-ms 1500 --output importtime.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import BACKEND_DIR, prepare_environment, run_metadata, sqlite_path, write_results
+
+DEFAULT_FORBIDDEN = ["pandas", "pyarrow", "alembic", "requests", "twilio"]
+
+STARTUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    ready = time.perf_counter()
+    client.get("/api/health/outbreaks")
+    first = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (first - ready) * 1000,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Map module name to (self_us, cumulative_us) from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+    return {"total_ms": modules["main"][1] / 1000, "modules": modules}
+
+
+def measure_startup() -> dict:
+    result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"startup failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure and gate worker cold-start time")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement, best is kept (default: 5)")
+    parser.add_argument("--budget-ms", type=float, help="Fail when importing main takes longer than this")
+    parser.add_argument("--forbid", default=",".join(DEFAULT_FORBIDDEN),
+                        help=f"Comma-separated modules that must not load at import (default: {','.join(DEFAULT_FORBIDDEN)})")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to print (default: 15)")
+    parser.add_argument("--output", default="importtime_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment()
+    try:
+        from app.migrations import upgrade_to_head
+        upgrade_to_head()
+
+        runs = [measure_import() for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["total_ms"])
+        startups = [measure_startup() for _ in range(args.repeat)]
+    finally:
+        path = sqlite_path(database_url)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    forbidden = [name for name in args.forbid.split(",") if name]
+    loaded = sorted(name for name in forbidden if name in best["modules"])
+    slowest = sorted(best["modules"].items(), key=lambda item: item[1][1], reverse=True)
+    top = [(name, cumulative / 1000) for name, (_, cumulative) in slowest if name != "main" and "." not in name][:args.top]
+    startup = {key: round(min(run[key] for run in startups), 1) for key in startups[0]}
+
+    results = {
+        "meta": run_metadata(benchmark="importtime", repeat=args.repeat, budget_ms=args.budget_ms),
+        "import_main_ms": round(best["total_ms"], 1),
+        "startup": startup,
+        "forbidden_loaded": loaded,
+        "slowest_modules_ms": {name: round(ms, 1) for name, ms in top},
+    }
+
+    print(f"import main: {results['import_main_ms']:.1f} ms (best of {args.repeat})")
+    print(f"lifespan startup: {startup['startup_ms']:.1f} ms, first request: {startup['first_request_ms']:.1f} ms")
+    for name, ms in top:
+        print(f"  {name:<32}{ms:>10.1f} ms")
+    write_results(args.output, results)
+
+    failed = False
+    if loaded:
+        print(f"Modules loaded at import that should be lazy: {', '.join(loaded)}")
+        failed = True
+    if args.budget_ms is not None and best["total_ms"] > args.budget_ms:
+        print(f"Import time {best['total_ms']:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
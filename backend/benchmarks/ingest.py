@@ -0,0 +1,111 @@
+"""
+Throughput of multi-file CSV ingestion against the number of parser processes.
+
+Generates ``--files`` synthetic outbreak CSVs and, for each worker count, times
+parsing alone (``parse_files``) and the full load into an emptied table
+(``ingest_files``: parse, merge, upsert, commit). Reports rows per second.
+
+    python -m benchmarks.ingest --files 16 --rows-per-file 5000 --workers 1,2,4,8
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def generate_files(files: int, rows_per_file: int, seed: int = 42) -> list:
+    from benchmarks.seed import DISEASES, SEVERITIES, random_location
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    columns = ["outbreak_id", "disease", "report_date", "state", "district", "cases_reported", "deaths", "severity", "confirmed", "notes"]
+    generated = []
+    for index in range(files):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in range(rows_per_file):
+            state, district = random_location(rng)
+            writer.writerow([
+                f"INGEST-{index:03d}-{row:07d}", rng.choice(DISEASES),
+                (start + timedelta(days=rng.randrange(365))).strftime("%Y-%m-%d"), state, district,
+                rng.randrange(1, 500), rng.randrange(0, 10), rng.choice(SEVERITIES), rng.random() < 0.8,
+                "synthetic",
+            ])
+        generated.append((f"outbreaks_{index:03d}.csv", buffer.getvalue().encode("utf-8")))
+    return generated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure parallel CSV ingestion throughput")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--rows-per-file", type=int, default=5000)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts (default: 1,2,4)")
+    parser.add_argument("--database-url", help="Database to load into (default: temporary SQLite file)")
+    parser.add_argument("--output", default="ingest_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url)
+    from app import models
+    from app.database import SessionLocal
+    from app.ingest import parse_files, shutdown_process_pool
+    from app.migrations import upgrade_to_head
+    from app.tasks import ingest_files
+
+    upgrade_to_head()
+    files = generate_files(args.files, args.rows_per_file)
+    total_rows = args.files * args.rows_per_file
+    print(f"{args.files} files x {args.rows_per_file} rows = {total_rows} rows")
+    print(f"{'workers':>8}{'parse rows/s':>16}{'end-to-end rows/s':>20}{'load s':>10}")
+
+    runs = []
+    try:
+        for workers in [int(value) for value in args.workers.split(",") if value]:
+            # The first map into a fresh pool pays for spawning the processes; warm it up
+            parse_files("outbreaks", files[:workers], workers)
+            started = time.perf_counter()
+            parse_files("outbreaks", files, workers)
+            parse_seconds = time.perf_counter() - started
+
+            db = SessionLocal()
+            try:
+                db.query(models.Outbreak).filter(models.Outbreak.outbreak_id.like("INGEST-%")).delete(synchronize_session=False)
+                db.commit()
+                started = time.perf_counter()
+                summary = ingest_files(db, "outbreaks", files, workers=workers, notify=False)
+                elapsed = time.perf_counter() - started
+            finally:
+                db.close()
+
+            run = {
+                "workers": workers,
+                "parse_seconds": round(parse_seconds, 3),
+                "parse_rows_per_second": round(total_rows / parse_seconds),
+                "end_to_end_seconds": round(elapsed, 3),
+                "end_to_end_rows_per_second": round(total_rows / elapsed),
+                "load_seconds": summary["load_seconds"],
+            }
+            runs.append(run)
+            print(f"{workers:>8}{run['parse_rows_per_second']:>16}{run['end_to_end_rows_per_second']:>20}{run['load_seconds']:>10.2f}")
+    finally:
+        shutdown_process_pool()
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    results = {
+        "meta": run_metadata(benchmark="ingest", files=args.files, rows_per_file=args.rows_per_file),
+        "runs": runs,
+    }
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Per-message cost of fallback intent matching as the keyword table grows.
+
+Pads the built-in intent table with synthetic keywords and compares a chain
+of ``keyword in message`` checks (how the fallback used to match) with the
+compiled ``IntentClassifier``.
+
+    python -m benchmarks.intents --keywords 10,100,1000,5000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+
+from benchmarks.common import run_metadata, write_results
+
+MESSAGES = [
+    "What are the symptoms of dengue?",
+    "Is there a malaria outbreak near me",
+    "मुझे तीन दिन से बुखार है, क्या करूं?",
+    "kya corona ka tika lagwana chahiye",
+    "டெங்கு காய்ச்சல் அறிகுறிகள் என்ன",
+    "Where can I get my child vaccinated this week?",
+    "How do I keep my family safe during the monsoon season and what should I do if someone gets sick",
+    "hello",
+]
+
+
+def padded_intents(total_keywords: int, seed: int = 42):
+    from app.intents import INTENTS, Intent
+
+    rng = random.Random(seed)
+    intents = list(INTENTS)
+    missing = max(0, total_keywords - sum(len(intent.keywords) for intent in intents))
+    for i in range(0, missing, 50):
+        words = tuple("".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 12))) for _ in range(min(50, missing - i)))
+        intents.append(Intent(f"synthetic{i // 50}", 5, words))
+    return intents
+
+
+def substring_chain(intents):
+    rules = [(keyword.rstrip("*"), intent.name) for intent in intents for keyword in intent.keywords]
+
+    def classify(message):
+        lowered = message.lower()
+        for keyword, name in rules:
+            if keyword in lowered:
+                return name
+        return None
+    return classify
+
+
+def per_message_us(classify, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in MESSAGES:
+            classify(message)
+    return (time.perf_counter() - started) / (rounds * len(MESSAGES)) * 1e6
+
+
+def main(argv=None):
+    from app.intents import IntentClassifier
+
+    parser = argparse.ArgumentParser(description="Measure fallback intent matching cost per message")
+    parser.add_argument("--keywords", default="10,100,1000,5000", help="Comma-separated keyword table sizes")
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--output", default="intents_results.json")
+    args = parser.parse_args(argv)
+
+    runs = []
+    print(f"{'keywords':>10}{'substring us':>14}{'compiled us':>13}{'compile ms':>12}")
+    for size in [int(value) for value in args.keywords.split(",") if value]:
+        intents = padded_intents(size)
+        started = time.perf_counter()
+        classifier = IntentClassifier(intents)
+        compile_ms = (time.perf_counter() - started) * 1000
+        run = {
+            "keywords": sum(len(intent.keywords) for intent in intents),
+            "substring_us": round(per_message_us(substring_chain(intents), args.rounds), 2),
+            "compiled_us": round(per_message_us(classifier.best, args.rounds), 2),
+            "compile_ms": round(compile_ms, 1),
+        }
+        runs.append(run)
+        print(f"{run['keywords']:>10}{run['substring_us']:>14}{run['compiled_us']:>13}{run['compile_ms']:>12}")
+
+    write_results(args.output, {"meta": run_metadata(benchmark="intents"), "runs": runs})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
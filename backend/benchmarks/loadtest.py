@@ -0,0 +1,291 @@
+"""
+Reproducible load test for the Health Monitoring System API.
+
+Seeds a database with synthetic data, starts the FastAPI app in-process and
+drives a weighted mix of requests across the health, chat, upload and login
+endpoints. Throughput and p50/p95/p99 latencies are written to JSON and can be
+compared against a baseline from an earlier commit.
+
+Examples (run from backend/):
+
+    python -m benchmarks.loadtest --scale 10 --requests 2000 --output bench.json
+    python -m benchmarks.loadtest --scale 10 --baseline bench.json --fail-on-regression
+    python -m benchmarks.loadtest --database-url postgresql://localhost/health_bench
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import (
+    compare_to_baseline, prepare_environment, run_metadata, sqlite_path, summarize, write_results,
+)
+from benchmarks.fake_ollama import FakeOllamaServer
+
+DEFAULT_MIX = {
+    "health_outbreaks": 30,
+    "health_vaccinations": 20,
+    "health_alerts": 15,
+    "health_location_data": 8,
+    "chat_history": 8,
+    "chat_message": 8,
+    "login": 5,
+    "upload_outbreaks_csv": 3,
+    "upload_vaccinations_csv": 3,
+}
+
+_upload_ids = itertools.count()
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _location_query(ctx, rng):
+    from benchmarks.seed import random_location
+    roll = rng.random()
+    if roll < 0.3:
+        return {}
+    state, district = random_location(rng)
+    if roll < 0.6:
+        return {"state": state}
+    return {"state": state, "district": district}
+
+
+def scenario_health_outbreaks(client, ctx, rng):
+    params = {"page": rng.randint(1, 5), "limit": rng.choice([10, 20, 50]), **_location_query(ctx, rng)}
+    return client.get("/api/health/outbreaks", params=params)
+
+
+def scenario_health_vaccinations(client, ctx, rng):
+    params = {"page": rng.randint(1, 5), "limit": rng.choice([10, 20, 50]), **_location_query(ctx, rng)}
+    return client.get("/api/health/vaccinations", params=params)
+
+
+def scenario_health_alerts(client, ctx, rng):
+    return client.get("/api/health/alerts", headers=_auth(rng.choice(ctx["tokens"])))
+
+
+def scenario_health_location_data(client, ctx, rng):
+    params = {"filter_location": "true" if rng.random() < 0.7 else "false"}
+    return client.get("/api/health/location-data", params=params, headers=_auth(rng.choice(ctx["tokens"])))
+
+
+def scenario_chat_history(client, ctx, rng):
+    return client.get("/api/chat/history", headers=_auth(rng.choice(ctx["tokens"])))
+
+
+def scenario_chat_message(client, ctx, rng):
+    from benchmarks.seed import CHAT_MESSAGES
+    return client.post(
+        "/api/chat/message",
+        json={"message": rng.choice(CHAT_MESSAGES)},
+        headers=_auth(rng.choice(ctx["tokens"])),
+    )
+
+
+def scenario_login(client, ctx, rng):
+    from benchmarks.seed import BENCH_PASSWORD
+    username = f"bench{rng.randrange(ctx['user_count'])}"
+    return client.post("/api/users/login", json={"username": username, "password": BENCH_PASSWORD})
+
+
+def scenario_upload_outbreaks_csv(client, ctx, rng):
+    from benchmarks.seed import DISEASES, SEVERITIES, random_location
+    lines = ["outbreak_id,disease,report_date,state,district,cases_reported,deaths,severity,confirmed,country,source_url,notes"]
+    for _ in range(ctx["upload_rows"]):
+        state, district = random_location(rng)
+        lines.append(
+            f"UPLOAD-OUT{next(_upload_ids):08d},{rng.choice(DISEASES)},2024-05-{rng.randint(1, 28):02d},"
+            f"{state},{district},{rng.randint(1, 300)},{rng.randint(0, 5)},{rng.choice(SEVERITIES)},true,India,,bench upload"
+        )
+    files = {"file": ("outbreaks.csv", "\n".join(lines), "text/csv")}
+    return client.post("/api/admin/outbreaks/upload-csv", files=files, headers=_auth(ctx["admin_token"]))
+
+
+def scenario_upload_vaccinations_csv(client, ctx, rng):
+    from benchmarks.seed import POPULATIONS, VACCINES, random_location
+    lines = ["campaign_id,state,district,start_date,end_date,vaccine_name,target_population,doses_allocated,doses_administered,country,partner_org,notes"]
+    for _ in range(ctx["upload_rows"]):
+        state, district = random_location(rng)
+        lines.append(
+            f"UPLOAD-VAC{next(_upload_ids):08d},{state},{district},2024-05-01,2024-07-01,"
+            f"{rng.choice(VACCINES)},{rng.choice(POPULATIONS)},5000,{rng.randint(0, 5000)},India,Bench,bench upload"
+        )
+    files = {"file": ("vaccinations.csv", "\n".join(lines), "text/csv")}
+    return client.post("/api/admin/vaccinations/upload-csv", files=files, headers=_auth(ctx["admin_token"]))
+
+
+SCENARIOS = {
+    name[len("scenario_"):]: func
+    for name, func in globals().items()
+    if name.startswith("scenario_")
+}
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'. Choose from: {', '.join(sorted(SCENARIOS))}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def build_schedule(mix: dict, total: int, seed: int) -> list:
+    rng = random.Random(seed)
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    return rng.choices(names, weights=weights, k=total)
+
+
+def setup_database(scale: int, seed: int) -> dict:
+    """Create the schema, seed data and mint tokens for the benchmark users."""
+    from app import auth, models
+    from app.database import SessionLocal
+    from app.migrations import upgrade_to_head
+    from benchmarks.seed import seed_database
+
+    upgrade_to_head()
+    db = SessionLocal()
+    try:
+        if db.query(models.Outbreak).first() is None:
+            started = time.perf_counter()
+            counts = seed_database(db, scale=scale, seed=seed)
+            print(f"Seeded {counts} in {time.perf_counter() - started:.1f}s")
+        else:
+            counts = {
+                "users": db.query(models.User).count(),
+                "outbreaks": db.query(models.Outbreak).count(),
+                "vaccinations": db.query(models.Vaccination).count(),
+                "chat_messages": db.query(models.ChatMessage).count(),
+            }
+            print(f"Reusing existing data {counts}")
+    finally:
+        db.close()
+
+    sample = min(counts["users"], 200)
+    return {
+        "counts": counts,
+        "user_count": counts["users"],
+        "tokens": [auth.create_access_token({"sub": f"bench{i}"}) for i in range(sample)],
+        "admin_token": auth.create_access_token({"sub": "bench0"}),
+    }
+
+
+def run_load(app, schedule: list, ctx: dict, concurrency: int, seed: int):
+    """Execute the schedule and return per-scenario latencies and error counts."""
+    from fastapi.testclient import TestClient
+
+    latencies = {name: [] for name in SCENARIOS}
+    errors = {name: 0 for name in SCENARIOS}
+    lock = threading.Lock()
+
+    def worker(index: int):
+        rng = random.Random(seed + index)
+        local_latencies = {name: [] for name in SCENARIOS}
+        local_errors = {name: 0 for name in SCENARIOS}
+        with TestClient(app) as client:
+            for name in schedule[index::concurrency]:
+                started = time.perf_counter()
+                try:
+                    response = SCENARIOS[name](client, ctx, rng)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                local_latencies[name].append(time.perf_counter() - started)
+                if failed:
+                    local_errors[name] += 1
+        with lock:
+            for name in SCENARIOS:
+                latencies[name].extend(local_latencies[name])
+                errors[name] += local_errors[name]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Health Monitoring System API in-process")
+    parser.add_argument("--database-url", help="Database to seed and test against (default: temporary SQLite file)")
+    parser.add_argument("--scale", type=int, default=5, help="Synthetic data scale factor (default: 5)")
+    parser.add_argument("--requests", type=int, default=1000, help="Total measured requests (default: 1000)")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured warm-up requests (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent client threads (default: 4)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Scenario weights, e.g. health_outbreaks=5,login=1")
+    parser.add_argument("--upload-rows", type=int, default=20, help="Rows per uploaded CSV (default: 20)")
+    parser.add_argument("--ollama-latency", type=float, default=0.02, help="Fake Ollama response delay in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed regression as a fraction (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero when a scenario regresses")
+    parser.add_argument("--keep-db", action="store_true", help="Keep the temporary SQLite database")
+    args = parser.parse_args(argv)
+
+    with FakeOllamaServer(latency=args.ollama_latency) as ollama:
+        # All simulated users share one client address; rate limiting would cap the measurement
+        database_url = prepare_environment(args.database_url, OLLAMA_URL=ollama.url, OLLAMA_MODEL="bench-model", RATE_LIMIT_ENABLED="false")
+        try:
+            ctx = setup_database(args.scale, args.seed)
+            ctx["upload_rows"] = args.upload_rows
+
+            from main import app
+
+            if args.warmup:
+                run_load(app, build_schedule(args.mix, args.warmup, args.seed + 1), ctx, args.concurrency, args.seed)
+            schedule = build_schedule(args.mix, args.requests, args.seed)
+            latencies, errors, elapsed = run_load(app, schedule, ctx, args.concurrency, args.seed)
+        finally:
+            path = sqlite_path(database_url)
+            if path and not args.database_url and not args.keep_db and os.path.exists(path):
+                os.remove(path)
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    results = {
+        "meta": run_metadata(
+            benchmark="loadtest",
+            database=database_url.split("://", 1)[0],
+            scale=args.scale,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            mix=args.mix,
+            ollama_latency_s=args.ollama_latency,
+            seed=args.seed,
+        ),
+        "dataset": ctx["counts"],
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "scenarios": {
+            name: summarize(values, errors[name], elapsed)
+            for name, values in latencies.items() if values
+        },
+    }
+
+    print(f"\n{'scenario':<28}{'count':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in sorted(results["scenarios"].items()):
+        print(f"{name:<28}{stats['count']:>7}{stats['errors']:>6}{stats['throughput_rps']:>9.1f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    overall = results["overall"]
+    print(f"{'overall':<28}{overall['count']:>7}{overall['errors']:>6}{overall['throughput_rps']:>9.1f}"
+          f"{overall['p50_ms']:>10.2f}{overall['p95_ms']:>10.2f}{overall['p99_ms']:>10.2f}")
+
+    write_results(args.output, results)
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"Regressed scenarios: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
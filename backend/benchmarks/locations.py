@@ -0,0 +1,102 @@
+"""
+Location filters on ``location_id`` versus the free-text state and district.
+
+Seeds the benchmark data set at ``--scale``, then counts and pages outbreaks
+for the busiest district three ways: comparing the text columns, through
+``app.locations.location_condition`` (what the listings do with a filter
+typed by a user) and with a known ``location_id`` (what per-user alerts do).
+Also times ``resolve_locations`` for a 500-row batch of mixed spellings,
+which is what each ingest batch pays to locate its rows.
+
+    python -m benchmarks.locations --scale 100 --rounds 200
+"""
+import argparse
+import os
+import sys
+import time
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare location filters on text columns and location_id")
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="locations_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false")
+    from sqlalchemy import func, select
+
+    from app import models
+    from app.database import SessionLocal
+    from app.locations import location_condition, resolve_locations
+    from app.migrations import upgrade_to_head
+    from benchmarks.seed import seed_database
+
+    upgrade_to_head()
+    db = SessionLocal()
+    try:
+        counts = seed_database(db, scale=args.scale)
+        counts["locations"] = db.scalar(select(func.count()).select_from(models.Location))
+    finally:
+        db.close()
+
+    outbreak = models.Outbreak
+    results = {"meta": run_metadata(benchmark="locations", scale=args.scale, rounds=args.rounds), "rows": counts, "filters": {}}
+    db = SessionLocal()
+    try:
+        state, district, location_id = db.execute(
+            select(outbreak.state, outbreak.district, outbreak.location_id)
+            .group_by(outbreak.state, outbreak.district, outbreak.location_id).order_by(func.count().desc()).limit(1)
+        ).one()
+        filters = {
+            "text": (outbreak.state == state, outbreak.district == district),
+            "location_condition": (location_condition(outbreak.location_id, state.upper(), f" {district.lower()} "),),
+            "location_id": (outbreak.location_id == location_id,),
+        }
+        expected = None
+        print(f"{'filter':>20}{'rows':>7}{'count us':>10}{'page us':>10}")
+        for label, condition in filters.items():
+            total = db.scalar(select(func.count()).select_from(outbreak).where(*condition))
+            if expected is None:
+                expected = total
+            elif total != expected:
+                raise SystemExit(f"{label} matched {total} rows, expected {expected}")
+            timings = {}
+            for name, query in (
+                ("count", select(func.count()).select_from(outbreak).where(*condition)),
+                ("page", select(outbreak.id, outbreak.disease, outbreak.cases_reported).where(*condition).order_by(outbreak.id).limit(10)),
+            ):
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    db.execute(query).all()
+                timings[name] = (time.perf_counter() - started) / args.rounds * 1e6
+            entry = {"rows": total, "count_us": round(timings["count"], 1), "page_us": round(timings["page"], 1)}
+            results["filters"][label] = entry
+            print(f"{label:>20}{total:>7}{entry['count_us']:>10}{entry['page_us']:>10}")
+
+        pairs = db.execute(select(models.Location.state, models.Location.district)).all()
+        spellings = [(s.upper(), d) if i % 3 == 0 else (f"{s} ", d.lower()) if i % 3 == 1 else (s, d) for i, (s, d) in enumerate(pairs)]
+        batch = [spellings[i % len(spellings)] for i in range(500)]
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            resolved = resolve_locations(db, batch, create=False)
+        elapsed = (time.perf_counter() - started) / args.rounds
+        if len({ref.id for ref in resolved.values()}) != len(pairs):
+            raise SystemExit("Variant spellings did not resolve to their locations")
+        results["resolve_500_ms"] = round(elapsed * 1000, 3)
+        print(f"resolve_locations for 500 rows ({len(set(batch))} spellings): {results['resolve_500_ms']}ms")
+    finally:
+        db.close()
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Per-recipient cost of building notification emails.
+
+Compares building a fresh ``MIMEMultipart`` per recipient (how emails used to
+be built) with ``PreparedEmail``, which renders and encodes the shared part of
+a location's message once. Nothing is sent.
+
+    python -m benchmarks.notifications --recipients 1000,10000,100000
+"""
+import argparse
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from benchmarks.common import run_metadata, write_results
+
+ITEMS = [
+    {"disease": "Dengue", "cases_reported": 120, "severity": "high"},
+    {"disease": "Malaria", "cases_reported": 45, "severity": "moderate"},
+    {"disease": "Cholera", "cases_reported": 8, "severity": "low"},
+]
+
+
+def build_per_recipient(recipients: int, locale: str) -> float:
+    from app.notification_templates import render_shared
+
+    started = time.perf_counter()
+    for i in range(recipients):
+        shared = render_shared("outbreak", "Tamil Nadu", "Chennai", ITEMS, locale)
+        msg = MIMEMultipart()
+        msg["From"] = "alerts@example.org"
+        msg["To"] = f"user{i}@example.org"
+        msg["Subject"] = shared.subject
+        msg.attach(MIMEText(shared.text_for(f"User {i}"), "plain"))
+        msg.as_bytes()
+    return time.perf_counter() - started
+
+
+def build_prepared(recipients: int, locale: str) -> float:
+    from app.notification_templates import PreparedEmail, render_shared
+
+    started = time.perf_counter()
+    prepared = PreparedEmail.from_shared(render_shared("outbreak", "Tamil Nadu", "Chennai", ITEMS, locale))
+    for i in range(recipients):
+        prepared.for_recipient("alerts@example.org", f"user{i}@example.org", f"User {i}")
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure notification email build cost per recipient")
+    parser.add_argument("--recipients", default="1000,10000", help="Comma-separated recipient counts (default: 1000,10000)")
+    parser.add_argument("--locale", default="en")
+    parser.add_argument("--output", default="notifications_results.json")
+    args = parser.parse_args(argv)
+
+    runs = []
+    print(f"{'recipients':>12}{'per-recipient us':>18}{'prepared us':>14}{'speedup':>9}")
+    for recipients in [int(value) for value in args.recipients.split(",") if value]:
+        baseline = build_per_recipient(recipients, args.locale)
+        prepared = build_prepared(recipients, args.locale)
+        run = {
+            "recipients": recipients,
+            "per_recipient_us": round(baseline / recipients * 1e6, 2),
+            "prepared_us": round(prepared / recipients * 1e6, 2),
+            "speedup": round(baseline / prepared, 2),
+        }
+        runs.append(run)
+        print(f"{recipients:>12}{run['per_recipient_us']:>18}{run['prepared_us']:>14}{run['speedup']:>8}x")
+
+    write_results(args.output, {"meta": run_metadata(benchmark="notifications", locale=args.locale), "runs": runs})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
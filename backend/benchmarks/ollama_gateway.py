@@ -0,0 +1,83 @@
+"""
+Chat fallback latency when the model server is slow or down.
+
+Sends ``--requests`` generate calls from ``--threads`` threads to a fake
+Ollama that answers slower than the timeout (or with 503), once with plain
+``requests.post`` (how chat used to call Ollama) and once through
+``OllamaGateway``. Reports how long callers waited before they could fall
+back, and how many requests reached the server.
+
+    python -m benchmarks.ollama_gateway --latency 3 --timeout 1 --requests 40
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentile, prepare_environment, run_metadata, write_results
+from benchmarks.fake_ollama import FakeOllamaServer
+
+
+def _timed(call) -> float:
+    started = time.perf_counter()
+    try:
+        call()
+    except Exception:
+        pass
+    return time.perf_counter() - started
+
+
+def run(call, requests: int, threads: int) -> dict:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        waits = sorted(pool.map(lambda _: _timed(call), range(requests)))
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "mean_wait_ms": round(sum(waits) / len(waits) * 1000, 1),
+        "p95_wait_ms": round(percentile(waits, 95) * 1000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure chat fallback latency against a slow or failing model server")
+    parser.add_argument("--latency", type=float, default=3.0, help="Fake Ollama response delay in seconds")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Read timeout for both clients")
+    parser.add_argument("--fail", action="store_true", help="Answer 503 instead of a slow success")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output", default="ollama_gateway_results.json")
+    args = parser.parse_args(argv)
+
+    prepare_environment()  # app.chatbot needs a database URL; nothing connects to it
+    import requests
+
+    from app.chatbot import OllamaGateway
+
+    results = {"meta": run_metadata(benchmark="ollama_gateway", latency=args.latency, timeout=args.timeout, fail=args.fail)}
+    payload = {"model": "bench-model", "prompt": "Is there dengue nearby?", "stream": False}
+    for name in ("direct", "gateway"):
+        with FakeOllamaServer(latency=args.latency, fail=args.fail) as server:
+            served = {"count": 0}
+            if name == "direct":
+                def call():
+                    served["count"] += 1
+                    response = requests.post(f"{server.url}/api/generate", json=payload, timeout=args.timeout)
+                    response.raise_for_status()
+            else:
+                gateway = OllamaGateway(timeout=args.timeout)
+                backend = gateway.backend(server.url)
+
+                def call():
+                    gateway.generate(server.url, payload)
+            result = run(call, args.requests, args.threads)
+            result["sent_to_server"] = served["count"] if name == "direct" else backend.counts["requests"]
+        results[name] = result
+        print(f"{name:>8}: {result['seconds']}s total, mean wait {result['mean_wait_ms']}ms, "
+              f"p95 {result['p95_wait_ms']}ms, {result['sent_to_server']} requests reached the server")
+
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Per-request cost of the rate limiter.
+
+Times identifying the caller (client IP and, from a cache, the JWT subject)
+plus charging both token buckets, over requests spread across ``--clients``
+distinct users and addresses, and the same through the optional shared
+sliding window with the in-memory backend.
+
+    python -m benchmarks.ratelimit --clients 1,1000,100000
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.common import prepare_environment, run_metadata, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure rate limiter overhead per request")
+    parser.add_argument("--clients", default="1,1000,100000", help="Comma-separated numbers of distinct clients")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--output", default="ratelimit_results.json")
+    args = parser.parse_args(argv)
+
+    prepare_environment()  # app.auth needs a database URL; nothing connects to it
+    from app.auth import create_access_token
+    from app.ratelimit import MemoryRateLimitBackend, Policy, RateLimiter, request_keys
+
+    runs = []
+    print(f"{'clients':>10}{'local us':>10}{'shared us':>11}")
+    for clients in [int(value) for value in args.clients.split(",") if value]:
+        scopes = [{
+            "type": "http", "method": "GET", "path": "/api/health/alerts", "client": (f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 50000),
+            "headers": [(b"host", b"api"), (b"authorization", f"Bearer {create_access_token({'sub': f'user{i}'})}".encode())],
+        } for i in range(clients)]
+        policies = {"user": Policy(1e9, 1e9), "ip": Policy(1e9, 1e9)}  # never reject, so every call does the full work
+        timings = {}
+        for name, limiter in (("local", RateLimiter(policies)), ("shared", RateLimiter(policies, shared=MemoryRateLimitBackend()))):
+            for scope in scopes:  # first sight of each token verifies the JWT; measure the steady state
+                request_keys(scope)
+            started = time.perf_counter()
+            for i in range(args.requests):
+                keys = request_keys(scopes[i % clients])
+                if not limiter.hit(keys, 1) and limiter.shared is not None:
+                    limiter.hit_shared(keys, 1)
+            timings[name] = (time.perf_counter() - started) / args.requests * 1e6
+        run = {"clients": clients, "local_us": round(timings["local"], 2), "shared_us": round(timings["shared"], 2)}
+        runs.append(run)
+        print(f"{clients:>10}{run['local_us']:>10}{run['shared_us']:>11}")
+
+    write_results(args.output, {"meta": run_metadata(benchmark="ratelimit", requests=args.requests), "runs": runs})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Health endpoint queries served by SQL versus the in-memory read model.
+
+Seeds the benchmark data set at ``--scale``, then times the listing pages
+(unfiltered and per district), the alerts lookup and the per-district
+location data, each once through the database and once through
+``app.read_model``. Also reports the time to load the read model and to
+rebuild a snapshot after a change.
+
+    python -m benchmarks.read_model --scale 50 --rounds 500
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare SQL and in-memory health queries")
+    parser.add_argument("--scale", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="read_model_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false", READ_MODEL_ENABLED="false")
+    import app.read_model as read_model_module
+    from app.database import ReadSessionLocal, SessionLocal
+    from app.events import publish_change
+    from app.locations import resolve_locations
+    from app.migrations import upgrade_to_head
+    from app.read_model import read_model
+    from app.routers import health_data
+    from benchmarks.seed import LOCATIONS, seed_database
+
+    upgrade_to_head()
+    locations = [(state, district) for state, districts in LOCATIONS.items() for district in districts]
+    db = SessionLocal()
+    try:
+        counts = seed_database(db, scale=args.scale)
+        resolved = resolve_locations(db, locations, create=False)
+    finally:
+        db.close()
+    users = [SimpleNamespace(state=state, district=district, location_id=resolved[(state, district)].id) for state, district in locations]
+
+    scenarios = {
+        "listing_first_page": lambda db, i: health_data.build_outbreaks_page(db, 1, 10),
+        "listing_district": lambda db, i: health_data.build_outbreaks_page(db, 2, 10, *locations[i % len(locations)]),
+        "alerts": lambda db, i: health_data.get_user_alerts(users[i % len(users)], db),
+        "location_data": lambda db, i: health_data.get_location_health_data(True, users[i % len(users)], db),
+    }
+    results = {"meta": run_metadata(benchmark="read_model", scale=args.scale, rounds=args.rounds), "rows": counts, "scenarios": {}}
+    try:
+        started = time.perf_counter()
+        read_model.load()
+        results["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        started = time.perf_counter()
+        publish_change("outbreaks", "updated", read_model.rows("outbreaks", limit=1))
+        results["apply_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        read_model.settle()
+        results["rebuild_ms"] = read_model.last_build_ms
+
+        db = ReadSessionLocal()
+        try:
+            print(f"{'scenario':>20}{'sql us':>10}{'memory us':>11}{'speedup':>9}")
+            for name, call in scenarios.items():
+                timings = {}
+                for mode in ("sql", "memory"):
+                    read_model_module.READ_MODEL_ENABLED = mode == "memory"
+                    started = time.perf_counter()
+                    for i in range(args.rounds):
+                        call(db, i)
+                    timings[mode] = (time.perf_counter() - started) / args.rounds * 1e6
+                scenario = {"sql_us": round(timings["sql"], 1), "memory_us": round(timings["memory"], 1),
+                            "speedup": round(timings["sql"] / timings["memory"], 1)}
+                results["scenarios"][name] = scenario
+                print(f"{name:>20}{scenario['sql_us']:>10}{scenario['memory_us']:>11}{scenario['speedup']:>8}x")
+        finally:
+            db.close()
+    finally:
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    print(f"load {results['load_ms']}ms, applying a change {results['apply_ms']}ms, "
+          f"background snapshot rebuild {results['rebuild_ms']}ms")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
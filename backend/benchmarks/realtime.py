@@ -0,0 +1,212 @@
+"""
+Connection-scale benchmark for the real-time alert hub.
+
+Hub mode (default) opens N idle subscriber streams exactly as the SSE endpoint
+does, spread over the seeded locations, and measures memory per connection
+and the latency for a published change to reach the last subscriber, both for
+a single-district change and for an import touching every district of a state.
+
+HTTP mode (--http N) additionally starts uvicorn in-process and holds N real
+SSE connections to /api/events/stream, then measures delivery latency over the
+wire. Raise the open-files limit (ulimit -n) for large N.
+
+    python -m benchmarks.realtime --connections 20000
+    python -m benchmarks.realtime --connections 0 --http 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, summarize, write_results
+
+
+def _change(state, district, count=1):
+    from app.events import DataChange
+    records = [{"id": i, "outbreak_id": f"RT{i}", "disease": "Dengue", "state": state, "district": district,
+                "cases_reported": 10, "severity": "high"} for i in range(count)]
+    return DataChange("outbreaks", "created", records)
+
+
+async def run_hub(connections: int, rounds: int, seed: int) -> dict:
+    from app.realtime import AlertHub
+    from benchmarks.seed import LOCATIONS, random_location
+
+    hub = AlertHub()
+    rng = random.Random(seed)
+    received = {}
+
+    async def consumer(index, state, district):
+        stream = hub.stream(state, district, keepalive=3600)
+        async for frame in stream:
+            if frame.startswith(b"id: "):
+                received.setdefault(frame, []).append(time.perf_counter())
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    tasks = []
+    for i in range(connections):
+        state, district = random_location(rng)
+        if i % 20 == 0:
+            district = None  # some clients follow a whole state
+        tasks.append(asyncio.create_task(consumer(i, state, district)))
+    while hub.connections < connections:
+        await asyncio.sleep(0)
+    subscribe_seconds = time.perf_counter() - started
+    memory_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    def expected_deliveries(change):
+        locations = {(r["state"], r["district"]) for r in change.records}
+        return sum(
+            len(hub._subscribers.get(key, ()))
+            for state, district in locations
+            for key in ((state, district), (state, None), (None, None))
+        )
+
+    fanout = {}
+    for label in ("district", "state"):
+        latencies = []
+        for _ in range(rounds):
+            received.clear()
+            state = rng.choice(list(LOCATIONS))
+            if label == "district":
+                change = _change(state, rng.choice(LOCATIONS[state]))
+            else:
+                # One import touching every district of a state
+                change = _change(state, None)
+                change.records = [r for d in LOCATIONS[state] for r in _change(state, d).records]
+            expected = expected_deliveries(change)
+            published_at = time.perf_counter()
+            hub.publish(change)
+            deadline = published_at + 30
+            while sum(len(times) for times in received.values()) < expected and time.perf_counter() < deadline:
+                await asyncio.sleep(0)
+            arrivals = [t for times in received.values() for t in times]
+            if arrivals:
+                latencies.append(max(arrivals) - published_at)
+        fanout[label] = summarize(latencies)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "connections": connections,
+        "subscribe_seconds": round(subscribe_seconds, 3),
+        "memory_bytes_per_connection": round(memory_bytes / connections) if connections else 0,
+        "fanout_to_last_subscriber": fanout,
+        "hub": hub.stats(),
+    }
+
+
+def run_http(connections: int, rounds: int, seed: int) -> dict:
+    import httpx
+    import uvicorn
+    from app import auth
+    from app.migrations import upgrade_to_head
+    from app.realtime import alert_hub
+    from benchmarks.seed import random_location
+
+    upgrade_to_head()
+    from main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", backlog=max(2048, connections))
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    token = auth.create_access_token({"sub": "bench0"})
+    state, district = random_location(random.Random(seed))
+
+    async def main():
+        received = []
+        ready = asyncio.Event()
+        opened = 0
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=0)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            async def listen():
+                nonlocal opened
+                params = {"state": state, "district": district, "token": token}
+                async with client.stream("GET", "/api/events/stream", params=params) as response:
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: subscribed"):
+                            opened += 1
+                            if opened == connections:
+                                ready.set()
+                        elif line.startswith("event: outbreak"):
+                            received.append(time.perf_counter())
+
+            started = time.perf_counter()
+            tasks = [asyncio.create_task(listen()) for _ in range(connections)]
+            await asyncio.wait_for(ready.wait(), timeout=300)
+            connect_seconds = time.perf_counter() - started
+
+            latencies = []
+            for _ in range(rounds):
+                received.clear()
+                published_at = time.perf_counter()
+                alert_hub.publish(_change(state, district))
+                while len(received) < connections:
+                    await asyncio.sleep(0.001)
+                latencies.append(max(received) - published_at)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return connect_seconds, latencies
+
+    try:
+        connect_seconds, latencies = asyncio.run(main())
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    return {
+        "connections": connections,
+        "connect_seconds": round(connect_seconds, 3),
+        "fanout_to_last_subscriber": summarize(latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark real-time alert fan-out at connection scale")
+    parser.add_argument("--connections", type=int, default=20000, help="Idle hub subscribers (default: 20000)")
+    parser.add_argument("--http", type=int, default=0, help="Real SSE connections through uvicorn (default: 0, skipped)")
+    parser.add_argument("--rounds", type=int, default=20, help="Publish rounds per measurement (default: 20)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="realtime_results.json")
+    args = parser.parse_args(argv)
+
+    # Thousands of SSE connections from one address would trip the per-IP limit
+    database_url = prepare_environment(RATE_LIMIT_ENABLED="false")
+    try:
+        results = {"meta": run_metadata(benchmark="realtime", rounds=args.rounds)}
+        if args.connections:
+            results["hub"] = asyncio.run(run_hub(args.connections, args.rounds, args.seed))
+            hub = results["hub"]
+            print(f"hub: {hub['connections']} connections subscribed in {hub['subscribe_seconds']}s, "
+                  f"~{hub['memory_bytes_per_connection']} bytes each")
+            for label, stats in hub["fanout_to_last_subscriber"].items():
+                print(f"  fan-out ({label}): p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
+        if args.http:
+            results["http"] = run_http(args.http, args.rounds, args.seed)
+            http = results["http"]
+            print(f"http: {http['connections']} SSE connections opened in {http['connect_seconds']}s, "
+                  f"fan-out p50 {http['fanout_to_last_subscriber']['p50_ms']:.2f} ms, "
+                  f"p99 {http['fanout_to_last_subscriber']['p99_ms']:.2f} ms")
+    finally:
+        path = sqlite_path(database_url)
+        if path and os.path.exists(path):
+            os.remove(path)
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Daily trend queries from the rollup tables versus GROUP BY over raw rows.
+
+Seeds the benchmark data set at ``--scale`` and builds the rollups, then
+computes the same per-day series (nationwide, per state, per state and
+disease) with ``app.rollups.daily_totals`` and with a GROUP BY over
+``outbreaks``, checking that both agree. Also times what keeping the rollups
+current adds to a write: ``apply_changes`` for a single-row edit and for a
+500-row upsert batch.
+
+    python -m benchmarks.rollups --scale 100 --rounds 100
+"""
+import argparse
+import os
+import sys
+import time
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare rollup-based trends with raw aggregation")
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="rollups_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false")
+    from sqlalchemy import func, select
+
+    from app import models, schemas
+    from app.database import SessionLocal
+    from app.migrations import upgrade_to_head
+    from app.rollups import apply_changes, daily_totals
+    from app.serialization import query_rows, rows_to_dicts, schema_fields
+    from benchmarks.seed import seed_database
+
+    upgrade_to_head()
+    db = SessionLocal()
+    try:
+        counts = seed_database(db, scale=args.scale)
+        state, disease = db.execute(
+            select(models.Outbreak.state, models.Outbreak.disease).group_by(models.Outbreak.state, models.Outbreak.disease)
+            .order_by(func.count().desc()).limit(1)
+        ).one()
+        counts["outbreak_daily_stats"] = db.scalar(select(func.count()).select_from(models.OutbreakDailyStat))
+    finally:
+        db.close()
+
+    def raw_totals(db, state=None, disease=None):
+        outbreak = models.Outbreak
+        day = func.date(outbreak.report_date)
+        query = select(day, func.count(), func.sum(outbreak.cases_reported), func.sum(outbreak.deaths)).group_by(day).order_by(day)
+        if state:
+            query = query.where(outbreak.state == state)
+        if disease:
+            query = query.where(outbreak.disease == disease)
+        return [(str(row[0]), row[1], row[2] or 0, row[3] or 0) for row in db.execute(query)]
+
+    def rollup_totals(db, state=None, disease=None):
+        return [(str(row["day"]), row["reports"], row["cases_reported"], row["deaths"])
+                for row in daily_totals(db, "outbreaks", state=state, key=disease)]
+
+    results = {"meta": run_metadata(benchmark="rollups", scale=args.scale, rounds=args.rounds), "rows": counts, "queries": {}}
+    db = SessionLocal()
+    try:
+        print(f"{'series':>28}{'days':>7}{'raw us':>10}{'rollup us':>11}{'speedup':>9}")
+        for label, filters in (("all", {}), (f"state={state}", {"state": state}),
+                               (f"state+disease={disease}", {"state": state, "disease": disease})):
+            raw = raw_totals(db, **filters)
+            if raw != rollup_totals(db, **filters):
+                raise SystemExit(f"Rollups disagree with the raw rows for {label}; run python rebuild_rollups.py")
+            timings = {}
+            for name, call in (("raw", raw_totals), ("rollup", rollup_totals)):
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    call(db, **filters)
+                timings[name] = (time.perf_counter() - started) / args.rounds * 1e6
+            entry = {"days": len(raw), "raw_us": round(timings["raw"], 1), "rollup_us": round(timings["rollup"], 1),
+                     "speedup": round(timings["raw"] / timings["rollup"], 1)}
+            results["queries"][label] = entry
+            print(f"{label:>28}{entry['days']:>7}{entry['raw_us']:>10}{entry['rollup_us']:>11}{entry['speedup']:>8}x")
+
+        fields = schema_fields(schemas.Outbreak)
+        records = rows_to_dicts(fields, query_rows(db, models.Outbreak, schemas.Outbreak).order_by(models.Outbreak.id).limit(500).all())
+        edited = [dict(record, cases_reported=record["cases_reported"] + 1, state="Goa") for record in records]
+        results["maintenance"] = {}
+        for label, batch in (("single_row", 1), ("batch_500", len(records))):
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                apply_changes(db, "outbreaks", records[:batch], edited[:batch])
+                apply_changes(db, "outbreaks", edited[:batch], records[:batch])
+            elapsed = (time.perf_counter() - started) / (args.rounds * 2)
+            db.rollback()
+            results["maintenance"][label] = {"rows": batch, "ms": round(elapsed * 1000, 3)}
+            print(f"apply_changes for {batch} edited rows: {results['maintenance'][label]['ms']}ms")
+    finally:
+        db.close()
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Outbreak search through the full-text index versus LIKE scans.
+
+Seeds the benchmark data set at ``--scale`` with varied notes, then runs the
+same queries through ``app.search`` (FTS5 on SQLite, tsvector on PostgreSQL)
+and through ``LIKE '%term%'`` over disease, notes, district and state, which
+is the closest a plain query gets. Both count all matches and fetch the first
+page. A misspelled query measures the fuzzy fallback.
+
+    python -m benchmarks.search --scale 100 --rounds 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+NOTE_WORDS = ["cluster", "village", "school", "flooding", "stagnant", "water", "mosquito", "breeding", "hospital",
+              "admissions", "contaminated", "well", "market", "vendors", "migrant", "workers", "rainfall", "spike"]
+QUERIES = ["dengue", "mosq", "kerala cholera", "contaminated well", "chennai"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare full-text search with LIKE scans")
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--database-url", help="Database to use (default: temporary SQLite file)")
+    parser.add_argument("--output", default="search_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment(args.database_url, DIGEST_SCHEDULER="false")
+    from sqlalchemy import func, or_, update
+
+    from app import models, schemas
+    from app.database import SessionLocal
+    from app.migrations import upgrade_to_head
+    from app.search import search_outbreaks, tokenize, vocabulary
+    from app.serialization import query_rows
+    from benchmarks.seed import seed_database
+
+    upgrade_to_head()
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        counts = seed_database(db, scale=args.scale)
+        ids = [row[0] for row in db.query(models.Outbreak.id).all()]
+        db.execute(update(models.Outbreak), [{"id": i, "notes": " ".join(rng.sample(NOTE_WORDS, 6))} for i in ids])
+        db.commit()
+    finally:
+        db.close()
+
+    def like_search(db, query):
+        outbreak = models.Outbreak
+        rows = query_rows(db, outbreak, schemas.Outbreak)
+        for term in tokenize(query):
+            pattern = f"%{term}%"
+            rows = rows.filter(or_(*(func.lower(column).like(pattern) for column in (outbreak.disease, outbreak.notes, outbreak.district, outbreak.state))))
+        return rows.count(), rows.limit(20).all()
+
+    results = {"meta": run_metadata(benchmark="search", scale=args.scale, rounds=args.rounds), "rows": counts, "queries": {}}
+    db = SessionLocal()
+    try:
+        print(f"{'query':>20}{'matches':>9}{'like us':>10}{'index us':>10}{'speedup':>9}")
+        for query in QUERIES + ["contaminatd"]:
+            timings = {}
+            for name, call in (("like", lambda: like_search(db, query)), ("index", lambda: search_outbreaks(db, query, fuzzy=False))):
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    result = call()
+                timings[name] = (time.perf_counter() - started) / args.rounds * 1e6
+                if name == "index":
+                    matches = result["total"]
+            entry = {"matches": matches, "like_us": round(timings["like"], 1), "index_us": round(timings["index"], 1),
+                     "speedup": round(timings["like"] / timings["index"], 1)}
+            results["queries"][query] = entry
+            print(f"{query:>20}{matches:>9}{entry['like_us']:>10}{entry['index_us']:>10}{entry['speedup']:>8}x")
+
+        vocabulary.clear()
+        started = time.perf_counter()
+        fuzzy = search_outbreaks(db, "contaminatd wel")
+        first = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            search_outbreaks(db, "contaminatd wel")
+        cached = (time.perf_counter() - started) / args.rounds
+        results["fuzzy"] = {"query": "contaminatd wel", "matches": fuzzy["total"], "expanded": fuzzy["expanded"],
+                            "first_ms": round(first * 1000, 2), "cached_vocabulary_ms": round(cached * 1000, 2)}
+        print(f"fuzzy 'contaminatd wel': {fuzzy['total']} matches via {fuzzy['expanded']}, "
+              f"{results['fuzzy']['first_ms']}ms with vocabulary load, {results['fuzzy']['cached_vocabulary_ms']}ms after")
+    finally:
+        db.close()
+        path = sqlite_path(database_url)
+        if not args.database_url and path and os.path.exists(path):
+            os.remove(path)
+
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Synthetic data generator for benchmarks.
+
+Seeds users, outbreaks, vaccinations and chat history in proportions that
+roughly match production. Everything is derived from a seeded RNG so two runs
+with the same --scale and --seed produce identical databases.
+"""
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app import models
+from app.locations import backfill_locations
+from app.rollups import rebuild_rollups
+
+BENCH_PASSWORD = "bench-password"
+
+LOCATIONS = {
+    "Delhi": ["New Delhi", "North Delhi", "South Delhi", "East Delhi"],
+    "Maharashtra": ["Mumbai", "Pune", "Nagpur", "Nashik", "Thane"],
+    "Tamil Nadu": ["Chennai", "Coimbatore", "Madurai", "Salem", "Tiruchirappalli"],
+    "Karnataka": ["Bengaluru Urban", "Mysuru", "Mangaluru", "Belagavi"],
+    "Kerala": ["Thiruvananthapuram", "Kochi", "Kozhikode"],
+    "West Bengal": ["Kolkata", "Howrah", "Darjeeling"],
+    "Uttar Pradesh": ["Lucknow", "Kanpur", "Varanasi", "Agra", "Prayagraj"],
+    "Gujarat": ["Ahmedabad", "Surat", "Vadodara", "Rajkot"],
+}
+DISEASES = ["Dengue", "Malaria", "Chikungunya", "Cholera", "Typhoid", "COVID-19", "Measles", "Hepatitis A"]
+VACCINES = ["COVID-19 Booster", "Hepatitis B", "Measles-Rubella", "Polio", "Influenza", "Typhoid Conjugate"]
+SEVERITIES = ["low", "moderate", "high"]
+POPULATIONS = ["Adults 18+", "Children 0-5", "Healthcare Workers", "Elderly 60+", "School Children"]
+CHAT_MESSAGES = [
+    "What are the symptoms of dengue?",
+    "Is there a malaria outbreak near me?",
+    "Where can I get the covid vaccine?",
+    "I have a fever, what should I do?",
+    "How do I prevent mosquito bites?",
+]
+
+# Rows generated per unit of --scale.
+USERS_PER_SCALE = 100
+OUTBREAKS_PER_SCALE = 200
+VACCINATIONS_PER_SCALE = 100
+CHATS_PER_SCALE = 300
+
+BATCH_SIZE = 5000
+
+
+def random_location(rng):
+    state = rng.choice(list(LOCATIONS))
+    return state, rng.choice(LOCATIONS[state])
+
+
+def _insert_batched(db, model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def seed_database(db, scale: int = 1, seed: int = 42, hashed_password: str = None) -> dict:
+    """Populate an empty database and return the number of rows per table.
+
+    ``hashed_password`` is shared by every seeded user so that seeding does not
+    pay for one bcrypt hash per row.
+    """
+    from app.auth import get_password_hash
+
+    rng = random.Random(seed)
+    now = datetime(2024, 6, 1)
+    hashed_password = hashed_password or get_password_hash(BENCH_PASSWORD)
+
+    users = []
+    for i in range(USERS_PER_SCALE * scale):
+        state, district = random_location(rng)
+        users.append({
+            "email": f"bench{i}@example.com",
+            "username": f"bench{i}",
+            "hashed_password": hashed_password,
+            "full_name": f"Bench User {i}",
+            "is_active": True,
+            "role": "admin" if i == 0 else "user",
+            "state": state,
+            "district": district,
+            "notifications": rng.random() < 0.3,
+        })
+    _insert_batched(db, models.User, users)
+
+    outbreaks = []
+    for i in range(OUTBREAKS_PER_SCALE * scale):
+        state, district = random_location(rng)
+        cases = rng.randint(1, 500)
+        outbreaks.append({
+            "outbreak_id": f"BENCH-OUT{i:07d}",
+            "disease": rng.choice(DISEASES),
+            "report_date": now - timedelta(days=rng.randint(0, 365)),
+            "country": "India",
+            "state": state,
+            "district": district,
+            "cases_reported": cases,
+            "deaths": rng.randint(0, cases // 20),
+            "severity": rng.choice(SEVERITIES),
+            "confirmed": rng.random() < 0.8,
+            "source_url": "",
+            "notes": "Synthetic benchmark outbreak",
+        })
+    _insert_batched(db, models.Outbreak, outbreaks)
+
+    vaccinations = []
+    for i in range(VACCINATIONS_PER_SCALE * scale):
+        state, district = random_location(rng)
+        start = now - timedelta(days=rng.randint(0, 180))
+        allocated = rng.randint(1000, 50000)
+        vaccinations.append({
+            "campaign_id": f"BENCH-VAC{i:07d}",
+            "country": "India",
+            "state": state,
+            "district": district,
+            "start_date": start,
+            "end_date": start + timedelta(days=rng.randint(7, 120)),
+            "vaccine_name": rng.choice(VACCINES),
+            "target_population": rng.choice(POPULATIONS),
+            "doses_allocated": allocated,
+            "doses_administered": rng.randint(0, allocated),
+            "partner_org": "Bench Health Dept",
+            "notes": "Synthetic benchmark campaign",
+        })
+    _insert_batched(db, models.Vaccination, vaccinations)
+
+    user_count = len(users)
+    chats = []
+    for i in range(CHATS_PER_SCALE * scale):
+        chats.append({
+            "user_id": rng.randint(1, user_count),
+            "message": rng.choice(CHAT_MESSAGES),
+            "response": "Synthetic benchmark response",
+            "timestamp": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+        })
+    _insert_batched(db, models.ChatMessage, chats)
+
+    db.commit()
+    # Core inserts skip the flush hook that locates ORM rows
+    backfill_locations(db)
+    db.commit()
+    rebuild_rollups(db)
+    return {
+        "users": len(users),
+        "outbreaks": len(outbreaks),
+        "vaccinations": len(vaccinations),
+        "chat_messages": len(chats),
+    }
@@ -0,0 +1,98 @@
+"""
+Serialization throughput benchmark for large list responses.
+
+Compares the original path (load ORM objects, validate into ``schemas.*``
+models, ``jsonable_encoder``, ``json.dumps``) with the fast path in
+``app/serialization.py`` (column tuples straight to orjson). Reports rows per
+second end-to-end (query + encode) and for the encoding step alone.
+
+    python -m benchmarks.serialization --rows 20000 --output serialization.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.common import prepare_environment, run_metadata, sqlite_path, write_results
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization of large list responses")
+    parser.add_argument("--rows", type=int, default=20000, help="Outbreak rows to serialize (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement, best is kept (default: 5)")
+    parser.add_argument("--output", default="serialization_results.json")
+    args = parser.parse_args(argv)
+
+    database_url = prepare_environment()
+    try:
+        from fastapi.encoders import jsonable_encoder
+        from app import models, schemas
+        from app.database import SessionLocal
+        from app.migrations import upgrade_to_head
+        from app.serialization import dumps, query_rows, rows_to_dicts, schema_fields
+        from benchmarks.seed import OUTBREAKS_PER_SCALE, seed_database
+
+        upgrade_to_head()
+        db = SessionLocal()
+        scale = max(1, -(-args.rows // OUTBREAKS_PER_SCALE))
+        seed_database(db, scale=scale, hashed_password="x")
+        fields = schema_fields(schemas.Outbreak)
+
+        def encode_before(objects):
+            validated = [schemas.Outbreak.model_validate(obj) for obj in objects]
+            return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        def encode_after(rows):
+            return dumps(rows_to_dicts(fields, rows))
+
+        def end_to_end_before():
+            db.expunge_all()
+            return encode_before(db.query(models.Outbreak).limit(args.rows).all())
+
+        def end_to_end_after():
+            return encode_after(query_rows(db, models.Outbreak, schemas.Outbreak).limit(args.rows).all())
+
+        objects = db.query(models.Outbreak).limit(args.rows).all()
+        rows = query_rows(db, models.Outbreak, schemas.Outbreak).limit(args.rows).all()
+        count = len(rows)
+        assert json.loads(encode_before(objects)) == json.loads(encode_after(rows)), "payloads differ"
+
+        timings = {
+            "end_to_end_before": _best_of(end_to_end_before, args.repeat),
+            "end_to_end_after": _best_of(end_to_end_after, args.repeat),
+            "encode_only_before": _best_of(lambda: encode_before(objects), args.repeat),
+            "encode_only_after": _best_of(lambda: encode_after(rows), args.repeat),
+        }
+        db.close()
+    finally:
+        path = sqlite_path(database_url)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    results = {
+        "meta": run_metadata(benchmark="serialization", rows=count, repeat=args.repeat),
+        "rows_per_second": {name: round(count / seconds) for name, seconds in timings.items()},
+        "speedup": {
+            "end_to_end": round(timings["end_to_end_before"] / timings["end_to_end_after"], 2),
+            "encode_only": round(timings["encode_only_before"] / timings["encode_only_after"], 2),
+        },
+    }
+    for name, rate in results["rows_per_second"].items():
+        print(f"{name:<22}{rate:>12,} rows/s")
+    print(f"speedup end-to-end {results['speedup']['end_to_end']}x, encode-only {results['speedup']['encode_only']}x")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Export the outbreak or vaccination table as gzip CSV, Parquet or Arrow IPC
+(see app/exports.py).
+
+    python export_data.py outbreaks --format parquet --since 2024-01-01 -o outbreaks.parquet
+    python export_data.py vaccinations --state Kerala --format csv.gz
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main(argv=None):
+    from app.exports import EXPORT_FORMATS, EXPORT_TABLES, ExportError, check_export, export_filename, iter_export
+
+    parser = argparse.ArgumentParser(description="Export outbreaks or vaccinations in a compressed format")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", default="parquet", choices=list(EXPORT_FORMATS))
+    parser.add_argument("--state")
+    parser.add_argument("--district")
+    parser.add_argument("--since", type=date.fromisoformat, help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument("-o", "--output", help="Output file (default: named after the table and dates)")
+    args = parser.parse_args(argv)
+
+    try:
+        check_export(args.table, args.format)
+    except ExportError as e:
+        print(f"✗ {e}")
+        return 1
+    path = args.output or export_filename(args.table, args.format, args.since, args.until)
+    started = time.perf_counter()
+    size = 0
+    with open(path, "wb") as output:
+        for chunk in iter_export(args.table, args.format, args.state, args.district, args.since, args.until):
+            output.write(chunk)
+            size += len(chunk)
+    print(f"✓ Wrote {path} ({size / 1024:.1f} KiB) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Load outbreak or vaccination feeds split over many CSV files (or zips of them).
+
+Files are parsed and validated in parallel, merged (a key repeated in a later
+file replaces the earlier row) and upserted in a single transaction.
+
+    python ingest_files.py outbreaks feeds/2024-05-01/*.csv --workers 8
+    python ingest_files.py vaccinations campaigns.zip --strict
+"""
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel CSV ingestion for outbreaks and vaccinations")
+    parser.add_argument("feed", choices=["outbreaks", "vaccinations"])
+    parser.add_argument("paths", nargs="+", help=".csv or .zip files")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: INGEST_WORKERS or one per CPU)")
+    parser.add_argument("--mode", choices=["upsert", "insert"], default="upsert")
+    parser.add_argument("--strict", action="store_true", help="Abort without loading anything if any row is invalid")
+    parser.add_argument("--no-notify", action="store_true", help="Do not email subscribers about the changes")
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal
+    from app.ingest import CSVFormatError, shutdown_process_pool
+    from app.tasks import ingest_files
+
+    files = []
+    for path in args.paths:
+        with open(path, "rb") as handle:
+            files.append((os.path.basename(path), handle.read()))
+
+    db = SessionLocal()
+    try:
+        summary = ingest_files(db, args.feed, files, args.mode, args.workers, args.strict, notify=not args.no_notify)
+    except CSVFormatError as e:
+        print(f"✗ {e}")
+        return 1
+    finally:
+        db.close()
+        shutdown_process_pool()
+
+    print(f"✓ {summary['message']}")
+    print(f"  parse {summary['parse_seconds']}s, load {summary['load_seconds']}s, {summary['rows_per_second']} rows/s")
+    if summary["duplicates"]:
+        print(f"  {summary['duplicates']} rows repeated a key from an earlier row and replaced it")
+    for file in summary["files"]:
+        if file["invalid_rows"]:
+            print(f"  {file['name']}: {file['invalid_rows']} invalid rows")
+            for error in file["errors"]:
+                print(f"    {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
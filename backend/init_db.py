@@ -1,24 +1,25 @@
 """
 Database initialization script for Neon PostgreSQL
-Run this after deploying to Render to create all tables
+Run this after deploying to Render to create or upgrade all tables
+(equivalent to `alembic upgrade head`)
 """
 import os
 from dotenv import load_dotenv
-from app.database import engine
-from app import models
+from app.migrations import upgrade_to_head
 
 load_dotenv()
 
 def init_database():
-    """Create all database tables"""
-    print("Creating database tables...")
-    models.Base.metadata.create_all(bind=engine)
-    print("✓ Database tables created successfully!")
+    """Apply all pending schema migrations"""
+    print("Applying database migrations...")
+    upgrade_to_head()
+    print("✓ Database schema is up to date!")
     print("\nTables created:")
     print("  - users")
     print("  - outbreaks")
     print("  - vaccinations")
     print("  - chat_messages")
+    print("  - jobs")
 
 if __name__ == "__main__":
     init_database()
@@ -1,46 +1,86 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
 import os
-from app.database import engine, get_db
-from app import models, auth, schemas
-from app.routers import users, admin, chat, health_data
+from app.database import engine, pool_warm_up
+from app.digests import DIGEST_SCHEDULER, digest_scheduler
+from app.district_context import district_context
+from app.ingest import shutdown_process_pool
+from app.jobs import job_queue
+from app.ratelimit import RateLimitMiddleware
+from app.read_model import READ_MODEL_ENABLED, read_model
+from app.routers import users, admin, chat, health_data, realtime, jobs
 
-models.Base.metadata.create_all(bind=engine)
+# Startup warm-up of the connection pool, listing cache and chat district context (set to false to skip)
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "true").lower() in ("1", "true", "yes", "on")
 
-app = FastAPI(title="Health Monitoring System", version="1.0.0")
 
-# CORS configuration for production and development
-allowed_origins = [
-    "http://localhost:3000",
-    "https://health-alerth-system.vercel.app",
-    os.getenv("FRONTEND_URL", "http://localhost:3000")
-]
+def startup():
+    # Schema is managed by Alembic; workers only verify it is current. Imported
+    # here so alembic is not loaded when the module is imported.
+    from app.migrations import check_schema
+    check_schema(engine)
+    job_queue.start()
+    if DIGEST_SCHEDULER:
+        digest_scheduler.start()
+    if READ_MODEL_ENABLED:
+        read_model.load()
 
-# Allow all Vercel preview deployments
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_origin_regex=r"https://.*\.vercel\.app",
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    if WARM_ON_STARTUP:
+        pool_warm_up()
+        health_data.warm_listing_cache()
+        district_context.rebuild_all()
 
-security = HTTPBearer()
 
-app.include_router(users.router, prefix="/api/users", tags=["users"])
-app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
-app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
-app.include_router(health_data.router, prefix="/api/health", tags=["health"])
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(startup)
+    yield
+    digest_scheduler.shutdown()
+    job_queue.shutdown()
+    shutdown_process_pool()
 
 
+def create_app() -> FastAPI:
+    app = FastAPI(title="Health Monitoring System", version="1.0.0", lifespan=lifespan)
 
-@app.get("/")
-async def root():
-    return {"message": "Health Monitoring System API"}
+    # CORS configuration for production and development
+    allowed_origins = [
+        "http://localhost:3000",
+        "https://health-alerth-system.vercel.app",
+        os.getenv("FRONTEND_URL", "http://localhost:3000")
+    ]
+
+    # Added first so CORS wraps it and 429 responses still carry CORS headers
+    app.add_middleware(RateLimitMiddleware)
+
+    # Allow all Vercel preview deployments
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=allowed_origins,
+        allow_origin_regex=r"https://.*\.vercel\.app",
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(users.router, prefix="/api/users", tags=["users"])
+    app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+    app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
+    app.include_router(health_data.router, prefix="/api/health", tags=["health"])
+    app.include_router(realtime.router, prefix="/api/events", tags=["events"])
+    app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+
+    @app.get("/")
+    async def root():
+        return {"message": "Health Monitoring System API"}
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8002)
\ No newline at end of file
+    uvicorn.run(app, host="127.0.0.1", port=8002)
@@ -0,0 +1,37 @@
+"""
+Recompute the daily outbreak and vaccination rollups from the live and
+archived rows (see app/rollups.py). Needed after loading data behind the
+application's back, e.g. with SQL or the sample data scripts.
+
+    python rebuild_rollups.py
+    python rebuild_rollups.py vaccinations
+"""
+import argparse
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main(argv=None):
+    from app.database import SessionLocal
+    from app.rollups import ROLLUPS, rebuild_rollups
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily rollup tables")
+    parser.add_argument("tables", nargs="*", choices=list(ROLLUPS), help="Source tables to roll up (default: all)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        for table, result in rebuild_rollups(db, args.tables or None).items():
+            if result["since"] is None:
+                print(f"✓ {table}: no rows")
+            else:
+                print(f"✓ {table}: {result['groups']} daily groups from {result['since']}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
-from app.database import engine
+from app.migrations import upgrade_to_head
 from app import models
+from app.rollups import rebuild_rollups
 from datetime import datetime
 
 def setup_database():
-    # Create all tables
-    models.Base.metadata.create_all(bind=engine)
+    # Create or upgrade all tables
+    upgrade_to_head()
     print("Database tables created successfully!")
     
     # Add sample data
@@ -81,6 +82,7 @@ def setup_database():
                 db.add(vaccination)
         
         db.commit()
+        rebuild_rollups(db)
         print("Sample data added successfully!")
         
     finally:
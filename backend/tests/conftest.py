@@ -0,0 +1,41 @@
+"""
+Test settings, applied before ``app`` is imported.
+
+``app.database`` builds its engines at import time, so the environment is
+set here: a primary and a "replica" SQLite file in a temporary directory,
+a read statement timeout for the timeout tests, and the background
+scheduler, read model and rate limits turned off.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="health_tests_")
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_DATA_DIR, 'primary.db')}",
+    READ_DATABASE_URL=f"sqlite:///{os.path.join(_DATA_DIR, 'replica.db')}",
+    SECRET_KEY="test-secret-key",
+    DB_STATEMENT_TIMEOUT_MS="0",
+    DB_READ_STATEMENT_TIMEOUT_MS="1500",
+    DIGEST_SCHEDULER="false",
+    READ_MODEL_ENABLED="false",
+    RATE_LIMIT_ENABLED="false",
+    WARM_ON_STARTUP="false",
+)
+
+
+@pytest.fixture(scope="session")
+def databases():
+    """Create the schema on both the primary and the replica file."""
+    from app import models  # noqa: F401 (registers the tables)
+    from app.database import Base, engine, read_engine
+
+    for target in (engine, read_engine):
+        Base.metadata.create_all(target)
+    yield engine, read_engine
+    for target in (engine, read_engine):
+        target.dispose()
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
@@ -0,0 +1,80 @@
+"""Validation of bulk PATCH items before the executemany UPDATE (app/routers/admin.py)."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select
+
+from app import models, schemas
+from app.database import SessionLocal
+from app.routers.admin import _bulk_patch
+
+
+def _outbreak(number: int) -> models.Outbreak:
+    return models.Outbreak(
+        outbreak_id=f"BULK{number}", disease="Cholera", report_date=datetime(2024, 3, number), country="India",
+        state="Kerala", district="Kochi", cases_reported=number, deaths=0, severity="low", confirmed=True,
+    )
+
+
+@pytest.fixture
+def db(databases):
+    db = SessionLocal()
+    db.execute(delete(models.Outbreak))
+    rows = [_outbreak(number) for number in (1, 2, 3)]
+    db.add_all(rows)
+    db.commit()
+    db.ids = [row.id for row in rows]
+    yield db
+    db.rollback()
+    db.execute(delete(models.Outbreak))
+    db.commit()
+    db.close()
+
+
+def _patch(db, *items):
+    results, records = _bulk_patch(db, models.Outbreak, schemas.Outbreak, [schemas.OutbreakPatch(**item) for item in items])
+    db.commit()
+    return results, records
+
+
+def _stored(db, row_id: int, field: str):
+    return db.scalar(select(getattr(models.Outbreak, field)).where(models.Outbreak.id == row_id))
+
+
+def test_explicit_null_for_a_required_field_is_invalid(db):
+    first, second, _ = db.ids
+    results, records = _patch(db, {"id": first, "disease": None}, {"id": second, "cases_reported": 50})
+    assert [result["status"] for result in results] == ["invalid", "updated"]
+    assert results[0]["detail"].startswith("disease:")
+    assert [record["id"] for record in records] == [second]
+    assert _stored(db, first, "disease") == "Cholera"
+    assert _stored(db, second, "cases_reported") == 50
+
+
+def test_optional_fields_can_be_cleared(db):
+    first = db.ids[0]
+    results, _ = _patch(db, {"id": first, "notes": None, "source_url": None})
+    assert results[0]["status"] == "updated"
+
+
+def test_taking_another_rows_key_is_a_conflict(db):
+    first, second, third = db.ids
+    results, records = _patch(db, {"id": first, "outbreak_id": "BULK2"}, {"id": third, "outbreak_id": "BULK9"})
+    assert [result["status"] for result in results] == ["conflict", "updated"]
+    assert "BULK2" in results[0]["detail"]
+    assert _stored(db, first, "outbreak_id") == "BULK1"
+    assert _stored(db, third, "outbreak_id") == "BULK9"
+
+
+def test_key_claimed_earlier_in_the_request_is_a_conflict(db):
+    first, second, _ = db.ids
+    results, _ = _patch(db, {"id": first, "outbreak_id": "NEW"}, {"id": second, "outbreak_id": "NEW"})
+    assert [result["status"] for result in results] == ["updated", "conflict"]
+    assert _stored(db, second, "outbreak_id") == "BULK2"
+
+
+def test_rewriting_a_rows_own_key_is_not_a_conflict(db):
+    first = db.ids[0]
+    results, _ = _patch(db, {"id": first, "outbreak_id": "BULK1", "deaths": 1})
+    assert results[0]["status"] == "updated"
+    assert _stored(db, first, "deaths") == 1
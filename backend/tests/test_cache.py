@@ -0,0 +1,72 @@
+"""Response cache: ETags, invalidation on writes and the shared tier (app/cache.py)."""
+import time
+
+import pytest
+from starlette.requests import Request
+
+from app import cache
+from app.cache import MemoryCacheBackend, ResponseCache, SharedCacheBackend, cached_json_response
+from app.events import publish_change
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    monkeypatch.setattr(cache, "response_cache", ResponseCache(replica_lag=0))
+    calls = []
+
+    def respond(request=None):
+        return cached_json_response(request, "outbreaks", {"page": 1}, lambda: calls.append(1) or {"total": len(calls)})
+
+    respond.calls = calls
+    return respond
+
+
+def _request(etag: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"if-none-match", etag.encode())]})
+
+
+def test_matching_etag_gets_304_without_a_body(builds):
+    first = builds()
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = builds(_request(first.headers["ETag"]))
+    assert again.status_code == 304 and again.body == b""
+    assert builds(_request('"other"')).status_code == 200
+    assert len(builds.calls) == 1
+
+
+def test_a_published_write_invalidates_the_tables_pages(builds):
+    before = builds()
+    builds()
+    assert len(builds.calls) == 1
+    publish_change("outbreaks", "updated")
+    after = builds(_request(before.headers["ETag"]))
+    assert after.status_code == 200 and after.body == b'{"total":2}'
+    assert len(builds.calls) == 2
+
+
+def test_pages_built_while_the_replica_may_lag_are_not_stored(builds):
+    cache.response_cache.replica_lag = 0.2
+    builds()
+    publish_change("outbreaks", "updated")
+    builds()
+    builds()
+    assert len(builds.calls) == 3
+    time.sleep(0.25)
+    builds()
+    builds()
+    assert len(builds.calls) == 4
+
+
+def test_shared_tier_serves_other_workers_and_carries_versions():
+    shared = MemoryCacheBackend()
+    first, second = ResponseCache(shared=shared, replica_lag=0), ResponseCache(shared=shared, replica_lag=0)
+    key = first.make_key("outbreaks", {"page": 1})
+    first.set(key, cache.CachedResponse(b"{}", '"tag"'))
+    assert second.get(second.make_key("outbreaks", {"page": 1})) == cache.CachedResponse(b"{}", '"tag"')
+    first.bump_data_version("outbreaks")
+    assert second.make_key("outbreaks", {"page": 1}) != key
+
+
+def test_shared_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SharedCacheBackend()
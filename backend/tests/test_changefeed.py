@@ -0,0 +1,93 @@
+"""Change log appends, polling and pruning (app/changefeed.py)."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app import changefeed, models
+from app.changefeed import ChangeLogExpired, log_changes, prune_change_log, read_changes
+from app.database import SessionLocal, get_read_db
+from app.routers import health_data
+
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture
+def db(databases, monkeypatch):
+    monkeypatch.setattr(changefeed, "_utcnow", lambda: NOW)
+    db = SessionLocal()
+    db.execute(delete(models.ChangeLogEntry))
+    db.commit()
+    yield db
+    db.rollback()
+    db.execute(delete(models.ChangeLogEntry))
+    db.commit()
+    db.close()
+
+
+def _outbreak(record_id: int, cases: int = 10) -> dict:
+    return {"id": record_id, "outbreak_id": f"CF{record_id}", "cases_reported": cases}
+
+
+def _read(db, since: int = 0, table: str = None, limit: int = 1000) -> dict:
+    return json.loads(read_changes(db, since, table, limit))
+
+
+def test_rows_written_back_unchanged_are_not_logged(db):
+    log_changes(db, "outbreaks", [_outbreak(1), _outbreak(2), _outbreak(3)], [_outbreak(1), _outbreak(2, cases=20), _outbreak(4)])
+    db.commit()
+    changes = _read(db)["changes"]
+    assert [(change["action"], change["id"]) for change in changes] == [("update", 2), ("insert", 4), ("delete", 3)]
+    assert changes[0]["record"]["cases_reported"] == 20 and changes[0]["key"] == "CF2"
+    assert changes[2]["record"] is None
+
+
+def test_polling_resumes_from_next_until_no_more(db):
+    log_changes(db, "outbreaks", added=[_outbreak(record_id) for record_id in range(1, 6)])
+    db.commit()
+    seen, since, more = [], 0, True
+    while more:
+        page = _read(db, since, limit=2)
+        assert len(page["changes"]) <= 2
+        seen.extend(change["id"] for change in page["changes"])
+        since, more = page["next"], page["more"]
+    assert seen == [1, 2, 3, 4, 5]
+    assert since == page["latest"]
+    assert _read(db, since)["changes"] == [] and _read(db, since)["next"] == since
+
+
+def test_table_filter(db):
+    log_changes(db, "outbreaks", added=[_outbreak(1)])
+    log_changes(db, "vaccinations", added=[{"id": 7, "campaign_id": "VC7"}])
+    db.commit()
+    assert [(change["table"], change["key"]) for change in _read(db, table="vaccinations")["changes"]] == [("vaccinations", "VC7")]
+    assert len(_read(db)["changes"]) == 2
+
+
+def test_a_since_before_the_pruned_entries_gets_410(db, monkeypatch):
+    monkeypatch.setattr(changefeed, "_utcnow", lambda: NOW - timedelta(days=changefeed.CHANGE_LOG_RETENTION_DAYS + 1))
+    log_changes(db, "outbreaks", added=[_outbreak(1), _outbreak(2)])
+    monkeypatch.setattr(changefeed, "_utcnow", lambda: NOW)
+    log_changes(db, "outbreaks", added=[_outbreak(3)])
+    db.commit()
+    first = _read(db)["changes"][0]["seq"]
+    assert prune_change_log(db, now=NOW) == 2
+    with pytest.raises(ChangeLogExpired):
+        read_changes(db, first)
+    assert [change["id"] for change in _read(db, first + 1)["changes"]] == [3]
+
+    app = FastAPI()
+    app.include_router(health_data.router)
+    app.dependency_overrides[get_read_db] = lambda: db
+    assert TestClient(app).get(f"/changes?since={first}").status_code == 410
+
+
+def test_the_newest_entry_survives_pruning(db):
+    log_changes(db, "outbreaks", added=[_outbreak(1)])
+    db.commit()
+    latest = _read(db)["latest"]
+    assert prune_change_log(db, now=NOW + timedelta(days=changefeed.CHANGE_LOG_RETENTION_DAYS + 1)) == 0
+    assert _read(db, latest) == {"since": latest, "next": latest, "latest": latest, "more": False, "changes": []}
@@ -0,0 +1,228 @@
+"""Ollama gateway admission control and circuit breaker (app/chatbot.py), against a slow local server."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from app.chatbot import FALLBACK_RESPONSES, CircuitBreaker, HealthChatbot, OllamaGateway, OllamaUnavailable
+
+
+class FakeOllama:
+    """Counts requests and how many ``/api/generate`` calls overlap."""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.generate_status = 200
+        self.tags_status = 200
+        self.calls = {"generate": 0, "tags": 0}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fake.lock:
+                    fake.calls["tags"] += 1
+                self._reply(fake.tags_status, {"models": [{"name": "llama3"}]})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake.lock:
+                    fake.calls["generate"] += 1
+                    fake.in_flight += 1
+                    fake.peak_in_flight = max(fake.peak_in_flight, fake.in_flight)
+                try:
+                    time.sleep(fake.delay)
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+                self._reply(fake.generate_status, {"response": " ok "})
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def ollama():
+    fake = FakeOllama()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.handler())
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def _generate_in_threads(gateway, url, count):
+    results = [None] * count
+
+    def call(index):
+        try:
+            results[index] = gateway.generate(url, {"prompt": "hi"})
+        except OllamaUnavailable as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _open_circuit(gateway, ollama):
+    ollama.generate_status = 500
+    for _ in range(gateway.backend(ollama.url).breaker.threshold):
+        with pytest.raises(OllamaUnavailable):
+            gateway.generate(ollama.url, {"prompt": "hi"})
+
+
+def test_semaphore_bounds_requests_in_flight(ollama):
+    ollama.delay = 0.2
+    gateway = OllamaGateway(concurrency=2, max_queue=10, queue_timeout=5, timeout=5)
+    results = _generate_in_threads(gateway, ollama.url, 6)
+    assert results == ["ok"] * 6
+    assert ollama.peak_in_flight == 2
+    assert gateway.stats()[ollama.url]["requests"] == 6
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_full_queue_is_refused_without_waiting(ollama):
+    ollama.delay = 0.5
+    gateway = OllamaGateway(concurrency=1, max_queue=1, queue_timeout=5, timeout=5)
+    backend = gateway.backend(ollama.url)
+    threads = [threading.Thread(target=gateway.generate, args=(ollama.url, {"prompt": "hi"})) for _ in range(2)]
+    threads[0].start()
+    _wait_for(lambda: ollama.in_flight == 1)
+    threads[1].start()
+    _wait_for(lambda: backend.waiting == 1)
+
+    started = time.monotonic()
+    with pytest.raises(OllamaUnavailable, match="queue full"):
+        gateway.generate(ollama.url, {"prompt": "hi"})
+    assert time.monotonic() - started < 0.2
+    for thread in threads:
+        thread.join()
+    assert ollama.calls["generate"] == 2
+    assert backend.counts["rejected"] == 1
+
+
+def test_queue_timeout_gives_up_waiting_for_a_slot(ollama):
+    ollama.delay = 0.5
+    gateway = OllamaGateway(concurrency=1, max_queue=5, queue_timeout=0.1, timeout=5)
+    results = _generate_in_threads(gateway, ollama.url, 2)
+    assert results.count("ok") == 1
+    assert gateway.stats()[ollama.url]["queue_timeouts"] == 1
+
+
+def test_breaker_opens_after_consecutive_failures(ollama):
+    gateway = OllamaGateway(concurrency=2, timeout=5)
+    _open_circuit(gateway, ollama)
+    backend = gateway.backend(ollama.url)
+    assert backend.breaker.state == CircuitBreaker.OPEN
+    assert not gateway.accepting(ollama.url)
+
+    ollama.generate_status = 200
+    with pytest.raises(OllamaUnavailable, match="circuit open"):
+        gateway.generate(ollama.url, {"prompt": "hi"})
+    assert ollama.calls["generate"] == backend.breaker.threshold
+    assert backend.counts["rejected"] == 1
+
+
+def test_half_open_trial_probes_tags_then_closes(ollama):
+    gateway = OllamaGateway(concurrency=2, timeout=5)
+    _open_circuit(gateway, ollama)
+    breaker = gateway.backend(ollama.url).breaker
+    generated = ollama.calls["generate"]
+
+    ollama.generate_status = 200
+    breaker.retry_at = time.monotonic()  # cooldown over
+    assert gateway.accepting(ollama.url)
+    assert gateway.generate(ollama.url, {"prompt": "hi"}) == "ok"
+    assert ollama.calls["tags"] == 1
+    assert ollama.calls["generate"] == generated + 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # Closed again: no more probes
+    gateway.generate(ollama.url, {"prompt": "hi"})
+    assert ollama.calls["tags"] == 1
+
+
+def test_half_open_failed_probe_reopens_without_generating(ollama):
+    gateway = OllamaGateway(concurrency=2, timeout=5)
+    _open_circuit(gateway, ollama)
+    breaker = gateway.backend(ollama.url).breaker
+    generated = ollama.calls["generate"]
+
+    ollama.tags_status = 503
+    breaker.retry_at = time.monotonic()
+    with pytest.raises(OllamaUnavailable, match="health probe failed"):
+        gateway.generate(ollama.url, {"prompt": "hi"})
+    assert ollama.calls["tags"] == 1
+    assert ollama.calls["generate"] == generated
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not gateway.accepting(ollama.url)
+
+
+def test_half_open_admits_a_single_trial(ollama):
+    gateway = OllamaGateway(concurrency=4, max_queue=10, queue_timeout=5, timeout=5)
+    _open_circuit(gateway, ollama)
+    ollama.generate_status = 200
+    ollama.delay = 0.3
+    gateway.backend(ollama.url).breaker.retry_at = time.monotonic()
+
+    results = _generate_in_threads(gateway, ollama.url, 4)
+    assert results.count("ok") == 1
+    assert ollama.calls["tags"] == 1
+
+
+def test_idle_backends_are_evicted_least_recently_used_first():
+    gateway = OllamaGateway(max_backends=2)
+    first = gateway.backend("http://first:11434")
+    gateway.backend("http://second:11434")
+    first.in_flight = 1  # busy servers are kept
+    gateway.backend("http://third:11434")
+    assert list(gateway.stats()) == ["http://first:11434", "http://third:11434"]
+
+    first.in_flight = 0
+    gateway.backend("http://third:11434/")
+    gateway.backend("http://fourth:11434")
+    assert list(gateway.stats()) == ["http://third:11434", "http://fourth:11434"]
+
+
+def test_open_circuit_returns_fallback_without_calling_the_server(ollama):
+    bot = HealthChatbot()
+    bot.gateway = OllamaGateway(concurrency=2, timeout=5)
+    _open_circuit(bot.gateway, ollama)
+    generated = ollama.calls["generate"]
+    assert not bot.gateway.accepting(ollama.url)
+
+    user = SimpleNamespace(id=1, state="Kerala", district="Kochi")
+    response = bot.generate_response("hello", user, db=None, ollama_url=ollama.url)
+    assert response == FALLBACK_RESPONSES["general"].format(district="Kochi", state="Kerala")
+    assert ollama.calls["generate"] == generated
+    assert ollama.calls["tags"] == 0
@@ -0,0 +1,42 @@
+"""Per-location digest runs (app/digests.py)."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete
+
+from app import digests, models, scheduler, whatsapp
+from app.database import SessionLocal
+
+
+@pytest.fixture
+def sent(databases, monkeypatch):
+    monkeypatch.setenv("EMAIL_USER", "digest@example.org")
+    messages = []
+    monkeypatch.setattr(scheduler, "send_email_batch", lambda batch: messages.extend(batch) or len(batch))
+    monkeypatch.setattr(whatsapp, "send_whatsapp_batch", lambda batch: len(batch))
+    yield messages
+    db = SessionLocal()
+    for model in (models.Outbreak, models.User, models.Location):
+        db.execute(delete(model))
+    db.commit()
+    db.close()
+
+
+def test_subscribers_get_their_locations_digest_under_any_spelling(sent):
+    now = datetime.utcnow()
+    db = SessionLocal()
+    db.add(models.Outbreak(outbreak_id="DG1", disease="Typhoid", report_date=now - timedelta(hours=2), state="Tamil Nadu",
+                           district="Chennai", cases_reported=12, deaths=0, severity="high"))
+    for name in ("meera", "ravi"):
+        db.add(models.User(email=f"{name}@example.org", username=name, hashed_password="x", state="Tamil Nadu",
+                           district="Chennai", digest_frequency="daily", is_active=True))
+    db.commit()
+    db.query(models.User).filter(models.User.username == "ravi").update({"state": "TAMIL NADU", "district": "chennai "})
+    db.commit()
+    db.close()
+
+    stats = digests.run_digest("daily", now)
+    assert stats["locations"] == 1 and stats["recipients"] == 2
+    assert sorted(recipient for recipient, _ in sent) == ["meera@example.org", "ravi@example.org"]
+    body = sent[0][1].decode("utf-8", "replace")
+    assert "Typhoid" in body and "Chennai, Tamil Nadu" in body
@@ -0,0 +1,54 @@
+"""Per-location chat summaries (app/district_context.py)."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete
+
+from app import models
+from app.database import SessionLocal
+from app.district_context import DistrictContextCache
+from app.events import DataChange
+
+
+@pytest.fixture
+def db(databases):
+    db = SessionLocal()
+    yield db
+    db.rollback()
+    for model in (models.Outbreak, models.User, models.Location):
+        db.execute(delete(model))
+    db.commit()
+    db.close()
+
+
+def _outbreak(db, outbreak_id: str, disease: str, state: str = "Tamil Nadu", district: str = "Chennai") -> models.Outbreak:
+    outbreak = models.Outbreak(outbreak_id=outbreak_id, disease=disease, report_date=datetime.utcnow() - timedelta(days=1),
+                               state=state, district=district, cases_reported=12, deaths=0, severity="high")
+    db.add(outbreak)
+    db.commit()
+    return outbreak
+
+
+def test_profile_spelling_reads_the_locations_summary(db):
+    _outbreak(db, "CTX1", "Typhoid")
+    user = models.User(email="meera@example.org", username="meera", hashed_password="x", state="TAMIL NADU", district="chennai ")
+    db.add(user)
+    db.commit()
+    db.query(models.User).filter(models.User.id == user.id).update({"state": "TAMIL NADU", "district": "chennai "})
+    db.commit()
+    db.refresh(user)
+
+    summary = DistrictContextCache().get(user.location_id)
+    assert summary.startswith("Local health data for Chennai, Tamil Nadu")
+    assert "Typhoid" in summary
+
+
+def test_a_write_marks_its_location_stale(db):
+    outbreak = _outbreak(db, "CTX2", "Dengue")
+    cache = DistrictContextCache()
+    assert "Dengue" in cache.get(outbreak.location_id)
+
+    _outbreak(db, "CTX3", "Cholera", state="tamil nadu", district="CHENNAI")
+    assert "Cholera" not in cache.get(outbreak.location_id)
+    cache.invalidate(DataChange("outbreaks", "created", [{"id": 0, "state": "Tamil Nadu", "district": "Chennai"}]))
+    assert "Cholera" in cache.get(outbreak.location_id)
@@ -0,0 +1,97 @@
+"""Streaming exports of the outbreak and vaccination tables (app/exports.py)."""
+import csv
+import gzip
+import io
+import sys
+from datetime import date, datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app import auth, exports, models
+from app.database import SessionLocal
+from app.exports import ExportError, check_export, iter_export
+from app.routers import health_data
+
+REPORTS = [
+    ("EX1", datetime(2024, 3, 1, 23, 59), "Kerala", "Kochi"),
+    ("EX2", datetime(2024, 3, 2, 0, 0), "Kerala", "Kochi"),
+    ("EX3", datetime(2024, 3, 3, 23, 59), "Delhi", "New Delhi"),
+    ("EX4", datetime(2024, 3, 4, 0, 0), "Kerala", "Kochi"),
+]
+
+
+@pytest.fixture
+def db(databases, monkeypatch):
+    # Several batches, row groups and record batches per export
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 2)
+    db = SessionLocal()
+    for outbreak_id, report_date, state, district in REPORTS:
+        db.add(models.Outbreak(outbreak_id=outbreak_id, disease="Dengue", report_date=report_date, country="India",
+                               state=state, district=district, cases_reported=int(outbreak_id[2:]), deaths=0,
+                               severity="low", confirmed=True))
+    db.commit()
+    yield db
+    db.rollback()
+    for model in (models.Outbreak, models.Location):
+        db.execute(delete(model))
+    db.commit()
+    db.close()
+
+
+def _read(data: bytes, format: str) -> list:
+    if format == "csv.gz":
+        return list(csv.DictReader(io.StringIO(gzip.decompress(data).decode("utf-8"))))
+    if format == "parquet":
+        return pytest.importorskip("pyarrow.parquet").read_table(io.BytesIO(data)).to_pylist()
+    return pytest.importorskip("pyarrow.ipc").open_stream(data).read_all().to_pylist()
+
+
+def _export(db, format: str = "csv.gz", **filters) -> list:
+    return _read(b"".join(iter_export("outbreaks", format, db=db, **filters)), format)
+
+
+@pytest.mark.parametrize("format", ["csv.gz", "parquet", "arrow"])
+def test_round_trip(db, format):
+    rows = _export(db, format)
+    assert [row["outbreak_id"] for row in rows] == ["EX1", "EX2", "EX3", "EX4"]
+    if format == "csv.gz":
+        assert rows[0]["cases_reported"] == "1" and rows[0]["confirmed"] == "True"
+    else:
+        assert rows[0]["cases_reported"] == 1 and rows[0]["confirmed"] is True
+        assert rows[0]["report_date"] == datetime(2024, 3, 1, 23, 59)
+
+
+def test_since_and_until_include_whole_days(db):
+    assert [row["outbreak_id"] for row in _export(db, since=date(2024, 3, 2), until=date(2024, 3, 3))] == ["EX2", "EX3"]
+    assert [row["outbreak_id"] for row in _export(db, until=date(2024, 3, 1))] == ["EX1"]
+
+
+def test_location_filter_matches_any_spelling(db):
+    assert [row["outbreak_id"] for row in _export(db, "parquet", state="KERALA", district="kochi ")] == ["EX1", "EX2", "EX4"]
+    assert _export(db, "arrow", state="Goa") == []
+
+
+def test_unknown_table_or_format_is_rejected_up_front():
+    with pytest.raises(ExportError):
+        check_export("users", "csv.gz")
+    with pytest.raises(ExportError):
+        check_export("outbreaks", "xlsx")
+
+
+def test_bad_format_or_missing_pyarrow_is_a_400_before_streaming(databases, monkeypatch):
+    app = FastAPI()
+    app.include_router(health_data.router)
+    app.dependency_overrides[auth.get_current_user] = lambda: models.User(username="analyst")
+    client = TestClient(app)
+    assert client.get("/export/outbreaks?format=xlsx").status_code == 400
+    assert client.get("/export/users").status_code == 404
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)  # makes ``import pyarrow`` fail
+    response = client.get("/export/outbreaks?format=parquet")
+    assert response.status_code == 400 and "pyarrow" in response.json()["detail"]
+    with pytest.raises(ExportError):
+        check_export("outbreaks", "arrow")
+    assert client.get("/export/outbreaks?format=csv.gz").status_code == 200
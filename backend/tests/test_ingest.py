@@ -0,0 +1,69 @@
+"""Re-imports of outbreaks that were already archived (app/ingest.py, app/archive.py)."""
+import gzip
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, inspect, select, text
+
+from app import archive, models
+from app.database import SessionLocal
+from app.ingest import upsert_rows
+from app.rollups import daily_totals
+
+NOW = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+OLD = NOW - timedelta(days=archive.OUTBREAK_HOT_DAYS + 60)
+
+
+@pytest.fixture
+def db(databases, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    db = SessionLocal()
+    yield db
+    db.rollback()
+    for name in archive.archive_partitions(db, archive.ARCHIVED_TABLES["outbreaks"]).values():
+        db.execute(text(f"DROP TABLE {name}"))
+    for model in (models.OutbreakDailyStat, models.ChangeLogEntry, models.Outbreak, models.Location):
+        db.execute(delete(model))
+    db.commit()
+    db.close()
+
+
+def _row(outbreak_id: str, report_date: datetime, cases: int = 10) -> dict:
+    return {"outbreak_id": outbreak_id, "disease": "Dengue", "report_date": report_date, "country": "India",
+            "state": "Kerala", "district": "Kochi", "cases_reported": cases, "deaths": 0, "severity": "low", "confirmed": True}
+
+
+def _archive(db):
+    spec = archive.ARCHIVED_TABLES["outbreaks"]
+    archive.move_cold_rows(db, spec, datetime.utcnow() - timedelta(days=spec.hot_days))
+
+
+def _reports(db) -> int:
+    return sum(day["reports"] for day in daily_totals(db, "outbreaks"))
+
+
+def test_reimporting_archived_rows_leaves_them_in_the_archive(db):
+    upsert_rows(db, "outbreaks", [_row("OLD1", OLD), _row("NEW1", NOW)])
+    db.commit()
+    _archive(db)
+    assert db.scalar(select(func.count()).select_from(models.Outbreak)) == 1
+    partition = archive.partition_name(archive.ARCHIVED_TABLES["outbreaks"], OLD)
+    assert [index["column_names"] for index in inspect(db.connection()).get_indexes(partition)] == [["outbreak_id"]]
+
+    result = upsert_rows(db, "outbreaks", [_row("OLD1", OLD, cases=99), _row("OLD2", OLD), _row("NEW1", NOW)])
+    db.commit()
+    assert result.statuses == {"OLD1": "archived", "OLD2": "inserted", "NEW1": "unchanged"}
+    assert set(db.scalars(select(models.Outbreak.outbreak_id))) == {"NEW1", "OLD2"}
+    assert _reports(db) == 3
+
+
+def test_rows_of_exported_months_are_skipped(db):
+    spec = archive.ARCHIVED_TABLES["outbreaks"]
+    directory = os.path.join(archive.ARCHIVE_DIR, spec.name)
+    os.makedirs(directory)
+    with gzip.open(os.path.join(directory, f"{OLD:%Y-%m}.ndjson.gz"), "wb"):
+        pass
+    result = upsert_rows(db, "outbreaks", [_row("GONE1", OLD)])
+    assert result.statuses == {"GONE1": "archived"}
+    assert _reports(db) == 0
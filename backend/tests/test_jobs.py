@@ -0,0 +1,128 @@
+"""Job retention and notification fan-out jobs (app/jobs.py, app/tasks.py)."""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+
+from app import jobs, models, tasks
+from app.database import SessionLocal
+
+
+@pytest.fixture
+def db(databases):
+    db = SessionLocal()
+    yield db
+    db.rollback()
+    for model in (models.Job, models.User, models.Location):
+        db.execute(delete(model))
+    db.commit()
+    db.close()
+
+
+def test_prune_jobs_deletes_only_old_finished_jobs(db):
+    now = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    old = now - timedelta(days=jobs.JOB_RETENTION_DAYS + 1)
+    recent = now - timedelta(days=1)
+    db.add_all([
+        models.Job(id="old-succeeded", kind="notify", status="succeeded", finished_at=old),
+        models.Job(id="old-failed", kind="notify", status="failed", finished_at=old),
+        models.Job(id="recent", kind="notify", status="succeeded", finished_at=recent),
+        models.Job(id="running", kind="notify", status="running", started_at=old),
+        models.Job(id="queued", kind="notify", status="queued"),
+    ])
+    db.commit()
+    assert jobs.prune_jobs(db, now.replace(tzinfo=None)) == 2
+    assert set(db.scalars(select(models.Job.id))) == {"recent", "running", "queued"}
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks, "enqueue", lambda kind, params: calls.append((kind, params)) or "job")
+    return calls
+
+
+def _user(db, state: str, district: str, notifications: bool):
+    db.add(models.User(email=f"{district}@example.org", username=district, hashed_password="x", state=state, district=district, notifications=notifications))
+    db.commit()
+
+
+def _record(state: str, district: str) -> dict:
+    return {"state": state, "district": district, "disease": "Dengue", "cases_reported": 12, "severity": "high"}
+
+
+def test_notify_records_skips_locations_without_subscribers(db, queued):
+    _user(db, "Kerala", "Kochi", notifications=True)
+    _user(db, "Goa", "Panaji", notifications=False)
+
+    assert tasks.notify_records("outbreak", [_record("Goa", "Panaji"), _record("Bihar", "Patna")]) is None
+    assert queued == []
+
+    assert tasks.notify_records("outbreak", [_record("Goa", "Panaji"), _record("kerala", "KOCHI")]) == "job"
+    kind, params = queued[0]
+    assert kind == "notify"
+    assert [item[:2] for item in params["items"]] == [["kerala", "KOCHI"]]
+
+
+@jobs.job_handler("test_wait")
+def _wait_for_cancel(ctx):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        ctx.progress(0.5, message="waiting", force=True)
+        time.sleep(0.01)
+    return "timed out"
+
+
+def _job(db, job_id: str) -> models.Job:
+    db.expire_all()
+    return db.get(models.Job, job_id)
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def test_progress_reports_do_not_touch_the_database(monkeypatch):
+    monkeypatch.setattr(jobs, "SessionLocal", lambda: pytest.fail("progress opened a session"))
+    live = {}
+    context = jobs.JobContext("job", {}, live)
+    for step in range(100):
+        context.progress(step, 100, message="working", force=True)
+    assert live == {"progress": 0.99, "message": "working"}
+    live["cancel_requested"] = True
+    with pytest.raises(jobs.JobCancelled):
+        context.progress(1.0)
+
+
+def test_heartbeat_is_written_and_cancellation_picked_up_from_the_table(db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.05)
+    queue = jobs.JobQueue(workers=1)
+    try:
+        job_id = queue.submit("test_wait")
+        _wait_for(lambda: _job(db, job_id).status == "running")
+        first = _job(db, job_id).heartbeat_at
+        _wait_for(lambda: _job(db, job_id).heartbeat_at != first)
+        assert _job(db, job_id).message == "waiting"
+
+        # As another worker process would: only the table says so
+        db.query(models.Job).filter(models.Job.id == job_id).update({"cancel_requested": True})
+        db.commit()
+        _wait_for(lambda: _job(db, job_id).status == "cancelled")
+    finally:
+        queue.shutdown(wait=True)
+
+
+def test_cancel_in_the_same_process_does_not_wait_for_the_heartbeat(db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 60)
+    queue = jobs.JobQueue(workers=1)
+    try:
+        job_id = queue.submit("test_wait")
+        _wait_for(lambda: queue.live_progress(job_id))
+        assert queue.cancel(job_id)
+        _wait_for(lambda: _job(db, job_id).status == "cancelled", timeout=2)
+    finally:
+        queue.shutdown(wait=True)
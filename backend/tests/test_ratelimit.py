@@ -0,0 +1,79 @@
+"""Token buckets, the shared sliding window and the 429 response (app/ratelimit.py)."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import ratelimit
+from app.ratelimit import MemoryRateLimitBackend, Policy, RateLimiter, RateLimitMiddleware
+
+USER, IP = ("user", "meera"), ("ip", "10.0.0.1")
+
+
+def _limiter(**kwargs) -> RateLimiter:
+    # One token per second for users, burst 3; IPs have room to spare unless a test says otherwise
+    policies = {"user": Policy(60, 3), "ip": Policy(kwargs.pop("ip_per_minute", 600), kwargs.pop("ip_burst", 100))}
+    return RateLimiter(policies, **kwargs)
+
+
+def _tokens(limiter: RateLimiter, key: tuple) -> float:
+    return limiter._buckets[key][0]
+
+
+def test_both_buckets_pay_and_a_rejected_request_is_not_charged():
+    limiter = _limiter(ip_burst=4)
+    assert limiter.hit([IP, USER], cost=2, now=0) == 0
+    assert (_tokens(limiter, IP), _tokens(limiter, USER)) == (2, 1)
+
+    # The user bucket cannot pay 2: nothing is taken from either bucket
+    assert limiter.hit([IP, USER], cost=2, now=0) == pytest.approx(1.0)
+    assert (_tokens(limiter, IP), _tokens(limiter, USER)) == (2, 1)
+    assert (limiter.allowed, limiter.rejected) == (1, 1)
+
+    # Nor when only the IP bucket is short
+    assert limiter.hit([IP, ("user", "ravi")], cost=3, now=0) == pytest.approx(0.1)
+    assert "ravi" not in {ident for _, ident in limiter._buckets}
+
+    assert limiter.hit([IP, USER], cost=2, now=1) == 0
+    assert (_tokens(limiter, IP), _tokens(limiter, USER)) == pytest.approx((2, 0))
+
+
+def test_cost_is_capped_at_the_burst():
+    limiter = _limiter()
+    assert limiter.hit([USER], cost=10, now=0) == 0
+    assert limiter.hit([USER], cost=10, now=0) == pytest.approx(3.0)
+
+
+def test_refilled_and_excess_buckets_are_pruned():
+    limiter = _limiter(max_keys=2)
+    limiter.hit([("user", "a")], now=0)
+    limiter.hit([("user", "b")], now=0.5)
+    assert len(limiter._buckets) == 2
+    # "a" has refilled by t=1 and goes; "b" has not
+    limiter.hit([("user", "c")], now=1.2)
+    assert [ident for _, ident in limiter._buckets] == ["b", "c"]
+    # Over max_keys the least recently charged bucket goes even if it has not refilled
+    limiter.hit([("user", "d")], now=1.3)
+    assert [ident for _, ident in limiter._buckets] == ["c", "d"]
+
+
+def test_shared_window_weighs_the_previous_minute():
+    limiter = _limiter(shared=MemoryRateLimitBackend())  # user limit: 60 per minute + burst 3
+    assert limiter.hit_shared([USER], cost=60, now=600) == 0
+    assert limiter.hit_shared([USER], cost=3, now=659) == 0
+    # Same minute, over 63
+    assert limiter.hit_shared([USER], cost=1, now=659) == pytest.approx(1.0)
+    # Next minute, a quarter in: 64 * 0.75 = 48 from before, room for 15
+    assert limiter.hit_shared([USER], cost=15, now=675) == 0
+    assert limiter.hit_shared([USER], cost=1, now=675) == pytest.approx(45.0)
+    assert limiter.rejected == 2
+
+
+def test_rejection_answers_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    app = FastAPI()
+    app.get("/api/ping")(lambda: {"ok": True})
+    app.add_middleware(RateLimitMiddleware, limiter=_limiter(ip_per_minute=6, ip_burst=1))
+    client = TestClient(app)
+    assert client.get("/api/ping").status_code == 200
+    response = client.get("/api/ping")
+    assert response.status_code == 429 and response.headers["Retry-After"] == "10"
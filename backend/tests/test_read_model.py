@@ -0,0 +1,112 @@
+"""Background snapshot rebuilds and reloads of the in-memory read model (app/read_model.py)."""
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select
+
+import app.read_model as read_model_module
+from app import models
+from app.database import SessionLocal
+from app.events import DataChange
+from app.locations import resolve_locations
+from app.read_model import ReadModel
+
+
+def _outbreak(outbreak_id: int, cases: int = 10, state: str = "Kerala") -> dict:
+    return {
+        "id": outbreak_id, "outbreak_id": f"OUT{outbreak_id:04d}", "disease": "Dengue", "state": state,
+        "district": "Kochi", "country": "India", "cases_reported": cases, "deaths": 0, "severity": "moderate",
+        "report_date": datetime(2024, 1, outbreak_id % 28 + 1), "confirmed": True,
+    }
+
+
+@pytest.fixture
+def outbreaks(databases):
+    db = SessionLocal()
+    try:
+        db.execute(delete(models.Outbreak))
+        db.add_all(models.Outbreak(**_outbreak(outbreak_id)) for outbreak_id in (1, 2, 3))
+        db.commit()
+        yield db
+        db.execute(delete(models.Outbreak))
+        db.execute(delete(models.Location))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _cases(model: ReadModel) -> dict:
+    return {row["id"]: row["cases_reported"] for row in model.rows("outbreaks")}
+
+
+def test_changes_are_swapped_in_by_the_builder(outbreaks):
+    model = ReadModel(refresh_seconds=0)
+    model.load(["outbreaks"])
+    assert _cases(model) == {1: 10, 2: 10, 3: 10}
+
+    model.apply(DataChange("outbreaks", "updated", [_outbreak(2, cases=25)]))
+    model.apply(DataChange("outbreaks", "created", [_outbreak(4, cases=5)]))
+    model.apply(DataChange("outbreaks", "deleted", [_outbreak(1)]))
+    assert model.settle(5)
+    assert _cases(model) == {2: 25, 3: 10, 4: 5}
+    assert model.stats()["pending"] == []
+
+
+def test_builder_does_not_run_in_the_writer_thread(outbreaks):
+    model = ReadModel(refresh_seconds=0)
+    model.load(["outbreaks"])
+    builders = []
+    build = model._build
+    model._build = lambda name: (builders.append(threading.current_thread()), build(name))
+    model.apply(DataChange("outbreaks", "updated", [_outbreak(3, cases=40)]))
+    assert model.settle(5)
+    assert builders and threading.current_thread() not in builders
+
+
+def test_record_less_change_reloads_from_the_primary(outbreaks):
+    model = ReadModel(refresh_seconds=0)
+    model.load(["outbreaks"])
+    outbreaks.execute(delete(models.Outbreak).where(models.Outbreak.id == 3))
+    outbreaks.commit()
+    model.apply(DataChange("outbreaks", "archived"))
+    assert model.settle(5)
+    assert _cases(model) == {1: 10, 2: 10}
+
+
+def test_changes_published_during_a_load_are_replayed(outbreaks, monkeypatch):
+    model = ReadModel(refresh_seconds=0)
+    model.load(["outbreaks"])
+
+    # Committed after the load read its rows, published before it swapped them in
+    class LateChangeSession:
+        def __init__(self):
+            self.db = SessionLocal()
+
+        def __getattr__(self, name):
+            return getattr(self.db, name)
+
+        def close(self):
+            model.apply(DataChange("outbreaks", "updated", [_outbreak(1, cases=99)]))
+            self.db.close()
+
+    monkeypatch.setattr(read_model_module, "SessionLocal", LateChangeSession)
+    model.load(["outbreaks"])
+    assert model.settle(5)
+    assert _cases(model)[1] == 99
+
+
+def test_published_records_are_filtered_by_location_id(outbreaks):
+    model = ReadModel(refresh_seconds=0)
+    model.load(["outbreaks"])
+    kerala = outbreaks.scalar(select(models.Outbreak.location_id).where(models.Outbreak.id == 1))
+    assert [row["id"] for row in model.rows("outbreaks", location_id=kerala)] == [1, 2, 3]
+
+    goa = resolve_locations(outbreaks, [("Goa", "Panaji")])[("Goa", "Panaji")].id
+    outbreaks.commit()
+    model.apply(DataChange("outbreaks", "created", [_outbreak(4), _outbreak(5, state="Goa") | {"district": "Panaji"}]))
+    assert model.settle(5)
+    assert [row["id"] for row in model.rows("outbreaks", location_id=kerala)] == [1, 2, 3, 4]
+    assert [row["id"] for row in model.rows("outbreaks", location_id=goa)] == [5]
+    assert "location_id" not in model.rows("outbreaks")[0]
+    assert model.rows("outbreaks", location_id=frozenset()) == []
@@ -0,0 +1,72 @@
+"""Daily rollups keyed by location (app/rollups.py)."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import delete, select, text
+
+from app import models
+from app.database import SessionLocal
+from app.locations import add_alias, resolve_locations
+from app.rollups import apply_changes, daily_totals, rebuild_rollups
+
+
+@pytest.fixture
+def db(databases):
+    db = SessionLocal()
+    yield db
+    db.rollback()
+    db.execute(text("DROP TABLE IF EXISTS outbreaks_archive_202301"))
+    for model in (models.OutbreakDailyStat, models.Outbreak, models.LocationAlias, models.Location):
+        db.execute(delete(model))
+    db.commit()
+    db.close()
+
+
+def _record(state: str, district: str, cases: int, day: int = 1) -> dict:
+    return {"state": state, "district": district, "disease": "Dengue", "report_date": datetime(2024, 2, day),
+            "cases_reported": cases, "deaths": 0}
+
+
+def _cases(db, state: str = None, district: str = None) -> list:
+    return [(row["day"], row["cases_reported"]) for row in daily_totals(db, "outbreaks", state, district)]
+
+
+def test_any_spelling_or_alias_of_a_location_shares_its_groups(db):
+    apply_changes(db, "outbreaks", [], [_record("Kerala", "Kochi", 5), _record(" kerala", "KOCHI", 7)])
+    location_id = resolve_locations(db, [("Kerala", "Kochi")], create=False)[("Kerala", "Kochi")].id
+    add_alias(db, location_id, "Kerala", "Cochin")
+    apply_changes(db, "outbreaks", [], [_record("Kerala", "Cochin", 1)])
+    db.commit()
+    assert db.scalar(select(models.OutbreakDailyStat.reports)) == 3
+    assert _cases(db, "KERALA", "cochin") == [(date(2024, 2, 1), 13)]
+
+
+def test_merging_a_location_adds_its_groups_to_the_other(db):
+    apply_changes(db, "outbreaks", [], [_record("Kerala", "Kochi", 5), _record("Kerala", "Cochin", 7),
+                                        _record("Kerala", "Cochin", 2, day=2)])
+    db.commit()
+    location_id = resolve_locations(db, [("Kerala", "Kochi")], create=False)[("Kerala", "Kochi")].id
+    add_alias(db, location_id, "Kerala", "Cochin")
+    db.commit()
+    assert set(db.scalars(select(models.OutbreakDailyStat.location_id))) == {location_id}
+    assert _cases(db, "Kerala", "Kochi") == [(date(2024, 2, 1), 12), (date(2024, 2, 2), 2)]
+
+    # Rows written before the merge are taken out of the merged group
+    apply_changes(db, "outbreaks", [_record("Kerala", "Cochin", 7)], [])
+    db.commit()
+    assert _cases(db, "Kerala") == [(date(2024, 2, 1), 5), (date(2024, 2, 2), 2)]
+
+
+def test_rebuild_locates_archived_rows_by_name(db):
+    db.add(models.Outbreak(outbreak_id="HOT1", disease="Dengue", report_date=datetime(2024, 2, 1), country="India",
+                           state="Kerala", district="Kochi", cases_reported=5, deaths=0, severity="low"))
+    db.commit()
+    # An archive month created before outbreaks had a location_id
+    db.execute(text("CREATE TABLE outbreaks_archive_202301 (id INTEGER, outbreak_id VARCHAR, disease VARCHAR, "
+                    "report_date DATETIME, state VARCHAR, district VARCHAR, cases_reported INTEGER, deaths INTEGER)"))
+    db.execute(text("INSERT INTO outbreaks_archive_202301 VALUES "
+                    "(1, 'OLD1', 'Dengue', '2023-01-05 00:00:00', 'kerala', 'kochi', 3, 1)"))
+    db.commit()
+    rebuild_rollups(db, ["outbreaks"])
+    assert _cases(db, "Kerala", "Kochi") == [(date(2023, 1, 5), 3), (date(2024, 2, 1), 5)]
+    assert db.scalar(select(models.Location.id).where(models.Location.district == "Kochi")) is not None
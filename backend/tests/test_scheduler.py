@@ -0,0 +1,63 @@
+"""Location notification fan-out (app/scheduler.py)."""
+import pytest
+from sqlalchemy import delete
+
+from app import models, scheduler
+from app.database import SessionLocal
+from app.locations import add_alias, resolve_locations
+
+
+@pytest.fixture
+def sent(databases, monkeypatch):
+    monkeypatch.setenv("EMAIL_USER", "alerts@example.org")
+    messages = []
+    monkeypatch.setattr(scheduler, "send_email_batch", lambda batch: messages.extend(batch) or len(batch))
+    yield messages
+    db = SessionLocal()
+    for model in (models.User, models.LocationAlias, models.Location):
+        db.execute(delete(model))
+    db.commit()
+    db.close()
+
+
+def _subscriber(db, name: str, state: str, district: str):
+    db.add(models.User(email=f"{name}@example.org", username=name, full_name=name, hashed_password="x",
+                       state=state, district=district, notifications=True))
+
+
+def _notice(disease: str) -> dict:
+    return {"disease": disease, "cases_reported": 12, "severity": "high"}
+
+
+def test_items_reach_subscribers_under_any_spelling(sent):
+    db = SessionLocal()
+    _subscriber(db, "anu", "Kerala", "Kochi")
+    _subscriber(db, "ravi", "Tamil Nadu", "Chennai")
+    db.commit()
+    location_id = resolve_locations(db, [("Kerala", "Kochi")], create=False)[("Kerala", "Kochi")].id
+    add_alias(db, location_id, "KL", "Cochin")
+    db.commit()
+    db.close()
+
+    scheduler.send_bulk_location_notifications("outbreak", [
+        ("KL", "Cochin", _notice("Dengue")),
+        (" kerala", "KOCHI ", _notice("Cholera")),
+        ("Goa", "Panaji", _notice("Malaria")),  # nobody there
+    ])
+    assert [recipient for recipient, _ in sent] == ["anu@example.org"]
+    body = sent[0][1].decode("utf-8", "replace")
+    assert "Dengue" in body and "Cholera" in body and "Malaria" not in body
+    assert "Kochi" in body and "Cochin" not in body  # rendered with the canonical names
+
+
+def test_profile_spelling_differing_from_the_location_is_not_an_error(sent):
+    db = SessionLocal()
+    _subscriber(db, "meera", "Tamil Nadu", "Chennai")
+    db.commit()
+    db.query(models.User).filter(models.User.username == "meera").update({"state": "TAMIL NADU", "district": "chennai "})
+    db.commit()
+    db.close()
+
+    scheduler.send_bulk_location_notifications("outbreak", [("Tamil Nadu", "Chennai", _notice("Typhoid"))])
+    assert [recipient for recipient, _ in sent] == ["meera@example.org"]
+    assert "Chennai" in sent[0][1].decode("utf-8", "replace")
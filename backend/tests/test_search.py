@@ -0,0 +1,67 @@
+"""Word list refreshes and location filters of outbreak search (app/search.py)."""
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import health_data
+from app.search import Vocabulary
+
+
+class CountingSession:
+    """Stands in for a SQLite session that only answers the vocabulary query."""
+
+    def __init__(self, words):
+        self.words = words
+        self.queries = 0
+
+    def get_bind(self):
+        return self
+
+    @property
+    def dialect(self):
+        return self
+
+    name = "sqlite"
+
+    def execute(self, statement, params=None):
+        self.queries += 1
+        return [(word,) for word in sorted(self.words)]
+
+
+def test_changes_reload_the_word_list_at_most_once_per_interval():
+    db = CountingSession(["cholera", "dengue"])
+    vocabulary = Vocabulary(ttl=300, min_refresh=0.2)
+    assert vocabulary.terms(db) == ["cholera", "dengue"]
+
+    db.words.append("malaria")
+    for _ in range(50):
+        vocabulary.invalidate()
+        assert vocabulary.terms(db) == ["cholera", "dengue"]
+    assert db.queries == 1
+
+    time.sleep(0.25)
+    assert vocabulary.terms(db) == ["cholera", "dengue", "malaria"]
+    assert vocabulary.terms(db) == ["cholera", "dengue", "malaria"]
+    assert db.queries == 2
+
+
+def test_word_list_is_kept_for_the_ttl_without_changes():
+    db = CountingSession(["typhoid"])
+    vocabulary = Vocabulary(ttl=300, min_refresh=0)
+    for _ in range(10):
+        vocabulary.terms(db)
+    assert db.queries == 1
+    vocabulary.invalidate()
+    vocabulary.terms(db)
+    assert db.queries == 2
+
+
+def test_page_and_limit_out_of_bounds_are_rejected(databases):
+    app = FastAPI()
+    app.include_router(health_data.router)
+    client = TestClient(app)
+    for path in ("/search?q=dengue", "/outbreaks", "/vaccinations"):
+        for params in ("limit=0", "limit=101", "page=0"):
+            assert client.get(f"{path}{'&' if '?' in path else '?'}{params}").status_code == 422
+    assert client.get("/outbreaks?limit=100").status_code == 200
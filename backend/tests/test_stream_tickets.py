@@ -0,0 +1,27 @@
+"""Stream-only tickets for the alert stream (app/auth.py, app/routers/realtime.py)."""
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import auth
+from app.routers import realtime
+
+
+def test_tickets_and_access_tokens_are_not_interchangeable():
+    ticket = auth.create_stream_ticket("meera")
+    token = auth.create_access_token({"sub": "meera"})
+    assert auth.decode_token(ticket, scope="stream") == "meera"
+    assert auth.decode_token(token) == "meera"
+    with pytest.raises(HTTPException):
+        auth.decode_token(ticket)
+    with pytest.raises(HTTPException):
+        auth.decode_token(token, scope="stream")
+
+
+def test_stream_rejects_access_tokens_in_the_url():
+    app = FastAPI()
+    app.include_router(realtime.router)
+    client = TestClient(app)
+    token = auth.create_access_token({"sub": "meera"})
+    assert client.get(f"/stream?token={token}").status_code == 401
+    assert client.get(f"/stream?ticket={token}").status_code == 401
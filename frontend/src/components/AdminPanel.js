@@ -12,6 +12,7 @@ const AdminPanel = () => {
   const [showModal, setShowModal] = useState(false);
   const [modalType, setModalType] = useState('');
   const [editingItem, setEditingItem] = useState(null);
+  const [selectedIds, setSelectedIds] = useState([]);
 
   useEffect(() => {
     fetchData();
@@ -20,11 +21,11 @@ const AdminPanel = () => {
   const fetchData = async () => {
     try {
       const [usersRes, outbreaksRes, vaccinationsRes] = await Promise.all([
-        axios.get('/api/admin/users'),
+        axios.get('/api/admin/users?limit=100'),
         axios.get('/api/health/outbreaks?limit=100'),
         axios.get('/api/health/vaccinations?limit=100')
       ]);
-      setUsers(Array.isArray(usersRes.data) ? usersRes.data : []);
+      setUsers(usersRes.data?.items || []);
       setOutbreaks(outbreaksRes.data?.items || []);
       setVaccinations(vaccinationsRes.data?.items || []);
     } catch (error) {
@@ -68,12 +69,49 @@ const AdminPanel = () => {
     }
   };
 
+  const toggleSelected = (id) => {
+    setSelectedIds(selectedIds.includes(id) ? selectedIds.filter(i => i !== id) : [...selectedIds, id]);
+  };
+
+  const switchTab = (tab) => {
+    setActiveTab(tab);
+    setSelectedIds([]);
+  };
+
+  const deleteSelected = async (type) => {
+    if (!window.confirm(`Delete ${selectedIds.length} selected ${type}?`)) return;
+    try {
+      const response = await axios.delete(`/api/admin/${type}/bulk`, { data: { ids: selectedIds } });
+      const deleted = response.data.counts.deleted || 0;
+      if (type === 'outbreaks') {
+        setOutbreaks(outbreaks.filter(o => !selectedIds.includes(o.id)));
+      } else {
+        setVaccinations(vaccinations.filter(v => !selectedIds.includes(v.id)));
+      }
+      setSelectedIds([]);
+      toast.success(`Deleted ${deleted} ${type}`);
+    } catch (error) {
+      toast.error(`Failed to delete ${type}`);
+    }
+  };
+
   const openModal = (type, item = null) => {
     setModalType(type);
     setEditingItem(item);
     setShowModal(true);
   };
 
+  const waitForJob = async (jobId, onProgress) => {
+    while (true) {
+      const { data: job } = await axios.get(`/api/jobs/${jobId}`);
+      if (!['queued', 'running'].includes(job.status)) {
+        return job;
+      }
+      onProgress(job.progress || 0);
+      await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+  };
+
   const uploadCSV = async (event, type) => {
     const file = event.target.files[0];
     if (!file) return;
@@ -83,12 +121,20 @@ const AdminPanel = () => {
 
     try {
       const endpoint = type === 'outbreaks' ? '/api/admin/outbreaks/upload-csv' : '/api/admin/vaccinations/upload-csv';
-      const response = await axios.post(endpoint, formData, {
+      const response = await axios.post(`${endpoint}?background=true`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
-      toast.success(response.data.message);
+      const toastId = toast.loading('Importing CSV...');
+      const job = await waitForJob(response.data.job_id, (progress) => {
+        toast.loading(`Importing CSV... ${Math.round(progress * 100)}%`, { id: toastId });
+      });
+      if (job.status === 'succeeded') {
+        toast.success(job.result.message, { id: toastId });
+      } else {
+        toast.error(job.error || `Import ${job.status}`, { id: toastId });
+      }
       fetchData();
     } catch (error) {
       toast.error(error.response?.data?.detail || 'CSV upload failed');
@@ -350,7 +396,7 @@ const AdminPanel = () => {
           <div className="border-b border-gray-200">
             <nav className="-mb-px flex space-x-8">
               <button
-                onClick={() => setActiveTab('users')}
+                onClick={() => switchTab('users')}
                 className={`py-2 px-1 border-b-2 font-medium text-sm ${
                   activeTab === 'users'
                     ? 'border-indigo-500 text-indigo-600'
@@ -361,7 +407,7 @@ const AdminPanel = () => {
                 Users
               </button>
               <button
-                onClick={() => setActiveTab('outbreaks')}
+                onClick={() => switchTab('outbreaks')}
                 className={`py-2 px-1 border-b-2 font-medium text-sm ${
                   activeTab === 'outbreaks'
                     ? 'border-indigo-500 text-indigo-600'
@@ -372,7 +418,7 @@ const AdminPanel = () => {
                 Outbreaks
               </button>
               <button
-                onClick={() => setActiveTab('vaccinations')}
+                onClick={() => switchTab('vaccinations')}
                 className={`py-2 px-1 border-b-2 font-medium text-sm ${
                   activeTab === 'vaccinations'
                     ? 'border-indigo-500 text-indigo-600'
@@ -416,6 +462,15 @@ const AdminPanel = () => {
                 <div className="px-4 py-5 sm:px-6 flex justify-between items-center">
                   <h3 className="text-lg leading-6 font-medium text-gray-900">Outbreaks</h3>
                   <div className="flex space-x-2">
+                    {selectedIds.length > 0 && (
+                      <button
+                        onClick={() => deleteSelected('outbreaks')}
+                        className="bg-red-600 text-white px-4 py-2 rounded-md text-sm font-medium hover:bg-red-700"
+                      >
+                        <Trash2 className="h-4 w-4 inline mr-2" />
+                        Delete Selected ({selectedIds.length})
+                      </button>
+                    )}
                     <label className="bg-green-600 text-white px-4 py-2 rounded-md text-sm font-medium hover:bg-green-700 cursor-pointer">
                       <Upload className="h-4 w-4 inline mr-2" />
                       Upload CSV
@@ -438,10 +493,18 @@ const AdminPanel = () => {
                 <ul className="divide-y divide-gray-200">
                   {Array.isArray(outbreaks) && outbreaks.map((outbreak) => (
                     <li key={outbreak.id} className="px-4 py-4 flex items-center justify-between">
-                      <div>
-                        <p className="text-sm font-medium text-gray-900">{outbreak.disease}</p>
-                        <p className="text-sm text-gray-500">{outbreak.district}, {outbreak.state}</p>
-                        <p className="text-sm text-gray-500">{outbreak.cases_reported} cases • {outbreak.severity}</p>
+                      <div className="flex items-center">
+                        <input
+                          type="checkbox"
+                          className="mr-4"
+                          checked={selectedIds.includes(outbreak.id)}
+                          onChange={() => toggleSelected(outbreak.id)}
+                        />
+                        <div>
+                          <p className="text-sm font-medium text-gray-900">{outbreak.disease}</p>
+                          <p className="text-sm text-gray-500">{outbreak.district}, {outbreak.state}</p>
+                          <p className="text-sm text-gray-500">{outbreak.cases_reported} cases • {outbreak.severity}</p>
+                        </div>
                       </div>
                       <div className="flex space-x-2">
                         <button
@@ -468,6 +531,15 @@ const AdminPanel = () => {
                 <div className="px-4 py-5 sm:px-6 flex justify-between items-center">
                   <h3 className="text-lg leading-6 font-medium text-gray-900">Vaccinations</h3>
                   <div className="flex space-x-2">
+                    {selectedIds.length > 0 && (
+                      <button
+                        onClick={() => deleteSelected('vaccinations')}
+                        className="bg-red-600 text-white px-4 py-2 rounded-md text-sm font-medium hover:bg-red-700"
+                      >
+                        <Trash2 className="h-4 w-4 inline mr-2" />
+                        Delete Selected ({selectedIds.length})
+                      </button>
+                    )}
                     <label className="bg-green-600 text-white px-4 py-2 rounded-md text-sm font-medium hover:bg-green-700 cursor-pointer">
                       <Upload className="h-4 w-4 inline mr-2" />
                       Upload CSV
@@ -490,10 +562,18 @@ const AdminPanel = () => {
                 <ul className="divide-y divide-gray-200">
                   {Array.isArray(vaccinations) && vaccinations.map((vaccination) => (
                     <li key={vaccination.id} className="px-4 py-4 flex items-center justify-between">
-                      <div>
-                        <p className="text-sm font-medium text-gray-900">{vaccination.vaccine_name}</p>
-                        <p className="text-sm text-gray-500">{vaccination.district}, {vaccination.state}</p>
-                        <p className="text-sm text-gray-500">{vaccination.target_population}</p>
+                      <div className="flex items-center">
+                        <input
+                          type="checkbox"
+                          className="mr-4"
+                          checked={selectedIds.includes(vaccination.id)}
+                          onChange={() => toggleSelected(vaccination.id)}
+                        />
+                        <div>
+                          <p className="text-sm font-medium text-gray-900">{vaccination.vaccine_name}</p>
+                          <p className="text-sm text-gray-500">{vaccination.district}, {vaccination.state}</p>
+                          <p className="text-sm text-gray-500">{vaccination.target_population}</p>
+                        </div>
                       </div>
                       <div className="flex space-x-2">
                         <button
@@ -3,11 +3,13 @@ import { Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { AlertTriangle, Shield, MessageCircle, Settings, LogOut } from 'lucide-react';
 import axios from 'axios';
+import { API_URL } from '../config';
 
 const Dashboard = () => {
   const { user, logout } = useAuth();
   const [healthData, setHealthData] = useState(null);
   const [notifications, setNotifications] = useState(false);
+  const [digestFrequency, setDigestFrequency] = useState('none');
   const [filterLocation, setFilterLocation] = useState(false);
   const [alerts, setAlerts] = useState([]);
   const [showAlerts, setShowAlerts] = useState(false);
@@ -24,6 +26,43 @@ const Dashboard = () => {
     fetchHealthData();
     fetchAlerts();
     setNotifications(user?.notifications || false);
+    setDigestFrequency(user?.digest_frequency || 'none');
+  }, [user, filterLocation]);
+
+  // Server push: refresh when outbreaks or campaigns change in the user's area
+  // EventSource cannot send headers, so each connection gets a short-lived stream ticket instead of the JWT
+  useEffect(() => {
+    if (!user || typeof EventSource === 'undefined') return undefined;
+    let source = null;
+    let retry = null;
+    let closed = false;
+    const refresh = () => {
+      fetchHealthData();
+      fetchAlerts();
+    };
+    const connect = async () => {
+      try {
+        const response = await axios.post('/api/events/ticket');
+        if (closed) return;
+        source = new EventSource(`${API_URL}/api/events/stream?ticket=${encodeURIComponent(response.data.ticket)}`);
+        source.addEventListener('outbreak', refresh);
+        source.addEventListener('vaccination', refresh);
+        source.addEventListener('resync', refresh);
+        // The ticket has expired by the time EventSource would reconnect; fetch a new one
+        source.onerror = () => {
+          source.close();
+          if (!closed) retry = setTimeout(connect, 5000);
+        };
+      } catch (error) {
+        console.error('Failed to open alert stream:', error);
+      }
+    };
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (source) source.close();
+    };
   }, [user, filterLocation]);
 
   useEffect(() => {
@@ -70,6 +109,15 @@ const Dashboard = () => {
     }
   };
 
+  const updateDigest = async (frequency) => {
+    try {
+      await axios.put('/api/users/me', { digest_frequency: frequency });
+      setDigestFrequency(frequency);
+    } catch (error) {
+      console.error('Failed to update digest:', error);
+    }
+  };
+
   const fetchAllOutbreaks = async () => {
     try {
       const response = await axios.get(`/api/health/outbreaks?page=${outbreakPage}&limit=10`);
@@ -222,6 +270,15 @@ const Dashboard = () => {
                         >
                           {notifications ? 'Enabled' : 'Disabled'}
                         </button>
+                        <select
+                          value={digestFrequency}
+                          onChange={(e) => updateDigest(e.target.value)}
+                          className="ml-2 px-2 py-1 rounded border border-gray-300 text-sm"
+                        >
+                          <option value="none">No digest</option>
+                          <option value="daily">Daily digest</option>
+                          <option value="weekly">Weekly digest</option>
+                        </select>
                       </dd>
                     </dl>
                   </div>
@@ -11,7 +11,6 @@ Usage:
 import os
 import pandas as pd
 from datetime import datetime, date, timedelta
-from twilio.rest import Client
 import math
 from dotenv import load_dotenv
 load_dotenv()
@@ -131,49 +130,50 @@ def build_outbreak_alerts(out_df, user_state, user_district=None):
     return serious, other
 
 # ----- Message composition & sending -----
+# Line templates are bound once here; compose_message only fills in row values.
+HEADER = "Health Alerts for {state}{district} — {today}".format
+NO_VACCINES = "Vaccination updates: No ongoing or upcoming campaigns in the next {} days.".format(VACC_UPCOMING_DAYS)
+ONGOING_LINE = "- ONGOING: {0.vaccine_name} for {0.target_population} in {0.district}. ({0.start_date_parsed} → {0.end_date_parsed}), doses administered: {0.doses_administered_num}".format
+UPCOMING_LINE = "- UPCOMING: {0.vaccine_name} for {0.target_population} in {0.district}. Starts: {0.start_date_parsed}. Allocated: {0.doses_allocated}".format
+MORE_VACCINES = "...and {} more vaccination events.".format
+NO_OUTBREAKS = f"No outbreaks reported in the last {OUTBREAK_DAYS_WINDOW} days."
+OUTBREAK_SUMMARY = ("Outbreak reports (last " + str(OUTBREAK_DAYS_WINDOW) + " days): {} (priority shown first)").format
+SERIOUS_LINE = "- {0.disease} ({severity}): {0.cases_reported_num} cases in {0.district} on {0.report_date_parsed}. Confirmed: {0.confirmed}.".format
+OTHER_LINE = "- {0.disease} ({0.severity}): {0.cases_reported_num} cases in {0.district} on {0.report_date_parsed}.".format
+MORE_OUTBREAKS = "...and {} more recent reports.".format
+FOOTER = "Note: This dataset is synthetic/demo. Replace with real feed for production."
+
+
 def compose_message(ongoing_vac, upcoming_vac, serious_out, other_out, user_state, user_district=None):
-    parts = []
-    header = f"Health Alerts for {user_state}"
-    if user_district:
-        header += f", {user_district}"
-    header += f" — {date.today().isoformat()}"
-    parts.append(header)
-    parts.append("")  # blank line
-
-    # Vaccines
-    if len(ongoing_vac) + len(upcoming_vac) == 0:
-        parts.append("Vaccination updates: No ongoing or upcoming campaigns in the next {} days.".format(VACC_UPCOMING_DAYS))
+    parts = [HEADER(state=user_state, district=f", {user_district}" if user_district else "", today=date.today().isoformat()), ""]
+
+    # Vaccines: ongoing first, only the rows that are shown are materialized
+    total_vac = len(ongoing_vac) + len(upcoming_vac)
+    if total_vac == 0:
+        parts.append(NO_VACCINES)
     else:
         parts.append("Vaccination updates:")
-        # show ongoing first
-        shown = 0
-        for _, r in ongoing_vac.head(MAX_ALERT_ITEMS).iterrows():
-            parts.append(f"- ONGOING: {r['vaccine_name']} for {r['target_population']} in {r['district']}. ({r['start_date_parsed']} → {r['end_date_parsed']}), doses administered: {r['doses_administered_num']}")
-            shown += 1
-        for _, r in upcoming_vac.head(max(0, MAX_ALERT_ITEMS - shown)).iterrows():
-            parts.append(f"- UPCOMING: {r['vaccine_name']} for {r['target_population']} in {r['district']}. Starts: {r['start_date_parsed']}. Allocated: {r['doses_allocated']}")
-        if (len(ongoing_vac) + len(upcoming_vac)) > MAX_ALERT_ITEMS:
-            parts.append(f"...and {len(ongoing_vac)+len(upcoming_vac)-MAX_ALERT_ITEMS} more vaccination events.")
-
-    parts.append("")  # blank
+        shown = ongoing_vac.head(MAX_ALERT_ITEMS)
+        parts.extend(ONGOING_LINE(r) for r in shown.itertuples(index=False))
+        parts.extend(UPCOMING_LINE(r) for r in upcoming_vac.head(max(0, MAX_ALERT_ITEMS - len(shown))).itertuples(index=False))
+        if total_vac > MAX_ALERT_ITEMS:
+            parts.append(MORE_VACCINES(total_vac - MAX_ALERT_ITEMS))
+    parts.append("")
 
     # Outbreaks
     total_recent = len(serious_out) + len(other_out)
     if total_recent == 0:
-        parts.append(f"No outbreaks reported in the last {OUTBREAK_DAYS_WINDOW} days.")
+        parts.append(NO_OUTBREAKS)
     else:
-        parts.append(f"Outbreak reports (last {OUTBREAK_DAYS_WINDOW} days): {total_recent} (priority shown first)")
-        shown = 0
-        for _, r in serious_out.head(MAX_ALERT_ITEMS).iterrows():
-            parts.append(f"- {r['disease']} ({r['severity'].upper()}): {r['cases_reported_num']} cases in {r['district']} on {r['report_date_parsed']}. Confirmed: {r['confirmed']}.")
-            shown += 1
-        for _, r in other_out.head(max(0, MAX_ALERT_ITEMS - shown)).iterrows():
-            parts.append(f"- {r['disease']} ({r['severity']}): {r['cases_reported_num']} cases in {r['district']} on {r['report_date_parsed']}.")
+        parts.append(OUTBREAK_SUMMARY(total_recent))
+        shown = serious_out.head(MAX_ALERT_ITEMS)
+        parts.extend(SERIOUS_LINE(r, severity=r.severity.upper()) for r in shown.itertuples(index=False))
+        parts.extend(OTHER_LINE(r) for r in other_out.head(max(0, MAX_ALERT_ITEMS - len(shown))).itertuples(index=False))
         if total_recent > MAX_ALERT_ITEMS:
-            parts.append(f"...and {total_recent - MAX_ALERT_ITEMS} more recent reports.")
-    parts.append("")  # blank
+            parts.append(MORE_OUTBREAKS(total_recent - MAX_ALERT_ITEMS))
+    parts.append("")
 
-    parts.append("Note: This dataset is synthetic/demo. Replace with real feed for production.")
+    parts.append(FOOTER)
     return "\n".join(parts)
 
 def send_whatsapp_message(body, recipient=RECIPIENT_WHATSAPP, dry_run=DRY_RUN):
@@ -185,6 +185,7 @@ def send_whatsapp_message(body, recipient=RECIPIENT_WHATSAPP, dry_run=DRY_RUN):
         return {"status": "dry_run", "sid": None}
     if not (TWILIO_SID and TWILIO_TOKEN and TWILIO_WHATSAPP_FROM and recipient):
         raise RuntimeError("Missing Twilio configuration. Set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, and TWILIO_WHATSAPP_FROM.")
+    from twilio.rest import Client  # only needed when actually sending
     client = Client(TWILIO_SID, TWILIO_TOKEN)
     message = client.messages.create(
         from_=TWILIO_WHATSAPP_FROM,